@@ -9,17 +9,19 @@ import pandas as pd
 import numpy as np
 from openai import OpenAI
 import json
+import os
 import faiss
 import time
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
 from scipy.sparse import csr_matrix
 import scipy.sparse
 from tqdm import tqdm
 from typing import List, Dict, Tuple, Optional, Union, Any
 from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 
 from app.data.sql.sql import bulk_update_attachments
+from docia.file_processing.processor.lexical_index import LexicalIndex
 from app.utils import getDate
 from app.processor.attributes_query import select_attr
 
@@ -32,6 +34,10 @@ class RAGEnvironment:
     Environnement RAG optimisé avec FAISS pour l'indexation et la recherche rapide.
     Supporte la recherche hybride (sémantique + lexicale).
     """
+
+    # Embeddings des requêtes, partagés entre instances : les requêtes "search" sont fixes par type de document
+    _query_embeddings_cache: Dict[Tuple[str, str], np.ndarray] = {}
+    _query_embeddings_lock = Lock()
 # init
     def __init__(
         self, 
@@ -80,16 +86,11 @@ class RAGEnvironment:
         # Initialisation de FAISS (sera créé lors de l'indexation)
         self.index = None
         self.chunks = []
+        # Embeddings normalisés des chunks (recalculés quand l'index change)
+        self._normalized_embeddings = None
         
-        # Initialisation de l'index lexical (TF-IDF)
-        self.tfidf_vectorizer = TfidfVectorizer(
-            lowercase=True, 
-            stop_words='english',
-            ngram_range=(1, 2),
-            max_df=0.85,
-            min_df=2
-        )
-        self.tfidf_matrix = None
+        # Initialisation de l'index lexical (BM25 incrémental, tokenisation française)
+        self.lexical_index = LexicalIndex()
 
 # API LLM à remplacer par un appel à une fonction dédiée
     def _initialize_openai_client(self) -> OpenAI:
@@ -300,8 +301,7 @@ class RAGEnvironment:
         Returns: (ajout AMA)
             chunks
             index
-            tfidf_matrix
-            tfidf_vectorizer
+            lexical_index
 
         """
         try:
@@ -389,9 +389,9 @@ class RAGEnvironment:
                 # logger.warning("Aucun chunk valide n'a été créé. Rien à indexer.")
                 return
             
-            # Construction de l'index TF-IDF pour la recherche hybride si activée
+            # Construction de l'index lexical pour la recherche hybride si activée
             if self.hybrid_search:
-                self._update_tfidf_index(new_chunks)
+                self._update_lexical_index(new_chunks)
             
             # Génération des embeddings par lots pour éviter les erreurs de mémoire
             total_chunks = len(new_chunks)
@@ -465,255 +465,160 @@ class RAGEnvironment:
             # Fallback: créer un index vide
             self.index = faiss.IndexFlatL2(self.embedding_dimension)
     
-    def _update_tfidf_index(self, new_chunks: List[Dict[str, str]]) -> None:
+    def _update_lexical_index(self, new_chunks: List[Dict[str, str]]) -> None:
         """
-        Met à jour l'index TF-IDF avec de nouveaux chunks.
+        Ajoute de nouveaux chunks à l'index lexical.
+        L'index est incrémental : seuls les nouveaux chunks sont traités, sans réapprendre de vocabulaire.
         
         Args:
             new_chunks: Nouveaux chunks à ajouter
         """
         try:
-            # Extraire les textes des chunks
-            chunk_texts = [chunk["text"] for chunk in new_chunks]
-            
-            if not self.tfidf_matrix:
-                # Premier ajout: créer l'index TF-IDF
-                # logger.info("Création de l'index TF-IDF...")
-                self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(chunk_texts)
-                # logger.info(f"Index TF-IDF créé avec {self.tfidf_matrix.shape[0]} chunks et {self.tfidf_matrix.shape[1]} termes")
-            else:
-                # Mise à jour de l'index existant
-                # logger.info("Mise à jour de l'index TF-IDF...")
-                
-                # Si nous avons de nouveaux termes, nous devons reconstruire l'index complet
-                old_chunk_texts = [chunk["text"] for chunk in self.chunks]
-                all_texts = old_chunk_texts + chunk_texts
-                
-                # Reconstruire la matrice TF-IDF avec tous les textes
-                self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(all_texts)
-                # logger.info(f"Index TF-IDF mis à jour avec {self.tfidf_matrix.shape[0]} chunks et {self.tfidf_matrix.shape[1]} termes")
-        
+            self.lexical_index.add([chunk["text"] for chunk in new_chunks])
         except Exception as e:
-            # logger.error(f"Erreur lors de la mise à jour de l'index TF-IDF: {str(e)}")
+            # logger.error(f"Erreur lors de la mise à jour de l'index lexical: {str(e)}")
             # Fallback: désactiver la recherche hybride en cas d'erreur
-            # logger.warning("Recherche hybride temporairement désactivée en raison d'une erreur d'indexation")
             self.hybrid_search = False
 
-# recherche dans l'embedding
-
-    def _search_semantic(self, query_embedding: np.ndarray, top_k: int = 5) -> List[Tuple[int, float]]:
+    def save(self, directory: str) -> None:
         """
-        Recherche sémantique avec FAISS.
-        
-        Args:
-            query_embedding: Embedding de la requête
-            top_k: Nombre de résultats à retourner
-            
-        Returns:
-            Liste de tuples (indice, score) pour les chunks les plus pertinents
+        Enregistre l'environnement (documents, chunks, index FAISS et index lexical) dans un répertoire,
+        pour le recharger avec load() sans recalculer les embeddings.
         """
-        if self.index is None:
-            return []
-        
-        # Recherche des K plus proches voisins
-        distances, indices = self.index.search(query_embedding, top_k)
-        
-        # Normaliser les distances (convertir en scores de similarité entre 0 et 1)
-        # Les distances FAISS sont des distances L2 (plus elles sont petites, meilleures elles sont)
-        # Trouver la distance maximale pour normaliser
-        max_dist = np.max(distances[0]) if distances.size > 0 else 1.0
-        if max_dist == 0:
-            max_dist = 1.0  # Éviter la division par zéro
-        
-        # Convertir les distances en scores (1 - distance normalisée)
-        scores = [1.0 - (dist / max_dist) for dist in distances[0]]
-        
-        # Retourner les paires (indice, score)
-        return [(int(idx), float(score)) for idx, score in zip(indices[0], scores)]
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "documents.json"), "w") as f:
+            json.dump({"documents": self.documents, "chunks": self.chunks}, f)
+        if self.index is not None:
+            faiss.write_index(self.index, os.path.join(directory, "embeddings.faiss"))
+        with open(os.path.join(directory, "lexical.npz"), "wb") as f:
+            self.lexical_index.save(f)
+
+    def load(self, directory: str) -> None:
+        """
+        Recharge un environnement enregistré avec save() ; des documents peuvent ensuite être ajoutés.
+        """
+        with open(os.path.join(directory, "documents.json")) as f:
+            data = json.load(f)
+        self.documents = data["documents"]
+        self.chunks = data["chunks"]
+        index_path = os.path.join(directory, "embeddings.faiss")
+        self.index = faiss.read_index(index_path) if os.path.exists(index_path) else None
+        self._normalized_embeddings = None
+        with open(os.path.join(directory, "lexical.npz"), "rb") as f:
+            self.lexical_index = LexicalIndex.load(f)
+
+# recherche dans l'embedding
+
+    @staticmethod
+    def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+        """Normalise chaque ligne (norme L2 = 1) ; les vecteurs nuls restent nuls."""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
 
-    def _search_lexical(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+    @staticmethod
+    def _min_max(scores: np.ndarray) -> np.ndarray:
+        """Normalisation min-max de chaque ligne entre 0 et 1 (1 si tous les scores sont égaux)."""
+        low = scores.min(axis=1, keepdims=True)
+        span = scores.max(axis=1, keepdims=True) - low
+        return np.divide(scores - low, span, out=np.ones_like(scores), where=span > 0)
+
+    def _get_query_embeddings(self, queries: List[str]) -> np.ndarray:
         """
-        Recherche lexicale avec TF-IDF.
-        
-        Args:
-            query: Requête de recherche
-            top_k: Nombre de résultats à retourner
-            
-        Returns:
-            Liste de tuples (indice, score) pour les chunks les plus pertinents
+        Embeddings normalisés des requêtes (une ligne par requête).
+        Les requêtes absentes du cache sont envoyées en un seul appel (par lots de _get_embeddings).
         """
-        if self.tfidf_matrix is None or not hasattr(self.tfidf_vectorizer, 'vocabulary_'):
-            return []
-        
+        with self._query_embeddings_lock:
+            missing = list(dict.fromkeys(
+                q for q in queries if (self.embedding_model, q) not in self._query_embeddings_cache
+            ))
+        if missing:
+            embeddings = self._normalize_rows(self._get_embeddings(missing))
+            computed = dict(zip(missing, embeddings))
+            with self._query_embeddings_lock:
+                for query, embedding in computed.items():
+                    # Vecteur nul : échec de l'API (voir _get_embeddings), à ne pas garder en cache
+                    if embedding.any():
+                        self._query_embeddings_cache[(self.embedding_model, query)] = embedding
+        else:
+            computed = {}
+        return np.vstack([
+            computed[q] if q in computed else self._query_embeddings_cache[(self.embedding_model, q)]
+            for q in queries
+        ])
+
+    def _get_chunk_embeddings(self) -> np.ndarray:
+        """Embeddings normalisés des chunks indexés (une ligne par chunk)."""
+        if self._normalized_embeddings is None or len(self._normalized_embeddings) != self.index.ntotal:
+            self._normalized_embeddings = self._normalize_rows(self.index.reconstruct_n(0, self.index.ntotal))
+        return self._normalized_embeddings
+
+    def _lexical_scores(self, queries: List[str]) -> Optional[np.ndarray]:
+        """Score BM25 de chaque requête (lignes) avec chaque chunk (colonnes), None si indisponible."""
+        # L'index lexical doit couvrir exactement les chunks indexés (un lot d'embeddings a pu échouer)
+        if len(self.lexical_index) == 0 or len(self.lexical_index) != len(self.chunks):
+            return None
         try:
-            # Transformer la requête en vecteur TF-IDF
-            query_vec = self.tfidf_vectorizer.transform([query])
-            
-            # Calculer la similarité entre la requête et tous les chunks
-            # Utiliser la similarité cosinus via le produit de matrices
-            similarity = query_vec.dot(self.tfidf_matrix.T).toarray()[0]
-            
-            # Trouver les top_k indices avec les scores les plus élevés
-            top_indices = similarity.argsort()[-top_k:][::-1]
-            top_scores = similarity[top_indices]
-            
-            # Retourner les paires (indice, score)
-            return [(int(idx), float(score)) for idx, score in zip(top_indices, top_scores)]
-            
+            return self.lexical_index.scores(queries)
         except Exception as e:
             # logger.error(f"Erreur lors de la recherche lexicale: {str(e)}")
-            return []
+            return None
 
-    def _normalize_scores(self, scores_list: List[Tuple[int, float]]) -> Dict[int, float]:
+    def search_batch(self, queries: List[str], top_k: int = 5,
+                     hybrid_weight: Optional[float] = None) -> List[List[Dict[str, Any]]]:
         """
-        Normalise les scores pour qu'ils soient entre 0 et 1.
-        
-        Args:
-            scores_list: Liste de tuples (indice, score)
-            
-        Returns:
-            Dictionnaire {indice: score normalisé}
-        """
-        scores_dict = {}
-        
-        if not scores_list:
-            return scores_dict
-        
-        # Extraire les scores
-        scores = [score for _, score in scores_list]
-        
-        # Trouver min et max pour la normalisation
-        min_score = min(scores)
-        max_score = max(scores)
-        
-        # Éviter la division par zéro
-        if min_score == max_score:
-            # Tous les scores sont identiques
-            for idx, _ in scores_list:
-                scores_dict[idx] = 1.0
-        else:
-            # Normalisation min-max
-            for idx, score in scores_list:
-                normalized_score = (score - min_score) / (max_score - min_score)
-                scores_dict[idx] = normalized_score
-        
-        return scores_dict
+        Recherche les chunks les plus pertinents pour plusieurs requêtes à la fois.
+        Les scores sémantiques (similarité cosinus) et lexicaux (BM25) sont normalisés par requête
+        puis pondérés (recherche hybride si activée).
 
-    def _merge_search_results(self, semantic_results: List[Tuple[int, float]], 
-                             lexical_results: List[Tuple[int, float]], 
-                             hybrid_weight: float, 
-                             top_k: int) -> List[Dict[str, Any]]:
-        """
-        Fusionne les résultats de recherche sémantique et lexicale avec pondération.
-        
         Args:
-            semantic_results: Résultats de la recherche sémantique [(indice, score)]
-            lexical_results: Résultats de la recherche lexicale [(indice, score)]
-            hybrid_weight: Poids de la recherche sémantique (0 à 1)
-            top_k: Nombre de résultats à retourner
-            
+            queries: Requêtes de recherche
+            top_k: Nombre de résultats à retourner par requête
+            hybrid_weight: Poids de la recherche sémantique (0 à 1, None = utiliser self.semantic_weight)
+
         Returns:
-            Liste des chunks les plus pertinents avec scores fusionnés
+            Pour chaque requête, liste des chunks les plus pertinents avec scores et métadonnées
         """
-        # Normaliser les scores sémantiques
-        semantic_scores = self._normalize_scores(semantic_results)
-        
-        # Normaliser les scores lexicaux
-        lexical_scores = self._normalize_scores(lexical_results)
-        
-        # Fusionner les scores avec pondération
-        combined_scores = {}
-        
-        # Ajouter les scores sémantiques pondérés
-        for idx, score in semantic_scores.items():
-            combined_scores[idx] = score * hybrid_weight
-        
-        # Ajouter les scores lexicaux pondérés
-        for idx, score in lexical_scores.items():
-            if idx in combined_scores:
-                combined_scores[idx] += score * (1 - hybrid_weight)
-            else:
-                combined_scores[idx] = score * (1 - hybrid_weight)
-        
-        # Trier les résultats par score
-        sorted_results = sorted(combined_scores.items(), key=lambda x: x[1], reverse=True)
-        
-        # Prendre les top_k meilleurs résultats
-        top_results = sorted_results[:top_k]
-        
-        # Préparer les résultats finaux
+        if self.index is None or not self.chunks or not queries:
+            # logger.error("Aucun document n'a été indexé. Impossible d'effectuer la recherche.")
+            return [[] for _ in queries]
+
+        if hybrid_weight is None:
+            hybrid_weight = self.semantic_weight
+
+        # Une multiplication matricielle pour toutes les requêtes
+        scores = self._min_max(self._get_query_embeddings(queries) @ self._get_chunk_embeddings().T)
+
+        lexical = self._lexical_scores(queries) if self.hybrid_search else None
+        if lexical is not None:
+            scores = hybrid_weight * scores + (1 - hybrid_weight) * self._min_max(lexical)
+
+        # Top-k par requête sans trier toute la ligne, puis tri des k meilleurs
+        k = min(top_k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        top = np.take_along_axis(top, np.argsort(-top_scores, axis=1, kind="stable"), axis=1)
+
         results = []
-        for i, (idx, score) in enumerate(top_results):
-            if idx < len(self.chunks) and idx >= 0:  # Vérification d'index valide
-                chunk = self.chunks[idx]
-                results.append({
-                    "chunk": chunk,
-                    "text": chunk["text"],
-                    "doc_id": chunk["doc_id"],
-                    "score": score,
-                    "rank": i
-                })
-        
+        for row, indices in zip(scores, top):
+            results.append([
+                {
+                    "chunk": self.chunks[idx],
+                    "text": self.chunks[idx]["text"],
+                    "doc_id": self.chunks[idx]["doc_id"],
+                    "score": float(row[idx]),
+                    "rank": rank,
+                }
+                for rank, idx in enumerate(indices)
+            ])
         return results
 
     def search(self, query: str, top_k: int = 5, hybrid_weight: Optional[float] = None) -> List[Dict[str, Any]]:
         """
-        Recherche les chunks les plus pertinents pour une requête.
-        Utilise une recherche hybride (sémantique + lexicale) si activée.
-        
-        Args:
-            query: Requête de recherche
-            top_k: Nombre de résultats à retourner
-            hybrid_weight: Poids de la recherche sémantique (0 à 1, None = utiliser self.semantic_weight)
-            
-        Returns:
-            Liste des chunks les plus pertinents avec scores et métadonnées
+        Recherche les chunks les plus pertinents pour une requête (voir search_batch).
         """
-        if self.index is None or not self.chunks:
-            # logger.error("Aucun document n'a été indexé. Impossible d'effectuer la recherche.")
-            return []
-        
-        # Utiliser le poids par défaut si non spécifié
-        if hybrid_weight is None:
-            hybrid_weight = self.semantic_weight
-        
-        # Générer l'embedding de la requête
-        query_embedding = self._get_embeddings([query])[0].reshape(1, -1)
-        
-        # Vérifier si la recherche hybride est activée
-        if self.hybrid_search and self.tfidf_matrix is not None:
-            # Recherche sémantique
-            semantic_results = self._search_semantic(query_embedding, top_k * 2)  # Récupérer plus de résultats pour le mélange
-            
-            # Recherche lexicale
-            lexical_results = self._search_lexical(query, top_k * 2)
-            
-            #################################################
-            # print("Semantic_results : ",semantic_results)
-            # print("lexical_results : ",lexical_results)
+        return self.search_batch([query], top_k, hybrid_weight)[0]
 
-            # Fusionner les résultats avec pondération
-            return self._merge_search_results(semantic_results, lexical_results, hybrid_weight, top_k)
-        else:
-            # Recherche sémantique uniquement
-            semantic_results = self._search_semantic(query_embedding, top_k)
-            
-            # Préparer les résultats
-            results = []
-            for i, (idx, score) in enumerate(semantic_results):
-                if idx < len(self.chunks) and idx >= 0:  # Vérification d'index valide
-                    chunk = self.chunks[idx]
-                    results.append({
-                        "chunk": chunk,
-                        "text": chunk["text"],
-                        "doc_id": chunk["doc_id"],
-                        "score": score,
-                        "rank": i
-                    })
-            
-            return results
-
-    def get_relevant_context(self, query, top_k=None, hybrid_weight=None, add_first_chunk=False) -> str:
+    def get_relevant_context(self, query, top_k=None, hybrid_weight=None, add_first_chunk=False, results=None) -> str:
         """
         Obtient un contexte pertinent pour une requête en combinant les meilleurs chunks.
         
@@ -721,6 +626,7 @@ class RAGEnvironment:
             query: Requête de recherche
             top_k: Nombre de chunks à utiliser (utilise self.retrieval_top_k si None)
             hybrid_weight: Poids de la recherche sémantique (None = utiliser self.semantic_weight)
+            results: Résultats de search_batch pour cette requête (la recherche n'est alors pas relancée)
             
         Returns:
             Contexte pertinent (chunks combinés)
@@ -730,8 +636,10 @@ class RAGEnvironment:
             top_k = self.retrieval_top_k
         
         try:
-            # Appel à search avec le nouveau paramètre hybrid_weight
-            results = self.search(query, top_k, hybrid_weight)
+            if results is None:
+                results = self.search(query, top_k, hybrid_weight)
+            else:
+                results = list(results)
             
             if not results:
                 if self.documents:
@@ -740,6 +648,18 @@ class RAGEnvironment:
                     return self.documents[doc_id][:3000]
                 return ""
             
+            # Limiter la taille du contexte : les chunks les moins pertinents sont écartés plutôt que
+            # de couper le contexte au milieu d'un chunk
+            results.sort(key=lambda x: -x["score"])
+            kept_results = []
+            context_length = 0
+            for result in results:
+                if kept_results and context_length + len(result["text"]) > self.max_car:
+                    continue
+                kept_results.append(result)
+                context_length += len(result["text"])
+            results = kept_results
+
             # Trier les résultats par doc_id et position dans le document
             results.sort(key=lambda x: (x["chunk"]["doc_id"], x["chunk"]["start_char"]))
             
@@ -757,7 +677,7 @@ class RAGEnvironment:
             # Joindre les chunks pertinents
             context = "\n\n---------------------------------\n\n".join(relevant_chunks)
             
-            # Limiter la taille du contexte pour éviter des prompts trop longs
+            # Dernier garde-fou (premier chunk ajouté, chunk plus long que la limite)
             max_context_length = self.max_car
             if len(context) > max_context_length:
                 context = context[:max_context_length]
@@ -801,15 +721,14 @@ class RAGEnvironment:
         try:
             # result = {}
             # logger.info("Extraction du titre...")
+            # Toutes les requêtes du type de document en une recherche (un seul appel d'embedding)
+            queries = ["" if pd.isna(q) else str(q) for q in dfAttributes['search']]
+            all_results = self.search_batch(queries, self.retrieval_top_k, hybrid_weight)
             chunks_list = []
-            cpt = 0
-            for idx, row in dfAttributes.iterrows():
-                search = row['search']
-                if cpt==0:
-                    chunks_list.append(self.get_relevant_context(search, hybrid_weight=hybrid_weight, add_first_chunk=True))
-                else:
-                    chunks_list.append(self.get_relevant_context(search, hybrid_weight=hybrid_weight))
-                cpt+=1
+            for cpt, (search, results) in enumerate(zip(queries, all_results)):
+                chunks_list.append(self.get_relevant_context(
+                    search, hybrid_weight=hybrid_weight, add_first_chunk=(cpt == 0), results=results
+                ))
             result = '\n'.join(chunks_list)
             # logger.info(f"Traitement du document {doc_id} terminé.")
             return result
@@ -881,7 +800,7 @@ def df_select_content(dfFiles: pd.DataFrame,
         rag_env.documents = {}
         rag_env.chunks = []
         rag_env.index = None
-        rag_env.tfidf_matrix = None
+        rag_env.lexical_index = LexicalIndex()
 
         rag_env.add_documents({doc_id: text})
 
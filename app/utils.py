@@ -1,5 +1,6 @@
 import json
 import re
+import resource
 import time
 import time as t
 from contextlib import contextmanager
@@ -50,6 +51,54 @@ def log_execution_time(title, treshold=10):
         raise
 
 
+def _reset_peak_rss() -> bool:
+    """Remet à zéro le pic de mémoire résidente du processus (Linux uniquement)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _read_peak_rss() -> int:
+    """Pic de mémoire résidente du processus, en octets."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Hors Linux : pic depuis le démarrage du processus
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRss:
+    peak: int | None = None
+
+
+@contextmanager
+def track_peak_rss():
+    """
+    A context manager that measures the peak resident memory (bytes) of the process during a code block.
+
+    On Linux the peak counter is reset when entering the block; elsewhere the peak since the
+    process start is reported.
+
+    Example:
+        with track_peak_rss() as rss:
+            extract_text(...)
+        print(rss.peak)
+    """
+    result = PeakRss()
+    _reset_peak_rss()
+    try:
+        yield result
+    finally:
+        result.peak = _read_peak_rss()
+
+
 def getDate():
     """
     Retourne la date du jour sous le format 'yyyy-mm-dd"
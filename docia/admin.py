@@ -129,6 +129,10 @@ class DocumentAdmin(admin.ModelAdmin):
     )
     search_fields = ("id", "filename", "dossier", "engagements__num_ej", "classification", "classification_type")
 
+    def get_queryset(self, request):
+        # Les champs volumineux ne sont chargés que sur la page d'un document
+        return super().get_queryset(request).defer("text", "relevant_content", "llm_response")
+
 
 # Déregistrer le GroupAdmin par défaut pour le personnaliser
 admin.site.unregister(auth_models.Group)
@@ -174,10 +178,11 @@ class CustomGroupAdmin(auth_admin.GroupAdmin):
 class EngagementScopeAdmin(admin.ModelAdmin):
     """Admin class for EngagementScope model"""
 
-    list_display = ("purchase_organization", "engagement_count", "group_count")
+    list_display = ("purchase_organization", "engagement_count", "group_count", "synced_until")
     search_fields = ("purchase_organization", "purchase_group")
     filter_horizontal = ("groups",)
-    fields = ("purchase_organization", "purchase_group", "groups")
+    fields = ("purchase_organization", "purchase_group", "groups", "synced_until")
+    readonly_fields = ("synced_until",)
 
     def engagement_count(self, obj):
         return obj.engagements.count()
@@ -1,7 +1,14 @@
+import zlib
+
+from django.conf import settings
 from django.contrib.auth.models import Group
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.functions import RandomUUID
 from django.db import models
+from django.db.transaction import atomic
+from django.utils.functional import cached_property
 
+from app.utils import count_words
 from docia.common.models import BaseModel
 
 
@@ -62,6 +69,148 @@ class Document(BaseModel):
     def __str__(self):
         return self.file.name
 
+    def get_text_storage(self) -> "DocumentText | None":
+        """Texte stocké par pages, sans charger le texte complet (lu à la demande)."""
+        if not hasattr(self, "_text_storage"):
+            self._text_storage = DocumentText.objects.defer("text", "compressed_text").filter(document=self).first()
+        return self._text_storage
+
+    def get_text(self) -> str | None:
+        """Texte extrait complet (colonne text pour les documents extraits avant le stockage par pages)."""
+        storage = self.get_text_storage()
+        return storage.full_text if storage else self.text
+
+    def save_text(self, text: str, pages: list[tuple[int, int]], is_ocr: bool):
+        """
+        Enregistre le texte extrait dans le stockage par pages (remplace le précédent).
+        La colonne text est vidée : sauvegarder ensuite le document avec update_fields=["text", ...].
+        """
+        with atomic():
+            DocumentText.objects.filter(document=self).delete()
+            storage = DocumentText.build(self, text, pages, is_ocr)
+            storage.save()
+        self.text = None
+        self._text_storage = storage
+
+    def get_text_head(self, nb_chars: int) -> str | None:
+        """Premiers caractères du texte extrait."""
+        storage = self.get_text_storage()
+        if storage:
+            return storage.first_chars(nb_chars)
+        return self.text[:nb_chars] if self.text is not None else None
+
+
+class DocumentText(BaseModel):
+    """
+    Texte extrait d'un document, stocké hors de la table docia_document.
+
+    Le texte complet est conservé tel quel s'il est court, compressé (zlib) sinon.
+    Le début du texte (head) et la position de chaque page permettent d'en lire une partie
+    sans charger ni décompresser l'ensemble.
+    """
+
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name="text_storage")
+    length = models.PositiveIntegerField()
+    head = models.TextField(blank=True)
+    text = models.TextField(null=True, blank=True)  # noqa: DJ001
+    compressed_text = models.BinaryField(null=True, blank=True)
+    # Contenu de la page i : full_text[page_starts[i]:page_ends[i]]
+    page_starts = ArrayField(models.PositiveIntegerField(), default=list)
+    page_ends = ArrayField(models.PositiveIntegerField(), default=list)
+    page_word_counts = ArrayField(models.PositiveIntegerField(), default=list)
+    page_is_ocr = ArrayField(models.BooleanField(), default=list)
+
+    def __str__(self):
+        return f"{self.document_id} ({self.length} caractères, {self.nb_pages} pages)"
+
+    @classmethod
+    def build(cls, document: Document, text: str, pages: list[tuple[int, int]], is_ocr: bool) -> "DocumentText":
+        """Structure le texte extrait d'un document ; pages : positions (début, fin) du contenu de chaque page."""
+        storage = cls(
+            document=document,
+            length=len(text),
+            head=text[: settings.DOCUMENT_TEXT_HEAD_CHARS],
+            page_starts=[start for start, _ in pages],
+            page_ends=[end for _, end in pages],
+            page_word_counts=[count_words(text[start:end]) for start, end in pages],
+            page_is_ocr=[is_ocr] * len(pages),
+        )
+        if len(text) > settings.DOCUMENT_TEXT_INLINE_MAX_CHARS:
+            storage.compressed_text = zlib.compress(text.encode("utf-8"))
+        else:
+            storage.text = text
+        return storage
+
+    @cached_property
+    def full_text(self) -> str:
+        if self.compressed_text is not None:
+            return zlib.decompress(self.compressed_text).decode("utf-8")
+        return self.text or ""
+
+    @property
+    def nb_pages(self) -> int:
+        return len(self.page_starts)
+
+    def _slice(self, start: int, end: int) -> str:
+        if end <= len(self.head):
+            return self.head[start:end]
+        return self.full_text[start:end]
+
+    def first_chars(self, nb_chars: int) -> str:
+        return self._slice(0, min(nb_chars, self.length))
+
+    def page(self, number: int) -> str:
+        """Contenu de la page `number` (à partir de 1)."""
+        if not 1 <= number <= self.nb_pages:
+            raise IndexError(f"Page {number} out of range (1-{self.nb_pages})")
+        return self._slice(self.page_starts[number - 1], self.page_ends[number - 1])
+
+
+class ChunkEmbedding(BaseModel):
+    """
+    Embedding d'un texte par un modèle, identifié par le hash du texte.
+
+    Un même texte (clause type répétée d'un CCAP à l'autre, nouvelle version d'un document) n'est
+    envoyé qu'une fois à l'API d'embedding, quel que soit le nombre de documents qui le contiennent.
+    """
+
+    text_hash = models.CharField(max_length=64)
+    embedding_model = models.CharField(max_length=255)
+    # Vecteur float16 (deux fois moins de place que float32, sans effet notable sur la similarité cosinus)
+    vector = models.BinaryField()
+
+    class Meta:
+        unique_together = [("text_hash", "embedding_model")]
+
+    def __str__(self):
+        return f"{self.embedding_model} {self.text_hash[:12]}"
+
+
+class DocumentChunk(BaseModel):
+    """
+    Morceau du texte extrait d'un document, et son embedding.
+
+    Les embeddings sont réutilisés lors d'une nouvelle analyse : seuls les morceaux dont le texte
+    (text_hash) n'a jamais été vu sont envoyés à l'API d'embedding.
+    """
+
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="chunks")
+    index = models.PositiveIntegerField()
+    # Position du morceau dans le texte complet : full_text[start:end]
+    start = models.PositiveIntegerField()
+    end = models.PositiveIntegerField()
+    # Page du morceau (à partir de 1) : un morceau ne s'étend jamais sur deux pages
+    page = models.PositiveIntegerField(default=1)
+    text_hash = models.CharField(max_length=64)
+    embedding_model = models.CharField(max_length=255)
+    embedding = models.ForeignKey(ChunkEmbedding, on_delete=models.PROTECT, related_name="document_chunks")
+
+    class Meta:
+        unique_together = [("document", "embedding_model", "index")]
+
+    def __str__(self):
+        return f"{self.document_id} #{self.index}"
+
 
 class EngagementScope(BaseModel):
     # OA: Organisation d'achat
@@ -69,6 +218,8 @@ class EngagementScope(BaseModel):
     # GA: Groupe d'achat
     purchase_group = models.CharField(max_length=255)
     engagements = models.ManyToManyField(DataEngagement, related_name="scopes", related_query_name="scopes")
+    # Date de réception de la dernière activité traitée : la synchronisation suivante repart de cette date
+    synced_until = models.DateTimeField(null=True, blank=True, verbose_name="Synchronisé jusqu'au")
     groups = models.ManyToManyField(
         Group,
         related_name="scopes",
@@ -3,7 +3,7 @@ import json
 import logging
 import random
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 from typing import TypeVar
 from urllib.parse import urljoin
 
@@ -18,24 +18,60 @@ logger = logging.getLogger(__name__)
 T = TypeVar("T")
 
 
-def _build_pdf_document_payload(pdf_content: bytes) -> dict:
-    """Payload document pour l'API OCR : PDF en base64 (data URI)."""
-    b64 = base64.b64encode(pdf_content).decode("utf-8")
-    data_uri = f"data:application/pdf;base64,{b64}"
-    return {"type": "document_url", "document_url": data_uri}
+# Taille des blocs encodés en base64 (multiple de 3 : pas de padding intermédiaire)
+OCR_BODY_CHUNK_SIZE = 3 * 1024 * 1024
 
 
-def _extract_markdown_from_ocr_response(response_data: dict) -> str:
-    """Extrait le texte markdown de la réponse OCR (toutes les pages)."""
-    pages = response_data.get("pages", [])
+def _iter_ocr_request_body(model: str, pdf_content) -> tuple[int, Callable[[], Iterator[bytes]]]:
+    """
+    Corps JSON de la requête OCR, encodé par blocs pour éviter de construire en mémoire
+    les copies base64 et JSON du PDF complet.
+
+    Le JSON produit est équivalent à :
+    {"model": model, "include_image_base64": false,
+     "document": {"type": "document_url", "document_url": "data:application/pdf;base64,<PDF en base64>"}}
+
+    Returns:
+        tuple: (longueur totale du corps en octets, fonction retournant un nouvel itérateur sur le corps)
+    """
+    prefix = (
+        '{"model": '
+        + json.dumps(model)
+        + ', "include_image_base64": false, "document": {"type": "document_url", '
+        + '"document_url": "data:application/pdf;base64,'
+    ).encode("utf-8")
+    suffix = b'"}}'
+    view = memoryview(pdf_content)
+    length = len(prefix) + 4 * ((len(view) + 2) // 3) + len(suffix)
+
+    def iter_body():
+        yield prefix
+        for i in range(0, len(view), OCR_BODY_CHUNK_SIZE):
+            yield base64.b64encode(view[i : i + OCR_BODY_CHUNK_SIZE])
+        yield suffix
+
+    return length, iter_body
+
+
+def _extract_pages_from_ocr_response(response_data: dict) -> list[str]:
+    """Extrait le texte markdown de chaque page de la réponse OCR."""
+    return [(page.get("markdown") or "").strip() for page in response_data.get("pages", [])]
+
+
+def format_ocr_pages(pages: list[str]) -> str:
+    """Assemble le texte des pages OCR avec les marqueurs [[PAGE i / n]] ... [[FIN PAGE i / n]]."""
     total = len(pages)
     parts = []
-    for i, page in enumerate(pages, start=1):
-        content = (page.get("markdown") or "").strip()
+    for i, content in enumerate(pages, start=1):
         parts.append(f"[[PAGE {i} / {total}]]\n{content}\n[[FIN PAGE {i} / {total}]]")
     return "\n\n".join(parts).strip()
 
 
+def _extract_markdown_from_ocr_response(response_data: dict) -> str:
+    """Extrait le texte markdown de la réponse OCR (toutes les pages)."""
+    return format_ocr_pages(_extract_pages_from_ocr_response(response_data))
+
+
 class LLMApiError(Exception):
     message: str
     code: str
@@ -216,6 +252,29 @@ class LLMClient:
     ) -> str:
         """
         Envoie le contenu d'un PDF à l'API OCR et retourne le texte extrait (markdown).
+        Les pages sont délimitées par des marqueurs [[PAGE i / n]] ... [[FIN PAGE i / n]].
+        """
+        pages = self.ocr_pdf_pages(
+            pdf_content,
+            model=model,
+            rate_per_minute=rate_per_minute,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            retry_short_delay=retry_short_delay,
+        )
+        return format_ocr_pages(pages)
+
+    def ocr_pdf_pages(
+        self,
+        pdf_content: bytes | memoryview,
+        model: str = "mistral-ocr-2512",
+        rate_per_minute: int | None = None,
+        max_retries: int = 3,
+        retry_delay: float = 60,
+        retry_short_delay: float = 10,
+    ) -> list[str]:
+        """
+        Envoie le contenu d'un PDF à l'API OCR et retourne le texte extrait (markdown) de chaque page.
 
         Retry : 429 (retry_delay), 5XX et erreurs de connexion (retry_short_delay).
         À utiliser dans extract_text_from_pdf (processor) quand le PDF est un scan / peu de texte.
@@ -223,17 +282,17 @@ class LLMClient:
         """
         max_retries = max(0, max_retries)
         url = urljoin(self.base_url.rstrip("/") + "/", "/ocr".lstrip("/"))
-        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-        payload = {
-            "model": model,
-            "document": _build_pdf_document_payload(pdf_content),
-            "include_image_base64": False,
+        body_length, iter_body = _iter_ocr_request_body(model, pdf_content)
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Content-Length": str(body_length),
         }
 
-        def _do_call() -> str:
+        def _do_call() -> list[str]:
             post = self._ocr_http_client.post if self._ocr_http_client else httpx.post
             try:
-                response = post(url, headers=headers, json=payload, timeout=self.timeout)
+                response = post(url, headers=headers, content=iter_body(), timeout=self.timeout)
             except (httpx.ConnectError, httpx.TimeoutException) as e:
                 raise LLMApiError(
                     f"OCR API error: {e!s}",
@@ -241,7 +300,7 @@ class LLMClient:
                     details=str(e),
                 ) from e
             if response.is_success:
-                return _extract_markdown_from_ocr_response(response.json())
+                return _extract_pages_from_ocr_response(response.json())
             raise LLMApiError(
                 f"OCR API error: {response.status_code}",
                 code=f"HTTP_{response.status_code}",
@@ -255,3 +314,46 @@ class LLMClient:
             retry_short_delay=retry_short_delay,
             limiter=self._get_limiter(model, rate_per_minute),
         )
+
+    def embed(
+        self,
+        texts: list[str],
+        model: str = "BAAI/bge-m3",
+        batch_size: int = 16,
+        rate_per_minute: int | None = None,
+        max_retries: int = 3,
+        retry_delay: float = 60,
+        retry_short_delay: float = 10,
+    ) -> list[list[float]]:
+        """
+        Calcule l'embedding de chaque texte, par lots de batch_size textes par requête.
+
+        Retry : 429 (retry_delay), 5XX et erreurs de connexion (retry_short_delay).
+        """
+        max_retries = max(0, max_retries)
+        limiter = self._get_limiter(model, rate_per_minute)
+        embeddings = []
+        for i in range(0, len(texts), batch_size):
+            batch = texts[i : i + batch_size]
+
+            def _do_call(batch=batch) -> list[list[float]]:
+                try:
+                    response = self.client.embeddings.create(model=model, input=batch, encoding_format="float")
+                except APIError as e:
+                    raise LLMApiError.from_api_error(e) from e
+                if len(response.data) != len(batch):
+                    raise LLMApiError(
+                        f"Embedding API error: {len(response.data)} embeddings for {len(batch)} texts",
+                        code="ERROR_EmbeddingCount",
+                        details=None,
+                    )
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+            embeddings += self._api_call(
+                _do_call,
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+                retry_short_delay=retry_short_delay,
+                limiter=limiter,
+            )
+        return embeddings
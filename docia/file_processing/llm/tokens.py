@@ -0,0 +1,39 @@
+"""
+Comptage des tokens d'un texte.
+
+Les modèles utilisés (Mistral, bge-m3) ont leur propre tokenizer : l'encodage tiktoken TOKENIZER_ENCODING
+en donne une approximation suffisante pour dimensionner morceaux et prompts. Si l'encodage n'est pas
+disponible (pas d'accès réseau pour le télécharger, TOKENIZER_ENCODING vide), le nombre de tokens
+est estimé à partir du nombre de caractères.
+"""
+
+import functools
+import logging
+import math
+
+from django.conf import settings
+
+import tiktoken
+
+logger = logging.getLogger("docia." + __name__)
+
+# Estimation pour un texte français (environ 3,5 caractères par token)
+CHARS_PER_TOKEN = 3.5
+
+
+@functools.cache
+def get_encoding(name: str) -> tiktoken.Encoding | None:
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning("Encodage %s indisponible, nombre de tokens estimé (%s)", name, e)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = get_encoding(settings.TOKENIZER_ENCODING) if settings.TOKENIZER_ENCODING else None
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
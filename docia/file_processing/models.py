@@ -22,7 +22,9 @@ class ProcessingStatus(models.TextChoices):
 class ProcessDocumentStepType(models.TextChoices):
     TEXT_EXTRACTION = "TEXT_EXTRACTION"
     CLASSIFICATION = "CLASSIFICATION"
+    RELEVANT_CONTENT = "RELEVANT_CONTENT"
     CONTENT_ANALYSIS = "CONTENT_ANALYSIS"
+    RECOMPUTE_STRUCTURED_DATA = "RECOMPUTE_STRUCTURED_DATA"
 
 
 BATCH_STUCK_TIMEOUT = 30 * 60  # 30min (in seconds)
@@ -93,6 +95,8 @@ class ProcessDocumentStep(BaseModel):
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
     duration = models.DurationField(null=True, blank=True)
+    peak_rss = models.PositiveBigIntegerField(null=True, blank=True, help_text="Pic de mémoire résidente (octets)")
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True, help_text="Tokens envoyés au LLM")
 
     def get_next(self) -> "ProcessDocumentStep | None":
         return self.job.step_set.filter(order__gt=self.order).order_by("order").first()
@@ -160,3 +164,36 @@ class DownloadDocumentError(BaseModel):
 
     def __str__(self):
         return f"{self.message}"
+
+
+class SyncDocumentMetadataError(BaseModel):
+    """
+    Échec de la récupération des métadonnées des documents d'un EJ (les autres EJ sont synchronisés).
+    Une seule ligne par EJ : le message et updated_at sont ceux du dernier échec.
+    """
+
+    order_id = models.CharField(unique=True)
+    message = models.CharField()
+
+    def __str__(self):
+        return f"{self.order_id}: {self.message}"
+
+
+class ExtractionCacheKind(models.TextChoices):
+    FILE = "FILE"
+    PAGE = "PAGE"
+
+
+class ExtractionCacheEntry(BaseModel):
+    """Résultat d'extraction de texte, adressé par le contenu (hash du fichier ou d'une page)."""
+
+    key = models.CharField(max_length=255, unique=True)
+    kind = models.CharField(choices=ExtractionCacheKind.choices)
+    text = models.TextField()
+    is_ocr = models.BooleanField(default=False)
+    size = models.PositiveIntegerField()
+    hit_count = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.hit_count} hits)"
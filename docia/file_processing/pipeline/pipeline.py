@@ -31,7 +31,10 @@ from docia.file_processing.pipeline.steps.init_documents import (
     init_documents_from_external_filter_by_num_ejs,
     init_documents_in_folder,
 )
+from docia.file_processing.pipeline.steps.recompute_structured_data import task_recompute_structured_data
+from docia.file_processing.pipeline.steps.relevant_content import task_select_relevant_content
 from docia.file_processing.pipeline.steps.text_extraction import task_extract_text
+from docia.file_processing.sync.sync_engagements import save_watermarks
 from docia.file_processing.sync.workflow import sync_all, sync_documents_and_download_files
 from docia.models import Document
 
@@ -41,6 +44,7 @@ logger = logging.getLogger(__name__)
 DEFAULT_PROCESS_STEPS = [
     ProcessDocumentStepType.TEXT_EXTRACTION,
     ProcessDocumentStepType.CLASSIFICATION,
+    ProcessDocumentStepType.RELEVANT_CONTENT,
     ProcessDocumentStepType.CONTENT_ANALYSIS,
 ]
 
@@ -102,7 +106,7 @@ def launch_batch(
     jobs = []
     steps = []
     job_tasks = []
-    for document in qs_documents:
+    for document in qs_documents.only("id"):
         job = ProcessDocumentJob(
             batch=batch,
             document=document,
@@ -180,8 +184,12 @@ def task_from_step_type(step_type: ProcessDocumentStepType):
         return task_extract_text
     elif step_type == ProcessDocumentStepType.CLASSIFICATION:
         return task_classify_document
+    elif step_type == ProcessDocumentStepType.RELEVANT_CONTENT:
+        return task_select_relevant_content
     elif step_type == ProcessDocumentStepType.CONTENT_ANALYSIS:
         return task_analyze_content
+    elif step_type == ProcessDocumentStepType.RECOMPUTE_STRUCTURED_DATA:
+        return task_recompute_structured_data
     else:
         raise ValueError(f"Unknown step type {step_type}")
 
@@ -230,27 +238,33 @@ def init_documents_and_launch_batch(folder: str, batch_grist: str, target_classi
     return batch_id, gr
 
 
-def sync_and_analyze(start: datetime, end: datetime = None, force_analyze: bool = False) -> str | None:
+def sync_and_analyze(
+    start: datetime, end: datetime = None, force_analyze: bool = False, backfill: bool = False
+) -> str | None:
     """
     Synchronize documents within a date range and analyze them.
 
     Args:
-        start: Start datetime for synchronization
+        start: Start datetime for synchronization of scopes never synced (all scopes if backfill)
         end: Optional end datetime for synchronization (defaults to now)
         force_analyze: If True, re-analyze already processed documents
+        backfill: If True, sync all scopes from start instead of their watermark
 
     Returns:
         str: Batch ID of the launched processing batch, None if no documents to process
     """
     logger.info("Start sync and analyze (by date)")
     logger.info("Start sync")
-    sync_result = sync_all(start, end)
+    sync_result = sync_all(start, end, backfill=backfill)
     logger.info("Sync success:")
     for k, v in sync_result.items():
         v_str = str(v) if len(v) <= 10 else str(len(v))
         logger.info(f"{k}: {v_str}")
     num_ejs = sync_result["num_ejs"]
-    return _init_and_launch_batch(num_ejs, force_analyze=force_analyze)
+    batch_id = _init_and_launch_batch(num_ejs, force_analyze=force_analyze)
+    # The activity is processed once the analysis of its documents is launched
+    save_watermarks(sync_result["watermarks"])
+    return batch_id
 
 
 def sync_and_analyze_ej_list(num_ejs: list[str], force_analyze: bool = False) -> str | None:
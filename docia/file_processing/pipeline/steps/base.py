@@ -2,60 +2,83 @@ import datetime
 import logging
 import traceback
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 
+from django.db import DatabaseError, connections
+from django.db.models import Exists, OuterRef
 from django.db.transaction import atomic
 
-from docia.file_processing.models import ProcessDocumentStep, ProcessingStatus
+from celery import Task
+
+from app.utils import track_peak_rss
+from docia.file_processing.models import (
+    ProcessDocumentBatch,
+    ProcessDocumentJob,
+    ProcessDocumentStep,
+    ProcessDocumentStepType,
+    ProcessingStatus,
+)
 from docia.file_processing.pipeline.steps.exceptions import SkipStepException
 
 logger = logging.getLogger(__name__)
 
+# Délai avant de revérifier une étape prise en charge par le lot d'une autre tâche (secondes), doublé à chaque
+# vérification jusqu'au maximum. Sans limite de tentatives : un lot peut durer longtemps si le LLM est ralenti,
+# et une étape bloquée est annulée avec son batch (close_and_retry_stuck_batches)
+CLAIMED_STEP_RETRY_DELAY = 5
+CLAIMED_STEP_MAX_RETRY_DELAY = 60
+
 
 class AbstractStepRunner(ABC):
     def run(self, step_id: str) -> ProcessingStatus:
         with atomic():
             step = ProcessDocumentStep.objects.select_related("job").select_for_update(nowait=True).get(id=step_id)
+            if not self.start(step):
+                return step.status
 
-            file_path = step.job.document.file.name
+        error = None
+        with track_peak_rss() as rss:
+            try:
+                self.process(step)
+            except Exception as e:
+                error = e
+        self.finish(step, error, rss.peak)
+        return step.status
 
-            if step.status != ProcessingStatus.PENDING:
-                logger.info(f"Step already processed step={step_id} ({file_path}) status={step.status}")
-                return step.status
+    def start(self, step: ProcessDocumentStep) -> bool:
+        """
+        Passe l'étape (verrouillée par l'appelant) au statut STARTED.
+        Renvoie False si elle ne doit pas être traitée : déjà traitée, job annulé ou terminé.
+        """
+        file_path = step.job.document.file.name
 
-            if step.job.status == ProcessingStatus.CANCELLED:
-                logger.info(f"Job cancelled job={step.job.id} step={step_id} ({file_path})")
-                return step.status
+        if step.status != ProcessingStatus.PENDING:
+            logger.info(f"Step already processed step={step.id} ({file_path}) status={step.status}")
+            return False
 
-            if step.job.status not in (ProcessingStatus.PENDING, ProcessingStatus.STARTED):
-                logger.info(
-                    f"Job already processed job={step.job.id} step={step_id} ({file_path}) status={step.job.status}"
-                )
-                return step.status
+        if step.job.status == ProcessingStatus.CANCELLED:
+            logger.info(f"Job cancelled job={step.job.id} step={step.id} ({file_path})")
+            return False
 
-            if step.job.status == ProcessingStatus.PENDING:
-                step.job.status = ProcessingStatus.STARTED
-                step.job.save(update_fields=["status"])
+        if step.job.status not in (ProcessingStatus.PENDING, ProcessingStatus.STARTED):
+            logger.info(
+                f"Job already processed job={step.job.id} step={step.id} ({file_path}) status={step.job.status}"
+            )
+            return False
 
-            step.started_at = datetime.datetime.now(tz=datetime.timezone.utc)
-            step.status = ProcessingStatus.STARTED
-            step.save(update_fields=["status"])
+        if step.job.status == ProcessingStatus.PENDING:
             step.job.status = ProcessingStatus.STARTED
+            step.job.save(update_fields=["status"])
 
-        try:
-            self.process(step)
-        except SkipStepException as e:
-            logger.info("(%s) Skip %s: %s", self.__class__.__name__, file_path, e)
-            step.status = ProcessingStatus.SKIPPED
-        except Exception as e:
-            logger.exception("(%s) Error during processing %s", self.__class__.__name__, file_path)
-            step.status = ProcessingStatus.FAILURE
-            step.error = str(e)
-            step.traceback = traceback.format_exc()
-        else:
-            step.status = ProcessingStatus.SUCCESS
+        step.started_at = datetime.datetime.now(tz=datetime.timezone.utc)
+        step.status = ProcessingStatus.STARTED
+        step.save(update_fields=["status"])
+        step.job.status = ProcessingStatus.STARTED
+        return True
 
-        step.finished_at = datetime.datetime.now(tz=datetime.timezone.utc)
-        step.duration = step.finished_at - step.started_at
+    def finish(self, step: ProcessDocumentStep, error: Exception | None, peak_rss: int):
+        """Enregistre le résultat de l'étape et le propage au job et au batch."""
+        self.set_result(step, error, peak_rss)
         step.save()
 
         # Propagate failure and skip
@@ -73,16 +96,202 @@ class AbstractStepRunner(ABC):
                 step.job.status = ProcessingStatus.SUCCESS
                 step.job.save(update_fields=["status"])
 
-            # Finish batch if needed
-            if not step.job.batch.job_set.filter(
-                status__in=[ProcessingStatus.PENDING, ProcessingStatus.STARTED]
-            ).exists():
-                if step.job.batch.job_set.filter(status=ProcessingStatus.FAILURE).exists():
-                    step.job.batch.status = ProcessingStatus.FAILURE
-                else:
-                    step.job.batch.status = ProcessingStatus.SUCCESS
-                step.job.batch.save(update_fields=["status"])
+            finish_batch_if_done(step.job.batch)
 
-        return step.status
+    def set_result(self, step: ProcessDocumentStep, error: Exception | None, peak_rss: int):
+        """Renseigne le statut, l'erreur et les mesures de l'étape (sans l'enregistrer)."""
+        file_path = step.job.document.file.name
+        if isinstance(error, SkipStepException):
+            logger.info("(%s) Skip %s: %s", self.__class__.__name__, file_path, error)
+            step.status = ProcessingStatus.SKIPPED
+        elif error is not None:
+            logger.error("(%s) Error during processing %s", self.__class__.__name__, file_path, exc_info=error)
+            step.status = ProcessingStatus.FAILURE
+            step.error = str(error)
+            step.traceback = "".join(traceback.format_exception(error))
+        else:
+            step.status = ProcessingStatus.SUCCESS
+
+        step.finished_at = datetime.datetime.now(tz=datetime.timezone.utc)
+        step.duration = step.finished_at - step.started_at
+        # Le traitement peut avoir renseigné le pic d'un processus enfant
+        step.peak_rss = max(peak_rss, step.peak_rss or 0)
+        logger.info(
+            "(%s) %s done in %s, peak RSS %.0f MB",
+            self.__class__.__name__,
+            file_path,
+            step.duration,
+            step.peak_rss / 1e6,
+        )
 
     def process(self, step: ProcessDocumentStep): ...
+
+
+class AbstractBatchStepRunner(AbstractStepRunner):
+    """
+    Traitement par lots (micro-batching) des étapes d'un même type.
+
+    La tâche d'une étape prend aussi en charge jusqu'à batch_size - 1 autres étapes prêtes du même type
+    (étapes précédentes du job réussies), avec les documents préchargés, et les traite ensemble :
+    par défaut process() de chaque étape, en parallèle sur max_workers threads.
+    Les statuts sont ensuite enregistrés en quelques requêtes groupées, avec la même propagation au job
+    et au batch que pour une étape seule. Les tâches des étapes prises en charge les trouvent déjà
+    traitées, ou en cours (voir run_step_task).
+    """
+
+    step_type: ProcessDocumentStepType
+    batch_size: int = 1
+    max_workers: int = 1
+
+    def run(self, step_id: str) -> ProcessingStatus:
+        try:
+            step, steps = self.claim(step_id)
+        except DatabaseError:
+            # Étape verrouillée par une autre tâche en train de constituer son lot
+            logger.info("Step locked by another task step=%s", step_id)
+            return ProcessingStatus.STARTED
+        if not steps:
+            return step.status
+
+        with track_peak_rss() as rss:
+            errors = self.process_batch(steps)
+        if len(steps) == 1:
+            self.finish(step, errors.get(step.id), rss.peak)
+        else:
+            self.finish_batch(steps, errors, rss.peak)
+        return step.status
+
+    def claim(self, step_id: str) -> tuple[ProcessDocumentStep, list[ProcessDocumentStep]]:
+        """Démarre l'étape et les autres étapes prêtes du lot ; liste vide si l'étape n'est pas à traiter."""
+        qs_steps = ProcessDocumentStep.objects.select_related("job__document", "job__batch")
+        with atomic():
+            step = qs_steps.select_for_update(nowait=True, of=("self",)).get(id=step_id)
+            if not self.start(step):
+                return step, []
+            if self.batch_size <= 1:
+                return step, [step]
+
+            previous_steps_not_done = ProcessDocumentStep.objects.filter(
+                job=OuterRef("job"), order__lt=OuterRef("order")
+            ).exclude(status=ProcessingStatus.SUCCESS)
+            others = list(
+                qs_steps.select_for_update(skip_locked=True, of=("self",))
+                .filter(step_type=self.step_type, status=ProcessingStatus.PENDING, job__status=ProcessingStatus.STARTED)
+                .exclude(id=step.id)
+                .exclude(Exists(previous_steps_not_done))
+                .order_by("created_at")[: self.batch_size - 1]
+            )
+            now = datetime.datetime.now(tz=datetime.timezone.utc)
+            ProcessDocumentStep.objects.filter(id__in=[other.id for other in others]).update(
+                status=ProcessingStatus.STARTED, updated_at=now
+            )
+            for other in others:
+                other.status = ProcessingStatus.STARTED
+                other.started_at = now
+        if others:
+            logger.info("(%s) %s steps claimed with step=%s", self.__class__.__name__, len(others), step_id)
+        return step, [step] + others
+
+    def process_batch(self, steps: list[ProcessDocumentStep]) -> dict:
+        """Traite les étapes ; renvoie l'erreur éventuelle de chaque étape (par identifiant)."""
+        if self.max_workers <= 1 or len(steps) == 1:
+            results = [self._process_step(step) for step in steps]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(steps))) as executor:
+                results = list(executor.map(self._process_step_in_thread, steps))
+        return {step.id: error for step, error in zip(steps, results, strict=True) if error is not None}
+
+    def _process_step(self, step: ProcessDocumentStep) -> Exception | None:
+        try:
+            self.process(step)
+        except Exception as e:
+            return e
+        return None
+
+    def _process_step_in_thread(self, step: ProcessDocumentStep) -> Exception | None:
+        try:
+            return self._process_step(step)
+        finally:
+            # Connexions ouvertes par ce thread
+            connections.close_all()
+
+    def finish_batch(self, steps: list[ProcessDocumentStep], errors: dict, peak_rss: int):
+        """Équivalent groupé de finish() pour les étapes de jobs distincts."""
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        for step in steps:
+            self.set_result(step, errors.get(step.id), peak_rss)
+            step.updated_at = now
+        ProcessDocumentStep.objects.bulk_update(
+            steps,
+            [
+                "status",
+                "error",
+                "traceback",
+                "started_at",
+                "finished_at",
+                "duration",
+                "peak_rss",
+                "prompt_tokens",
+                "updated_at",
+            ],
+        )
+
+        # Propagate failure and skip
+        ended_job_ids = []
+        for status in (ProcessingStatus.FAILURE, ProcessingStatus.SKIPPED):
+            job_ids = [step.job_id for step in steps if step.status == status]
+            if job_ids:
+                ProcessDocumentJob.objects.filter(id__in=job_ids).update(status=status, updated_at=now)
+                ended_job_ids += job_ids
+        for step in steps:
+            if step.job_id in ended_job_ids:
+                step.job.status = step.status
+        if ended_job_ids:
+            # Skip next steps
+            ProcessDocumentStep.objects.filter(job_id__in=ended_job_ids, status=ProcessingStatus.PENDING).update(
+                status=ProcessingStatus.SKIPPED
+            )
+
+        # Finish jobs if needed
+        jobs_with_steps_left = ProcessDocumentStep.objects.filter(
+            job=OuterRef("pk"), status__in=[ProcessingStatus.PENDING, ProcessingStatus.STARTED]
+        )
+        done_job_ids = set(
+            ProcessDocumentJob.objects.filter(id__in=[step.job_id for step in steps])
+            .exclude(Exists(jobs_with_steps_left))
+            .values_list("id", flat=True)
+        )
+        ProcessDocumentJob.objects.filter(id__in=done_job_ids, status=ProcessingStatus.STARTED).update(
+            status=ProcessingStatus.SUCCESS, updated_at=now
+        )
+        batches = {}
+        for step in steps:
+            if step.job_id in done_job_ids:
+                if step.job.status == ProcessingStatus.STARTED:
+                    step.job.status = ProcessingStatus.SUCCESS
+                batches[step.job.batch_id] = step.job.batch
+        for batch in batches.values():
+            finish_batch_if_done(batch)
+
+
+def finish_batch_if_done(batch: ProcessDocumentBatch):
+    """Termine le batch si tous ses jobs sont terminés : FAILURE si l'un d'eux a échoué, SUCCESS sinon."""
+    if not batch.job_set.filter(status__in=[ProcessingStatus.PENDING, ProcessingStatus.STARTED]).exists():
+        if batch.job_set.filter(status=ProcessingStatus.FAILURE).exists():
+            batch.status = ProcessingStatus.FAILURE
+        else:
+            batch.status = ProcessingStatus.SUCCESS
+        batch.save(update_fields=["status"])
+
+
+def run_step_task(task: Task, runner: AbstractStepRunner, step_id: str) -> ProcessingStatus:
+    """
+    Exécute l'étape depuis sa tâche Celery (liée, bind=True, max_retries=None).
+    Si l'étape est en cours dans le lot d'une autre tâche, la tâche est relancée plus tard, autant de fois
+    que nécessaire : l'étape suivante de la chaîne ne doit démarrer qu'une fois celle-ci terminée.
+    """
+    status = runner.run(step_id)
+    if status == ProcessingStatus.STARTED:
+        countdown = min(CLAIMED_STEP_RETRY_DELAY * 2 ** min(task.request.retries, 10), CLAIMED_STEP_MAX_RETRY_DELAY)
+        raise task.retry(countdown=countdown)
+    return status
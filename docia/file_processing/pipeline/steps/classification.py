@@ -1,30 +1,105 @@
 import logging
 
+from django.conf import settings
+
 from celery import shared_task
 
-from docia.file_processing.models import ProcessDocumentStep
-from docia.file_processing.pipeline.steps.base import AbstractStepRunner
+from docia.file_processing.llm.client import LLMClient
+from docia.file_processing.models import ProcessDocumentStep, ProcessDocumentStepType
+from docia.file_processing.pipeline.steps.base import AbstractBatchStepRunner, AbstractStepRunner, run_step_task
 from docia.file_processing.processor import classifier as processor
+from docia.file_processing.processor import local_classifier
 from docia.file_processing.processor.classifier import DIC_CLASS_FILE_BY_NAME
 
 logger = logging.getLogger(__name__)
 
 
 class ClassifyStepRunner(AbstractStepRunner):
+    llm_client: LLMClient | None = None
+
     def process(self, step: ProcessDocumentStep):
         document = step.job.document
-        file_path = document.file.name
-        classification = processor.classify_file_with_llm(
-            file_path,
-            document.text,
-            DIC_CLASS_FILE_BY_NAME,
+        text_head = document.get_text_head(processor.FIRST_PAGE_CHARS)
+        if not self.classify_locally(step, text_head):
+            self.save_classification(
+                step,
+                processor.classify_file_with_llm(
+                    document.file.name, text_head, DIC_CLASS_FILE_BY_NAME, llm_client=self.llm_client
+                ),
+                "llm",
+            )
+
+    def classify_locally(self, step: ProcessDocumentStep, text_head: str | None) -> bool:
+        """Classification locale si sa confiance dépasse le seuil ; renvoie False sinon."""
+        if not settings.LOCAL_CLASSIFIER_ENABLED:
+            return False
+        document = step.job.document
+        prediction = local_classifier.classify_file_locally(document.filename, text_head)
+        if not prediction or prediction.confidence < settings.LOCAL_CLASSIFIER_THRESHOLD:
+            return False
+        logger.info(
+            "Local classification of %s: %s (%s, confidence %.2f)",
+            document.id,
+            prediction.classification,
+            prediction.source,
+            prediction.confidence,
         )
+        self.save_classification(step, prediction.classification, "local")
+        return True
+
+    def save_classification(self, step: ProcessDocumentStep, classification: str, classification_type: str):
+        document = step.job.document
         document.classification = classification
-        document.classification_type = "llm"
+        document.classification_type = classification_type
         document.save(update_fields=["classification", "classification_type"])
 
 
-@shared_task(name="docia.classify_document")
-def task_classify_document(step_id: str):
-    runner = ClassifyStepRunner()
-    return runner.run(step_id)
+class ClassifyBatchStepRunner(AbstractBatchStepRunner, ClassifyStepRunner):
+    """Classification par lots : les documents non classifiés localement le sont en une seule requête au LLM."""
+
+    step_type = ProcessDocumentStepType.CLASSIFICATION
+
+    def __init__(self, batch_size: int | None = None):
+        self.batch_size = batch_size or settings.CLASSIFICATION_BATCH_SIZE
+        self.llm_client = LLMClient()
+
+    def process_batch(self, steps: list[ProcessDocumentStep]) -> dict:
+        if len(steps) == 1:
+            return super().process_batch(steps)
+
+        errors = {}
+        to_classify = {}
+        for step in steps:
+            try:
+                text_head = step.job.document.get_text_head(processor.FIRST_PAGE_CHARS)
+                if not self.classify_locally(step, text_head):
+                    to_classify[step.id] = (step, text_head)
+            except Exception as e:
+                errors[step.id] = e
+        if not to_classify:
+            return errors
+
+        try:
+            classifications = processor.classify_files_batch_with_llm(
+                {
+                    step_id: (step.job.document.file.name, text_head)
+                    for step_id, (step, text_head) in to_classify.items()
+                },
+                DIC_CLASS_FILE_BY_NAME,
+                llm_client=self.llm_client,
+            )
+        except Exception as e:
+            logger.exception("Batch classification of %s documents failed", len(to_classify))
+            return errors | {step_id: e for step_id in to_classify}
+
+        for step_id, (step, _) in to_classify.items():
+            try:
+                self.save_classification(step, classifications[step_id], "llm")
+            except Exception as e:
+                errors[step_id] = e
+        return errors
+
+
+@shared_task(name="docia.classify_document", bind=True, max_retries=None)
+def task_classify_document(self, step_id: str):
+    return run_step_task(self, ClassifyBatchStepRunner(), step_id)
@@ -1,12 +1,20 @@
 import logging
 
+from django.conf import settings
 from django.utils import timezone
 
 from celery import shared_task
 
-from docia.file_processing.models import ProcessDocumentStep
-from docia.file_processing.pipeline.steps.base import AbstractStepRunner, SkipStepException
+from docia.file_processing.llm.client import LLMClient
+from docia.file_processing.models import ProcessDocumentStep, ProcessDocumentStepType
+from docia.file_processing.pipeline.steps.base import (
+    AbstractBatchStepRunner,
+    AbstractStepRunner,
+    SkipStepException,
+    run_step_task,
+)
 from docia.file_processing.processor import analyze_content as processor
+from docia.file_processing.processor import relevant_content
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +34,8 @@ SUPPORTED_DOCUMENT_TYPES = [
 
 
 class AnalyzeContentStepRunner(AbstractStepRunner):
+    llm_client: LLMClient | None = None
+
     def process(self, step: ProcessDocumentStep):
         document = step.job.document
 
@@ -35,17 +45,56 @@ class AnalyzeContentStepRunner(AbstractStepRunner):
         if target_classifications is not None and classification not in target_classifications:
             raise SkipStepException(f"Not in target classifications: {classification}.")
 
+        # Contenu déjà sélectionné par l'étape RELEVANT_CONTENT : analysé tel quel, sans nouvelle sélection
+        if document.relevant_content:
+            text = document.relevant_content
+            select_content = None
+        else:
+            text = document.get_text()
+            select_content = (
+                self._content_selector(document, text) if relevant_content.search_queries(classification) else None
+            )
+
         result = processor.analyze_file_text(
-            document.relevant_content or document.text,
-            document.classification,
+            text,
+            classification,
+            llm_client=self.llm_client,
+            select_content=select_content,
+        )
+        step.prompt_tokens = result["prompt_tokens"]
+        logger.info(
+            "Content analysis of document %s: %s prompt tokens (%s)",
+            document.id,
+            result["prompt_tokens"],
+            result["context_strategy"],
         )
         document.llm_response = result["llm_response"]
         document.structured_data = result["structured_data"]
         document.analyzed_at = timezone.now()
         document.save(update_fields=["llm_response", "structured_data", "analyzed_at"])
 
+    def _content_selector(self, document, text: str):
+        """Sélection RAG dans le texte complet, par groupe de requêtes."""
+
+        def select_content(group_queries: list[str], max_tokens: int) -> str:
+            return relevant_content.select_relevant_content(
+                document, text, group_queries, llm_client=self.llm_client, max_tokens=max_tokens
+            )
+
+        return select_content
+
+
+class AnalyzeContentBatchStepRunner(AbstractBatchStepRunner, AnalyzeContentStepRunner):
+    """Analyse par lots : les documents du lot sont analysés en parallèle, avec un client LLM partagé."""
+
+    step_type = ProcessDocumentStepType.CONTENT_ANALYSIS
+
+    def __init__(self, batch_size: int | None = None):
+        self.batch_size = batch_size or settings.CONTENT_ANALYSIS_BATCH_SIZE
+        self.max_workers = self.batch_size
+        self.llm_client = LLMClient()
+
 
-@shared_task(name="docia.analyse_content")
-def task_analyze_content(step_id: str):
-    runner = AnalyzeContentStepRunner()
-    return runner.run(step_id)
+@shared_task(name="docia.analyse_content", bind=True, max_retries=None)
+def task_analyze_content(self, step_id: str):
+    return run_step_task(self, AnalyzeContentBatchStepRunner(), step_id)
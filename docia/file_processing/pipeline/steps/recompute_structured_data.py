@@ -0,0 +1,73 @@
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from celery import shared_task
+
+from docia.file_processing.models import ProcessDocumentStep, ProcessDocumentStepType
+from docia.file_processing.pipeline.steps.base import AbstractBatchStepRunner, run_step_task
+from docia.file_processing.pipeline.steps.exceptions import SkipStepException
+from docia.file_processing.processor import recompute_structured_data as processor
+from docia.models import Document
+
+logger = logging.getLogger(__name__)
+
+
+class RecomputeStructuredDataStepRunner(AbstractBatchStepRunner):
+    """
+    Recompute the structured data of documents from their stored LLM response, without calling the LLM
+    (e.g. after a change of the cleaning functions). Claimed steps are processed in the task process
+    and the changed documents are saved with a single bulk update.
+    """
+
+    step_type = ProcessDocumentStepType.RECOMPUTE_STRUCTURED_DATA
+
+    def __init__(self, batch_size: int | None = None):
+        self.batch_size = batch_size or settings.RECOMPUTE_STRUCTURED_DATA_BATCH_SIZE
+
+    def recompute(self, step: ProcessDocumentStep) -> Document | None:
+        """Document with its recomputed structured data, None if unchanged."""
+        document = step.job.document
+
+        classification = document.classification
+        target_classifications = step.job.batch.target_classifications
+
+        if target_classifications is not None and classification not in target_classifications:
+            raise SkipStepException(f"Not in target classifications: {classification}.")
+        if document.llm_response is None:
+            raise SkipStepException("No stored LLM response.")
+
+        data, changed_fields = processor.recompute_document_data(
+            classification, document.llm_response, document.structured_data
+        )
+        if not changed_fields:
+            return None
+        logger.info("Structured data of document %s changed: %s", document.id, ", ".join(changed_fields))
+        document.structured_data = data
+        return document
+
+    def process(self, step: ProcessDocumentStep):
+        document = self.recompute(step)
+        if document is not None:
+            document.save(update_fields=["structured_data"])
+
+    def process_batch(self, steps: list[ProcessDocumentStep]) -> dict:
+        errors = {}
+        documents = []
+        for step in steps:
+            try:
+                document = self.recompute(step)
+            except Exception as e:
+                errors[step.id] = e
+                continue
+            if document is not None:
+                document.updated_at = timezone.now()
+                documents.append(document)
+        Document.objects.bulk_update(documents, ["structured_data", "updated_at"])
+        return errors
+
+
+@shared_task(name="docia.recompute_structured_data", bind=True, max_retries=None)
+def task_recompute_structured_data(self, step_id: str):
+    return run_step_task(self, RecomputeStructuredDataStepRunner(), step_id)
@@ -0,0 +1,57 @@
+import logging
+
+from django.conf import settings
+
+from celery import shared_task
+
+from docia.file_processing.llm.client import LLMClient
+from docia.file_processing.models import ProcessDocumentStep, ProcessingStatus
+from docia.file_processing.pipeline.steps.base import AbstractStepRunner
+from docia.file_processing.pipeline.steps.exceptions import SkipStepException
+from docia.file_processing.processor import relevant_content as processor
+
+logger = logging.getLogger(__name__)
+
+
+class RelevantContentStepRunner(AbstractStepRunner):
+    """
+    Select the chunks of long documents matching the attribute search queries of their type.
+    Short documents and types without search queries are analyzed on their full text.
+    """
+
+    llm_client: LLMClient | None = None
+
+    def process(self, step: ProcessDocumentStep):
+        document = step.job.document
+
+        classification = document.classification
+        target_classifications = step.job.batch.target_classifications
+
+        if target_classifications is not None and classification not in target_classifications:
+            raise SkipStepException(f"Not in target classifications: {classification}.")
+
+        text = document.get_text() or ""
+        nb_words = document.nb_mot if document.nb_mot is not None else len(text.split())
+        queries = processor.search_queries(classification)
+
+        if not queries or nb_words <= settings.RELEVANT_CONTENT_MIN_WORDS:
+            document.relevant_content = None
+            document.is_embedded = False
+        else:
+            document.relevant_content = processor.select_relevant_content(
+                document, text, queries, llm_client=self.llm_client
+            )
+            document.is_embedded = True
+            logger.info(
+                "Relevant content of document %s: %s/%s chars",
+                document.id,
+                len(document.relevant_content),
+                len(text),
+            )
+        document.save(update_fields=["relevant_content", "is_embedded"])
+
+
+@shared_task(name="docia.select_relevant_content")
+def task_select_relevant_content(step_id: str) -> ProcessingStatus:
+    worker = RelevantContentStepRunner()
+    return worker.run(step_id)
@@ -1,12 +1,16 @@
 import logging
 
+from django.conf import settings
+from django.db.transaction import atomic
+
 from celery import shared_task
 
 from docia.file_processing.models import ProcessDocumentStep, ProcessingStatus
 from docia.file_processing.pipeline.steps.base import AbstractStepRunner
 from docia.file_processing.pipeline.steps.exceptions import SkipStepException
 from docia.file_processing.processor import text_extraction as processor
-from docia.file_processing.processor.text_extraction import UnsupportedFileType
+from docia.file_processing.processor.text_extraction import UnsupportedFileType, sandbox
+from docia.file_processing.processor.text_extraction.pages import split_pages
 
 logger = logging.getLogger(__name__)
 
@@ -16,17 +20,27 @@ class ExtractTextStepRunner(AbstractStepRunner):
         document = step.job.document
         file_path = document.file.name
         try:
-            text, is_ocr, nb_words = processor.process_file(file_path, document.extension)
+            if settings.EXTRACTION_SANDBOX_ENABLED and document.extension not in sandbox.IN_PROCESS_EXTENSIONS:
+                (text, is_ocr, nb_words), step.peak_rss = sandbox.run_in_sandbox(
+                    processor.process_file,
+                    file_path,
+                    document.extension,
+                    file_hash=document.hash,
+                    limits=sandbox.limits_for(document.taille or 0, document.extension),
+                )
+            else:
+                text, is_ocr, nb_words = processor.process_file(file_path, document.extension, file_hash=document.hash)
         except UnsupportedFileType as e:
             raise SkipStepException(str(e))
 
         if not text:
             raise Exception(f"Failed to extract text - empty result - {file_path}")
 
-        document.text = text
-        document.is_ocr = is_ocr
-        document.nb_mot = nb_words
-        document.save(update_fields=["text", "is_ocr", "nb_mot"])
+        with atomic():
+            document.save_text(text, split_pages(text), is_ocr)
+            document.is_ocr = is_ocr
+            document.nb_mot = nb_words
+            document.save(update_fields=["text", "is_ocr", "nb_mot"])
 
 
 @shared_task(name="docia.extract_text")
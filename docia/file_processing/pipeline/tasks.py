@@ -2,6 +2,8 @@ from .pipeline import task_launch_batch
 from .steps.classification import task_classify_document
 from .steps.content_analysis import task_analyze_content
 from .steps.init_documents import task_chunk_init_documents
+from .steps.recompute_structured_data import task_recompute_structured_data
+from .steps.relevant_content import task_select_relevant_content
 from .steps.text_extraction import task_extract_text
 
 __all__ = [
@@ -10,4 +12,6 @@ __all__ = [
     "task_classify_document",
     "task_extract_text",
     "task_launch_batch",
+    "task_recompute_structured_data",
+    "task_select_relevant_content",
 ]
@@ -21,6 +21,7 @@ def get_batch_progress_per_step(batch):
     for step_type in [
         ProcessDocumentStepType.TEXT_EXTRACTION,
         ProcessDocumentStepType.CLASSIFICATION,
+        ProcessDocumentStepType.RELEVANT_CONTENT,
         ProcessDocumentStepType.CONTENT_ANALYSIS,
     ]:
         step_counters[step_type] = {
@@ -102,10 +103,15 @@ def display_batch_progress(batch_id: str):
         tqdm(
             desc=" classification", total=progress["steps"][ProcessDocumentStepType.CLASSIFICATION]["total"], position=2
         ) as pbar_classification,
+        tqdm(
+            desc="   rel. content",
+            total=progress["steps"][ProcessDocumentStepType.RELEVANT_CONTENT]["total"],
+            position=3,
+        ) as pbar_relevant_content,
         tqdm(
             desc="info extraction",
             total=progress["steps"][ProcessDocumentStepType.CONTENT_ANALYSIS]["total"],
-            position=3,
+            position=4,
         ) as pbar_content_analysis,
     ):
         while True:
@@ -122,6 +128,11 @@ def display_batch_progress(batch_id: str):
                 errors=progress["steps"][ProcessDocumentStepType.CLASSIFICATION]["errors"],
                 skipped=progress["steps"][ProcessDocumentStepType.CLASSIFICATION]["skipped"],
             )
+            pbar_relevant_content.n = progress["steps"][ProcessDocumentStepType.RELEVANT_CONTENT]["progress"]
+            pbar_relevant_content.set_postfix(
+                errors=progress["steps"][ProcessDocumentStepType.RELEVANT_CONTENT]["errors"],
+                skipped=progress["steps"][ProcessDocumentStepType.RELEVANT_CONTENT]["skipped"],
+            )
             pbar_content_analysis.n = progress["steps"][ProcessDocumentStepType.CONTENT_ANALYSIS]["progress"]
             pbar_content_analysis.set_postfix(
                 errors=progress["steps"][ProcessDocumentStepType.CONTENT_ANALYSIS]["errors"],
@@ -3,13 +3,23 @@ Analyse le contexte fourni en utilisant l'api et les modèles d'IA. Prend en ent
 Contexte = parfois tout le texte extrait, parfois seulement une liste de chunks concaténés.
 """
 
+import functools
 import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
 
 import pandas as pd
 
-from ..llm.client import LLMClient
-from .attributes_query import ATTRIBUTES, select_attr
+from ..llm.client import LLMApiError, LLMClient
+from ..llm.tokens import count_tokens
+from .attributes_query import ATTRIBUTES, DOC_TYPE_ATTRIBUTE_GROUPS, select_attr
 from .post_processing_llm import clean_llm_response
+from .relevant_content import search_queries
+from .token_budget import ContextPlan, ContextStrategy, get_prompt_budget, plan_context
 
 logger = logging.getLogger("docia." + __name__)
 
@@ -78,32 +88,185 @@ def create_response_format(df_attributes, classification):
     return response_format
 
 
-def analyze_file_text(text: str, document_type: str, llm_model: str = "mistral-medium-2508", temperature: float = 0.0):
+SYSTEM_PROMPT = "Vous êtes un assistant IA qui analyse des documents juridiques."
+
+
+def get_messages(question: str, text: str) -> list[dict]:
+    user_prompt = f"Analyse le contexte suivant et réponds à la question : {question}\n\nContexte : {text}"
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}]
+
+
+def merge_llm_responses(responses: list[dict]) -> dict:
+    """Fusionne des réponses (parties d'un texte, groupes d'attributs) : première valeur renseignée par champ."""
+    merged = {}
+    for response in responses:
+        for key, value in response.items():
+            if merged.get(key) in (None, "", [], {}):
+                merged[key] = value
+    return merged
+
+
+@dataclass(frozen=True)
+class AnalysisRequest:
+    """Requête(s) d'analyse d'un ensemble d'attributs : prompt, schéma de réponse et texte de chaque requête."""
+
+    question: str
+    response_format: dict
+    plan: ContextPlan
+    prompt_tokens: int
+
+
+def prepare_analysis(
+    text: str,
+    document_type: str,
+    llm_model: str,
+    select_content: Callable[[list[str], int], str] | None = None,
+    attributes: list[str] | None = None,
+) -> AnalysisRequest:
+    """Prépare l'analyse des attributs du type de document (tous, ou seulement ceux de la liste attributes)."""
+    df_attributes = select_attr(ATTRIBUTES, document_type)
+    if attributes is not None:
+        df_attributes = df_attributes[df_attributes["attribut"].isin(attributes)]
+    question = get_prompt_from_attributes(df_attributes)
+    response_format = create_response_format(df_attributes, document_type)
+
+    budget = get_prompt_budget(llm_model, get_messages(question, ""), response_format)
+    queries = search_queries(document_type, attributes) if select_content is not None else []
+    plan = plan_context(text, budget, functools.partial(select_content, queries) if queries else None)
+    prompt_tokens = sum(budget.fixed_tokens + count_tokens(part) for part in plan.parts)
+    return AnalysisRequest(question, response_format, plan, prompt_tokens)
+
+
+def ask_analysis(request: AnalysisRequest, llm_model: str, temperature: float, llm_client: LLMClient) -> dict:
+    """Envoie la ou les requêtes d'analyse ; les réponses des parties d'un texte découpé sont fusionnées."""
+    responses = [
+        llm_client.ask_llm(
+            get_messages(request.question, part),
+            model=llm_model,
+            response_format=request.response_format,
+            temperature=temperature,
+        )
+        for part in request.plan.parts
+    ]
+    return responses[0] if len(responses) == 1 else merge_llm_responses(responses)
+
+
+def _ask_group(group: str, request: AnalysisRequest, llm_model: str, temperature: float, llm_client: LLMClient):
+    """Analyse d'un groupe d'attributs (dans un thread) : seul ce groupe est relancé en cas d'échec."""
+    try:
+        for attempt in range(settings.CONTENT_ANALYSIS_GROUP_RETRIES + 1):
+            try:
+                return ask_analysis(request, llm_model, temperature, llm_client)
+            except (LLMApiError, ValueError) as e:
+                if attempt >= settings.CONTENT_ANALYSIS_GROUP_RETRIES:
+                    raise
+                logger.warning("Échec de l'analyse du groupe %s (%s), nouvelle tentative", group, e)
+    finally:
+        # Connexions ouvertes par ce thread (limiteur de débit)
+        connections.close_all()
+
+
+def analyze_attribute_groups(
+    text: str,
+    document_type: str,
+    groups: dict[str, list[str]],
+    llm_model: str,
+    temperature: float,
+    llm_client: LLMClient,
+    select_content: Callable[[list[str], int], str] | None = None,
+) -> tuple[dict, int, str]:
+    """
+    Analyse par groupes d'attributs : chaque groupe a son contexte (RAG sur les requêtes de recherche
+    du groupe si le texte dépasse le budget) et son schéma de réponse ; les requêtes des groupes sont envoyées
+    en parallèle et leurs réponses fusionnées dans l'ordre des attributs du type de document.
+
+    Returns:
+        Réponse fusionnée, tokens envoyés et stratégie(s) retenue(s) pour le texte
+    """
+    # Contextes préparés avant l'envoi : la sélection RAG enregistre les morceaux du document
+    requests = {
+        group: prepare_analysis(text, document_type, llm_model, select_content, attributes)
+        for group, attributes in groups.items()
+    }
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        futures = {
+            group: executor.submit(_ask_group, group, request, llm_model, temperature, llm_client)
+            for group, request in requests.items()
+        }
+        responses = {group: future.result() for group, future in futures.items()}
+
+    merged = merge_llm_responses(list(responses.values()))
+    fields = select_attr(ATTRIBUTES, document_type)["output_field"].tolist()
+    response = {field: merged[field] for field in fields if field in merged} | merged
+
+    prompt_tokens = sum(request.prompt_tokens for request in requests.values())
+    strategies = "+".join(sorted({request.plan.strategy for request in requests.values()}))
+    return response, prompt_tokens, strategies
+
+
+def analyze_file_text(
+    text: str,
+    document_type: str,
+    llm_model: str = "mistral-medium-2508",
+    temperature: float = 0.0,
+    llm_client: LLMClient | None = None,
+    select_content: Callable[[list[str], int], str] | None = None,
+    split_attributes: bool | None = None,
+):
     """
     Analyse le texte pour extraire des informations.
+    Si le texte dépasse le budget de tokens du prompt, il est réduit ou découpé (voir token_budget).
 
     Args:
         text: Texte à analyser
-        response_format: Format de réponse à utiliser
+        document_type: Type du document (attributs à extraire)
         temperature: Température pour la génération (0.0 = déterministe)
+        llm_client: Client à réutiliser (par défaut : nouveau client)
+        select_content: Sélection du contenu pertinent pour des requêtes de recherche,
+            dans une limite de tokens (RAG)
+        split_attributes: Analyse par groupes d'attributs pour les types qui en définissent
+            (par défaut : CONTENT_ANALYSIS_SPLIT_ATTRIBUTES)
 
     Returns:
-        Réponse du LLM à la question posée
+        Réponse du LLM, données nettoyées, tokens envoyés et stratégie retenue pour le texte
     """
+    llm_env = llm_client or LLMClient()
+    if split_attributes is None:
+        split_attributes = settings.CONTENT_ANALYSIS_SPLIT_ATTRIBUTES
+
+    if not text:
+        raise ValueError("Le texte est vide.")
+
+    groups = DOC_TYPE_ATTRIBUTE_GROUPS.get(document_type) if split_attributes else None
+    if groups:
+        response, prompt_tokens, strategy = analyze_attribute_groups(
+            text, document_type, groups, llm_model, temperature, llm_env, select_content
+        )
+    else:
+        request = prepare_analysis(text, document_type, llm_model, select_content)
+        response = ask_analysis(request, llm_model, temperature, llm_env)
+        prompt_tokens, strategy = request.prompt_tokens, request.plan.strategy
+    if strategy != ContextStrategy.FULL:
+        logger.info("Texte trop long pour le prompt, stratégie %s", strategy)
 
-    response = analyze_file_text_llm(text, document_type, llm_model, temperature)
     data = clean_llm_response(document_type, response)
 
     return {
         "llm_response": response,
         "structured_data": data,
+        "prompt_tokens": prompt_tokens,
+        "context_strategy": strategy,
     }
 
 
 def analyze_file_text_llm(
-    text: str, document_type: str, llm_model: str = "mistral-medium-2508", temperature: float = 0.0
+    text: str,
+    document_type: str,
+    llm_model: str = "mistral-medium-2508",
+    temperature: float = 0.0,
+    llm_client: LLMClient | None = None,
 ):
-    llm_env = LLMClient()
+    llm_env = llm_client or LLMClient()
 
     question = get_prompt_from_attributes(select_attr(ATTRIBUTES, document_type))
     response_format = create_response_format(ATTRIBUTES, document_type)
@@ -111,10 +274,7 @@ def analyze_file_text_llm(
     if not text:
         raise ValueError("Le texte est vide.")
 
-    system_prompt = "Vous êtes un assistant IA qui analyse des documents juridiques."
-    user_prompt = f"Analyse le contexte suivant et réponds à la question : {question}\n\nContexte : {text}"
-
-    messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
+    messages = get_messages(question, text)
 
     response = llm_env.ask_llm(messages, model=llm_model, response_format=response_format, temperature=temperature)
 
@@ -2,11 +2,11 @@
 Module contenant les définitions d'attributs par type de document.
 """
 
-from .acte_engagement import ACTE_ENGAGEMENT_ATTRIBUTES
+from .acte_engagement import ACTE_ENGAGEMENT_ATTRIBUTE_GROUPS, ACTE_ENGAGEMENT_ATTRIBUTES
 from .att_sirene import ATT_SIRENE_ATTRIBUTES
 from .avenant import AVENANT_ATTRIBUTES
 from .bon_de_commande import BON_DE_COMMANDE_ATTRIBUTES
-from .ccap import CCAP_ATTRIBUTES
+from .ccap import CCAP_ATTRIBUTE_GROUPS, CCAP_ATTRIBUTES
 from .cctp import CCTP_ATTRIBUTES
 from .devis import DEVIS_ATTRIBUTES
 from .fiche_navette import FICHE_NAVETTE_ATTRIBUTES
@@ -26,4 +26,6 @@ __all__ = [
     "RIB_ATTRIBUTES",
     "SOUS_TRAITANCE_ATTRIBUTES",
     "ATT_SIRENE_ATTRIBUTES",
+    "ACTE_ENGAGEMENT_ATTRIBUTE_GROUPS",
+    "CCAP_ATTRIBUTE_GROUPS",
 ]
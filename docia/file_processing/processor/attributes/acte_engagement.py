@@ -464,3 +464,37 @@ Règles d’extraction :
         "output_field": "remise_catalogue",
     },
 }
+
+# Groupes d'attributs extraits par des requêtes distinctes (analyse par groupes, voir analyze_content)
+ACTE_ENGAGEMENT_ATTRIBUTE_GROUPS = {
+    "marche": [
+        "objet_marche",
+        "forme_marche",
+        "administration_beneficiaire",
+        "duree",
+        "code_cpv",
+        "mode_consultation",
+        "mode_reconduction",
+        "ligne_imputation_budgetaire",
+    ],
+    "titulaires": [
+        "societe_principale",
+        "siret_mandataire",
+        "siren_mandataire",
+        "rib_mandataire",
+        "cotraitants",
+        "sous_traitants",
+        "rib_autres",
+    ],
+    "montants_dates": [
+        "montant_ht",
+        "montant_ttc",
+        "montant_tva",
+        "montants_en_annexe",
+        "remise_catalogue",
+        "conserve_avance",
+        "date_signature_mandataire",
+        "date_signature_administration",
+        "date_notification",
+    ],
+}
@@ -652,3 +652,39 @@ CCAP_ATTRIBUTES = {
         },
     },
 }
+
+# Groupes d'attributs extraits par des requêtes distinctes (analyse par groupes, voir analyze_content).
+# L'introduction (définitions) est reprise dans chaque groupe.
+CCAP_ATTRIBUTE_GROUPS = {
+    "marche": [
+        "intro",
+        "objet_marche",
+        "id_marche",
+        "forme_marche",
+        "ccag",
+        "mode_consultation",
+        "regle_attribution_bc",
+        "mention_reconduction",
+        "debut_execution",
+        "code_cpv",
+    ],
+    "lots_durees_montants": [
+        "intro",
+        "lots",
+        "forme_marche_lots",
+        "duree_marche",
+        "duree_lots",
+        "montant_ht",
+        "montant_ht_lots",
+        "delai_execution_entite",
+    ],
+    "revision_prix": [
+        "intro",
+        "formule_revision_prix",
+        "index_reference",
+        "revision_prix",
+        "mois_zero_revision",
+        "clause_sauvegarde_revision",
+    ],
+    "garanties_penalites": ["intro", "avance", "retenue_garantie", "penalites"],
+}
@@ -2,10 +2,12 @@ import pandas as pd
 
 # Import des dictionnaires d'attributs depuis les fichiers séparés
 from .attributes import (
+    ACTE_ENGAGEMENT_ATTRIBUTE_GROUPS,
     ACTE_ENGAGEMENT_ATTRIBUTES,
     ATT_SIRENE_ATTRIBUTES,
     AVENANT_ATTRIBUTES,
     BON_DE_COMMANDE_ATTRIBUTES,
+    CCAP_ATTRIBUTE_GROUPS,
     CCAP_ATTRIBUTES,
     CCTP_ATTRIBUTES,
     DEVIS_ATTRIBUTES,
@@ -30,6 +32,12 @@ DOC_TYPE_ATTRIBUTES_MAPPING = {
     "sous_traitance": SOUS_TRAITANCE_ATTRIBUTES,
 }
 
+# Groupes d'attributs des types de document pouvant être analysés par groupes (une requête par groupe)
+DOC_TYPE_ATTRIBUTE_GROUPS = {
+    "acte_engagement": ACTE_ENGAGEMENT_ATTRIBUTE_GROUPS,
+    "ccap": CCAP_ATTRIBUTE_GROUPS,
+}
+
 # Génère le DataFrame ATTRIBUTES à partir des fichiers séparés
 rows = []
 for doc_type, attributes_dict in DOC_TYPE_ATTRIBUTES_MAPPING.items():
@@ -10,6 +10,9 @@ from docia.file_processing.llm.client import LLMClient
 
 logger = logging.getLogger("docia." + __name__)
 
+# Nombre de caractères du début du texte transmis comme « première page »
+FIRST_PAGE_CHARS = 2000
+
 
 def create_classification_prompt(filename: str, text: str, list_classification: dict) -> str:
     system_prompt = "Vous êtes un assistant qui aide à classer des fichiers en fonction de leur contenu."
@@ -32,7 +35,7 @@ def create_classification_prompt(filename: str, text: str, list_classification:
     
     Voici la première page du document :
     <DEBUT PAGE>
-    '{text[:2000]}'
+    '{text[:FIRST_PAGE_CHARS]}'
     <FIN PAGE>
 
     Format : répondez par une liste de catégories possibles (sans autre texte ni ponctuation).
@@ -42,7 +45,11 @@ def create_classification_prompt(filename: str, text: str, list_classification:
 
 
 def classify_file_with_llm(
-    filename: str, text: str, list_classification: dict, llm_model: str = "openweight-medium"
+    filename: str,
+    text: str,
+    list_classification: dict,
+    llm_model: str = "openweight-medium",
+    llm_client: LLMClient | None = None,
 ) -> str:
     """
     Classifie un fichier en fonction de son contenu en utilisant un LLM.
@@ -54,11 +61,12 @@ def classify_file_with_llm(
         api_key (str): Clé API pour le LLM
         base_url (str): URL de base pour le LLM
         llm_model (str): Modèle LLM à utiliser
+        llm_client (LLMClient): Client à réutiliser (par défaut : nouveau client)
 
     Returns:
         str: Classification du fichier
     """
-    llm_env = LLMClient()
+    llm_env = llm_client or LLMClient()
 
     prompt, system_prompt = create_classification_prompt(filename, text, list_classification)
 
@@ -78,17 +86,150 @@ def classify_file_with_llm(
     # Convertir la (nouvelle) réponse (list) en clé de classification (on prend la première catégorie trouvée)
     if not response or not isinstance(response, list):
         return "Non classifié"
+    return _first_classification_key(response, list_classification)
+
 
+def _first_classification_key(categories: list, list_classification: dict) -> str:
+    """Clé de la première catégorie reconnue d'une liste de noms complets, « Non classifié » sinon."""
     reversed_classification_ref = {value["nom_complet"]: key for key, value in list_classification.items()}
     result_classif_keys = []
-    for classif in response:
-        key_classif = reversed_classification_ref.get(classif)
+    for classif in categories:
+        key_classif = reversed_classification_ref.get(classif) if isinstance(classif, str) else None
         if key_classif:
             result_classif_keys.append(key_classif)
 
     return result_classif_keys[0] if len(result_classif_keys) > 0 else "Non classifié"
 
 
+def create_batch_classification_prompt(documents: dict[str, tuple[str, str]], list_classification: dict) -> str:
+    """
+    Prompt de classification de plusieurs documents en une seule requête.
+
+    Args:
+        documents: {identifiant: (nom du fichier, texte)} ; l'identifiant est repris dans la réponse
+        list_classification: Dictionnaire de classification
+    """
+    system_prompt = "Vous êtes un assistant qui aide à classer des fichiers en fonction de leur contenu."
+    categories_str = ",\n".join(
+        f"'{v['nom_complet']}': {v['description']}" if v["description"] else f"'{v['nom_complet']}'"
+        for v in list_classification.values()
+    )
+    documents_str = "\n\n".join(
+        f"""<DEBUT DOCUMENT id="{doc_id}">
+    Nom du document : '{filename}'
+    Première page :
+    '{(text or "")[:FIRST_PAGE_CHARS]}'
+    <FIN DOCUMENT id="{doc_id}">"""
+        for doc_id, (filename, text) in documents.items()
+    )
+    prompt = f"""
+    Pour chacun des documents ci-dessous, vous devez déterminer à quelles catégories il appartient 
+    parmi les catégories suivantes. Pour chaque document, la réponse est une liste de catégories possibles, 
+    classée par ordre de correspondance avec le contenu du document.
+    
+    Voici la liste des catégories possibles :
+    {categories_str}
+    
+    Le titre du document est un élément essentiel pour la classification, mais il peut être trompeur : 
+    il faut aussi regarder le contenu. Chaque document est à classer indépendamment des autres.
+    Si le type d'un document ne correspond à aucune des catégories, répondez "Non classifié".
+    
+    Voici les {len(documents)} documents :
+    {documents_str}
+
+    Format : répondez par une liste contenant, pour chaque document, son identifiant (id) 
+    et sa liste de catégories possibles.
+    """
+
+    return prompt, system_prompt
+
+
+def classify_files_batch_with_llm(
+    documents: dict[str, tuple[str, str]],
+    list_classification: dict,
+    llm_model: str = "openweight-medium",
+    llm_client: LLMClient | None = None,
+) -> dict[str, str]:
+    """
+    Classifie plusieurs fichiers en une seule requête au LLM.
+
+    Les documents absents de la réponse, en double ou dont la réponse est mal formée sont classifiés
+    individuellement avec classify_file_with_llm (tous si la réponse n'est pas un JSON valide).
+    Les erreurs de l'API sont propagées.
+
+    Args:
+        documents: {identifiant: (nom du fichier, texte)}
+        list_classification: Dictionnaire de classification
+        llm_model: Modèle LLM à utiliser
+        llm_client: Client à réutiliser (par défaut : nouveau client)
+
+    Returns:
+        dict: {identifiant: classification}
+    """
+    llm_client = llm_client or LLMClient()
+    if len(documents) == 1:
+        ((doc_id, (filename, text)),) = documents.items()
+        return {doc_id: classify_file_with_llm(filename, text, list_classification, llm_model, llm_client)}
+
+    # Identifiants courts dans le prompt : moins de tokens et moins de risques de recopie erronée
+    short_ids = {str(i): doc_id for i, doc_id in enumerate(documents, start=1)}
+    prompt, system_prompt = create_batch_classification_prompt(
+        {short_id: documents[doc_id] for short_id, doc_id in short_ids.items()}, list_classification
+    )
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "ClassificationBatch",
+            "strict": True,
+            "schema": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string", "enum": list(short_ids)},
+                        "categories": {"type": "array", "items": {"type": "string"}},
+                    },
+                    "required": ["id", "categories"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+    }
+    messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": prompt}]
+
+    try:
+        response = llm_client.ask_llm(messages=messages, model=llm_model, response_format=response_format)
+    except ValueError:
+        logger.warning("Réponse mal formée à la classification groupée de %s documents", len(documents))
+        response = None
+
+    # Seules les entrées bien formées et uniques sont retenues
+    categories_by_id = {}
+    duplicated_ids = set()
+    for item in response if isinstance(response, list) else []:
+        if not isinstance(item, dict) or not isinstance(item.get("categories"), list):
+            continue
+        doc_id = short_ids.get(str(item.get("id")))
+        if doc_id is None:
+            continue
+        if doc_id in categories_by_id:
+            duplicated_ids.add(doc_id)
+        categories_by_id[doc_id] = item["categories"]
+
+    results = {
+        doc_id: _first_classification_key(categories, list_classification)
+        for doc_id, categories in categories_by_id.items()
+        if doc_id not in duplicated_ids
+    }
+    missing = [doc_id for doc_id in documents if doc_id not in results]
+    if missing:
+        logger.warning("Classification groupée : %s/%s documents reclassifiés un par un", len(missing), len(documents))
+    for doc_id in missing:
+        filename, text = documents[doc_id]
+        results[doc_id] = classify_file_with_llm(filename, text, list_classification, llm_model, llm_client)
+    return results
+
+
 def classify_files(
     dfFiles: pd.DataFrame, list_classification: dict, llm_model: str = "openweight-medium", max_workers: int = 4
 ) -> pd.DataFrame:
@@ -0,0 +1,109 @@
+"""
+Index lexical BM25 incrémental pour la recherche hybride (voir relevant_content).
+
+Les termes sont hachés (HashingVectorizer) : aucun vocabulaire à réapprendre quand des textes sont ajoutés,
+seules les fréquences documentaires sont mises à jour. Les occurrences sont conservées dans une matrice
+creuse CSR à laquelle les nouveaux textes sont ajoutés, et l'index peut être enregistré puis rechargé.
+"""
+
+import io
+import re
+import unicodedata
+
+import scipy.sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+import numpy as np
+
+# Mots outils français, sans accents (les textes sont comparés sans accents)
+FRENCH_STOP_WORDS = frozenset(
+    """
+    a afin ai au aux avec avoir c ce ceci cela ces cet cette ceux chaque ci d dans de des du elle elles en
+    entre est et etre eux il ils j je l la le les leur leurs lui m ma mais me meme mes moi mon n ne ni nos
+    notre nous on ont ou par pas peut pour qu que quel quelle quels qui s sa sans se selon ses si son sont
+    sous sur t ta te tes toi ton tous tout toute toutes tu un une vos votre vous y
+    """.split()
+)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Mots du texte en minuscules, sans accents ni mots outils (les nombres sont conservés : article 12)."""
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return [token for token in TOKEN_RE.findall(text) if token not in FRENCH_STOP_WORDS]
+
+
+class LexicalIndex:
+    """Index BM25 : add() ajoute des textes, scores() note chaque texte indexé pour chaque requête."""
+
+    def __init__(self, n_features: int = 2**18, k1: float = 1.5, b: float = 0.75):
+        self.n_features = n_features
+        self.k1 = k1
+        self.b = b
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            tokenizer=tokenize,
+            token_pattern=None,
+            lowercase=False,
+            alternate_sign=False,
+            norm=None,
+        )
+        # Nombre d'occurrences de chaque terme (colonnes) dans chaque texte (lignes)
+        self.term_counts = scipy.sparse.csr_matrix((0, n_features), dtype=np.float32)
+        # Nombre de textes contenant chaque terme
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self._weights = None
+
+    def __len__(self) -> int:
+        return self.term_counts.shape[0]
+
+    def add(self, texts: list[str]):
+        counts = self.vectorizer.transform(texts).astype(np.float32).tocsr()
+        counts.sum_duplicates()
+        self.term_counts = scipy.sparse.vstack([self.term_counts, counts], format="csr")
+        self.doc_freq += np.bincount(counts.indices, minlength=self.n_features)
+        self._weights = None
+
+    def _bm25_weights(self) -> scipy.sparse.csr_matrix:
+        """Poids BM25 (saturation et normalisation par la longueur) de chaque terme de chaque texte."""
+        if self._weights is None:
+            counts = self.term_counts
+            lengths = np.asarray(counts.sum(axis=1)).ravel()
+            avg_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+            row_norms = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+            data = counts.data * (self.k1 + 1) / (counts.data + np.repeat(row_norms, np.diff(counts.indptr)))
+            self._weights = scipy.sparse.csr_matrix((data, counts.indices, counts.indptr), shape=counts.shape)
+        return self._weights
+
+    def scores(self, queries: list[str]) -> np.ndarray:
+        """Score BM25 de chaque texte indexé (colonnes) pour chaque requête (lignes)."""
+        nb_texts = len(self)
+        idf = np.log1p((nb_texts - self.doc_freq + 0.5) / (self.doc_freq + 0.5)).astype(np.float32)
+        query_terms = (self.vectorizer.transform(queries) > 0).astype(np.float32)
+        query_terms = query_terms.multiply(idf).tocsr()
+        return (query_terms @ self._bm25_weights().T).toarray()
+
+    def save(self, file):
+        """Enregistre l'index dans un fichier ouvert en écriture binaire."""
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            params=np.array([self.n_features, self.k1, self.b]),
+            data=self.term_counts.data,
+            indices=self.term_counts.indices,
+            indptr=self.term_counts.indptr,
+            doc_freq=self.doc_freq,
+        )
+        file.write(buffer.getvalue())
+
+    @classmethod
+    def load(cls, file) -> "LexicalIndex":
+        arrays = np.load(io.BytesIO(file.read()))
+        n_features, k1, b = arrays["params"]
+        index = cls(n_features=int(n_features), k1=float(k1), b=float(b))
+        index.term_counts = scipy.sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]), shape=(len(arrays["indptr"]) - 1, int(n_features))
+        )
+        index.doc_freq = arrays["doc_freq"]
+        return index
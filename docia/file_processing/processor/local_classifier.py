@@ -0,0 +1,192 @@
+"""
+Pré-classification locale des documents, avant l'appel au LLM.
+
+Deux niveaux :
+- des règles sur le nom du fichier pour les pièces triviales à reconnaître (Kbis, RIB, DC4, fiche navette...) ;
+- un modèle linéaire (TF-IDF sur le nom du fichier et la première page, régression logistique calibrée)
+  entraîné sur les classifications déjà produites par le LLM (commande train_local_classifier).
+
+La confiance renvoyée est mesurée : probabilité calibrée pour le modèle, précision de la règle face aux
+classifications du LLM pour les règles (mesurée par train_local_classifier et enregistrée avec le modèle).
+Une règle non mesurée n'est pas utilisée. Au-delà de LOCAL_CLASSIFIER_THRESHOLD, la classification locale
+est retenue et le LLM n'est pas appelé.
+"""
+
+import functools
+import io
+import logging
+import os.path
+import pickle
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.compose import ColumnTransformer
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+import numpy as np
+
+from docia.file_processing.processor.classifier import FIRST_PAGE_CHARS
+
+logger = logging.getLogger("docia." + __name__)
+
+MODEL_VERSION = 2
+
+# Nombre minimal d'exemples par classe (validation croisée de la calibration)
+CALIBRATION_FOLDS = 3
+
+# (classification, motif sur le nom de fichier normalisé) : le nom doit commencer par le motif,
+# un nom comme « certificat changement rib » ne doit pas être pris pour un RIB.
+# Un nom contenant les motifs de plusieurs règles (« dc1 dc2 », « rib et kbis ») n'est pas classifié.
+RULES = [
+    ("kbis", re.compile(r"\b(extrait )?k ?bis\b")),
+    ("rib", re.compile(r"\b(rib|releve d identite bancaire)\b")),
+    ("sous_traitance", re.compile(r"\b(formulaire )?dc ?4\b")),
+    ("fiche_navette", re.compile(r"\bfiche navette\b")),
+    ("lettre_candidature_dc1", re.compile(r"\b(formulaire )?dc ?1\b")),
+    ("lettre_candidature_dc2", re.compile(r"\b(formulaire )?dc ?2\b")),
+]
+
+
+@dataclass
+class LocalPrediction:
+    classification: str
+    confidence: float
+    source: str  # "rule" ou "model"
+
+
+def normalize_filename(filename: str) -> str:
+    """Nom du fichier sans chemin ni extension, en minuscules, sans accents ni séparateurs."""
+    name = os.path.splitext(os.path.basename(filename))[0]
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.split(r"[\W_]+", name)).strip()
+
+
+def classify_by_rules(filename: str) -> str | None:
+    """
+    Classification déduite du seul nom de fichier, ou None si aucune règle ne s'applique
+    ou si le nom correspond à plusieurs règles.
+    """
+    name = normalize_filename(filename)
+    mentioned = {classification for classification, pattern in RULES if pattern.search(name)}
+    if len(mentioned) != 1:
+        return None
+    classification = mentioned.pop()
+    pattern = dict(RULES)[classification]
+    return classification if pattern.match(name) else None
+
+
+def measure_rules(filenames: list[str], labels: list[str]) -> dict[str, tuple[int, float]]:
+    """
+    Précision de chaque règle face aux classifications de référence (LLM).
+
+    Returns:
+        dict: classification de la règle -> (nombre de fichiers reconnus, part correctement classifiée)
+    """
+    matches = {}
+    for filename, label in zip(filenames, labels, strict=True):
+        classification = classify_by_rules(filename)
+        if classification:
+            matches.setdefault(classification, []).append(classification == label)
+    return {classification: (len(m), sum(m) / len(m)) for classification, m in matches.items()}
+
+
+def _features(filenames: list[str], texts: list[str | None]) -> np.ndarray:
+    return np.array(
+        [[normalize_filename(f), (t or "")[:FIRST_PAGE_CHARS]] for f, t in zip(filenames, texts, strict=True)],
+        dtype=object,
+    )
+
+
+def build_model() -> Pipeline:
+    features = ColumnTransformer(
+        [
+            # n-grammes de caractères : robustes aux abréviations et fautes dans les noms de fichiers
+            ("filename", TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True), 0),
+            (
+                "text",
+                TfidfVectorizer(
+                    ngram_range=(1, 2), min_df=2, max_features=50_000, sublinear_tf=True, strip_accents="unicode"
+                ),
+                1,
+            ),
+        ]
+    )
+    classifier = CalibratedClassifierCV(
+        LogisticRegression(C=10.0, max_iter=1000), method="sigmoid", cv=CALIBRATION_FOLDS
+    )
+    return Pipeline([("features", features), ("classifier", classifier)])
+
+
+def train_model(filenames: list[str], texts: list[str | None], labels: list[str]) -> Pipeline:
+    """Entraîne le modèle ; chaque classe doit compter au moins CALIBRATION_FOLDS exemples."""
+    model = build_model()
+    model.fit(_features(filenames, texts), labels)
+    return model
+
+
+def predict_with_model(model: Pipeline, filenames: list[str], texts: list[str | None]) -> list[LocalPrediction]:
+    probas = model.predict_proba(_features(filenames, texts))
+    best = probas.argmax(axis=1)
+    return [
+        LocalPrediction(classification=str(model.classes_[i]), confidence=float(p[i]), source="model")
+        for i, p in zip(best, probas, strict=True)
+    ]
+
+
+def save_model(model: Pipeline, path: str, rule_confidences: dict[str, float] | None = None):
+    """Enregistre le modèle et la confiance mesurée de chaque règle (cf. measure_rules)."""
+    content = pickle.dumps({"version": MODEL_VERSION, "model": model, "rule_confidences": rule_confidences or {}})
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(content))
+    _load.cache_clear()
+
+
+@functools.cache
+def _load(path: str) -> dict | None:
+    if not default_storage.exists(path):
+        logger.info("Pas de modèle de classification locale (%s)", path)
+        return None
+    with default_storage.open(path, "rb") as f:
+        data = pickle.load(io.BytesIO(f.read()))  # noqa: S301 (fichier produit par train_local_classifier)
+    if data.get("version") != MODEL_VERSION:
+        logger.warning("Modèle de classification locale obsolète (%s), à réentraîner", path)
+        return None
+    return data
+
+
+def load_model(path: str) -> Pipeline | None:
+    """Modèle enregistré (chargé une fois par processus), ou None s'il n'a pas encore été entraîné."""
+    data = _load(path)
+    return data["model"] if data else None
+
+
+def load_rule_confidences(path: str) -> dict[str, float]:
+    """Confiance mesurée de chaque règle, enregistrée avec le modèle (vide s'il n'a pas été entraîné)."""
+    data = _load(path)
+    return data["rule_confidences"] if data else {}
+
+
+def classify_file_locally(filename: str, text: str | None) -> LocalPrediction | None:
+    """
+    Classification locale la plus probable, avec sa confiance.
+    Une règle n'est retenue que si sa précision a été mesurée par train_local_classifier ;
+    renvoie None si aucune règle mesurée ne s'applique et qu'aucun modèle n'est disponible.
+    """
+    path = settings.LOCAL_CLASSIFIER_PATH
+    classification = classify_by_rules(filename)
+    confidence = load_rule_confidences(path).get(classification)
+    if classification and confidence is not None:
+        return LocalPrediction(classification=classification, confidence=confidence, source="rule")
+    model = load_model(path)
+    if model is None:
+        return None
+    return predict_with_model(model, [filename], [text])[0]
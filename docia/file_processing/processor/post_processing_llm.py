@@ -5,51 +5,31 @@ import re
 from schwifty import IBAN
 from schwifty.exceptions import SchwiftyException
 
+from .validation import correct_iban, is_valid_iban
+
 logger = logging.getLogger("docia." + __name__)
 
 
 def check_consistency_iban(iban: str) -> bool:
     """
-    Vérifie la validité d'un IBAN via schwifty (ISO 13616 + clé RIB française si applicable).
-    Format accepté : IBAN français 27 caractères (avec ou sans espaces), ou chaîne vide / None.
+    Vérifie la validité d'un IBAN (ISO 13616 + clé RIB française si applicable, voir validation).
+    Format accepté : IBAN (avec ou sans espaces), ou chaîne vide / None.
     Retourne True si valide ou vide, False sinon.
     """
     if not iban:
         return True
-
-    try:
-        IBAN(iban, validate_bban=True)
-        return True
-    except SchwiftyException:
-        return False
+    return is_valid_iban(iban)
 
 
 def try_correct_false_iban(iban: str) -> str | None:
     """
     Tente de corriger un IBAN invalide en supposant une erreur d'un seul caractère
     (ex. lecture OCR). Teste toutes les possibilités à chaque position ; si une seule
-    correction donne un IBAN cohérent (schwifty), la renvoie, sinon None.
+    correction donne un IBAN cohérent, la renvoie, sinon None.
     """
     if not iban or len(iban) != 27:
         return None
-
-    valid_candidates: set[str] = set()
-
-    for i in range(27):
-        if i <= 1:
-            possible_chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-        else:
-            possible_chars = "0123456789"
-        for char in possible_chars:
-            if char == iban[i]:
-                continue
-            candidate = iban[:i] + char + iban[i + 1 :]
-            if check_consistency_iban(candidate):
-                valid_candidates.add(candidate)
-
-    if len(valid_candidates) == 1:
-        return valid_candidates.pop()
-    return None
+    return correct_iban(iban)
 
 
 ################################################################################
@@ -0,0 +1,162 @@
+"""
+Recalcul des données structurées à partir des réponses du LLM déjà enregistrées.
+
+Après une modification des fonctions de nettoyage (CLEAN_FUNCTIONS), structured_data est recalculé en
+réappliquant clean_llm_response à llm_response, sans nouvel appel au LLM. Les documents sont lus par lots
+(curseur côté serveur), nettoyés en parallèle dans un pool de processus, et seuls les documents dont les
+données changent sont mis à jour.
+"""
+
+import itertools
+import json
+import logging
+import multiprocessing
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from django.db import models
+from django.utils import timezone
+
+from docia.documents.models import Document
+
+from .post_processing_llm import clean_llm_response
+
+logger = logging.getLogger("docia." + __name__)
+
+# Lots soumis au pool en avance par processus (les autres restent dans le curseur)
+PENDING_BATCHES_PER_WORKER = 2
+
+# (id, classification, llm_response, structured_data)
+Row = tuple[object, str | None, dict, dict | None]
+
+
+@dataclass(frozen=True)
+class RowResult:
+    id: object
+    classification: str | None
+    # Nouvelles données, None si elles sont inchangées ou en erreur
+    structured_data: dict | None = None
+    changed_fields: tuple[str, ...] = ()
+    error: str | None = None
+
+
+@dataclass
+class RecomputeReport:
+    total: int = 0
+    changed: int = 0
+    errors: int = 0
+    # Documents modifiés par type de document, et par champ de premier niveau
+    changed_by_classification: Counter = field(default_factory=Counter)
+    changed_fields: Counter = field(default_factory=Counter)
+
+    @property
+    def unchanged(self) -> int:
+        return self.total - self.changed - self.errors
+
+    def add(self, result: RowResult):
+        self.total += 1
+        if result.error is not None:
+            self.errors += 1
+        elif result.changed_fields:
+            self.changed += 1
+            self.changed_by_classification[result.classification] += 1
+            self.changed_fields.update(result.changed_fields)
+
+
+def recompute_document_data(
+    classification: str | None, llm_response: dict, structured_data: dict | None
+) -> tuple[dict, tuple[str, ...]]:
+    """
+    Données structurées recalculées à partir de la réponse du LLM, et champs de premier niveau modifiés
+    par rapport aux données actuelles (aucun si elles sont identiques).
+    """
+    # Aller-retour JSON : données telles qu'elles seront relues en base (tuples -> listes...)
+    data = json.loads(json.dumps(clean_llm_response(classification, llm_response)))
+    if data == structured_data:
+        return data, ()
+    if not isinstance(structured_data, dict):
+        return data, tuple(sorted(data))
+    keys = data.keys() | structured_data.keys()
+    return data, tuple(sorted(key for key in keys if data.get(key) != structured_data.get(key)))
+
+
+def recompute_rows(rows: list[Row]) -> list[RowResult]:
+    """Recalcule les données d'un lot de documents (exécuté dans les processus du pool, sans accès à la base)."""
+    results = []
+    for document_id, classification, llm_response, structured_data in rows:
+        try:
+            data, changed_fields = recompute_document_data(classification, llm_response, structured_data)
+        except Exception as e:
+            results.append(RowResult(document_id, classification, error=f"{type(e).__name__}: {e}"))
+            continue
+        results.append(
+            RowResult(document_id, classification, data if changed_fields else None, changed_fields=changed_fields)
+        )
+    return results
+
+
+def _map_batches(batches: Iterable[list[Row]], workers: int) -> Iterator[list[RowResult]]:
+    """Résultats de chaque lot, dans l'ordre, avec au plus PENDING_BATCHES_PER_WORKER lots en attente par processus."""
+    if workers <= 1:
+        yield from map(recompute_rows, batches)
+        return
+
+    # fork : les processus héritent de la configuration Django, ils n'utilisent pas la connexion à la base
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(recompute_rows, batch))
+            if len(pending) >= workers * PENDING_BATCHES_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def recompute_structured_data(
+    qs_documents: models.QuerySet | None = None,
+    *,
+    batch_size: int = 500,
+    workers: int = 1,
+    dry_run: bool = False,
+    on_batch: Callable[[RecomputeReport], None] | None = None,
+) -> RecomputeReport:
+    """
+    Recalcule structured_data pour les documents ayant une réponse du LLM enregistrée.
+
+    Args:
+        qs_documents: Documents à traiter (tous par défaut), par exemple filtrés par classification
+        batch_size: Nombre de documents lus, nettoyés et mis à jour par lot
+        workers: Nombre de processus de nettoyage (1 : dans le processus courant)
+        dry_run: Calcule les différences sans mettre à jour les documents
+        on_batch: Appelée après chaque lot avec le bilan en cours
+
+    Returns:
+        Bilan : documents traités, modifiés, en erreur, et modifications par type de document et par champ
+    """
+    if qs_documents is None:
+        qs_documents = Document.objects.all()
+    rows = (
+        qs_documents.filter(llm_response__isnull=False)
+        .order_by()
+        .values_list("id", "classification", "llm_response", "structured_data")
+        .iterator(chunk_size=batch_size)
+    )
+    batches = (list(batch) for batch in itertools.batched(rows, batch_size))
+
+    report = RecomputeReport()
+    for results in _map_batches(batches, workers):
+        now = timezone.now()
+        documents = []
+        for result in results:
+            report.add(result)
+            if result.error is not None:
+                logger.warning("Données structurées du document %s non recalculées : %s", result.id, result.error)
+            elif result.changed_fields:
+                documents.append(Document(id=result.id, structured_data=result.structured_data, updated_at=now))
+        if documents and not dry_run:
+            Document.objects.bulk_update(documents, ["structured_data", "updated_at"], batch_size=batch_size)
+        if on_batch is not None:
+            on_batch(report)
+    return report
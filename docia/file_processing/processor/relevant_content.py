@@ -0,0 +1,310 @@
+"""
+Sélection du contenu pertinent d'un document long avant l'analyse par le LLM (RAG).
+
+Le texte est découpé en morceaux (chunks) ; pour chaque requête de recherche ("search") des attributs
+du type de document, les morceaux les plus proches sont retenus selon un score hybride :
+similarité des embeddings (sémantique) et BM25 (lexical). Le début du document est toujours conservé.
+Les embeddings sont enregistrés par hash du texte (ChunkEmbedding), partagés entre documents et réutilisés
+lors d'une nouvelle analyse ; les morceaux de chaque document (DocumentChunk) y font référence.
+"""
+
+import functools
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db.transaction import atomic
+
+import numpy as np
+
+from docia.documents.models import ChunkEmbedding, Document, DocumentChunk
+from docia.file_processing.llm.client import LLMClient
+from docia.file_processing.llm.tokens import count_tokens
+from docia.file_processing.processor.attributes_query import DOC_TYPE_ATTRIBUTES_MAPPING
+from docia.file_processing.processor.lexical_index import LexicalIndex
+from docia.file_processing.processor.text_extraction.pages import split_pages
+
+logger = logging.getLogger("docia." + __name__)
+
+# Chevauchement des fenêtres, uniquement quand un passage sans frontière structurelle doit être coupé
+CHUNK_OVERLAP_TOKENS = 50
+CONTEXT_SEPARATOR = "\n\n---------------------------------\n\n"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Début de section : titre markdown (dont les feuilles des classeurs, "## Feuille"), article, chapitre,
+# titre ou numérotation ("3.2 Pénalités") en début de ligne
+SECTION_RE = re.compile(
+    r"^(?:#{1,6} |(?:ARTICLE|Article|Art\.)\s*\d|(?:CHAPITRE|Chapitre|TITRE|Titre)\s|\d+(?:\.\d+)*[.)]?\s+[A-ZÀ-Ý])",
+    re.MULTILINE,
+)
+# Frontières utilisées pour couper un passage trop long, de la plus forte à la plus faible :
+# (motif, True si la coupure se fait avant le motif qui reste dans le passage suivant)
+BOUNDARIES = [
+    (SECTION_RE, True),
+    (re.compile(r"\n[ \t]*\n\s*"), False),  # paragraphes
+    (re.compile(r"\n"), False),  # lignes (lignes de tableau notamment)
+    (re.compile(r"(?<=[.!?;:])\s+"), False),  # phrases
+]
+
+
+@dataclass(frozen=True)
+class Chunk:
+    index: int
+    start: int
+    end: int
+    text: str
+    # Page du morceau (à partir de 1)
+    page: int = 1
+
+    @property
+    def text_hash(self) -> str:
+        return text_hash(self.text)
+
+    @functools.cached_property
+    def nb_tokens(self) -> int:
+        return count_tokens(self.text)
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _cut(text: str, start: int, end: int, pattern: re.Pattern, keep_match: bool) -> list[tuple[int, int]]:
+    """Coupe le passage à chaque occurrence du motif (passages vides exclus)."""
+    spans = []
+    for match in pattern.finditer(text, start, end):
+        spans.append((start, match.start()))
+        start = match.start() if keep_match else match.end()
+    spans.append((start, end))
+    return [span for span in (_strip_span(text, s, e) for s, e in spans) if span[0] < span[1]]
+
+
+def _windows(text: str, start: int, end: int, max_tokens: int) -> list[tuple[int, int]]:
+    """Fenêtres d'environ max_tokens tokens se chevauchant de CHUNK_OVERLAP_TOKENS, coupées sur un espace."""
+    chars_per_token = (end - start) / max(count_tokens(text[start:end]), 1)
+    size = max(int(max_tokens * chars_per_token), 1)
+    overlap = min(int(CHUNK_OVERLAP_TOKENS * chars_per_token), size // 2)
+    windows = []
+    while True:
+        window_end = min(start + size, end)
+        if window_end < end:
+            space = text.rfind(" ", start + size // 2, window_end)
+            if space > 0:
+                window_end = space
+        windows.append((start, window_end))
+        if window_end >= end:
+            return windows
+        start = max(window_end - overlap, start + 1)
+
+
+def _split_span(text: str, start: int, end: int, max_tokens: int, level: int = 0) -> list[tuple[int, int]]:
+    """Découpe un passage en passages d'au plus max_tokens tokens, à la frontière la plus forte possible."""
+    if count_tokens(text[start:end]) <= max_tokens:
+        return [(start, end)]
+    for current_level in range(level, len(BOUNDARIES)):
+        pattern, keep_match = BOUNDARIES[current_level]
+        parts = _cut(text, start, end, pattern, keep_match)
+        if len(parts) > 1:
+            return [span for s, e in parts for span in _split_span(text, s, e, max_tokens, current_level)]
+    return _windows(text, start, end, max_tokens)
+
+
+def split_into_chunks(text: str, max_tokens: int | None = None) -> list[Chunk]:
+    """
+    Découpe le texte en morceaux d'au plus max_tokens tokens en suivant sa structure : pages, sections
+    (titres, articles), paragraphes, lignes puis phrases. Les passages courts consécutifs d'une même page
+    sont regroupés, sans dépasser max_tokens ; une nouvelle section commence un nouveau morceau dès que
+    le morceau en cours a atteint la moitié de la taille cible. Les morceaux ne se chevauchent que lorsqu'un passage
+    sans aucune frontière doit être coupé.
+    """
+    max_tokens = max_tokens or settings.RELEVANT_CONTENT_CHUNK_TOKENS
+    pieces = []
+    for page, (page_start, page_end) in enumerate(split_pages(text), start=1):
+        page_start, page_end = _strip_span(text, page_start, page_end)
+        if page_start < page_end:
+            pieces += [(s, e, page) for s, e in _split_span(text, page_start, page_end, max_tokens)]
+
+    groups = []  # [début, fin, page, tokens]
+    for start, end, page in pieces:
+        nb_tokens = count_tokens(text[start:end])
+        if groups and groups[-1][2] == page:
+            current = groups[-1]
+            new_section = SECTION_RE.match(text, start) is not None and current[3] >= max_tokens // 2
+            if start >= current[1] and current[3] + nb_tokens <= max_tokens and not new_section:
+                current[1], current[3] = end, current[3] + nb_tokens
+                continue
+        groups.append([start, end, page, nb_tokens])
+
+    return [
+        Chunk(index=index, start=start, end=end, text=text[start:end], page=page)
+        for index, (start, end, page, _) in enumerate(groups)
+    ]
+
+
+def search_queries(document_type: str, attributes: list[str] | None = None) -> list[str]:
+    """
+    Requêtes de recherche (distinctes et non vides) des attributs du type de document,
+    limitées à une partie des attributs si attributes est renseigné.
+    """
+    definitions = DOC_TYPE_ATTRIBUTES_MAPPING.get(document_type, {})
+    if attributes is not None:
+        definitions = {name: definitions[name] for name in attributes if name in definitions}
+    queries = ((definition.get("search") or "").strip() for definition in definitions.values())
+    return list(dict.fromkeys(query for query in queries if query))
+
+
+def get_embeddings(texts: list[str], model: str, llm_client: LLMClient) -> dict[str, ChunkEmbedding]:
+    """
+    Embeddings des textes, par hash du texte.
+    Seuls les textes absents du stock (ChunkEmbedding) sont envoyés à l'API, puis ajoutés au stock.
+    """
+    texts_by_hash = {text_hash(text): text for text in texts}
+    embeddings = {
+        embedding.text_hash: embedding
+        for embedding in ChunkEmbedding.objects.filter(embedding_model=model, text_hash__in=texts_by_hash)
+    }
+    missing = [h for h in texts_by_hash if h not in embeddings]
+    if not missing:
+        return embeddings
+
+    logger.info("Embedding de %s/%s textes (%s)", len(missing), len(texts_by_hash), model)
+    vectors = llm_client.embed([texts_by_hash[h] for h in missing], model=model)
+    # ignore_conflicts : un autre worker a pu ajouter le même texte entre-temps, les lignes sont relues
+    ChunkEmbedding.objects.bulk_create(
+        (
+            ChunkEmbedding(text_hash=h, embedding_model=model, vector=np.asarray(vector, dtype=np.float16).tobytes())
+            for h, vector in zip(missing, vectors, strict=True)
+        ),
+        ignore_conflicts=True,
+    )
+    embeddings.update(
+        (embedding.text_hash, embedding)
+        for embedding in ChunkEmbedding.objects.filter(embedding_model=model, text_hash__in=missing)
+    )
+    return embeddings
+
+
+def to_vector(embedding: ChunkEmbedding) -> np.ndarray:
+    return np.frombuffer(embedding.vector, dtype=np.float16).astype(np.float32)
+
+
+def save_chunks(document: Document, chunks: list[Chunk], model: str, embeddings: dict[str, ChunkEmbedding]):
+    """Enregistre les morceaux du document et leur embedding, s'ils ont changé depuis la dernière analyse."""
+    stored = document.chunks.filter(embedding_model=model).order_by("index")
+    if list(stored.values_list("index", "start", "end", "page", "text_hash")) != [
+        (c.index, c.start, c.end, c.page, c.text_hash) for c in chunks
+    ]:
+        with atomic():
+            stored.delete()
+            DocumentChunk.objects.bulk_create(
+                DocumentChunk(
+                    document=document,
+                    index=chunk.index,
+                    start=chunk.start,
+                    end=chunk.end,
+                    page=chunk.page,
+                    text_hash=chunk.text_hash,
+                    embedding_model=model,
+                    embedding=embeddings[chunk.text_hash],
+                )
+                for chunk in chunks
+            )
+
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    """Normalisation min-max de chaque ligne (1 si tous les scores de la ligne sont égaux)."""
+    low = scores.min(axis=1, keepdims=True)
+    span = scores.max(axis=1, keepdims=True) - low
+    return np.divide(scores - low, span, out=np.ones_like(scores), where=span > 0)
+
+
+def hybrid_scores(
+    query_vectors: np.ndarray,
+    chunk_vectors: np.ndarray,
+    queries: list[str],
+    chunk_texts: list[str],
+    semantic_weight: float,
+) -> np.ndarray:
+    """Score de chaque morceau (colonnes) pour chaque requête (lignes), entre 0 et 1."""
+    query_vectors = query_vectors / np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+    chunk_vectors = chunk_vectors / np.maximum(np.linalg.norm(chunk_vectors, axis=1, keepdims=True), 1e-12)
+    semantic = _min_max(query_vectors @ chunk_vectors.T)
+
+    lexical_index = LexicalIndex()
+    lexical_index.add(chunk_texts)
+    lexical = _min_max(lexical_index.scores(queries))
+    return semantic_weight * semantic + (1 - semantic_weight) * lexical
+
+
+def merge_spans(text: str, chunks: list[Chunk]) -> list[tuple[int, int]]:
+    """
+    Positions (début, fin) des passages couverts par les morceaux, fusionnés s'ils se chevauchent
+    ou ne sont séparés que par des espaces.
+    """
+    spans = []
+    for chunk in sorted(chunks, key=lambda c: c.start):
+        if spans and (chunk.start <= spans[-1][1] or not text[spans[-1][1] : chunk.start].strip()):
+            spans[-1] = (spans[-1][0], max(spans[-1][1], chunk.end))
+        else:
+            spans.append((chunk.start, chunk.end))
+    return spans
+
+
+def select_relevant_content(
+    document: Document,
+    text: str,
+    queries: list[str],
+    top_k: int | None = None,
+    semantic_weight: float | None = None,
+    llm_client: LLMClient | None = None,
+    max_tokens: int | None = None,
+) -> str:
+    """
+    Contenu pertinent du document pour les requêtes : les top_k meilleurs morceaux de chaque requête
+    et le premier morceau, dans l'ordre du texte, les passages contigus étant fusionnés.
+    max_tokens : taille maximale du contenu ; les morceaux sont alors retenus par rang (le meilleur de chaque
+    requête, puis le deuxième...) tant qu'ils tiennent dans la limite.
+    """
+    top_k = top_k or settings.RELEVANT_CONTENT_TOP_K
+    if semantic_weight is None:
+        semantic_weight = settings.RELEVANT_CONTENT_SEMANTIC_WEIGHT
+    model = settings.RELEVANT_CONTENT_EMBEDDING_MODEL
+    llm_client = llm_client or LLMClient()
+
+    chunks = split_into_chunks(text)
+    if not chunks or not queries:
+        return text
+
+    # Un seul appel à l'API pour les morceaux et les requêtes absents du stock ; les requêtes étant fixes
+    # par type de document, leurs embeddings sont calculés une fois pour toutes
+    embeddings = get_embeddings([chunk.text for chunk in chunks] + queries, model, llm_client)
+    save_chunks(document, chunks, model, embeddings)
+    chunk_vectors = np.vstack([to_vector(embeddings[chunk.text_hash]) for chunk in chunks])
+    query_vectors = np.vstack([to_vector(embeddings[text_hash(query)]) for query in queries])
+    scores = hybrid_scores(query_vectors, chunk_vectors, queries, [chunk.text for chunk in chunks], semantic_weight)
+
+    k = min(top_k, len(chunks))
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    # Meilleurs morceaux de chaque requête triés par score, parcourus rang par rang
+    best = np.take_along_axis(best, np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1), axis=1)
+    selected = {0}
+    nb_tokens = chunks[0].nb_tokens
+    for i in best.T.ravel().tolist():
+        if i in selected:
+            continue
+        if max_tokens is not None and nb_tokens + chunks[i].nb_tokens > max_tokens:
+            continue
+        selected.add(i)
+        nb_tokens += chunks[i].nb_tokens
+    spans = merge_spans(text, [chunks[i] for i in selected])
+    return CONTEXT_SEPARATOR.join(text[start:end] for start, end in spans)
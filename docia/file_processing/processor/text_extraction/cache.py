@@ -0,0 +1,182 @@
+"""
+Cache des résultats d'extraction, adressé par le contenu.
+
+Un même scan (Kbis, RIB, AE signé...) est souvent déposé sur plusieurs EJ, ou redéposé
+avec des métadonnées différentes : on évite de refaire l'OCR à chaque fois.
+
+- Entrées « fichier » : clé = SHA-256 du fichier (cf. Document.hash) + version des extracteurs
+  + outil d'OCR (avec ses réglages pour Tesseract : langue, DPI, PSM) + seuil de mots.
+- Entrées « page » (PDF) : clé = hash du flux de contenu et des images de la page + version
+  + outil d'OCR. Un PDF partiellement modifié ne refait l'OCR que des nouvelles pages.
+
+La taille totale du cache est bornée : les entrées les moins récemment utilisées sont évincées
+périodiquement (commande evict_extraction_cache), pas à chaque écriture.
+"""
+
+import hashlib
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+import pymupdf
+
+from docia.file_processing.models import ExtractionCacheEntry, ExtractionCacheKind
+
+logger = logging.getLogger("docia." + __name__)
+
+# À incrémenter quand la sortie des extracteurs change (invalide tout le cache)
+# 2 : pages des PDF natifs séparées par PAGE_SEPARATOR (join_pages)
+EXTRACTOR_VERSION = "2"
+
+# Statistiques du processus courant : {(kind, "hit"|"miss"): nombre}
+cache_stats = Counter()
+
+
+def hit_rate(kind: str | None = None) -> float | None:
+    """Taux de succès du cache dans le processus courant (None si aucune requête)."""
+    kinds = [kind] if kind else [k.value for k in ExtractionCacheKind]
+    hits = sum(cache_stats[(k, "hit")] for k in kinds)
+    total = hits + sum(cache_stats[(k, "miss")] for k in kinds)
+    return hits / total if total else None
+
+
+def get_cache_summary() -> dict:
+    """Métriques globales du cache (toutes machines confondues)."""
+    summary = {}
+    for kind in ExtractionCacheKind:
+        agg = ExtractionCacheEntry.objects.filter(kind=kind).aggregate(size=Sum("size"), hits=Sum("hit_count"))
+        summary[kind.value] = {
+            "entries": ExtractionCacheEntry.objects.filter(kind=kind).count(),
+            "size": agg["size"] or 0,
+            "hits": agg["hits"] or 0,
+            "process_hit_rate": hit_rate(kind),
+        }
+    return summary
+
+
+def compute_page_hash(doc: pymupdf.Document, page: pymupdf.Page) -> str:
+    """Hash d'une page PDF : géométrie, flux de contenu et images."""
+    h = hashlib.sha256()
+    h.update(f"{tuple(page.rect)}:{page.rotation}".encode())
+    h.update(page.read_contents())
+    for image in page.get_images(full=True):
+        h.update(doc.xref_stream_raw(image[0]) or b"")
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Accès au cache d'extraction pour un outil d'OCR donné.
+
+    Args:
+        ocr_tool (str): Outil d'OCR utilisé ("mistral-ocr", "tesseract")
+        max_bytes (int): Taille maximale du cache (défaut : settings.EXTRACTION_CACHE_MAX_BYTES)
+        ocr_dpi (int): Résolution Tesseract (défaut : settings.TESSERACT_OCR_DPI)
+        ocr_psm (int): Mode de segmentation Tesseract (défaut : settings.TESSERACT_OCR_PSM)
+    """
+
+    def __init__(
+        self,
+        ocr_tool: str,
+        max_bytes: int | None = None,
+        ocr_dpi: int | None = None,
+        ocr_psm: int | None = None,
+    ):
+        self.ocr_tool = ocr_tool
+        self.max_bytes = max_bytes if max_bytes is not None else settings.EXTRACTION_CACHE_MAX_BYTES
+        self.tool_key = ocr_tool
+        if ocr_tool == "tesseract":
+            # Le texte OCRisé dépend des réglages de Tesseract : les changer invalide le cache
+            dpi = ocr_dpi or settings.TESSERACT_OCR_DPI
+            psm = ocr_psm if ocr_psm is not None else settings.TESSERACT_OCR_PSM
+            self.tool_key = f"tesseract-{settings.TESSERACT_OCR_LANG}-{dpi}dpi-psm{psm}"
+
+    def file_key(self, file_hash: str, word_threshold: int) -> str:
+        return f"file:{file_hash}:{EXTRACTOR_VERSION}:{self.tool_key}:{word_threshold}"
+
+    def page_key(self, page_hash: str) -> str:
+        return f"page:{page_hash}:{EXTRACTOR_VERSION}:{self.tool_key}"
+
+    def _get_many(self, kind: str, keys: list[str]) -> dict[str, ExtractionCacheEntry]:
+        entries = {e.key: e for e in ExtractionCacheEntry.objects.filter(key__in=keys)}
+        if entries:
+            ExtractionCacheEntry.objects.filter(key__in=entries.keys()).update(
+                hit_count=F("hit_count") + 1, last_used_at=timezone.now()
+            )
+        cache_stats[(kind, "hit")] += len(entries)
+        cache_stats[(kind, "miss")] += len(set(keys)) - len(entries)
+        logger.info(
+            "Cache extraction %s : %s/%s trouvés (taux de succès %.0f%%)",
+            kind,
+            len(entries),
+            len(set(keys)),
+            100 * hit_rate(kind),
+        )
+        return entries
+
+    def _set_many(self, kind: str, items: dict[str, tuple[str, bool]]):
+        now = timezone.now()
+        entries = [
+            ExtractionCacheEntry(
+                key=key,
+                kind=kind,
+                text=text,
+                is_ocr=is_ocr,
+                size=len(text.encode("utf-8")),
+                last_used_at=now,
+            )
+            for key, (text, is_ocr) in items.items()
+        ]
+        ExtractionCacheEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["key"],
+            update_fields=["text", "is_ocr", "size", "last_used_at", "updated_at"],
+        )
+
+    def get_file(self, file_hash: str, word_threshold: int) -> tuple[str, bool] | None:
+        """Retourne (texte, is_ocr) si le fichier est en cache, sinon None."""
+        key = self.file_key(file_hash, word_threshold)
+        entry = self._get_many(ExtractionCacheKind.FILE, [key]).get(key)
+        return (entry.text, entry.is_ocr) if entry else None
+
+    def set_file(self, file_hash: str, word_threshold: int, text: str, is_ocr: bool):
+        self._set_many(ExtractionCacheKind.FILE, {self.file_key(file_hash, word_threshold): (text, is_ocr)})
+
+    def get_pages(self, page_hashes: list[str]) -> dict[str, str]:
+        """Retourne {hash de page: texte} pour les pages en cache."""
+        keys = {self.page_key(h): h for h in page_hashes}
+        entries = self._get_many(ExtractionCacheKind.PAGE, list(keys))
+        return {keys[key]: entry.text for key, entry in entries.items()}
+
+    def set_pages(self, pages: dict[str, str]):
+        """Enregistre le texte OCR de pages : {hash de page: texte}."""
+        if pages:
+            self._set_many(ExtractionCacheKind.PAGE, {self.page_key(h): (text, True) for h, text in pages.items()})
+
+    def evict(self) -> tuple[int, int]:
+        """
+        Supprime les entrées les moins récemment utilisées tant que le cache dépasse max_bytes.
+        Parcourt toute la table : à appeler périodiquement, pas à chaque écriture.
+
+        Returns:
+            (nombre d'entrées évincées, octets libérés)
+        """
+        total = ExtractionCacheEntry.objects.aggregate(total=Sum("size"))["total"] or 0
+        if total <= self.max_bytes:
+            return 0, 0
+        to_free = total - int(self.max_bytes * 0.9)
+        freed = 0
+        ids = []
+        for pk, size in ExtractionCacheEntry.objects.order_by("last_used_at").values_list("pk", "size").iterator():
+            if freed >= to_free:
+                break
+            ids.append(pk)
+            freed += size
+        for i in range(0, len(ids), 1000):
+            ExtractionCacheEntry.objects.filter(pk__in=ids[i : i + 1000]).delete()
+        logger.info("Cache extraction : %s entrées évincées (%s octets)", len(ids), freed)
+        return len(ids), freed
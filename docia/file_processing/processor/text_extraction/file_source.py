@@ -0,0 +1,188 @@
+"""
+Accès au contenu des fichiers à extraire sans multiplier les copies en mémoire.
+
+Le fichier est lu depuis le stockage par blocs dans un « spool » : en mémoire tant qu'il reste
+sous un seuil (settings.EXTRACTION_SPOOL_MAX_MEMORY), dans un fichier temporaire au-delà.
+Les extracteurs ouvrent ensuite le contenu selon ce que leur bibliothèque accepte le mieux :
+un chemin (pymupdf, LibreOffice), un flux (openpyxl, zipfile, PIL) ou un buffer (xlrd, API OCR).
+
+Les extracteurs acceptent indifféremment des ``bytes`` ou un ``FileSource``.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from collections.abc import Iterable
+from contextlib import contextmanager
+from typing import BinaryIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+import pymupdf
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class FileSource:
+    """
+    Contenu d'un fichier, en mémoire sous ``max_memory`` octets, sur disque au-delà.
+    Le SHA-256 et la taille sont calculés au fil de l'écriture.
+    """
+
+    def __init__(self, max_memory: int | None = None):
+        self.max_memory = max_memory if max_memory is not None else settings.EXTRACTION_SPOOL_MAX_MEMORY
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._buffer = io.BytesIO()
+        self._content = None
+        self._file = None
+        self._mmap = None
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[bytes], max_memory: int | None = None) -> "FileSource":
+        """Contenu écrit bloc par bloc (ex. téléchargement en flux), sans jamais être entièrement en mémoire."""
+        source = cls(max_memory)
+        try:
+            for chunk in chunks:
+                source._write(chunk)
+        except BaseException:
+            source.close()
+            raise
+        source._finish()
+        return source
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO, max_memory: int | None = None) -> "FileSource":
+        return cls.from_chunks(iter(lambda: stream.read(CHUNK_SIZE), b""), max_memory)
+
+    @classmethod
+    def from_storage(cls, file_path: str, max_memory: int | None = None) -> "FileSource":
+        with default_storage.open(file_path, "rb") as f:
+            return cls.from_stream(f, max_memory)
+
+    @classmethod
+    def from_bytes(cls, content: bytes) -> "FileSource":
+        source = cls(max_memory=len(content))
+        source._hash.update(content)
+        source.size = len(content)
+        source._content = content
+        source._buffer = None
+        return source
+
+    def _write(self, chunk: bytes):
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        if self._file is None and self.size > self.max_memory:
+            # Débordement sur disque
+            self._file = tempfile.NamedTemporaryFile(prefix="docia-extract-")
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        (self._file or self._buffer).write(chunk)
+
+    def _finish(self):
+        if self._file is None:
+            self._content = self._buffer.getvalue()
+            self._buffer = None
+        else:
+            self._file.flush()
+
+    @property
+    def in_memory(self) -> bool:
+        return self._file is None
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def __len__(self):
+        return self.size
+
+    def open(self) -> BinaryIO:
+        """Nouveau flux de lecture, positionné au début du fichier."""
+        if self.in_memory:
+            return io.BytesIO(self._content)
+        return open(self._file.name, "rb")
+
+    def view(self) -> bytes | mmap.mmap:
+        """
+        Contenu sous forme de buffer, sans copie : ``bytes`` en mémoire,
+        projection mémoire (mmap) du fichier temporaire sinon.
+        """
+        if self.in_memory:
+            return self._content
+        if self._mmap is None:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def read(self) -> bytes:
+        """Copie complète du contenu (à réserver aux traitements qui l'exigent)."""
+        if self.in_memory:
+            return self._content
+        with self.open() as f:
+            return f.read()
+
+    @contextmanager
+    def path(self, suffix: str = ""):
+        """Chemin d'un fichier contenant les données (temporaire si le contenu est en mémoire)."""
+        if not self.in_memory:
+            yield self._file.name
+            return
+        fd, path = tempfile.mkstemp(prefix="docia-extract-", suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._content)
+            yield path
+        finally:
+            os.unlink(path)
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Un buffer exporté est encore référencé : libéré par le ramasse-miettes
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+        self._content = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def as_buffer(file_content: bytes | FileSource) -> bytes | mmap.mmap:
+    """Contenu sous forme de buffer (bytes-like)."""
+    return file_content.view() if isinstance(file_content, FileSource) else file_content
+
+
+def as_bytes(file_content: bytes | FileSource) -> bytes:
+    """Contenu sous forme de bytes (copie si le fichier est sur disque)."""
+    return file_content.read() if isinstance(file_content, FileSource) else file_content
+
+
+def open_stream(file_content: bytes | FileSource) -> BinaryIO:
+    """Flux de lecture binaire sur le contenu."""
+    return file_content.open() if isinstance(file_content, FileSource) else io.BytesIO(file_content)
+
+
+@contextmanager
+def as_path(file_content: bytes | FileSource, suffix: str = ""):
+    """Chemin d'un fichier contenant les données."""
+    source = file_content if isinstance(file_content, FileSource) else FileSource.from_bytes(file_content)
+    with source.path(suffix) as path:
+        yield path
+
+
+def open_pdf(file_content: bytes | FileSource) -> pymupdf.Document:
+    """Ouvre un PDF : par chemin s'il est sur disque, depuis la mémoire sinon."""
+    if isinstance(file_content, FileSource) and not file_content.in_memory:
+        with file_content.path() as path:
+            return pymupdf.Document(path, filetype="pdf")
+    return pymupdf.Document(stream=as_buffer(file_content))
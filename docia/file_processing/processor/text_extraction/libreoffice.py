@@ -0,0 +1,169 @@
+"""
+Service de conversion LibreOffice persistant.
+
+Lancer ``libreoffice --headless --convert-to`` pour chaque document coûte plusieurs secondes
+de démarrage, et deux conversions simultanées se disputent le profil utilisateur par défaut.
+
+Chaque processus worker démarre une seule instance headless (listener) avec un profil isolé.
+Les conversions, une à la fois, sont transmises à l'instance en cours d'exécution (une commande
+``--convert-to`` lancée avec le même profil est relayée à l'instance existante au lieu d'en
+démarrer une nouvelle). L'instance est redémarrée automatiquement si elle plante ou ne répond plus.
+"""
+
+import atexit
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger("docia." + __name__)
+
+
+class LibreOfficeError(Exception):
+    """Échec de conversion par le service LibreOffice."""
+
+
+class LibreOfficeService:
+    """
+    Convertisseur LibreOffice (document → texte) propre à un processus.
+
+    Args:
+        executable (str): Chemin de l'exécutable soffice/libreoffice
+        timeout (int): Délai maximal de conversion par document (secondes)
+        startup_timeout (int): Délai maximal de démarrage de l'instance (secondes)
+    """
+
+    def __init__(self, executable: str, timeout: int = 90, startup_timeout: int = 60):
+        self.executable = executable
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self._profile_dir = tempfile.mkdtemp(prefix="docia-libreoffice-profile-")
+        self._process = None
+        self._lock = threading.Lock()
+        self._owner_pid = os.getpid()
+
+    @property
+    def _profile_arg(self):
+        return f"-env:UserInstallation={Path(self._profile_dir).as_uri()}"
+
+    # Cycle de vie de l'instance
+
+    def _start(self):
+        cmd = [
+            self.executable,
+            self._profile_arg,
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--nodefault",
+            "--norestore",
+            "--nolockcheck",
+            f"--accept=pipe,name=docia-{uuid.uuid4().hex};urp;",
+        ]
+        logger.info("Démarrage de l'instance LibreOffice (profil %s)", self._profile_dir)
+        self._process = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        # Conversion témoin : l'instance est prête quand elle traite une première demande
+        with tempfile.TemporaryDirectory(prefix="docia-libreoffice-") as tmpdir:
+            probe_path = os.path.join(tmpdir, "probe.txt")
+            with open(probe_path, "w") as f:
+                f.write("probe")
+            try:
+                self._run_convert([probe_path], os.path.join(tmpdir, "out"), timeout=self.startup_timeout)
+            except LibreOfficeError:
+                self._stop()
+                raise
+
+    def _stop(self):
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self._process.wait()
+        self._process = None
+
+    def _ensure_started(self):
+        if self._process is not None and self._process.poll() is not None:
+            logger.warning("L'instance LibreOffice s'est arrêtée (code %s), redémarrage", self._process.returncode)
+            self._process = None
+        if self._process is None:
+            self._start()
+
+    def close(self):
+        """Arrête l'instance et supprime le profil."""
+        if os.getpid() != self._owner_pid:
+            # Copie héritée d'un fork : l'instance appartient au processus parent
+            return
+        with self._lock:
+            self._stop()
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+
+    # Conversion
+
+    def _run_convert(self, paths: list[str], outdir: str, timeout: float):
+        cmd = [self.executable, self._profile_arg, "--headless", "--convert-to", "txt", "--outdir", outdir, *paths]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            raise LibreOfficeError(f"Timeout de conversion LibreOffice ({timeout}s)") from e
+        if result.returncode != 0:
+            raise LibreOfficeError(f"Erreur LibreOffice (code {result.returncode}):\n{result.stdout}")
+
+    def _convert(self, path: str, extension: str) -> str:
+        self._ensure_started()
+        with tempfile.TemporaryDirectory(prefix="docia-libreoffice-") as tmpdir:
+            # Nom neutre avec la bonne extension, sans copie du fichier
+            link = os.path.join(tmpdir, f"document.{extension}")
+            os.symlink(os.path.abspath(path), link)
+            outdir = os.path.join(tmpdir, "out")
+            try:
+                self._run_convert([link], outdir, timeout=self.timeout)
+            except LibreOfficeError:
+                # Instance bloquée ou plantée : elle sera redémarrée à la prochaine conversion
+                self._stop()
+                raise
+            try:
+                with open(os.path.join(outdir, "document.txt"), "r", encoding="utf-8", errors="ignore") as f:
+                    return f.read().strip()
+            except FileNotFoundError:
+                raise LibreOfficeError("Error libreoffice (output file not found)") from None
+
+    def convert(self, content: bytes, extension: str = "doc") -> str:
+        """Convertit un document en texte. Lève LibreOfficeError en cas d'échec."""
+        with tempfile.NamedTemporaryFile(prefix="docia-libreoffice-", suffix=f".{extension}") as f:
+            f.write(content)
+            f.flush()
+            return self.convert_file(f.name, extension)
+
+    def convert_file(self, path: str, extension: str = "doc") -> str:
+        """Convertit un fichier présent sur disque en texte. Lève LibreOfficeError en cas d'échec."""
+        with self._lock:
+            return self._convert(path, extension)
+
+
+_service = None
+_service_pid = None
+_service_lock = threading.Lock()
+
+
+def get_libreoffice_service(executable: str) -> LibreOfficeService:
+    """Retourne le service LibreOffice du processus courant (recréé après un fork)."""
+    global _service, _service_pid
+    pid = os.getpid()
+    with _service_lock:
+        if _service is None or _service_pid != pid:
+            _service = LibreOfficeService(executable, timeout=settings.LIBREOFFICE_TIMEOUT)
+            _service_pid = pid
+            atexit.register(_service.close)
+        return _service
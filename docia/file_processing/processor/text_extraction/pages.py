@@ -0,0 +1,37 @@
+"""
+Découpage en pages du texte extrait.
+
+Les pages des PDF natifs et de l'OCR local sont séparées par un saut de page (\\f) sur sa propre ligne ;
+l'OCR par API délimite chaque page par des marqueurs [[PAGE i / n]] ... [[FIN PAGE i / n]].
+Les autres formats forment une seule page.
+"""
+
+import re
+
+PAGE_SEPARATOR = "\n\f\n"
+
+_OCR_PAGE_RE = re.compile(r"\[\[PAGE (\d+) / (\d+)\]\]\n(.*?)\n\[\[FIN PAGE \1 / \2\]\]", re.DOTALL)
+
+
+def join_pages(pages: list[str]) -> str:
+    """Assemble le texte de pages séparées par PAGE_SEPARATOR."""
+    return PAGE_SEPARATOR.join(page.strip() for page in pages)
+
+
+def split_pages(text: str) -> list[tuple[int, int]]:
+    """
+    Position (début, fin) du contenu de chaque page dans le texte, marqueurs exclus.
+    Un texte vide n'a aucune page.
+    """
+    if not text:
+        return []
+    spans = [match.span(3) for match in _OCR_PAGE_RE.finditer(text)]
+    if spans:
+        return spans
+    spans = []
+    start = 0
+    for match in re.finditer(re.escape(PAGE_SEPARATOR), text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+    return spans
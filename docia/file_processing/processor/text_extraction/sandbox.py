@@ -0,0 +1,239 @@
+"""
+Exécution de l'extraction dans un processus enfant supervisé.
+
+Un seul fichier pathologique (PDF malformé qui fait boucler pymupdf, image « bombe de décompression »,
+gros xls lu avec formatting_info) peut bloquer ou faire tuer (OOM) un worker Celery en plein lot.
+L'extraction est donc exécutée dans un processus enfant (fork) soumis à trois limites,
+calculées selon la taille et le type du fichier :
+
+- temps réel : le parent tue l'enfant à l'échéance ;
+- temps CPU (RLIMIT_CPU) : le noyau interrompt un enfant qui boucle ;
+- mémoire (RLIMIT_DATA) : au-delà du budget, les allocations échouent (MemoryError).
+
+Le worker survit et l'échec est remonté sous forme de SandboxError (code timeout, cpu, memory ou crash).
+Les statistiques du cache d'extraction comptées dans l'enfant sont renvoyées au parent avec le résultat.
+"""
+
+import logging
+import os
+import pickle
+import resource
+import select
+import signal
+import time
+import traceback
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
+
+from docia.file_processing.processor.text_extraction.cache import cache_stats
+
+logger = logging.getLogger("docia." + __name__)
+
+MB = 1024 * 1024
+
+# Types de fichiers extraits dans le processus du worker : la conversion .doc passe déjà par
+# le service LibreOffice, qui a son propre délai et ne doit pas être relancé dans chaque enfant.
+IN_PROCESS_EXTENSIONS = {"doc"}
+
+# Secondes supplémentaires accordées par Mo de fichier (OCR plus lent que l'extraction native)
+_TIME_PER_MB = {"pdf": 30, "png": 30, "jpg": 30, "jpeg": 30, "tif": 30, "tiff": 30}
+_DEFAULT_TIME_PER_MB = 5
+# Mémoire supplémentaire accordée par octet de fichier (tableurs et images compressés)
+_MEMORY_PER_BYTE = {"xlsx": 50, "xls": 50, "ods": 50, "png": 100, "jpg": 100, "jpeg": 100, "tif": 50, "tiff": 50}
+_DEFAULT_MEMORY_PER_BYTE = 20
+# Types dont l'OCR local répartit les pages sur plusieurs threads
+_OCR_EXTENSIONS = {"pdf", "png", "jpg", "jpeg", "tif", "tiff"}
+
+# Connexions à la base héritées du parent : détachées dans l'enfant mais jamais fermées
+# (l'enfant sort par os._exit, sans finaliser ces objets qui partagent la socket du parent)
+_inherited_connections = []
+
+
+class SandboxError(Exception):
+    """
+    Extraction interrompue par le superviseur.
+
+    Attributes:
+        code (str): "timeout", "cpu", "memory" ou "crash"
+        details (dict): Limites appliquées et informations sur la fin du processus
+    """
+
+    def __init__(self, code: str, message: str, details: dict | None = None):
+        super().__init__(message)
+        self.code = code
+        self.details = details or {}
+
+    def __reduce__(self):
+        return self.__class__, (self.code, str(self), self.details)
+
+
+class _RemoteTraceback(Exception):
+    """Traceback de l'exception levée dans le processus enfant (affichée comme cause)."""
+
+    def __init__(self, tb: str):
+        super().__init__(tb)
+        self.tb = tb
+
+    def __str__(self):
+        return self.tb
+
+
+@dataclass
+class SandboxLimits:
+    timeout: float  # secondes (temps réel)
+    cpu_time: int  # secondes CPU
+    memory: int  # octets alloués en plus de la mémoire héritée du parent
+
+
+def limits_for(size: int, extension: str) -> SandboxLimits:
+    """Limites d'extraction pour un fichier de `size` octets et d'extension `extension`."""
+    extension = (extension or "").lower()
+    timeout = min(
+        settings.EXTRACTION_SANDBOX_MAX_TIMEOUT,
+        settings.EXTRACTION_SANDBOX_BASE_TIMEOUT + size / MB * _TIME_PER_MB.get(extension, _DEFAULT_TIME_PER_MB),
+    )
+    memory = min(
+        settings.EXTRACTION_SANDBOX_MAX_MEMORY,
+        settings.EXTRACTION_SANDBOX_BASE_MEMORY + size * _MEMORY_PER_BYTE.get(extension, _DEFAULT_MEMORY_PER_BYTE),
+    )
+    threads = settings.TESSERACT_POOL_SIZE if extension in _OCR_EXTENSIONS else 1
+    return SandboxLimits(timeout=timeout, cpu_time=int(timeout * threads) + 1, memory=int(memory))
+
+
+def _vm_data() -> int:
+    """Taille du segment de données du processus (octets), 0 si inconnue."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmData:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _detach_db_connections():
+    for alias in connections:
+        _inherited_connections.append(connections[alias])
+        del connections[alias]
+
+
+def _apply_limits(limits: SandboxLimits):
+    resource.setrlimit(resource.RLIMIT_CPU, (limits.cpu_time, limits.cpu_time + 5))
+    data = _vm_data()
+    if data:
+        resource.setrlimit(resource.RLIMIT_DATA, (data + limits.memory, data + limits.memory))
+
+
+def _run_child(write_fd: int, func, args, kwargs, limits: SandboxLimits):
+    """Corps du processus enfant : ne retourne jamais."""
+    exit_code = 1
+    try:
+        os.setpgid(0, 0)
+        _detach_db_connections()
+        _apply_limits(limits)
+        # Statistiques héritées du parent : seules celles de l'extraction lui sont renvoyées
+        inherited_stats = cache_stats.copy()
+        try:
+            payload = ("ok", func(*args, **kwargs))
+        except MemoryError:
+            payload = ("memory", traceback.format_exc())
+        except Exception as e:
+            payload = ("error", e, traceback.format_exc())
+        stats = cache_stats - inherited_stats
+        try:
+            data = pickle.dumps((payload, stats))
+        except Exception:
+            data = pickle.dumps((("error", RuntimeError(repr(payload[1])), payload[-1]), stats))
+        with os.fdopen(write_fd, "wb") as f:
+            f.write(data)
+        exit_code = 0
+    finally:
+        os._exit(exit_code)
+
+
+def _read_result(read_fd: int, pid: int, timeout: float) -> bytes | None:
+    """Lit le résultat de l'enfant ; None si le délai est dépassé (l'enfant est alors tué)."""
+    chunks = []
+    deadline = time.monotonic() + timeout
+    with os.fdopen(read_fd, "rb", buffering=0) as pipe:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ready, _, _ = select.select([pipe], [], [], remaining)
+            if not ready:
+                continue
+            chunk = pipe.read(MB)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    return None
+
+
+def run_in_sandbox(func, *args, limits: SandboxLimits, **kwargs):
+    """
+    Exécute func(*args, **kwargs) dans un processus enfant soumis à `limits`.
+
+    Returns:
+        (résultat de func, pic de mémoire résidente de l'enfant en octets)
+
+    Raises:
+        SandboxError: délai, temps CPU ou mémoire dépassé, ou enfant mort sans résultat
+        Exception: l'exception levée par func dans l'enfant (traceback d'origine en cause)
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _run_child(write_fd, func, args, kwargs, limits)
+    os.close(write_fd)
+    try:
+        os.setpgid(pid, pid)
+    except OSError:
+        # L'enfant l'a déjà fait (ou est déjà terminé)
+        pass
+
+    data = _read_result(read_fd, pid, limits.timeout)
+    _, status, rusage = os.wait4(pid, 0)
+    peak_rss = rusage.ru_maxrss * 1024
+    cpu_time = rusage.ru_utime + rusage.ru_stime
+    details = {
+        "timeout": limits.timeout,
+        "cpu_time_limit": limits.cpu_time,
+        "memory_limit": limits.memory,
+        "cpu_time": round(cpu_time, 1),
+        "peak_rss": peak_rss,
+    }
+
+    if data is None:
+        raise SandboxError("timeout", f"Extraction timeout after {limits.timeout:.0f}s", details)
+    if os.WIFSIGNALED(status):
+        sig = signal.Signals(os.WTERMSIG(status))
+        details["signal"] = sig.name
+        if sig == signal.SIGXCPU or (sig == signal.SIGKILL and cpu_time >= limits.cpu_time):
+            raise SandboxError("cpu", f"Extraction exceeded {limits.cpu_time}s of CPU time", details)
+        if sig == signal.SIGKILL:
+            # Tué par un tiers, le plus souvent l'OOM killer du noyau
+            raise SandboxError("memory", "Extraction process killed (out of memory)", details)
+        raise SandboxError("crash", f"Extraction process killed by {sig.name}", details)
+    if not data:
+        details["exit_code"] = os.WEXITSTATUS(status)
+        raise SandboxError("crash", f"Extraction process exited with code {details['exit_code']}", details)
+
+    (kind, *payload), stats = pickle.loads(data)
+    cache_stats.update(stats)
+    if kind == "memory":
+        raise SandboxError(
+            "memory", f"Extraction exceeded its memory budget ({limits.memory / MB:.0f} MB)", details
+        ) from _RemoteTraceback(payload[0])
+    if kind == "error":
+        exc, tb = payload
+        raise exc from _RemoteTraceback(tb)
+    return payload[0], peak_rss
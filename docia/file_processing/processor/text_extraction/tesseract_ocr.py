@@ -0,0 +1,167 @@
+"""
+OCR local avec Tesseract.
+
+Les moteurs ``PyTessBaseAPI`` sont coûteux à initialiser (chargement du modèle de langue
+à chaque appel de ``tesserocr.image_to_text``) : on les conserve dans un pool propre à
+chaque processus worker et on les réutilise d'un document à l'autre. Tesseract relâche le GIL
+pendant la reconnaissance, les pages d'un PDF sont donc OCRisées en parallèle dans un pool de threads.
+"""
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+
+import pymupdf
+import tesserocr
+from PIL import Image
+
+logger = logging.getLogger("docia." + __name__)
+
+
+class TesseractPool:
+    """
+    Pool de moteurs Tesseract réutilisables.
+
+    Les moteurs sont créés à la demande, jusqu'à ``size`` instances. Un moteur n'est utilisé
+    que par un seul thread à la fois.
+    """
+
+    def __init__(self, size: int, lang: str = "fra", psm: int = tesserocr.PSM.AUTO):
+        self.size = max(1, size)
+        self.lang = lang
+        self.psm = psm
+        self._idle = queue.LifoQueue()
+        self._engines = []
+        self._lock = threading.Lock()
+
+    def _create_engine(self):
+        logger.debug("Initialisation d'un moteur Tesseract (lang=%s, psm=%s)", self.lang, self.psm)
+        return tesserocr.PyTessBaseAPI(lang=self.lang, psm=self.psm)
+
+    def _get_engine(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._engines) < self.size:
+                engine = self._create_engine()
+                self._engines.append(engine)
+                return engine
+        # Tous les moteurs sont occupés : attendre qu'un moteur soit libéré
+        return self._idle.get()
+
+    @contextmanager
+    def acquire(self):
+        """Emprunte un moteur du pool et le rend une fois le bloc terminé."""
+        engine = self._get_engine()
+        try:
+            yield engine
+        finally:
+            engine.Clear()
+            self._idle.put(engine)
+
+    def image_to_text(self, image: Image.Image, psm: int | None = None) -> str:
+        """Équivalent de ``tesserocr.image_to_text`` avec un moteur du pool."""
+        with self.acquire() as engine:
+            if psm is not None and psm != self.psm:
+                engine.SetPageSegMode(psm)
+            try:
+                engine.SetImage(image)
+                return engine.GetUTF8Text()
+            finally:
+                if psm is not None and psm != self.psm:
+                    engine.SetPageSegMode(self.psm)
+
+    def close(self):
+        """Libère tous les moteurs (les moteurs empruntés ne doivent plus être utilisés)."""
+        with self._lock:
+            for engine in self._engines:
+                engine.End()
+            self._engines = []
+            self._idle = queue.LifoQueue()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_tesseract_pool() -> TesseractPool:
+    """
+    Retourne le pool Tesseract du processus courant.
+
+    Le pool est recréé après un fork (worker Celery) : les moteurs ne doivent pas être
+    partagés entre processus.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = TesseractPool(
+                size=settings.TESSERACT_POOL_SIZE,
+                lang=settings.TESSERACT_OCR_LANG,
+                psm=settings.TESSERACT_OCR_PSM,
+            )
+            _pool_pid = pid
+        return _pool
+
+
+def ocr_image(image: Image.Image, psm: int | None = None) -> str:
+    """OCR d'une image avec le pool du processus courant."""
+    return get_tesseract_pool().image_to_text(image, psm=psm).strip()
+
+
+def render_page(page: pymupdf.Page, dpi: int) -> Image.Image:
+    """Rend une page PDF en image RGB à la résolution demandée."""
+    pix = page.get_pixmap(dpi=dpi)
+    return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+
+def ocr_pdf_pages(
+    doc: pymupdf.Document,
+    dpi: int | None = None,
+    psm: int | None = None,
+    pages: list[int] | None = None,
+) -> list[str]:
+    """
+    OCR des pages d'un PDF, en parallèle.
+
+    Le rendu des pages reste séquentiel (pymupdf n'est pas thread-safe) et le nombre
+    d'images en attente est borné pour limiter la mémoire.
+
+    Args:
+        doc (pymupdf.Document): Document PDF ouvert
+        dpi (int): Résolution de rendu des pages (défaut : settings.TESSERACT_OCR_DPI)
+        psm (int): Mode de segmentation Tesseract (défaut : celui du pool)
+        pages (list[int]): Index des pages à traiter (défaut : toutes les pages)
+
+    Returns:
+        list[str]: Texte de chaque page traitée, dans l'ordre demandé
+    """
+    dpi = dpi or settings.TESSERACT_OCR_DPI
+    pool = get_tesseract_pool()
+    in_flight = threading.BoundedSemaphore(pool.size * 2)
+
+    def ocr_and_release(image):
+        try:
+            return pool.image_to_text(image, psm=psm).strip()
+        finally:
+            in_flight.release()
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="tesseract") as executor:
+        for i in range(len(doc)) if pages is None else pages:
+            in_flight.acquire()
+            try:
+                image = render_page(doc[i], dpi)
+            except Exception:
+                in_flight.release()
+                raise
+            futures.append(executor.submit(ocr_and_release, image))
+        return [future.result() for future in futures]
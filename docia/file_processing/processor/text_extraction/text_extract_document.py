@@ -7,39 +7,59 @@ import logging
 import os
 import re
 import subprocess
-import tempfile
 import xml.etree.ElementTree as ET
 import zipfile
 
 import docx2txt
 import pymupdf
-import tesserocr
 from PIL import Image
 
 from app.utils import count_words
-from docia.file_processing.llm.client import LLMClient
+from docia.file_processing.llm.client import LLMClient, format_ocr_pages
 from docia.file_processing.processor.pdf_drawings import add_drawings_to_pdf
+from docia.file_processing.processor.text_extraction.cache import ExtractionCache, compute_page_hash
+from docia.file_processing.processor.text_extraction.file_source import (
+    FileSource,
+    as_buffer,
+    as_bytes,
+    as_path,
+    open_pdf,
+    open_stream,
+)
+from docia.file_processing.processor.text_extraction.libreoffice import get_libreoffice_service
+from docia.file_processing.processor.text_extraction.pages import join_pages
+from docia.file_processing.processor.text_extraction.tesseract_ocr import ocr_image, ocr_pdf_pages
 
 logger = logging.getLogger("docia." + __name__)
 
 
-def extract_text_from_pdf(file_content: bytes, word_threshold=50, ocr_tool: str = "mistral-ocr"):
+def extract_text_from_pdf(
+    file_content: bytes | FileSource,
+    word_threshold=50,
+    ocr_tool: str = "mistral-ocr",
+    ocr_dpi: int | None = None,
+    ocr_psm: int | None = None,
+    cache: ExtractionCache | None = None,
+):
     """
     Extrait le texte d'un PDF. Si le PDF contient moins de mots que le seuil défini,
     utilise l'OCR pour extraire le texte.
 
     Args:
-        file_content (bytes): Contenu du fichier
+        file_content (bytes | FileSource): Contenu du fichier
         word_threshold (int): Nombre minimal de mots en dessous duquel l'OCR est utilisé
         ocr_tool (str): "mistral-ocr" (défaut) pour l'API Albert/OpenGateLLM, "tesseract" pour OCR local Tesseract
+        ocr_dpi (int): Résolution de rendu des pages pour Tesseract (défaut : settings.TESSERACT_OCR_DPI)
+        ocr_psm (int): Mode de segmentation Tesseract (défaut : settings.TESSERACT_OCR_PSM)
+        cache (ExtractionCache): Cache des pages déjà OCRisées (optionnel)
 
     Returns:
         tuple: (texte extrait, booléen indiquant si l'OCR a été utilisé)
     """
-    doc = pymupdf.Document(stream=file_content)
+    doc = open_pdf(file_content)
 
     # Essayer d'extraire directement le texte dans l'ordre vertical
-    text = "\n".join([page.get_text(sort=True) for page in doc]).strip()
+    text = join_pages([page.get_text(sort=True) for page in doc])
     is_ocr_used = False
 
     # Compter les mots dans le texte extrait
@@ -48,34 +68,71 @@ def extract_text_from_pdf(file_content: bytes, word_threshold=50, ocr_tool: str
     # Si suffisamment de mots, c'est un pdf natif
     if word_count >= word_threshold:
         doc_with_drawings = add_drawings_to_pdf(doc)
-        text = "\n".join([page.get_text(sort=True) for page in doc_with_drawings]).strip()
+        text = join_pages([page.get_text(sort=True) for page in doc_with_drawings])
 
     # Si peu de mots sont extraits, c'est peut-être une image scannée → OCR
     else:
         is_ocr_used = True
-        if ocr_tool == "tesseract":
-            # OCR local : PDF → pixmap (pymupdf) → image → tesserocr
-            parts = []
-            for i in range(len(doc)):
-                pix = doc.load_page(i).get_pixmap(matrix=pymupdf.Matrix(2, 2))
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                parts.append(tesserocr.image_to_text(img, lang="fra").strip())
-            text = "\n\n".join(parts).strip()
+        if cache is not None:
+            parts = _ocr_pdf_pages_with_cache(doc, file_content, cache, ocr_tool, ocr_dpi, ocr_psm)
+            text = join_pages(parts) if ocr_tool == "tesseract" else format_ocr_pages(parts)
+        elif ocr_tool == "tesseract":
+            # OCR local : PDF → pixmap (pymupdf) → image → pool de moteurs Tesseract, pages en parallèle
+            parts = ocr_pdf_pages(doc, dpi=ocr_dpi, psm=ocr_psm)
+            text = join_pages(parts)
         else:
             llm_client = LLMClient()
-            text = llm_client.ocr_pdf(file_content)
+            text = llm_client.ocr_pdf(as_buffer(file_content))
 
     return text, is_ocr_used
 
 
-def extract_text_from_docx(file_content: bytes, file_path: str):
+def _ocr_pdf_pages_with_cache(
+    doc: pymupdf.Document,
+    file_content: bytes | FileSource,
+    cache: ExtractionCache,
+    ocr_tool: str,
+    ocr_dpi: int | None,
+    ocr_psm: int | None,
+) -> list[str]:
+    """
+    OCR page par page en réutilisant les pages déjà présentes dans le cache.
+    Seules les pages absentes du cache sont envoyées à l'OCR.
+    """
+    page_hashes = [compute_page_hash(doc, page) for page in doc]
+    cached = cache.get_pages(page_hashes)
+    missing = [i for i, h in enumerate(page_hashes) if h not in cached]
+
+    if missing:
+        if ocr_tool == "tesseract":
+            texts = ocr_pdf_pages(doc, dpi=ocr_dpi, psm=ocr_psm, pages=missing)
+        else:
+            if len(missing) == len(doc):
+                content = as_buffer(file_content)
+            else:
+                # PDF réduit aux seules pages à OCRiser
+                subset = pymupdf.Document()
+                for i in missing:
+                    subset.insert_pdf(doc, from_page=i, to_page=i)
+                content = subset.tobytes()
+            texts = LLMClient().ocr_pdf_pages(content)
+            if len(texts) != len(missing):
+                raise ValueError(f"OCR returned {len(texts)} pages, expected {len(missing)}")
+        new_pages = dict(zip((page_hashes[i] for i in missing), texts))
+        cache.set_pages(new_pages)
+        cached = {**cached, **new_pages}
+
+    return [cached[h] for h in page_hashes]
+
+
+def extract_text_from_docx(file_content: bytes | FileSource, file_path: str):
     """
     Extrait le texte d'un fichier DOCX avec gestion d'erreurs robuste.
     Returns:
         tuple: (texte extrait, booléen indiquant si l'OCR a été utilisé)
     """
     try:
-        text = docx2txt.process(io.BytesIO(file_content))
+        text = docx2txt.process(open_stream(file_content))
         if text is None:
             print(f"Attention: Aucun texte extrait de {file_path}")
             return "", False
@@ -92,14 +149,14 @@ def extract_text_from_docx(file_content: bytes, file_path: str):
         return "", False
 
 
-def extract_text_from_odt(file_content: bytes, file_path: str):
+def extract_text_from_odt(file_content: bytes | FileSource, file_path: str):
     """
     Extrait le texte d'un fichier ODT avec gestion d'erreurs robuste.
     Returns:
         tuple: (texte extrait, booléen indiquant si l'OCR a été utilisé)
     """
     try:
-        with zipfile.ZipFile(io.BytesIO(file_content), "r") as zip_file:
+        with zipfile.ZipFile(open_stream(file_content), "r") as zip_file:
             if "content.xml" not in zip_file.namelist():
                 return "", False
             content = zip_file.read("content.xml")
@@ -117,24 +174,24 @@ def extract_text_from_odt(file_content: bytes, file_path: str):
         return "", False
 
 
-def extract_text_from_txt(file_content: bytes, file_path: str):
+def extract_text_from_txt(file_content: bytes | FileSource, file_path: str):
     """Extrait le texte d'un fichier TXT."""
     try:
-        return file_content.decode("utf-8", errors="ignore"), False
+        return as_bytes(file_content).decode("utf-8", errors="ignore"), False
     except Exception as e:
         print(f"Erreur inattendue lors de l'extraction du texte de {file_path}: {e}")
         return "", False
 
 
-def extract_text_from_image(file_content: bytes, file_path: str):
+def extract_text_from_image(file_content: bytes | FileSource, file_path: str):
     """
     Extrait le texte d'une image (PNG, JPG, JPEG, TIFF) avec OCR.
     Returns:
         tuple: (texte extrait, booléen indiquant si l'OCR a été utilisé)
     """
     try:
-        image = Image.open(io.BytesIO(file_content))
-        text_ocr = tesserocr.image_to_text(image, lang="fra").strip()
+        image = Image.open(open_stream(file_content))
+        text_ocr = ocr_image(image)
         if not text_ocr:
             print(f"Attention: Aucun texte détecté dans l'image {file_path}")
             return "", True
@@ -160,42 +217,19 @@ def find_libreoffice_executable():
     return None
 
 
-def extract_text_from_doc_libreoffice(file_content: bytes, file_path: str):
-    """Extrait le texte d'un fichier .doc en utilisant LibreOffice."""
+def extract_text_from_doc_libreoffice(file_content: bytes | FileSource, file_path: str):
+    """Extrait le texte d'un fichier .doc avec le service LibreOffice persistant du worker."""
     libreoffice_path = find_libreoffice_executable()
     if not libreoffice_path:
         logger.warning("LibreOffice n'est pas installé ou pas trouvé dans le PATH")
         return "", False
 
-    with tempfile.TemporaryDirectory() as tmpdirname:
-        local_file_path = os.path.join(tmpdirname, "file.doc")
-        with open(local_file_path, "wb") as f:
-            f.write(file_content)
-        cmd = [
-            libreoffice_path,
-            "--headless",
-            "--convert-to",
-            "txt",
-            "--outdir",
-            tmpdirname,
-            local_file_path,
-        ]
-        try:
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=90)
-        except subprocess.TimeoutExpired:
-            logger.exception("Error libreoffice (timeout)")
-            return "", False
-
-        if result.returncode != 0:
-            logger.error("Error libreoffice (unknown):\n%s", result.stdout)
-            return "", False
-        output_path = os.path.join(tmpdirname, "file.txt")
-        try:
-            with open(output_path, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read().strip(), False
-        except FileNotFoundError:
-            logger.error("Error libreoffice (output file not found)\n%s", result.stdout)
-            return "", False
+    try:
+        with as_path(file_content, ".doc") as path:
+            return get_libreoffice_service(libreoffice_path).convert_file(path, "doc"), False
+    except Exception:
+        logger.exception("Error libreoffice (%s)", file_path)
+        return "", False
 
 
 def extract_text_from_doc_docx2txt(file_content: bytes, file_path: str):
@@ -381,7 +415,7 @@ def extract_text_from_doc_ole2(file_content: bytes):
         return "", False
 
 
-def extract_text_from_doc(file_content: bytes, file_path: str):
+def extract_text_from_doc(file_content: bytes | FileSource, file_path: str):
     """Extrait le texte d'un fichier .doc avec plusieurs méthodes de fallback."""
     print(f"  - Extraction du texte de {file_path} ({len(file_content)} octets)")
 
@@ -389,6 +423,9 @@ def extract_text_from_doc(file_content: bytes, file_path: str):
     if text and is_text_readable(text):
         return text, is_ocr
 
+    # Méthodes de repli : elles travaillent sur le contenu complet en mémoire
+    file_content = as_bytes(file_content)
+
     text, is_ocr = extract_text_from_doc_docx2txt(file_content, file_path)
     if text and is_text_readable(text):
         return text, is_ocr
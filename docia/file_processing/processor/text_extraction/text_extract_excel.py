@@ -4,16 +4,24 @@ Retourne un contenu markdown (tableaux avec |, légende des fusions, ## par feui
 Sans pandas : listes Python + openpyxl (xlsx), xlrd (xls). ODS : stdlib uniquement (zip + XML).
 """
 
-import io
 import xml.etree.ElementTree as ET
 import zipfile
+from collections import deque
+from typing import BinaryIO, Iterable, Iterator
+
+from django.conf import settings
 
 import xlrd
 from openpyxl import load_workbook
+from openpyxl.utils import range_boundaries
+
+from .file_source import FileSource, as_buffer, open_stream
 
 MERGE_LEGEND = """Légende : **#** = cellule appartenant à une plage fusionnée verticalement 
 (la valeur figure dans la première cellule en haut de la plage)."""
 
+TRUNCATION_MARKER = "*(Feuille tronquée : seules les {nb_rows} premières lignes non vides sont reprises.)*"
+
 # Type pour une feuille : liste de lignes, chaque ligne = liste de valeurs de cellules
 SheetRows = list[list]
 
@@ -27,42 +35,6 @@ def _is_empty(v) -> bool:
     return str(v).strip() == ""
 
 
-def _merged_continuation_cells(ws) -> set[tuple[int, int]]:
-    """Cellules fusionnées verticalement (hors cellule d'origine). Coordonnées 1-based (openpyxl)."""
-    continuation: set[tuple[int, int]] = set()
-    for merged_range in ws.merged_cells.ranges:
-        min_row, max_row = merged_range.min_row, merged_range.max_row
-        if max_row <= min_row:
-            continue
-        min_col = merged_range.min_col
-        for row in range(merged_range.min_row, merged_range.max_row + 1):
-            for col in range(merged_range.min_col, merged_range.max_col + 1):
-                if (row, col) != (min_row, min_col):
-                    continuation.add((row, col))
-    return continuation
-
-
-def _sheet_to_rows_with_merge_markers(ws) -> SheetRows:
-    """Lit une feuille openpyxl. Cellules fusionnées verticalement : valeur en haut, '#' ailleurs."""
-    continuation = _merged_continuation_cells(ws)
-    max_row = ws.max_row or 0
-    max_col = ws.max_column or 0
-    if max_row == 0 or max_col == 0:
-        return []
-
-    rows: SheetRows = []
-    for r in range(1, max_row + 1):
-        row_vals = []
-        for c in range(1, max_col + 1):
-            if (r, c) in continuation:
-                row_vals.append("#")
-            else:
-                cell = ws.cell(row=r, column=c)
-                row_vals.append(cell.value)
-        rows.append(row_vals)
-    return rows
-
-
 def _drop_empty_rows(rows: SheetRows) -> SheetRows:
     """Supprime les lignes dont toutes les cellules sont vides."""
     if not rows:
@@ -100,18 +72,86 @@ def _rows_to_markdown_pipe(rows: SheetRows) -> str:
     return "\n".join(lines)
 
 
+def _xlsx_vertical_merges(ws) -> list[tuple[int, int, int, int]]:
+    """
+    Plages fusionnées verticalement d'une feuille en lecture seule : (min_row, max_row, min_col, max_col), 1-based.
+    Le mode read_only d'openpyxl n'expose pas les fusions : on les lit dans le XML de la feuille
+    (éléments mergeCell, situés après les données), en libérant les lignes au fil du parcours.
+    """
+    merges = []
+    sheet_data = None
+    with ws._get_source() as src:
+        for event, elem in ET.iterparse(src, events=("start", "end")):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                if tag == "sheetData":
+                    sheet_data = elem
+            elif tag == "row" and sheet_data is not None:
+                sheet_data.remove(elem)
+            elif tag == "mergeCell":
+                min_col, min_row, max_col, max_row = range_boundaries(elem.get("ref"))
+                if max_row > min_row:
+                    merges.append((min_row, max_row, min_col, max_col))
+    return sorted(merges)
+
+
+def _xlsx_sheet_rows(ws) -> Iterator[list]:
+    """
+    Lignes (valeurs) d'une feuille openpyxl ouverte en lecture seule, lues au fil de l'eau.
+    Cellules fusionnées verticalement : valeur en haut, '#' ailleurs.
+    """
+    merges = _xlsx_vertical_merges(ws)
+    pending = 0
+    active: list[tuple[int, int, int, int]] = []
+    # Dimensions déclarées ignorées : une plage formatée peut annoncer A1:XFD1048576
+    ws.reset_dimensions()
+    for r, values in enumerate(ws.iter_rows(values_only=True), start=1):
+        while pending < len(merges) and merges[pending][0] <= r:
+            active.append(merges[pending])
+            pending += 1
+        active = [m for m in active if m[1] >= r]
+        row = list(values)
+        for min_row, _, min_col, max_col in active:
+            if len(row) < max_col:
+                row.extend([None] * (max_col - len(row)))
+            for c in range(min_col, max_col + 1):
+                if (r, c) != (min_row, min_col):
+                    row[c - 1] = "#"
+        yield row
+
+
+def _collect_rows(rows: Iterable[list], max_rows: int, max_cells: int) -> tuple[SheetRows, bool]:
+    """
+    Conserve les lignes non vides, sans leurs cellules vides de fin, dans la limite
+    de max_rows lignes et max_cells cellules. Retourne (lignes, tronqué).
+    """
+    kept: SheetRows = []
+    nb_cells = 0
+    for row in rows:
+        end = len(row)
+        while end and _is_empty(row[end - 1]):
+            end -= 1
+        if not end:
+            continue
+        if len(kept) >= max_rows or nb_cells + end > max_cells:
+            return kept, True
+        kept.append(row[:end])
+        nb_cells += end
+    return kept, False
+
+
+def _stream_to_markdown(rows: Iterable[list]) -> str:
+    """Lignes lues au fil de l'eau en markdown, tronquées au-delà des limites."""
+    kept, truncated = _collect_rows(rows, settings.EXTRACTION_EXCEL_MAX_ROWS, settings.EXTRACTION_EXCEL_MAX_CELLS)
+    md = _rows_to_markdown_pipe(kept)
+    if md and truncated:
+        md += "\n\n" + TRUNCATION_MARKER.format(nb_rows=len(kept))
+    return md
+
+
 def _xlsx_sheet_to_markdown(ws) -> str:
-    """Contenu d'une feuille openpyxl en markdown."""
-    rows = _sheet_to_rows_with_merge_markers(ws)
-    if not rows:
-        return ""
-    rows = _drop_empty_rows(rows)
-    if not rows:
-        return ""
-    rows = _drop_trailing_empty_columns(rows)
-    if not rows:
-        return ""
-    return _rows_to_markdown_pipe(rows)
+    """Contenu d'une feuille openpyxl (lecture seule) en markdown."""
+    return _stream_to_markdown(_xlsx_sheet_rows(ws))
 
 
 def _rows_to_markdown(rows: SheetRows) -> str:
@@ -177,6 +217,9 @@ _TABLE_TABLE = "{%s}table" % _ODF_NS["table"]
 _TABLE_ROW = "{%s}table-row" % _ODF_NS["table"]
 _TABLE_CELL = "{%s}table-cell" % _ODF_NS["table"]
 _TABLE_COVERED = "{%s}covered-table-cell" % _ODF_NS["table"]
+_TABLE_NAME = "{%s}name" % _ODF_NS["table"]
+_TABLE_COLUMNS_REPEATED = "{%s}number-columns-repeated" % _ODF_NS["table"]
+_TABLE_ROWS_REPEATED = "{%s}number-rows-repeated" % _ODF_NS["table"]
 _OFFICE_VALUE = "{%s}value" % _ODF_NS["office"]
 _TEXT_P = "{%s}p" % _ODF_NS["text"]
 
@@ -193,32 +236,55 @@ def _ods_cell_text_elt(cell_elt) -> str:
     return ""
 
 
-def _ods_parse_sheet(table_elt) -> tuple[str, SheetRows]:
-    """Parse un élément table:table ; retourne (nom, lignes)."""
-    name = table_elt.get("{%s}name" % _ODF_NS["table"], "") or ""
-    rows: SheetRows = []
-    for row_elt in table_elt.findall(f".//{_TABLE_ROW}"):
-        line = []
-        for child in row_elt:
-            if child.tag == _TABLE_CELL:
-                line.append(_ods_cell_text_elt(child))
-            elif child.tag == _TABLE_COVERED:
-                line.append("#")
-        if line:
-            rows.append(line)
-    return name, rows
-
-
-def _ods_parse_content(content_xml: bytes) -> list[tuple[str, SheetRows]]:
-    """Parse content.xml d'un ODS ; retourne [(nom_feuille, rows), ...]."""
-    root = ET.fromstring(content_xml)
-    result = []
-    for table_elt in root.iter(_TABLE_TABLE):
-        result.append(_ods_parse_sheet(table_elt))
-    return result
-
-
-def extract_text_from_xlsx(file_content: bytes, file_path: str = "", sep: str = "\n\n") -> tuple[str, bool]:
+def _ods_iter_rows(events, table_elt) -> Iterator[list]:
+    """
+    Lignes non vides de la feuille en cours de parcours (jusqu'à la fin de table_elt).
+    Les répétitions (number-columns-repeated / number-rows-repeated) sont développées à la demande,
+    les cellules vides de fin de ligne et les lignes vides répétées ne sont jamais matérialisées.
+    Les éléments traités sont détachés de l'arbre pour garder une mémoire constante.
+    """
+    parents = [table_elt]
+    runs: list[tuple[str, int]] = []  # (valeur, répétitions) des cellules de la ligne en cours
+    for event, elem in events:
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem is table_elt:
+            table_elt.clear()
+            return
+        if elem.tag in (_TABLE_CELL, _TABLE_COVERED):
+            value = _ods_cell_text_elt(elem) if elem.tag == _TABLE_CELL else "#"
+            runs.append((value, int(elem.get(_TABLE_COLUMNS_REPEATED, 1))))
+            parents[-1].remove(elem)
+        elif elem.tag == _TABLE_ROW:
+            while runs and _is_empty(runs[-1][0]):
+                runs.pop()
+            if runs:
+                row = [value for value, repeat in runs for _ in range(repeat)]
+                for _ in range(int(elem.get(_TABLE_ROWS_REPEATED, 1))):
+                    yield row
+            runs = []
+            parents[-1].remove(elem)
+
+
+def _ods_iter_sheets(content_xml: BinaryIO) -> Iterator[tuple[str, Iterator[list]]]:
+    """
+    Parse content.xml d'un ODS en flux (iterparse) ; produit (nom_feuille, lignes) par feuille.
+    Les lignes d'une feuille sont lues au fil de l'eau : ce qui n'a pas été consommé
+    est ignoré avant de passer à la feuille suivante.
+    """
+    events = ET.iterparse(content_xml, events=("start", "end"))
+    for event, elem in events:
+        if event == "start" and elem.tag == _TABLE_TABLE:
+            rows = _ods_iter_rows(events, elem)
+            yield elem.get(_TABLE_NAME, "") or "", rows
+            deque(rows, maxlen=0)
+
+
+def extract_text_from_xlsx(
+    file_content: bytes | FileSource, file_path: str = "", sep: str = "\n\n"
+) -> tuple[str, bool]:
     """
     Extrait le texte (markdown) d'un fichier XLSX à partir de son contenu binaire.
 
@@ -230,7 +296,7 @@ def extract_text_from_xlsx(file_content: bytes, file_path: str = "", sep: str =
     Returns:
         (texte markdown, False) — pas d'OCR pour Excel
     """
-    wb = load_workbook(io.BytesIO(file_content), read_only=False, data_only=True)
+    wb = load_workbook(open_stream(file_content), read_only=True, data_only=True)
     sheet_names = wb.sheetnames
     parts = [MERGE_LEGEND]
     for name in sheet_names:
@@ -242,26 +308,24 @@ def extract_text_from_xlsx(file_content: bytes, file_path: str = "", sep: str =
     return sep.join(parts), False
 
 
-def extract_text_from_ods(file_content: bytes, file_path: str = "", sep: str = "\n\n") -> tuple[str, bool]:
+def extract_text_from_ods(file_content: bytes | FileSource, file_path: str = "", sep: str = "\n\n") -> tuple[str, bool]:
     """
     Extrait le texte (markdown) d'un fichier ODS à partir de son contenu binaire.
-    Utilise uniquement la stdlib : zipfile + xml.etree (pas de pandas ni odfpy).
+    Utilise uniquement la stdlib : zipfile + xml.etree en flux (pas de pandas ni odfpy).
 
     Returns:
         (texte markdown, False)
     """
-    with zipfile.ZipFile(io.BytesIO(file_content), "r") as z:
-        content_xml = z.read("content.xml")
-    sheets = _ods_parse_content(content_xml)
     parts = [MERGE_LEGEND]
-    for name, rows in sheets:
-        md = _rows_to_markdown(rows)
-        if md:
-            parts.append(f"## {name}\n\n{md}")
+    with zipfile.ZipFile(open_stream(file_content), "r") as z, z.open("content.xml") as content_xml:
+        for name, rows in _ods_iter_sheets(content_xml):
+            md = _stream_to_markdown(rows)
+            if md:
+                parts.append(f"## {name}\n\n{md}")
     return sep.join(parts), False
 
 
-def extract_text_from_xls(file_content: bytes, file_path: str = "", sep: str = "\n\n") -> tuple[str, bool]:
+def extract_text_from_xls(file_content: bytes | FileSource, file_path: str = "", sep: str = "\n\n") -> tuple[str, bool]:
     """
     Extrait le texte (markdown) d'un fichier XLS à partir de son contenu binaire.
 
@@ -270,9 +334,9 @@ def extract_text_from_xls(file_content: bytes, file_path: str = "", sep: str = "
     """
     try:
         try:
-            wb = xlrd.open_workbook(file_contents=file_content, formatting_info=True)
+            wb = xlrd.open_workbook(file_contents=as_buffer(file_content), formatting_info=True)
         except (xlrd.XLRDError, NotImplementedError):
-            wb = xlrd.open_workbook(file_contents=file_content, formatting_info=False)
+            wb = xlrd.open_workbook(file_contents=as_buffer(file_content), formatting_info=False)
     except AssertionError as ex:
         # xlrd raise an assertion error on some invalid excels
         # We want to re-raise a cleaner exception
@@ -5,12 +5,14 @@ vers text_extract_document ou text_extract_excel.
 
 import logging
 
-from django.core.files.storage import default_storage
+from django.conf import settings
 
 from app.utils import clean_nul_bytes, count_words, log_execution_time
 
 from . import text_extract_document as document
 from . import text_extract_excel as excel
+from .cache import ExtractionCache
+from .file_source import FileSource
 
 logger = logging.getLogger("docia." + __name__)
 
@@ -37,15 +39,18 @@ SUPPORTED_FILES_TYPE = [
 
 
 def extract_text(
-    file_content: bytes,
+    file_content: bytes | FileSource,
     file_path: str,
     file_type: str,
     word_threshold=50,
     ocr_tool: str = "mistral-ocr",
+    cache: ExtractionCache | None = None,
 ):
     """
     Extrait le texte d'un fichier selon son type.
     Délègue à text_extract_document (PDF, doc, docx, odt, txt, images) ou text_extract_excel (xlsx, xls, ods).
+    Le contenu peut être fourni en bytes ou sous forme de FileSource (en mémoire ou sur disque).
+    Le cache (optionnel) permet de ne pas refaire l'OCR des pages PDF déjà traitées.
 
     Returns:
         tuple: (texte extrait, booléen indiquant si l'OCR a été utilisé)
@@ -67,7 +72,7 @@ def extract_text(
 
     # Documents (PDF, doc, docx, odt, txt, images)
     if file_type == "pdf":
-        text, is_ocr = document.extract_text_from_pdf(file_content, word_threshold, ocr_tool=ocr_tool)
+        text, is_ocr = document.extract_text_from_pdf(file_content, word_threshold, ocr_tool=ocr_tool, cache=cache)
     elif file_type == "docx":
         text, is_ocr = document.extract_text_from_docx(file_content, file_path)
     elif file_type == "odt":
@@ -90,10 +95,14 @@ def process_file(
     extension: str,
     word_threshold: int = 50,
     ocr_tool: str = "mistral-ocr",
+    file_hash: str | None = None,
 ):
     """
     Extrait le texte d'un fichier (chemin + extension).
 
+    Les résultats OCR sont mis en cache par contenu (settings.EXTRACTION_CACHE_ENABLED) :
+    file_hash (SHA-256 du fichier, cf. Document.hash) est calculé à la lecture s'il n'est pas fourni.
+
     Returns:
         tuple: (texte, is_ocr, nb_mots)
 
@@ -104,11 +113,22 @@ def process_file(
     if extension not in SUPPORTED_FILES_TYPE:
         raise UnsupportedFileType(f"Unsupported filed type {extension!r}")
 
-    with default_storage.open(file_path, "rb") as f:
-        file_content = f.read()
-
-    with log_execution_time(f"extract_text({file_path})"):
-        text, is_ocr = extract_text(file_content, file_path, extension, word_threshold, ocr_tool=ocr_tool)
+    # Lecture par blocs : en mémoire pour les petits fichiers, sur disque au-delà du seuil
+    with FileSource.from_storage(file_path) as source:
+        cache = ExtractionCache(ocr_tool) if settings.EXTRACTION_CACHE_ENABLED else None
+        if cache is not None:
+            file_hash = file_hash or source.sha256
+            cached = cache.get_file(file_hash, word_threshold)
+            if cached is not None:
+                text, is_ocr = cached
+                return text, is_ocr, count_words(text)
+
+        with log_execution_time(f"extract_text({file_path})"):
+            text, is_ocr = extract_text(source, file_path, extension, word_threshold, ocr_tool=ocr_tool, cache=cache)
+
+    # Seuls les résultats OCR (coûteux) sont conservés au niveau fichier
+    if cache is not None and is_ocr and text:
+        cache.set_file(file_hash, word_threshold, text, is_ocr)
 
     nb_words = count_words(text)
     return text, is_ocr, nb_words
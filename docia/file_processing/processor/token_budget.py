@@ -0,0 +1,158 @@
+"""
+Budget de tokens des prompts d'analyse de contenu.
+
+Le prompt (instructions, schéma de réponse et texte du document) doit tenir dans la fenêtre de contexte du modèle,
+en réservant la place de la réponse, et le nombre de tokens envoyés pour un document reste sous un plafond de coût.
+Quand le texte ne tient pas, il est réduit selon l'une des stratégies :
+- RAG : sélection des morceaux pertinents pour les requêtes de recherche du type de document ;
+- découpage : le texte est analysé en plusieurs parties, si le plafond de coût le permet ;
+- échantillonnage : premières et dernières pages (parties, montants, signatures...).
+"""
+
+import enum
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from docia.file_processing.llm.tokens import CHARS_PER_TOKEN, count_tokens
+from docia.file_processing.processor.relevant_content import CONTEXT_SEPARATOR, split_into_chunks
+from docia.file_processing.processor.text_extraction.pages import split_pages
+
+# Tokens ajoutés par le format de chaque message (rôle, délimiteurs)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class ContextStrategy(enum.StrEnum):
+    FULL = "full"
+    RAG = "rag"
+    SPLIT = "split"
+    PAGES = "pages"
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    # Tokens du prompt hors texte du document (instructions, schéma de réponse)
+    fixed_tokens: int
+    # Tokens en entrée du modèle : fenêtre de contexte moins la réponse
+    max_input_tokens: int
+    # Plafond de tokens envoyés pour un document, toutes requêtes confondues
+    max_prompt_tokens: int
+
+    @property
+    def text_tokens(self) -> int:
+        """Place disponible pour le texte dans une requête."""
+        return max(0, min(self.max_input_tokens, self.max_prompt_tokens) - self.fixed_tokens)
+
+
+@dataclass(frozen=True)
+class ContextPlan:
+    strategy: ContextStrategy
+    # Texte envoyé dans chaque requête
+    parts: list[str]
+
+
+def get_prompt_budget(model: str, messages: list[dict], response_format: dict | None = None) -> PromptBudget:
+    """Budget d'un prompt dont les messages sont donnés sans le texte du document."""
+    fixed_tokens = sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+    if response_format:
+        fixed_tokens += count_tokens(json.dumps(response_format, ensure_ascii=False))
+    context_tokens = settings.LLM_CONTEXT_TOKENS_BY_MODEL.get(model, settings.LLM_CONTEXT_TOKENS_DEFAULT)
+    return PromptBudget(
+        fixed_tokens=fixed_tokens,
+        max_input_tokens=context_tokens - settings.CONTENT_ANALYSIS_RESPONSE_TOKENS,
+        max_prompt_tokens=settings.CONTENT_ANALYSIS_MAX_PROMPT_TOKENS,
+    )
+
+
+def _head(text: str, max_tokens: int) -> str:
+    """Début du texte dans la limite de tokens."""
+    size = int(max_tokens * CHARS_PER_TOKEN)
+    while size > 0 and count_tokens(text[:size]) > max_tokens:
+        size = int(size * 0.9)
+    return text[:size]
+
+
+def _tail(text: str, max_tokens: int) -> str:
+    """Fin du texte dans la limite de tokens."""
+    size = int(max_tokens * CHARS_PER_TOKEN)
+    while size > 0 and count_tokens(text[-size:]) > max_tokens:
+        size = int(size * 0.9)
+    return text[-size:] if size else ""
+
+
+def split_text(text: str, max_tokens: int) -> list[str]:
+    """
+    Découpe le texte en parties d'au plus max_tokens tokens (environ), le long des pages et des sections :
+    les morceaux consécutifs sont regroupés tant qu'ils tiennent dans la limite.
+    """
+    spans = []
+    nb_tokens = 0
+    for chunk in split_into_chunks(text, max_tokens):
+        # Un token de plus pour les espaces entre deux morceaux
+        if spans and nb_tokens + chunk.nb_tokens + 1 <= max_tokens:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], chunk.end))
+            nb_tokens += chunk.nb_tokens + 1
+        else:
+            spans.append((chunk.start, chunk.end))
+            nb_tokens = chunk.nb_tokens
+    return [text[start:end] for start, end in spans]
+
+
+def sample_pages(text: str, max_tokens: int) -> str:
+    """
+    Premières et dernières pages du texte, prises alternativement (1, n, 2, n-1...) dans la limite de tokens.
+    Si aucune page entière ne tient, le début de la première page et la fin de la dernière.
+    """
+    pages = split_pages(text) or [(0, len(text))]
+    separator_tokens = count_tokens(CONTEXT_SEPARATOR)
+    order = [i for pair in zip(range(len(pages)), reversed(range(len(pages))), strict=True) for i in pair]
+    selected = set()
+    nb_tokens = 0
+    for i in order[: len(pages)]:
+        start, end = pages[i]
+        page_tokens = count_tokens(text[start:end]) + (separator_tokens if selected else 0)
+        if nb_tokens + page_tokens > max_tokens:
+            break
+        selected.add(i)
+        nb_tokens += page_tokens
+    if selected:
+        return CONTEXT_SEPARATOR.join(text[pages[i][0] : pages[i][1]] for i in sorted(selected))
+
+    half = max(0, (max_tokens - separator_tokens) // 2)
+    first_start, first_end = pages[0]
+    last_start, last_end = pages[-1]
+    return _head(text[first_start:first_end], half) + CONTEXT_SEPARATOR + _tail(text[last_start:last_end], half)
+
+
+def plan_context(text: str, budget: PromptBudget, select_content: Callable[[int], str] | None = None) -> ContextPlan:
+    """
+    Texte de chaque requête d'analyse.
+
+    Args:
+        text: Texte du document
+        budget: Budget du prompt
+        select_content: Sélection du contenu pertinent (RAG) dans une limite de tokens, si le type de document
+            a des requêtes de recherche
+
+    Returns:
+        Stratégie retenue et texte de chaque requête
+    """
+    max_tokens = budget.text_tokens
+    nb_tokens = count_tokens(text)
+    if nb_tokens <= max_tokens:
+        return ContextPlan(ContextStrategy.FULL, [text])
+
+    if select_content is not None:
+        content = select_content(max_tokens)
+        if count_tokens(content) <= max_tokens:
+            return ContextPlan(ContextStrategy.RAG, [content])
+
+    # Découpage si les instructions répétées dans chaque requête restent sous le plafond de coût
+    if max_tokens > 0:
+        parts = split_text(text, max_tokens)
+        if len(parts) * budget.fixed_tokens + nb_tokens <= budget.max_prompt_tokens:
+            return ContextPlan(ContextStrategy.SPLIT, parts)
+
+    return ContextPlan(ContextStrategy.PAGES, [sample_pages(text, max_tokens)])
@@ -0,0 +1,198 @@
+"""
+Validation des identifiants extraits par le LLM : IBAN (ISO 13616, modulo 97), clé RIB française,
+SIREN et SIRET (algorithme de Luhn).
+
+Les contrôles sont faits en arithmétique entière, sans construire d'objet schwifty. Le reste modulo 97
+d'un IBAN est la somme des contributions de ses caractères (valeur x puissance de 10 modulo 97) : le reste
+de chaque substitution d'un caractère s'en déduit en O(1), et toutes les substitutions d'un IBAN sont
+évaluées en une seule opération numpy (correction des erreurs de lecture d'un caractère).
+
+Les résultats sont ceux de schwifty (IBAN(..., validate_bban=True)) : les IBAN français et monégasques sont
+entièrement vérifiés ici (format, clé IBAN, clé RIB), les autres pays passent le filtre modulo 97 puis sont
+confirmés par schwifty.
+"""
+
+import re
+import string
+
+from schwifty import IBAN
+from schwifty.exceptions import SchwiftyException
+
+import numpy as np
+
+IBAN_CHARACTERS_RE = re.compile(r"[A-Z]{2}\d{2}[A-Z0-9]+", re.ASCII)
+# IBAN français et monégasque : FR2!n5!n5!n11!c2!n
+FR_IBAN_RE = re.compile(r"(?:FR|MC)\d{2}\d{5}\d{5}[A-Za-z0-9]{11}\d{2}", re.ASCII)
+FR_IBAN_LENGTH = 27
+
+# Puissances de 10 modulo 97 (un IBAN fait au plus 34 caractères, soit 68 chiffres une fois converti)
+POW10_MOD97 = np.array([pow(10, n, 97) for n in range(80)], dtype=np.int64)
+# Inverse de 10 modulo 97 (10 * 68 = 680 = 7 * 97 + 1)
+INV10_MOD97 = 68
+
+# Valeur de chaque caractère dans la clé RIB (lettres du numéro de compte : A, J -> 1 ; B, K, S -> 2...)
+RIB_LETTER_VALUES = {letter: str(i % 9 + 1 + (i >= 18)) for i, letter in enumerate(string.ascii_uppercase)}
+RIB_TRANSLATION = str.maketrans(RIB_LETTER_VALUES)
+
+# Candidats de correction : lettres pour le code pays, chiffres ailleurs
+COUNTRY_CANDIDATES = np.frombuffer(string.ascii_uppercase.encode(), dtype=np.uint8)
+DIGIT_CANDIDATES = np.frombuffer(string.digits.encode(), dtype=np.uint8)
+
+# SIRET des établissements de La Poste : somme des chiffres multiple de 5 (la clé de Luhn ne s'applique pas)
+LA_POSTE_SIREN = "356000000"
+LA_POSTE_HEAD_OFFICE_SIRET = "35600000000048"
+
+
+def normalize_iban(iban: str) -> str:
+    return re.sub(r"\s+", "", iban).upper()
+
+
+def _char_values(codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Valeur (0-9, A=10...Z=35) et nombre de chiffres (1 ou 2) de chaque caractère ASCII."""
+    is_digit = codes <= ord("9")
+    values = np.where(is_digit, codes.astype(np.int64) - ord("0"), codes.astype(np.int64) - ord("A") + 10)
+    widths = np.where(is_digit, 1, 2)
+    return values, widths
+
+
+def _contributions(codes: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Contributions au reste modulo 97 de chaque caractère des IBAN (lignes de même longueur), dans l'ordre
+    de calcul ISO 13616 (BBAN puis code pays et clé). Renvoie aussi les valeurs et exposants des caractères.
+    """
+    rearranged = np.roll(codes, -4, axis=-1)
+    values, widths = _char_values(rearranged)
+    # Exposant de chaque caractère : nombre de chiffres qui le suivent
+    exponents = np.cumsum(widths[..., ::-1], axis=-1)[..., ::-1] - widths
+    return values * POW10_MOD97[exponents] % 97, values, exponents
+
+
+def iban_remainders(ibans: list[str]) -> list[int | None]:
+    """Reste modulo 97 de chaque IBAN normalisé (None si ses caractères ne sont pas valides)."""
+    remainders = [None] * len(ibans)
+    by_length = {}
+    for i, iban in enumerate(ibans):
+        if iban and IBAN_CHARACTERS_RE.fullmatch(iban):
+            by_length.setdefault(len(iban), []).append(i)
+    for indices in by_length.values():
+        codes = np.frombuffer("".join(ibans[i] for i in indices).encode("ascii"), dtype=np.uint8)
+        contributions, _, _ = _contributions(codes.reshape(len(indices), -1))
+        for i, remainder in zip(indices, contributions.sum(axis=1) % 97, strict=True):
+            remainders[i] = int(remainder)
+    return remainders
+
+
+def rib_key(bank_code: str, branch_code: str, account_number: str) -> str:
+    """Clé RIB française (97 - (89 x banque + 15 x guichet + 3 x compte) modulo 97)."""
+    account = int(account_number.upper().translate(RIB_TRANSLATION))
+    return f"{97 - (89 * int(bank_code) + 15 * int(branch_code) + 3 * account) % 97:02d}"
+
+
+def is_valid_rib(bank_code: str, branch_code: str, account_number: str, key: str) -> bool:
+    if not (
+        re.fullmatch(r"\d{5}", bank_code or "")
+        and re.fullmatch(r"\d{5}", branch_code or "")
+        and re.fullmatch(r"[A-Za-z0-9]{11}", account_number or "")
+        and re.fullmatch(r"\d{2}", key or "")
+    ):
+        return False
+    return rib_key(bank_code, branch_code, account_number) == key
+
+
+def _is_valid_iban(iban: str, remainder: int | None) -> bool:
+    """IBAN normalisé dont le reste modulo 97 est connu : mêmes contrôles que schwifty (validate_bban=True)."""
+    # Les chiffres de clé 00, 01 et 99 passent le modulo 97 mais ne sont pas des clés calculées
+    if remainder != 1 or not IBAN_CHARACTERS_RE.fullmatch(iban) or not 2 <= int(iban[2:4]) <= 98:
+        return False
+    if iban[:2] in ("FR", "MC"):
+        return bool(FR_IBAN_RE.fullmatch(iban)) and rib_key(iban[4:9], iban[9:14], iban[14:25]) == iban[25:27]
+    try:
+        IBAN(iban, validate_bban=True)
+        return True
+    except SchwiftyException:
+        return False
+
+
+def validate_ibans(ibans: list[str]) -> list[bool]:
+    """Validité de chaque IBAN (espaces et minuscules acceptés)."""
+    normalized = [normalize_iban(iban) if iban else "" for iban in ibans]
+    return [
+        _is_valid_iban(iban, remainder) for iban, remainder in zip(normalized, iban_remainders(normalized), strict=True)
+    ]
+
+
+def is_valid_iban(iban: str) -> bool:
+    return validate_ibans([iban])[0]
+
+
+def correct_iban(iban: str) -> str | None:
+    """
+    Corrige un IBAN de 27 caractères (France, Monaco...) en supposant une erreur sur un seul caractère
+    (lecture OCR) : lettre du code pays ou chiffre ailleurs. Renvoie la correction si elle est unique, sinon None.
+    """
+    iban = normalize_iban(iban) if iban else ""
+    if len(iban) != FR_IBAN_LENGTH or not iban.isascii() or not iban.isalnum():
+        return None
+
+    codes = np.frombuffer(iban.encode("ascii"), dtype=np.uint8)
+    contributions, _, exponents = _contributions(codes)
+    total = int(contributions.sum()) % 97
+    # Somme des contributions des caractères qui précèdent chacun dans l'ordre de calcul
+    before = (np.cumsum(contributions) - contributions) % 97
+    # Position de chaque caractère de l'IBAN dans l'ordre de calcul
+    order = (np.arange(len(iban)) - 4) % len(iban)
+    contributions, exponents, before = contributions[order], exponents[order], before[order]
+    after = (total - before - contributions) % 97
+    _, widths = _char_values(codes)
+
+    candidates = []
+    for candidate_chars, positions in ((COUNTRY_CANDIDATES, np.arange(2)), (DIGIT_CANDIDATES, np.arange(2, len(iban)))):
+        new_values, new_widths = _char_values(candidate_chars)
+        # Remplacement d'un caractère : sa contribution change, et celles des caractères qui le précèdent sont
+        # décalées d'un chiffre si le nombre de chiffres change (lettre remplacée par un chiffre et inversement)
+        shift = new_widths[None, :] - widths[positions, None]
+        multiplier = np.where(shift > 0, 10, np.where(shift < 0, INV10_MOD97, 1))
+        remainders = (
+            before[positions, None] * multiplier
+            + new_values[None, :] * POW10_MOD97[exponents[positions]][:, None]
+            + after[positions, None]
+        ) % 97
+        # Le caractère d'origine n'est pas une correction
+        remainders[candidate_chars[None, :] == codes[positions, None]] = -1
+        for position, char in zip(*np.nonzero(remainders == 1), strict=True):
+            i = positions[position]
+            candidates.append(iban[:i] + chr(candidate_chars[char]) + iban[i + 1 :])
+
+    valid = {candidate for candidate in candidates if _is_valid_iban(candidate, 1)}
+    return valid.pop() if len(valid) == 1 else None
+
+
+def correct_ibans(ibans: list[str]) -> list[str | None]:
+    return [correct_iban(iban) for iban in ibans]
+
+
+def luhn_checksum(number: str) -> int:
+    """Somme de Luhn modulo 10 (0 pour un numéro valide)."""
+    digits = np.frombuffer(number.encode("ascii"), dtype=np.uint8)[::-1].astype(np.int64) - ord("0")
+    doubled = digits[1::2] * 2
+    return int(digits[::2].sum() + (doubled // 10 + doubled % 10).sum()) % 10
+
+
+def is_valid_siren(siren: str) -> bool:
+    return bool(siren) and len(siren) == 9 and siren.isascii() and siren.isdigit() and luhn_checksum(siren) == 0
+
+
+def is_valid_siret(siret: str) -> bool:
+    if not siret or len(siret) != 14 or not siret.isascii() or not siret.isdigit():
+        return False
+    if siret.startswith(LA_POSTE_SIREN) and siret != LA_POSTE_HEAD_OFFICE_SIRET:
+        return sum(int(digit) for digit in siret) % 5 == 0
+    return luhn_checksum(siret) == 0
+
+
+def validate_sirens(sirens: list[str]) -> list[bool]:
+    return [is_valid_siren(siren) for siren in sirens]
+
+
+def validate_sirets(sirets: list[str]) -> list[bool]:
+    return [is_valid_siret(siret) for siret in sirets]
@@ -8,15 +8,21 @@ import unicodedata
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Literal
+from urllib.parse import urlencode
 
 from django.conf import settings
 
 import pydantic
 import requests
 from requests import HTTPError
+from requests.adapters import HTTPAdapter
+
+from docia.file_processing.processor.text_extraction.file_source import CHUNK_SIZE, FileSource
 
 logger = logging.getLogger(__name__)
 
+DOCUMENTS_METADATA_ENDPOINT = "export_pj_ej/pieces_jointes_metadata"
+
 
 class ApiRawDocumentMetadata(pydantic.BaseModel):
     """Raw representation of document metadata from API"""
@@ -105,6 +111,11 @@ def parse_api_datetime(value: str) -> datetime:
     return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
 
 
+def odata_string(value: str) -> str:
+    """OData string literal (single quotes doubled)."""
+    return "'" + value.replace("'", "''") + "'"
+
+
 def datetime_to_api(value: datetime) -> str:
     s = value.astimezone(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
     return f"datetime'{s}'"
@@ -138,6 +149,7 @@ class SyncClient:
         client_id: str,
         client_secret: str,
         env: Literal["prod", "sandbox"],
+        pool_maxsize: int = 10,
     ):
         self.base_url = base_url
         if not self.base_url.endswith("/"):
@@ -149,6 +161,10 @@ class SyncClient:
         self.client_secret = client_secret
         self.token = ""
         self.session = requests.Session()
+        # Connexions réutilisables par les threads qui partagent la session
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.env = env
         self.is_authenticated = False
 
@@ -160,6 +176,7 @@ class SyncClient:
             client_id=settings.FILE_SYNC_CLIENT_ID,
             client_secret=settings.FILE_SYNC_CLIENT_SECRET,
             env=settings.FILE_SYNC_ENV,
+            pool_maxsize=settings.FILE_SYNC_CONCURRENCY,
         )
 
     def authenticate(self):
@@ -187,11 +204,10 @@ class SyncClient:
         self, num_ej: str, object_type: str = "BUS2201", return_raw: bool = False
     ) -> list[ApiDocumentMetadata]:
         """Get list of documents associated with an engagement number"""
-        endpoint = "export_pj_ej/pieces_jointes_metadata"
-        params = {"$filter": f"num_ej eq '{num_ej}' and object_type eq '{object_type}'"}
+        params = {"$filter": f"num_ej eq {odata_string(num_ej)} and object_type eq {odata_string(object_type)}"}
 
         response = self.session.get(
-            self.base_url + endpoint,
+            self.base_url + DOCUMENTS_METADATA_ENDPOINT,
             params=params,
         )
         response.raise_for_status()
@@ -201,9 +217,49 @@ class SyncClient:
         if return_raw:
             return data
 
+        return self._parse_documents(data["d"]["results"])
+
+    def list_documents_for_ejs(
+        self, num_ejs: list[str], object_type: str = "BUS2201"
+    ) -> dict[str, list[ApiDocumentMetadata]]:
+        """
+        Get the documents of several engagement numbers in a single request, by engagement number.
+        The OData filter combines the engagement numbers with `or` (see documents_filter), pages of results
+        (`__next`) are followed.
+        """
+        url = self.base_url + DOCUMENTS_METADATA_ENDPOINT
+        params = {"$filter": self.documents_filter(num_ejs, object_type)}
+        docs_data_by_ej = {num_ej: [] for num_ej in num_ejs}
+        while url:
+            response = self.session.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()["d"]
+            for doc_data in data["results"]:
+                num_ej = doc_data.get("num_ej")
+                if num_ej in docs_data_by_ej:
+                    docs_data_by_ej[num_ej].append(doc_data)
+                else:
+                    logger.warning("Document of an engagement not requested: %r", doc_data)
+            # The next page URL contains the query
+            url, params = data.get("__next"), None
+        return {num_ej: self._parse_documents(docs_data) for num_ej, docs_data in docs_data_by_ej.items()}
+
+    @staticmethod
+    def documents_filter(num_ejs: list[str], object_type: str = "BUS2201") -> str:
+        """OData filter on several engagement numbers (the `in` operator is not supported by OData V2)."""
+        num_ejs_filter = " or ".join(f"num_ej eq {odata_string(num_ej)}" for num_ej in num_ejs)
+        return f"({num_ejs_filter}) and object_type eq {odata_string(object_type)}"
+
+    def documents_url_length(self, num_ejs: list[str], object_type: str = "BUS2201") -> int:
+        """Length of the URL of the request listing the documents of the engagement numbers."""
+        query = urlencode({"$filter": self.documents_filter(num_ejs, object_type)})
+        return len(self.base_url + DOCUMENTS_METADATA_ENDPOINT) + 1 + len(query)
+
+    def _parse_documents(self, docs_data: list[dict]) -> list[ApiDocumentMetadata]:
+        """Parse the documents data of an engagement number, removing the duplicates."""
         result = []
         doc_by_id = {}  # Save already processed docs to remove duplicates
-        for doc_data in data["d"]["results"]:
+        for doc_data in docs_data:
             try:
                 raw_doc = ApiRawDocumentMetadata(**doc_data)
                 doc = ApiDocumentMetadata.from_raw_doc(raw_doc)
@@ -226,7 +282,7 @@ class SyncClient:
                             raise ValueError(f"Invalid duplicate: {duplicate!r} != {doc!r}")
 
             except pydantic.ValidationError as e:
-                logger.warning(f"Validation error for document data={data!r} error={e}")
+                logger.warning(f"Validation error for document data={doc_data!r} error={e}")
                 raise
         return result
 
@@ -249,7 +305,7 @@ class SyncClient:
         filter_str = (
             f"date_reception ge {start_api} and "
             f"date_reception le {end_api} and "
-            f"pur_org eq '{purchase_organization}' and pur_group eq '{purchase_group}'"
+            f"pur_org eq {odata_string(purchase_organization)} and pur_group eq {odata_string(purchase_group)}"
         )
         response = self.session.get(
             self.base_url + endpoint,
@@ -272,16 +328,20 @@ class SyncClient:
                 raise
         return result
 
-    def download_document(self, doc_id: str, *, max_retries: int = 0, retry_delay: float = 20) -> bytes:
-        """Download document content by ID"""
+    def download_document(self, doc_id: str, *, max_retries: int = 0, retry_delay: float = 20) -> FileSource:
+        """Download document content by ID.
+
+        The response is streamed by chunks into a FileSource (in memory under FILE_SYNC_DOWNLOAD_MAX_MEMORY bytes,
+        in a temporary file beyond), its SHA-256 and size are computed on the fly. The caller must close it.
+        """
         endpoint = f"export_pj_ej/pieces_jointes_data('{doc_id.strip()}')/$value"
 
         def _do_call():
-            response = self.session.get(
-                self.base_url + endpoint,
-            )
-            response.raise_for_status()
-            return response.content
+            with self.session.get(self.base_url + endpoint, stream=True) as response:
+                response.raise_for_status()
+                return FileSource.from_chunks(
+                    response.iter_content(chunk_size=CHUNK_SIZE), max_memory=settings.FILE_SYNC_DOWNLOAD_MAX_MEMORY
+                )
 
         return self._retry_call(_do_call, max_retries=max_retries, retry_delay=retry_delay)
 
@@ -1,17 +1,18 @@
-import hashlib
-import io
 import logging
 import os
 import posixpath
 import re
+import shutil
 import zipfile
 
+from django.conf import settings
 from django.core.files.storage import default_storage
 from django.utils import timezone
 
 from unidecode import unidecode
 
 from docia.file_processing.models import FileInfo
+from docia.file_processing.processor.text_extraction.file_source import CHUNK_SIZE, FileSource
 from docia.file_processing.sync.client import SyncClient
 from docia.file_processing.sync.files_utils import get_corrected_extension
 
@@ -35,22 +36,15 @@ class DocumentDownloader:
             logger.info("Skip file %s / %s: Already exists", external_id, name)
             return
 
-        # Download the document
-        file_content = self.client.download_document(external_id, max_retries=max_retries)
-
-        self._store_file(external_id, name, file_content=file_content, folder=f"docs/{external_id}")
-
-    def _compute_hash(self, file_content: bytes):
-        hash_sha256 = hashlib.sha256()
-        hash_sha256.update(file_content)
-        hash_hex = hash_sha256.hexdigest()
-        return hash_hex
+        # Download the document (streamed to a temporary file when large)
+        with self.client.download_document(external_id, max_retries=max_retries) as file_content:
+            self._store_file(external_id, name, file_content=file_content, folder=f"docs/{external_id}")
 
     def _store_file(
         self,
         external_id: str | None,
         name: str,
-        file_content: bytes,
+        file_content: FileSource,
         folder: str,
         db_save: bool = True,
         parent: FileInfo | None = None,
@@ -62,6 +56,9 @@ class DocumentDownloader:
 
         This process ensures that a file in the database has an existing file in s3, but not the opposite.
         Errors during processing can lead to files in s3 without a row in the database.
+
+        The content is copied to the storage by chunks (multipart upload on s3), its hash and size are those
+        computed by the FileSource while it was written.
         """
 
         # Store original name
@@ -81,12 +78,12 @@ class DocumentDownloader:
                 filename = name + "." + extension
 
         filepath = f"{folder}/{filename}"
-        with default_storage.open(filepath, "wb") as f:
-            f.write(file_content)
+        with default_storage.open(filepath, "wb") as f, file_content.open() as source:
+            shutil.copyfileobj(source, f, CHUNK_SIZE)
 
-        hash = self._compute_hash(file_content)
+        hash = file_content.sha256
 
-        size = len(file_content)
+        size = file_content.size
 
         file_info = FileInfo(
             external_id=external_id,
@@ -113,7 +110,7 @@ class DocumentDownloader:
 
         return files_info
 
-    def _store_sub_zip_file(self, folder: str, file_content: bytes, parent: FileInfo):
+    def _store_sub_zip_file(self, folder: str, file_content: FileSource, parent: FileInfo):
         """
         Extract the files inside a zip and store them, works reccursively in case of nested zips.
 
@@ -129,25 +126,29 @@ class DocumentDownloader:
         files_info = []
         # Extract and store each file from the zip archive
         try:
-            with zipfile.ZipFile(io.BytesIO(file_content), "r") as zip_ref:
+            with file_content.open() as zip_stream, zipfile.ZipFile(zip_stream, "r") as zip_ref:
                 for zip_info in zip_ref.infolist():
                     if not zip_info.is_dir():  # Skip directories
-                        # Get the file content from the zip
-                        file_content = zip_ref.read(zip_info.filename)
+                        # Get the file content from the zip (decompressed by chunks)
+                        with zip_ref.open(zip_info) as member:
+                            sub_file_content = FileSource.from_stream(
+                                member, max_memory=settings.FILE_SYNC_DOWNLOAD_MAX_MEMORY
+                            )
 
                         subfolder, filename = posixpath.split(zip_info.filename)
                         filename = self.clean_filename(filename)
                         filefolder = posixpath.join(folder, subfolder).rstrip("/")
 
                         # Store the inner file
-                        sub_files_info = self._store_file(
-                            external_id=None,
-                            name=filename,
-                            folder=filefolder,
-                            file_content=file_content,
-                            db_save=False,
-                            parent=parent,
-                        )
+                        with sub_file_content:
+                            sub_files_info = self._store_file(
+                                external_id=None,
+                                name=filename,
+                                folder=filefolder,
+                                file_content=sub_file_content,
+                                db_save=False,
+                                parent=parent,
+                            )
                         files_info.extend(sub_files_info)
 
         except zipfile.BadZipFile as ex:
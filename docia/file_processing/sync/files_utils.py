@@ -1,20 +1,31 @@
 import logging
 import mimetypes
 import os
+from typing import BinaryIO
 
 from django.core.files.storage import default_storage
 
 import magic
 import olefile
 
+from docia.file_processing.processor.text_extraction.file_source import FileSource
+
 logger = logging.getLogger(__name__)
 
 
-def detect_file_extension_from_content(file: str | bytes) -> str:
+def _open(file: str | FileSource) -> BinaryIO:
+    """Flux de lecture d'un fichier du stockage (chemin) ou d'un fichier téléchargé."""
+    if isinstance(file, FileSource):
+        return file.open()
+    return default_storage.open(file, "rb")
+
+
+def detect_file_extension_from_content(file: str | bytes | FileSource) -> str:
     if isinstance(file, bytes):
         mime = magic.from_buffer(file, mime=True)
     else:
-        with default_storage.open(file, "rb") as f:
+        # Only the header is read, the file may not fit in memory
+        with _open(file) as f:
             header = f.read(1024)
             mime = magic.from_buffer(header, mime=True)
             if mime == "application/octet-stream":
@@ -34,12 +45,12 @@ def detect_file_extension_from_content(file: str | bytes) -> str:
     if ext:
         return ext.strip(".")
     else:
-        log_file = "binary:{file[:10]!r}" if isinstance(file, bytes) else file
+        log_file = "binary:{file[:10]!r}" if not isinstance(file, str) else file
         logger.warning("Could not guess extension for mime %r (file=%s)", mime, log_file)
         return "unknown"
 
 
-def guess_office_type(file: str | bytes) -> str:
+def guess_office_type(file: str | bytes | FileSource) -> str:
     def _read(fd):
         ole = olefile.OleFileIO(fd)
         names = {".".join(e) for e in ole.listdir()}
@@ -48,7 +59,7 @@ def guess_office_type(file: str | bytes) -> str:
     if isinstance(file, bytes):
         names = _read(file)
     else:
-        with default_storage.open(file, "rb") as f:
+        with _open(file) as f:
             names = _read(f)
 
     if "WordDocument" in names:
@@ -63,14 +74,14 @@ def guess_office_type(file: str | bytes) -> str:
     return "unknown"
 
 
-def get_corrected_extension(filename: str, file: str | bytes) -> str:
+def get_corrected_extension(filename: str, file: str | bytes | FileSource) -> str:
     """
     Obtient l'extension correcte d'un fichier en comparant l'extension du nom
     avec l'extension détectée par le contenu
 
     Args:
         filename (str): Nom du fichier
-        file (str): Chemin complet vers le fichier
+        file (str | bytes | FileSource): Chemin complet vers le fichier, ou son contenu
 
     Returns:
         str: Extension correcte (sans le point)
@@ -1,6 +1,8 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from django.conf import settings
+from django.db.models import Q
 from django.db.transaction import atomic
 from django.utils import timezone
 
@@ -13,12 +15,26 @@ logger = logging.getLogger(__name__)
 class EngagementsSync:
     def __init__(self):
         self.client = SyncClient.from_settings()
-
-    def sync(self, scopes: list[tuple[str, str]], start: datetime, end: datetime | None = None) -> list[str]:
+        # Reception date of the last activity synced, by scope (purchase_organization, purchase_group)
+        self.watermarks: dict[tuple[str, str], datetime] = {}
+
+    def sync(
+        self,
+        scopes: list[tuple[str, str]],
+        start: datetime,
+        end: datetime | None = None,
+        backfill: bool = False,
+    ) -> list[str]:
         """
         Update Engagement data from external system. Returns the inserted/updated engagements.
 
         scopes: List of tuples (purchase_organization, purchase_group)
+        start: Start of the window for scopes never synced, or for all scopes in backfill mode. Otherwise each
+            scope is synced from its watermark (reception date of the last activity processed) minus
+            FILE_SYNC_WATERMARK_OVERLAP_HOURS.
+
+        The new watermarks are kept in self.watermarks, to be saved with save_watermarks() once the engagements
+        have been processed.
         """
 
         if not self.client.is_authenticated:
@@ -28,23 +44,29 @@ class EngagementsSync:
             end = datetime.now()
 
         num_ejs_synced = set()
+        self.watermarks = {}
         logger.info("Fetch engagements activity...")
         for i, t_scope in enumerate(scopes):
             purchase_organization, purchase_group = t_scope
-            logger.info("Process scope %s (%s/%s)", t_scope, i, len(scopes))
-
-            # Get data from external system
-            activities = self.client.list_ej_place(start, end, purchase_organization, purchase_group)
-            activities = self._remove_duplicate(activities)
 
             # Get or Create the scope
             scope, _created = EngagementScope.objects.get_or_create(
                 purchase_organization=purchase_organization, purchase_group=purchase_group
             )
+            scope_start = start
+            if not backfill and scope.synced_until is not None:
+                scope_start = scope.synced_until - timedelta(hours=settings.FILE_SYNC_WATERMARK_OVERLAP_HOURS)
+            logger.info("Process scope %s (%s/%s) from %s", t_scope, i, len(scopes), scope_start)
+
+            # Get data from external system
+            activities = self.client.list_ej_place(scope_start, end, purchase_organization, purchase_group)
+            activities = self._remove_duplicate(activities)
 
             # Create and link the related engagements
             num_ejs = self._save_engagements(activities, scope)
             num_ejs_synced.update(num_ejs)
+            if activities:
+                self.watermarks[(purchase_organization, purchase_group)] = max(a.received_at for a in activities)
             logger.info("Sync scope %s: Success. %s engagements synced", t_scope, len(num_ejs))
         logger.info("Success: %s engagements synced", len(num_ejs_synced))
         return sorted(num_ejs_synced)
@@ -115,3 +137,13 @@ class EngagementsSync:
                 num_ejs.add(activity.num_ej)
                 result.append(activity)
         return result
+
+
+def save_watermarks(watermarks: dict[tuple[str, str], datetime]):
+    """Save the watermark of each scope (purchase_organization, purchase_group), which never goes backwards."""
+    for (purchase_organization, purchase_group), synced_until in watermarks.items():
+        EngagementScope.objects.filter(
+            Q(synced_until__isnull=True) | Q(synced_until__lt=synced_until),
+            purchase_organization=purchase_organization,
+            purchase_group=purchase_group,
+        ).update(synced_until=synced_until, updated_at=timezone.now())
@@ -1,65 +1,176 @@
 import logging
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
+from django.conf import settings
 from django.db.transaction import atomic
 
-from docia.file_processing.models import ExternalDocumentMetadata, ExternalLinkDocumentOrder
+from requests import HTTPError
 
-from .client import SyncClient
+from docia.file_processing.llm.rategate.gate import RateGate
+from docia.file_processing.models import (
+    ExternalDocumentMetadata,
+    ExternalLinkDocumentOrder,
+    SyncDocumentMetadataError,
+)
+
+from .client import ApiDocumentMetadata, SyncClient
 
 logger = logging.getLogger(__name__)
 
+# Status codes of a request rejected because of its filter (unsupported syntax, URL too long)
+FILTER_REJECTED_STATUS_CODES = (400, 414, 501)
+
+
+def is_filter_rejected(error: Exception) -> bool:
+    return (
+        isinstance(error, HTTPError)
+        and error.response is not None
+        and error.response.status_code in FILTER_REJECTED_STATUS_CODES
+    )
+
 
 class DocumentMetadataSync:
-    def __init__(self):
+    def __init__(self, concurrency: int | None = None, chunk_size: int | None = None):
         self.client = SyncClient.from_settings()
+        self.concurrency = concurrency or settings.FILE_SYNC_CONCURRENCY
+        self.chunk_size = chunk_size or settings.FILE_SYNC_METADATA_CHUNK_SIZE
+        # Errors of the last sync, by engagement number
+        self.errors: dict[str, str] = {}
+        # Engagements in error in a previous sync, synced by the last sync
+        self.recovered: list[str] = []
+        # Several engagements per request
+        self.multi_ej_filter = settings.FILE_SYNC_MAX_EJS_PER_REQUEST > 1
 
-    def sync(self, list_num_ej: list[str]) -> list[str]:
+    def sync(self, list_num_ej: list[str], retry_failed: bool = False) -> list[str]:
         """Fetch and store metadata for all documents associated with the provided engagement numbers.
 
-        Store results in ExternalDocumentMetadata.
-        Returns the list of doc external ids insterted/updated.
+        Engagements are fetched concurrently, several per request (at most `concurrency` requests in flight,
+        FILE_SYNC_RATE_PER_MINUTE request starts per minute), and results are stored in ExternalDocumentMetadata
+        by chunks as they arrive.
+        A failed engagement is recorded in SyncDocumentMetadataError and does not stop the sync. With retry_failed,
+        the engagements that failed in previous syncs are fetched again; their errors are deleted once they succeed.
+        Returns the list of doc external ids inserted/updated.
         """
 
         if not self.client.is_authenticated:
             self.client.authenticate()
 
+        previous_failures = set(
+            SyncDocumentMetadataError.objects.order_by().values_list("order_id", flat=True).distinct()
+        )
+        if retry_failed:
+            retried = sorted(previous_failures.difference(list_num_ej))
+            if retried:
+                logger.info("Retry %s engagements that failed in previous syncs", len(retried))
+            list_num_ej = [*list_num_ej, *retried]
+
         logger.info("Fetch documents data...")
-        docs_metadata = []
+        self.errors = {}
+        self.recovered = []
+        doc_ids = set()
+        docs_metadata = {}
         links = []
-        for i, num_ej in enumerate(list_num_ej):
+        for i, (num_ej, result) in enumerate(self._fetch(list_num_ej)):
             if len(list_num_ej) > 50 and i % 50 == 0:
-                logger.info("ej=%s/%s (%s documents)", i, len(list_num_ej), len(docs_metadata))
-            documents_data = self.client.list_documents_for_ej(num_ej)
-            docs_metadata.extend(
-                [
-                    ExternalDocumentMetadata(
-                        external_id=doc.id,
-                        name=doc.name,
-                        size=doc.size,
-                        date=doc.date,
-                    )
-                    for doc in documents_data
-                ]
-            )
-            links.extend(
-                [
-                    ExternalLinkDocumentOrder(
-                        external_document_id=doc.id,
-                        order_id=doc.num_ej,
-                    )
-                    for doc in documents_data
-                ]
-            )
-        logger.info("Fetched %s documents data, now inserting...", len(docs_metadata))
+                logger.info("ej=%s/%s (%s documents)", i, len(list_num_ej), len(doc_ids) + len(docs_metadata))
+            if isinstance(result, Exception):
+                logger.warning("Error fetching documents data for ej=%s: %s", num_ej, result)
+                self.errors[num_ej] = str(result)
+                SyncDocumentMetadataError.objects.update_or_create(order_id=num_ej, defaults={"message": str(result)})
+                continue
+            if num_ej in previous_failures:
+                self.recovered.append(num_ej)
+
+            for doc in result:
+                docs_metadata[doc.id] = ExternalDocumentMetadata(
+                    external_id=doc.id,
+                    name=doc.name,
+                    size=doc.size,
+                    date=doc.date,
+                )
+                links.append(ExternalLinkDocumentOrder(external_document_id=doc.id, order_id=doc.num_ej))
+            if len(docs_metadata) >= self.chunk_size:
+                doc_ids.update(self._save(docs_metadata, links))
+                docs_metadata, links = {}, []
+        doc_ids.update(self._save(docs_metadata, links))
+        if self.recovered:
+            SyncDocumentMetadataError.objects.filter(order_id__in=self.recovered).delete()
+            logger.info("%s engagements in error synced", len(self.recovered))
+
+        if self.errors:
+            logger.error("Documents data of %s/%s engagements not synced", len(self.errors), len(list_num_ej))
+        logger.info("Success: %s documents data inserted", len(doc_ids))
+        return sorted(doc_ids)
+
+    def _fetch(self, list_num_ej: list[str]) -> Iterator[tuple[str, list[ApiDocumentMetadata] | Exception]]:
+        """
+        Documents of each engagement (or the error raised), in completion order.
+        Engagements are queried by groups (see _next_group); if the gateway rejects the filter of a group
+        (e.g. because of one malformed engagement number), this group is queried again one engagement at a time.
+        """
+        limiter = self._get_limiter()
+        remaining = deque(list_num_ej)
+        # Engagements of rejected groups, queried alone
+        singles = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending: dict[Future, list[str]] = {}
+            while remaining or singles or pending:
+                while (remaining or singles) and len(pending) < self.concurrency:
+                    group = [singles.popleft()] if singles else self._next_group(remaining)
+                    # Requests start as soon as they are submitted: a worker is free
+                    if limiter:
+                        limiter.wait_turn()
+                    pending[executor.submit(self._list_documents, group)] = group
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    group = pending.pop(future)
+                    error = future.exception()
+                    if error is not None and len(group) > 1 and is_filter_rejected(error):
+                        logger.warning(
+                            "Filter of %s engagements rejected (%s), query them one by one", len(group), error
+                        )
+                        singles.extend(group)
+                        continue
+                    for num_ej in group:
+                        yield num_ej, error or future.result()[num_ej]
+
+    def _next_group(self, remaining: deque) -> list[str]:
+        """Next engagements to query in a single request, within FILE_SYNC_MAX_EJS_PER_REQUEST and the URL length."""
+        group = [remaining.popleft()]
+        if not self.multi_ej_filter:
+            return group
+        while remaining and len(group) < settings.FILE_SYNC_MAX_EJS_PER_REQUEST:
+            if self.client.documents_url_length(group + [remaining[0]]) > settings.FILE_SYNC_MAX_URL_LENGTH:
+                break
+            group.append(remaining.popleft())
+        return group
+
+    def _list_documents(self, group: list[str]) -> dict[str, list[ApiDocumentMetadata]]:
+        if len(group) == 1:
+            return {group[0]: self.client.list_documents_for_ej(group[0])}
+        return self.client.list_documents_for_ejs(group)
+
+    def _get_limiter(self) -> RateGate | None:
+        rate = settings.FILE_SYNC_RATE_PER_MINUTE
+        if rate <= 0:
+            return None
+        return RateGate(rate, key=f"file_sync_{rate}")
+
+    def _save(
+        self, docs_metadata: dict[str, ExternalDocumentMetadata], links: list[ExternalLinkDocumentOrder]
+    ) -> list[str]:
+        if not docs_metadata:
+            return []
         with atomic():
             ExternalDocumentMetadata.objects.bulk_create(
-                docs_metadata,
+                list(docs_metadata.values()),
                 batch_size=1000,
                 update_conflicts=True,
                 update_fields=["name", "size", "date"],
                 unique_fields=["external_id"],
             )
             ExternalLinkDocumentOrder.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
-        logger.info("Success: %s documents data inserted", len(docs_metadata))
-        list_doc_ids = sorted(set([doc.external_id for doc in docs_metadata]))
-        return list_doc_ids
+        logger.info("%s documents data inserted", len(docs_metadata))
+        return list(docs_metadata)
@@ -15,42 +15,55 @@ from .sync_metadata import DocumentMetadataSync
 logger = logging.getLogger(__name__)
 
 
-def sync_all(start: datetime, end: datetime = None):
-    num_ejs = sync_engagements(start, end)
-    r = sync_documents_and_download_files(num_ejs)
+def sync_all(start: datetime, end: datetime = None, backfill: bool = False):
+    num_ejs, watermarks = sync_engagements(start, end, backfill=backfill)
+    # Engagements whose documents failed to sync previously are synced again: the watermarks do not need
+    # to wait for them
+    r = sync_documents_and_download_files(num_ejs, retry_failed=True)
     return {
-        "num_ejs": num_ejs,
+        "num_ejs": sorted({*num_ejs, *r["recovered_num_ejs"]}),
         **r,
+        "watermarks": watermarks,
     }
 
 
-def sync_documents_and_download_files(num_ejs: list[str]):
-    doc_ids = sync_documents(num_ejs)
+def sync_documents_and_download_files(num_ejs: list[str], retry_failed: bool = False):
+    doc_ids, recovered_num_ejs, failed_num_ejs = sync_documents(num_ejs, retry_failed=retry_failed)
     download_success, download_errors = download_documents(doc_ids)
     return {
         "doc_ids": doc_ids,
         "download_success": download_success,
         "download_errors": download_errors,
+        "recovered_num_ejs": recovered_num_ejs,
+        "metadata_errors": failed_num_ejs,
     }
 
 
-def sync_engagements(start: datetime, end: datetime = None) -> list[str]:
+def sync_engagements(
+    start: datetime, end: datetime = None, backfill: bool = False
+) -> tuple[list[str], dict[tuple[str, str], datetime]]:
+    """Sync the engagements of the scopes; returns them with the new watermark of each scope (not saved yet)."""
     end = end or timezone.now()
     scopes = settings.FILE_SYNC_SCOPES
     t_scopes = [s.split("/") for s in scopes]
 
     ej_syncer = EngagementsSync()
-    num_ejs = ej_syncer.sync(t_scopes, start, end)
-    return num_ejs
+    num_ejs = ej_syncer.sync(t_scopes, start, end, backfill=backfill)
+    return num_ejs, ej_syncer.watermarks
 
 
-def sync_documents(num_ejs: list[str]) -> list[str]:
+def sync_documents(num_ejs: list[str], retry_failed: bool = False) -> tuple[list[str], list[str], list[str]]:
+    """
+    Sync the metadata of the documents of the engagements (and of those in error in previous syncs if
+    retry_failed). Returns the doc ids synced, the engagements in error previously that are now synced, and the
+    engagements in error.
+    """
     qs = DataEngagement.objects.filter(num_ej__in=num_ejs)
     qs = qs.order_by("external_updated_at")
     order_ids = list(qs.values_list("num_ej", flat=True))
     doc_syncer = DocumentMetadataSync()
-    ids = doc_syncer.sync(order_ids)
-    return ids
+    ids = doc_syncer.sync(order_ids, retry_failed=retry_failed)
+    return ids, doc_syncer.recovered, sorted(doc_syncer.errors)
 
 
 def download_documents(doc_ids: list[str]):
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from docia.file_processing.processor.text_extraction.cache import ExtractionCache
+
+
+class Command(BaseCommand):
+    help = "Evicts the least recently used text extraction cache entries while the cache exceeds its maximum size"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-bytes",
+            type=int,
+            default=settings.EXTRACTION_CACHE_MAX_BYTES,
+            help="Maximum size of the cache (bytes)",
+        )
+
+    def handle(self, *args, **options):
+        # The OCR tool is only part of the keys, eviction covers every entry
+        count, freed = ExtractionCache("", max_bytes=options["max_bytes"]).evict()
+        self.stdout.write(self.style.SUCCESS(f"{count} entries evicted ({freed} bytes freed)"))
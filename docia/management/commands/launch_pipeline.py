@@ -14,7 +14,13 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument(
-            "--timedelta", type=str, default="7d", help='Time delta for filtering documents (e.g., "24h", "1d", "7d")'
+            "--timedelta",
+            type=str,
+            default="7d",
+            help=(
+                'Time delta for filtering documents (e.g., "24h", "1d", "7d"), '
+                "applied to scopes never synced or with --backfill"
+            ),
         )
         parser.add_argument(
             "--force-analyze",
@@ -23,6 +29,12 @@ class Command(BaseCommand):
             default=False,
             help="Force running the pipeline on all documents even if already analyzed, default=False",
         )
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            default=False,
+            help="Sync all scopes over the whole time delta instead of from their last synced activity, default=False",
+        )
 
     def handle(self, *args, **options):
         force_analyze = options["force_analyze"]
@@ -43,7 +55,7 @@ class Command(BaseCommand):
             return
 
         end = timezone.now()
-        batch_id = sync_and_analyze(start, end, force_analyze=force_analyze)
+        batch_id = sync_and_analyze(start, end, force_analyze=force_analyze, backfill=options["backfill"])
         if batch_id:
             self.stdout.write(self.style.SUCCESS(f"Pipeline launched, batch: {batch_id}"))
         else:
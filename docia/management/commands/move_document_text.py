@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.transaction import atomic
+
+from docia.documents.models import Document, DocumentText
+from docia.file_processing.processor.text_extraction.pages import split_pages
+
+
+class Command(BaseCommand):
+    help = "Moves the extracted text of documents from the docia_document table to the page-structured text storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Number of documents moved per transaction")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        ids = list(Document.objects.filter(text__isnull=False, text_storage__isnull=True).values_list("id", flat=True))
+        self.stdout.write(f"{len(ids)} documents to move")
+
+        for i in range(0, len(ids), batch_size):
+            chunk = ids[i : i + batch_size]
+            with atomic():
+                documents = Document.objects.filter(id__in=chunk).only("id", "text", "is_ocr")
+                DocumentText.objects.bulk_create(
+                    [DocumentText.build(doc, doc.text, split_pages(doc.text), bool(doc.is_ocr)) for doc in documents]
+                )
+                Document.objects.filter(id__in=chunk).update(text=None)
+            self.stdout.write(f"{min(i + batch_size, len(ids))}/{len(ids)} documents moved")
+
+        self.stdout.write(self.style.SUCCESS(f"Successfully moved the text of {len(ids)} documents"))
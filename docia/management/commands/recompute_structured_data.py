@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from docia.documents.models import Document
+from docia.file_processing.processor.recompute_structured_data import RecomputeReport, recompute_structured_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the structured data of documents from their stored LLM response (no LLM call), "
+        "e.g. after a change of the cleaning functions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--classification",
+            action="append",
+            dest="classifications",
+            help="Only recompute documents of this classification (can be repeated)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.RECOMPUTE_STRUCTURED_DATA_BATCH_SIZE,
+            help="Number of documents read, cleaned and updated per batch",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.RECOMPUTE_STRUCTURED_DATA_WORKERS,
+            help="Number of cleaning processes (1: in the command process)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            default=False,
+            help="Report the changes without updating the documents",
+        )
+
+    def handle(self, *args, **options):
+        qs_documents = Document.objects.all()
+        if options["classifications"]:
+            qs_documents = qs_documents.filter(classification__in=options["classifications"])
+
+        def on_batch(report: RecomputeReport):
+            self.stdout.write(f"{report.total} documents processed, {report.changed} changed")
+
+        report = recompute_structured_data(
+            qs_documents,
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            dry_run=options["dry_run"],
+            on_batch=on_batch,
+        )
+
+        for classification, count in sorted(report.changed_by_classification.items(), key=lambda item: -item[1]):
+            self.stdout.write(f"  {classification}: {count} documents changed")
+        for field, count in report.changed_fields.most_common():
+            self.stdout.write(f"  {field}: changed in {count} documents")
+        summary = f"{report.changed} changed, {report.unchanged} unchanged, {report.errors} errors"
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"Dry run, nothing saved: {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Successfully recomputed the structured data: {summary}"))
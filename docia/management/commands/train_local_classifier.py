@@ -0,0 +1,95 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Coalesce, Left
+
+from sklearn.model_selection import train_test_split
+
+from docia.documents.models import Document
+from docia.file_processing.processor import local_classifier
+from docia.file_processing.processor.classifier import FIRST_PAGE_CHARS
+
+
+class Command(BaseCommand):
+    help = (
+        "Trains the local pre-classifier on the classifications produced by the LLM and saves it to the storage, "
+        "with the precision of each filename rule measured against the same classifications. "
+        "Running workers load the model once: restart them to use a new one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=None, help="Storage path of the model (default: LOCAL_CLASSIFIER_PATH)")
+        parser.add_argument(
+            "--min-samples", type=int, default=10, help="Classes with fewer labelled documents are left to the LLM"
+        )
+        parser.add_argument(
+            "--test-size", type=float, default=0.2, help="Share of documents held out to evaluate the model"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Evaluate the model without saving it")
+
+    def handle(self, *args, **options):
+        path = options["path"] or settings.LOCAL_CLASSIFIER_PATH
+        min_samples = max(options["min_samples"], local_classifier.CALIBRATION_FOLDS)
+        threshold = settings.LOCAL_CLASSIFIER_THRESHOLD
+
+        rows = list(
+            Document.objects.filter(classification_type="llm", classification__isnull=False)
+            .exclude(classification="Non classifié")
+            .annotate(text_head=Coalesce(Left("text_storage__head", FIRST_PAGE_CHARS), Left("text", FIRST_PAGE_CHARS)))
+            .values_list("filename", "text_head", "classification")
+        )
+        rule_confidences = self._measure_rules(rows, options["min_samples"])
+
+        counts = Counter(label for _, _, label in rows)
+        kept_classes = {label for label, count in counts.items() if count >= min_samples}
+        rows = [row for row in rows if row[2] in kept_classes]
+        self.stdout.write(
+            f"{len(rows)} labelled documents, {len(kept_classes)} classes "
+            f"({len(counts) - len(kept_classes)} classes with fewer than {min_samples} documents ignored)"
+        )
+        if len(kept_classes) < 2:
+            raise CommandError("Not enough labelled documents to train the local classifier")
+
+        filenames, texts, labels = (list(column) for column in zip(*rows, strict=True))
+
+        if options["test_size"] > 0:
+            train_f, test_f, train_t, test_t, train_l, test_l = train_test_split(
+                filenames, texts, labels, test_size=options["test_size"], stratify=labels, random_state=0
+            )
+            model = local_classifier.train_model(train_f, train_t, train_l)
+            start = time.perf_counter()
+            predictions = local_classifier.predict_with_model(model, test_f, test_t)
+            latency = (time.perf_counter() - start) / len(test_f)
+            self._report(predictions, test_l, threshold, latency)
+
+        if options["dry_run"]:
+            return
+        model = local_classifier.train_model(filenames, texts, labels)
+        local_classifier.save_model(model, path, rule_confidences)
+        self.stdout.write(self.style.SUCCESS(f"Local classifier trained on {len(rows)} documents and saved to {path}"))
+
+    def _measure_rules(self, rows, min_samples):
+        """Precision of each rule; rules matching fewer than min_samples documents are not used."""
+        filenames = [filename for filename, _, _ in rows]
+        labels = [label for _, _, label in rows]
+        rule_confidences = {}
+        for classification, (nb_matches, precision) in sorted(
+            local_classifier.measure_rules(filenames, labels).items()
+        ):
+            self.stdout.write(f"Rule {classification}: {nb_matches} documents, precision {precision:.1%}")
+            if nb_matches >= min_samples:
+                rule_confidences[classification] = precision
+        return rule_confidences
+
+    def _report(self, predictions, labels, threshold, latency):
+        nb_correct = sum(p.classification == label for p, label in zip(predictions, labels, strict=True))
+        accepted = [(p, label) for p, label in zip(predictions, labels, strict=True) if p.confidence >= threshold]
+        nb_accepted_correct = sum(p.classification == label for p, label in accepted)
+        self.stdout.write(f"Held-out documents: {len(labels)}")
+        self.stdout.write(f"  accuracy: {nb_correct / len(labels):.1%}")
+        self.stdout.write(f"  confidence >= {threshold}: {len(accepted) / len(labels):.1%} of documents")
+        if accepted:
+            self.stdout.write(f"  accuracy above threshold: {nb_accepted_correct / len(accepted):.1%}")
+        self.stdout.write(f"  latency: {latency * 1000:.2f} ms per document")
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-19 06:27
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0028_document_analyzed_at_externaldocumentmetadata_date_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionCacheEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('kind', models.CharField(choices=[('FILE', 'File'), ('PAGE', 'Page')])),
+                ('text', models.TextField()),
+                ('is_ocr', models.BooleanField(default=False)),
+                ('size', models.PositiveIntegerField()),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
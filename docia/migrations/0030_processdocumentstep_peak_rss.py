@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0029_extractioncacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processdocumentstep',
+            name='peak_rss',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Pic de mémoire résidente (octets)', null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-19 06:43
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0030_processdocumentstep_peak_rss'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('length', models.PositiveIntegerField()),
+                ('head', models.TextField(blank=True)),
+                ('text', models.TextField(blank=True, null=True)),
+                ('compressed_text', models.BinaryField(blank=True, null=True)),
+                ('page_starts', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), default=list, size=None)),
+                ('page_ends', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), default=list, size=None)),
+                ('page_word_counts', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), default=list, size=None)),
+                ('page_is_ocr', django.contrib.postgres.fields.ArrayField(base_field=models.BooleanField(), default=list, size=None)),
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='text_storage', to='docia.document')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:08
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0031_documenttext'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='processdocumentbatch',
+            name='steps',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(choices=[('TEXT_EXTRACTION', 'Text Extraction'), ('CLASSIFICATION', 'Classification'), ('RELEVANT_CONTENT', 'Relevant Content'), ('CONTENT_ANALYSIS', 'Content Analysis')], max_length=255), size=None),
+        ),
+        migrations.AlterField(
+            model_name='processdocumentstep',
+            name='step_type',
+            field=models.CharField(choices=[('TEXT_EXTRACTION', 'Text Extraction'), ('CLASSIFICATION', 'Classification'), ('RELEVANT_CONTENT', 'Relevant Content'), ('CONTENT_ANALYSIS', 'Content Analysis')]),
+        ),
+        migrations.CreateModel(
+            name='DocumentChunk',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('index', models.PositiveIntegerField()),
+                ('start', models.PositiveIntegerField()),
+                ('end', models.PositiveIntegerField()),
+                ('text_hash', models.CharField(max_length=64)),
+                ('embedding_model', models.CharField(max_length=255)),
+                ('embedding', models.BinaryField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='docia.document')),
+            ],
+            options={
+                'unique_together': {('document', 'embedding_model', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+def delete_document_chunks(apps, schema_editor):
+    # Les embeddings sont désormais dans ChunkEmbedding : les morceaux seront recréés à la prochaine analyse
+    apps.get_model("docia", "DocumentChunk").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0032_documentchunk_relevant_content_step'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkEmbedding',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('text_hash', models.CharField(max_length=64)),
+                ('embedding_model', models.CharField(max_length=255)),
+                ('vector', models.BinaryField()),
+            ],
+            options={
+                'unique_together': {('text_hash', 'embedding_model')},
+            },
+        ),
+        migrations.RunPython(delete_document_chunks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='documentchunk',
+            name='embedding',
+        ),
+        migrations.AddField(
+            model_name='documentchunk',
+            name='embedding',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='document_chunks', to='docia.chunkembedding'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0033_chunkembedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentchunk',
+            name='page',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
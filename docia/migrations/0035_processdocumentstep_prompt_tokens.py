@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0034_documentchunk_page'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processdocumentstep',
+            name='prompt_tokens',
+            field=models.PositiveIntegerField(blank=True, help_text='Tokens envoyés au LLM', null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:39
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0035_processdocumentstep_prompt_tokens'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='processdocumentbatch',
+            name='steps',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(choices=[('TEXT_EXTRACTION', 'Text Extraction'), ('CLASSIFICATION', 'Classification'), ('RELEVANT_CONTENT', 'Relevant Content'), ('CONTENT_ANALYSIS', 'Content Analysis'), ('RECOMPUTE_STRUCTURED_DATA', 'Recompute Structured Data')], max_length=255), size=None),
+        ),
+        migrations.AlterField(
+            model_name='processdocumentstep',
+            name='step_type',
+            field=models.CharField(choices=[('TEXT_EXTRACTION', 'Text Extraction'), ('CLASSIFICATION', 'Classification'), ('RELEVANT_CONTENT', 'Relevant Content'), ('CONTENT_ANALYSIS', 'Content Analysis'), ('RECOMPUTE_STRUCTURED_DATA', 'Recompute Structured Data')]),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:43
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0036_alter_processdocumentbatch_steps_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncDocumentMetadataError',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('order_id', models.CharField()),
+                ('message', models.CharField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
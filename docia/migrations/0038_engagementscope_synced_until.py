@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0037_syncdocumentmetadataerror'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='engagementscope',
+            name='synced_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Synchronisé jusqu'au"),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.11 on 2026-10-19 08:26
+
+from django.db import migrations, models
+
+
+def keep_latest_error_per_order(apps, schema_editor):
+    """Keep only the most recent error of each engagement before adding the unique constraint."""
+    SyncDocumentMetadataError = apps.get_model('docia', 'SyncDocumentMetadataError')
+
+    seen = set()
+    duplicates = []
+    for error_id, order_id in SyncDocumentMetadataError.objects.order_by('order_id', '-updated_at').values_list(
+        'id', 'order_id'
+    ):
+        if order_id in seen:
+            duplicates.append(error_id)
+        seen.add(order_id)
+    SyncDocumentMetadataError.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docia', '0038_engagementscope_synced_until'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            keep_latest_error_per_order,
+            reverse_code=migrations.RunPython.noop,
+        ),
+        migrations.AlterField(
+            model_name='syncdocumentmetadataerror',
+            name='order_id',
+            field=models.CharField(unique=True),
+        ),
+    ]
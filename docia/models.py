@@ -1,11 +1,14 @@
 # Import other models so Django can discover them
 from .common.models import BaseModel, User  # noqa: F401
 from .documents.models import (  # noqa: F401
+    ChunkEmbedding,
     DataBatch,
     DataEngagement,
     DataEngagementItems,
     DataProgrammesMinisteriels,
     Document,
+    DocumentChunk,
+    DocumentText,
     EngagementScope,
 )
 from .file_processing.models import (  # noqa: F401
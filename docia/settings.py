@@ -398,6 +398,79 @@ ALBERT_RATE_PER_MINUTE_BY_MODEL = {
 }
 ALBERT_RATE_PER_MINUTE_DEFAULT = config.int("ALBERT_RATE_PER_MINUTE", default=100)
 
+# OCR local Tesseract
+TESSERACT_OCR_LANG = config.str("TESSERACT_OCR_LANG", default="fra")
+# Résolution de rendu des pages PDF avant OCR (144 dpi = zoom x2)
+TESSERACT_OCR_DPI = config.int("TESSERACT_OCR_DPI", default=144)
+# Mode de segmentation des pages (3 = PSM.AUTO)
+TESSERACT_OCR_PSM = config.int("TESSERACT_OCR_PSM", default=3)
+# Nombre de moteurs Tesseract (et de pages OCRisées en parallèle) par processus worker. Chaque moteur garde ses
+# données de langue en mémoire et chaque processus worker a son pool : à augmenter selon les coeurs disponibles
+# divisés par la concurrence des workers
+TESSERACT_POOL_SIZE = config.int("TESSERACT_POOL_SIZE", default=2)
+
+# Service de conversion LibreOffice (.doc) : délai max par document (secondes)
+LIBREOFFICE_TIMEOUT = config.int("LIBREOFFICE_TIMEOUT", default=90)
+
+# Cache des résultats d'extraction/OCR (adressé par le hash du fichier et des pages PDF), taille max ramenée
+# périodiquement par la commande evict_extraction_cache
+EXTRACTION_CACHE_ENABLED = config.bool("EXTRACTION_CACHE_ENABLED", default=True)
+EXTRACTION_CACHE_MAX_BYTES = config.int("EXTRACTION_CACHE_MAX_BYTES", default=2 * 1024 * 1024 * 1024)
+# Taille au-delà de laquelle un fichier à extraire est lu sur disque plutôt qu'en mémoire
+EXTRACTION_SPOOL_MAX_MEMORY = config.int("EXTRACTION_SPOOL_MAX_MEMORY", default=20 * 1024 * 1024)
+# Limites par feuille de tableur (lignes non vides, cellules) au-delà desquelles le contenu est tronqué
+EXTRACTION_EXCEL_MAX_ROWS = config.int("EXTRACTION_EXCEL_MAX_ROWS", default=50_000)
+EXTRACTION_EXCEL_MAX_CELLS = config.int("EXTRACTION_EXCEL_MAX_CELLS", default=1_000_000)
+# Stockage du texte extrait : au-delà de INLINE_MAX_CHARS caractères le texte est compressé,
+# les HEAD_CHARS premiers restent lisibles sans décompression
+DOCUMENT_TEXT_INLINE_MAX_CHARS = config.int("DOCUMENT_TEXT_INLINE_MAX_CHARS", default=16 * 1024)
+DOCUMENT_TEXT_HEAD_CHARS = config.int("DOCUMENT_TEXT_HEAD_CHARS", default=4000)
+# Extraction dans un processus enfant supervisé : limites de base (tout fichier),
+# augmentées selon la taille et le type du fichier dans la limite des maxima
+EXTRACTION_SANDBOX_ENABLED = config.bool("EXTRACTION_SANDBOX_ENABLED", default=True)
+EXTRACTION_SANDBOX_BASE_TIMEOUT = config.int("EXTRACTION_SANDBOX_BASE_TIMEOUT", default=120)
+EXTRACTION_SANDBOX_MAX_TIMEOUT = config.int("EXTRACTION_SANDBOX_MAX_TIMEOUT", default=1800)
+EXTRACTION_SANDBOX_BASE_MEMORY = config.int("EXTRACTION_SANDBOX_BASE_MEMORY", default=1024 * 1024 * 1024)
+EXTRACTION_SANDBOX_MAX_MEMORY = config.int("EXTRACTION_SANDBOX_MAX_MEMORY", default=6 * 1024 * 1024 * 1024)
+
+# Pré-classification locale (règles + modèle entraîné par train_local_classifier) : au-delà du seuil de
+# confiance, la classification locale est retenue sans appel au LLM. Désactivée par défaut : à activer
+# après avoir vérifié le rapport de précision de train_local_classifier
+LOCAL_CLASSIFIER_ENABLED = config.bool("LOCAL_CLASSIFIER_ENABLED", default=False)
+LOCAL_CLASSIFIER_PATH = config.str("LOCAL_CLASSIFIER_PATH", default="models/local_classifier.pickle")
+LOCAL_CLASSIFIER_THRESHOLD = config.float("LOCAL_CLASSIFIER_THRESHOLD", default=0.9)
+# Nombre maximal de documents classifiés par le LLM en une seule requête (1 : une requête par document)
+CLASSIFICATION_BATCH_SIZE = config.int("CLASSIFICATION_BATCH_SIZE", default=10)
+# Nombre maximal d'étapes d'analyse de contenu prises en charge par une tâche et traitées en parallèle
+CONTENT_ANALYSIS_BATCH_SIZE = config.int("CONTENT_ANALYSIS_BATCH_SIZE", default=4)
+# Budget de tokens des prompts d'analyse de contenu : fenêtre de contexte par modèle (défaut pour un modèle
+# non listé : LLM_CONTEXT_TOKENS_DEFAULT), tokens réservés à la réponse et plafond de tokens envoyés par document
+LLM_CONTEXT_TOKENS_BY_MODEL = {
+    "openweight-medium": 128_000,
+    "mistral-medium-2508": 128_000,
+}
+LLM_CONTEXT_TOKENS_DEFAULT = config.int("LLM_CONTEXT_TOKENS_DEFAULT", default=32_000)
+CONTENT_ANALYSIS_RESPONSE_TOKENS = config.int("CONTENT_ANALYSIS_RESPONSE_TOKENS", default=4_000)
+CONTENT_ANALYSIS_MAX_PROMPT_TOKENS = config.int("CONTENT_ANALYSIS_MAX_PROMPT_TOKENS", default=100_000)
+# Analyse par groupes d'attributs (types de document qui en définissent : CCAP, acte d'engagement) :
+# une requête par groupe, en parallèle, chaque groupe en échec étant relancé CONTENT_ANALYSIS_GROUP_RETRIES fois
+CONTENT_ANALYSIS_SPLIT_ATTRIBUTES = config.bool("CONTENT_ANALYSIS_SPLIT_ATTRIBUTES", default=False)
+CONTENT_ANALYSIS_GROUP_RETRIES = config.int("CONTENT_ANALYSIS_GROUP_RETRIES", default=1)
+# Recalcul des données structurées à partir des réponses du LLM enregistrées (recompute_structured_data) :
+# documents lus et mis à jour par lots, nettoyés dans RECOMPUTE_STRUCTURED_DATA_WORKERS processus
+RECOMPUTE_STRUCTURED_DATA_BATCH_SIZE = config.int("RECOMPUTE_STRUCTURED_DATA_BATCH_SIZE", default=500)
+RECOMPUTE_STRUCTURED_DATA_WORKERS = config.int("RECOMPUTE_STRUCTURED_DATA_WORKERS", default=4)
+# Sélection du contenu pertinent (RAG) : au-delà de RELEVANT_CONTENT_MIN_WORDS mots, seuls les morceaux
+# les plus proches des requêtes de recherche des attributs sont envoyés à l'analyse de contenu
+RELEVANT_CONTENT_MIN_WORDS = config.int("RELEVANT_CONTENT_MIN_WORDS", default=5000)
+RELEVANT_CONTENT_EMBEDDING_MODEL = config.str("RELEVANT_CONTENT_EMBEDDING_MODEL", default="BAAI/bge-m3")
+RELEVANT_CONTENT_TOP_K = config.int("RELEVANT_CONTENT_TOP_K", default=3)
+RELEVANT_CONTENT_SEMANTIC_WEIGHT = config.float("RELEVANT_CONTENT_SEMANTIC_WEIGHT", default=0.7)
+# Taille cible des morceaux, en tokens
+RELEVANT_CONTENT_CHUNK_TOKENS = config.int("RELEVANT_CONTENT_CHUNK_TOKENS", default=300)
+# Encodage tiktoken utilisé pour compter les tokens (vide : estimation à partir du nombre de caractères)
+TOKENIZER_ENCODING = config.str("TOKENIZER_ENCODING", default="o200k_base")
+
 GRIST_DOCS_URL = config.str("GRIST_DOCS_URL", default="")
 GRIST_API_KEY = config.str("GRIST_API_KEY", default="")
 
@@ -409,3 +482,17 @@ FILE_SYNC_CLIENT_ID = config.str("FILE_SYNC_CLIENT_ID", default="")
 FILE_SYNC_CLIENT_SECRET = config.str("FILE_SYNC_CLIENT_SECRET", default="")
 FILE_SYNC_ENV = config.str("FILE_SYNC_ENV", default="prod")
 FILE_SYNC_SCOPES = config.list("FILE_SYNC_SCOPES", default=[])
+# Synchronisation incrémentale des EJ : chaque périmètre repart de la date de la dernière activité traitée,
+# moins une marge de sécurité (activités enregistrées en retard par le système source)
+FILE_SYNC_WATERMARK_OVERLAP_HOURS = config.int("FILE_SYNC_WATERMARK_OVERLAP_HOURS", default=6)
+# Synchronisation des métadonnées des documents : EJ interrogés en parallèle (et taille du pool de connexions HTTP),
+# plafond de requêtes par minute (0 : pas de plafond) et nombre de documents enregistrés par lot
+FILE_SYNC_CONCURRENCY = config.int("FILE_SYNC_CONCURRENCY", default=10)
+FILE_SYNC_RATE_PER_MINUTE = config.int("FILE_SYNC_RATE_PER_MINUTE", default=600)
+FILE_SYNC_METADATA_CHUNK_SIZE = config.int("FILE_SYNC_METADATA_CHUNK_SIZE", default=1000)
+# EJ interrogés par requête de métadonnées (filtre OData "or" ; 1 : une requête par EJ), dans la limite
+# de longueur d'URL acceptée par la passerelle
+FILE_SYNC_MAX_EJS_PER_REQUEST = config.int("FILE_SYNC_MAX_EJS_PER_REQUEST", default=100)
+FILE_SYNC_MAX_URL_LENGTH = config.int("FILE_SYNC_MAX_URL_LENGTH", default=2048)
+# Téléchargement des documents : lu par blocs, gardé en mémoire sous ce seuil, dans un fichier temporaire au-delà
+FILE_SYNC_DOWNLOAD_MAX_MEMORY = config.int("FILE_SYNC_DOWNLOAD_MAX_MEMORY", default=8 * 1024 * 1024)
@@ -78,7 +78,7 @@ def home(request):
                     logger.warning(f"PermissionDenied: User {request.user.email} cannot view EJ {num_ej}")
                 else:
                     db_docs = Document.objects.filter(engagements__num_ej=form.cleaned_data["num_ej"])
-                    db_docs = db_docs.order_by("classification")
+                    db_docs = db_docs.defer("text", "relevant_content", "llm_response").order_by("classification")
                     for db_doc in db_docs:
                         document_data_raw = db_doc.structured_data or {}
                         ratio_extracted = compute_ratio_data_extraction(document_data_raw)
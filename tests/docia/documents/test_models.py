@@ -0,0 +1,80 @@
+from django.core.management import call_command
+
+import pytest
+
+from docia.documents.models import DocumentText
+from docia.file_processing.processor.text_extraction.pages import join_pages, split_pages
+from tests.factories.data import DocumentFactory
+
+PAGES = ["Première page du marché", "Deuxième page\navec deux lignes", "Fin"]
+
+
+@pytest.mark.django_db
+def test_save_text_inline():
+    document = DocumentFactory(text="ancien texte")
+    text = join_pages(PAGES)
+
+    document.save_text(text, split_pages(text), is_ocr=False)
+    document.save(update_fields=["text"])
+
+    document.refresh_from_db()
+    assert document.text is None
+    storage = document.get_text_storage()
+    assert storage.text == text
+    assert storage.compressed_text is None
+    assert storage.nb_pages == 3
+    assert [storage.page(i) for i in (1, 2, 3)] == PAGES
+    assert storage.page_word_counts == [4, 5, 1]
+    assert storage.page_is_ocr == [False, False, False]
+    assert document.get_text() == text
+
+
+@pytest.mark.django_db
+def test_save_text_compressed(settings, django_assert_num_queries):
+    settings.DOCUMENT_TEXT_INLINE_MAX_CHARS = 100
+    settings.DOCUMENT_TEXT_HEAD_CHARS = 50
+    pages = [f"page {i} " + "mot " * 100 for i in range(1, 4)]
+    text = join_pages(pages)
+    DocumentFactory().save_text(text, split_pages(text), is_ocr=True)
+
+    storage = DocumentText.objects.get()
+    assert storage.text is None
+    assert len(storage.compressed_text) < len(text)
+    assert storage.length == len(text)
+
+    document = storage.document
+    with django_assert_num_queries(1):
+        # Le début du texte est lu sans charger le texte compressé
+        assert document.get_text_head(20) == text[:20]
+    with django_assert_num_queries(1):
+        assert document.get_text() == text
+    assert document.get_text_storage().page(3) == pages[2].strip()
+    with pytest.raises(IndexError):
+        document.get_text_storage().page(4)
+
+
+@pytest.mark.django_db
+def test_legacy_text_column():
+    document = DocumentFactory(text="texte historique")
+
+    assert document.get_text_storage() is None
+    assert document.get_text() == "texte historique"
+    assert document.get_text_head(5) == "texte"
+
+
+@pytest.mark.django_db
+def test_move_document_text_command():
+    text = "[[PAGE 1 / 2]]\nA\n[[FIN PAGE 1 / 2]]\n\n[[PAGE 2 / 2]]\nB\n[[FIN PAGE 2 / 2]]"
+    documents = [DocumentFactory(text=text, is_ocr=True) for _ in range(3)]
+    DocumentFactory(text=None)
+
+    call_command("move_document_text", batch_size=2)
+
+    assert DocumentText.objects.count() == 3
+    for document in documents:
+        document.refresh_from_db()
+        assert document.text is None
+        assert document.get_text() == text
+        storage = document.get_text_storage()
+        assert [storage.page(1), storage.page(2)] == ["A", "B"]
+        assert storage.page_is_ocr == [True, True]
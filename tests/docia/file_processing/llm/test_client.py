@@ -1,4 +1,5 @@
 import base64
+import json
 from unittest import mock
 from unittest.mock import Mock, patch
 
@@ -10,28 +11,54 @@ from openai._base_client import SyncHttpxClientWrapper
 from docia.file_processing.llm.client import (
     LLMApiError,
     LLMClient,
-    _build_pdf_document_payload,
     _extract_markdown_from_ocr_response,
+    _iter_ocr_request_body,
 )
 
-# --- _build_pdf_document_payload / _extract_markdown_from_ocr_response ---
+# --- _iter_ocr_request_body / _extract_markdown_from_ocr_response ---
 
 
-def test_build_pdf_document_payload_empty():
-    """Payload pour contenu vide : type document_url et data URI base64."""
-    out = _build_pdf_document_payload(b"")
-    assert out == {"type": "document_url", "document_url": "data:application/pdf;base64,"}
-    assert out["document_url"].startswith("data:application/pdf;base64,")
+def ocr_request_json(content: bytes) -> dict:
+    """Corps JSON attendu par l'API OCR : PDF en base64 dans un data URI."""
+    b64 = base64.b64encode(content).decode("utf-8")
+    return {
+        "model": "mistral-ocr",
+        "include_image_base64": False,
+        "document": {"type": "document_url", "document_url": f"data:application/pdf;base64,{b64}"},
+    }
 
 
-def test_build_pdf_document_payload_content():
-    """Payload encode le PDF en base64 dans un data URI."""
+def test_iter_ocr_request_body_empty():
+    """Contenu vide : data URI sans données, longueur annoncée exacte."""
+    length, iter_body = _iter_ocr_request_body("mistral-ocr", b"")
+    body = b"".join(iter_body())
+    assert len(body) == length
+    assert json.loads(body)["document"] == {"type": "document_url", "document_url": "data:application/pdf;base64,"}
+
+
+def test_iter_ocr_request_body_content():
+    """Le PDF est encodé en base64 dans un data URI."""
     content = b"%PDF-1.4 fake"
-    out = _build_pdf_document_payload(content)
-    assert out["type"] == "document_url"
-    assert out["document_url"].startswith("data:application/pdf;base64,")
-    b64 = out["document_url"].split(",", 1)[1]
-    assert base64.b64decode(b64) == content
+    length, iter_body = _iter_ocr_request_body("mistral-ocr", content)
+    body = b"".join(iter_body())
+    assert len(body) == length
+    document_url = json.loads(body)["document"]["document_url"]
+    assert document_url.startswith("data:application/pdf;base64,")
+    assert base64.b64decode(document_url.split(",", 1)[1]) == content
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 10, 1000])
+def test_iter_ocr_request_body(size):
+    """Le corps streamé est le JSON attendu par l'API OCR, de longueur annoncée exacte."""
+    content = bytes(range(256)) * 4
+    content = content[:size]
+    with patch("docia.file_processing.llm.client.OCR_BODY_CHUNK_SIZE", 3):
+        length, iter_body = _iter_ocr_request_body("mistral-ocr", content)
+        body = b"".join(iter_body())
+    assert len(body) == length
+    assert json.loads(body) == ocr_request_json(content)
+    # L'itérateur peut être rejoué (nouvelle tentative de la requête)
+    assert b"".join(iter_body()) == body
 
 
 def test_extract_markdown_from_ocr_response_empty():
@@ -364,3 +391,36 @@ def test_ocr_pdf_success():
     expected = "[[PAGE 1 / 2]]\nPage one\n[[FIN PAGE 1 / 2]]\n\n[[PAGE 2 / 2]]\nPage two\n[[FIN PAGE 2 / 2]]"
     assert result == expected
     assert mock_handler.call_count == 1
+
+
+def _embedding_response(request):
+    body = json.loads(request.content)
+    # Ordre inversé : le client doit remettre les embeddings dans l'ordre des textes
+    data = [
+        {"object": "embedding", "index": i, "embedding": [float(len(text)), float(i)]}
+        for i, text in reversed(list(enumerate(body["input"])))
+    ]
+    return httpx.Response(status_code=200, json={"object": "list", "data": data, "model": body["model"]})
+
+
+def test_embed_batches_and_order():
+    mock_handler = Mock(side_effect=_embedding_response)
+    httpx_client = SyncHttpxClientWrapper(transport=httpx.MockTransport(handler=mock_handler))
+    client = LLMClient(http_client=httpx_client, use_rate_limiter=False)
+    result = client.embed(["a", "bb", "ccc"], model="BAAI/bge-m3", batch_size=2)
+    assert result == [[1.0, 0.0], [2.0, 1.0], [3.0, 0.0]]
+    assert mock_handler.call_count == 2
+
+
+def test_embed_count_mismatch():
+    mock_handler = Mock(
+        return_value=httpx.Response(
+            status_code=200,
+            json={"object": "list", "data": [{"object": "embedding", "index": 0, "embedding": [1.0]}], "model": "m"},
+        )
+    )
+    httpx_client = SyncHttpxClientWrapper(transport=httpx.MockTransport(handler=mock_handler))
+    client = LLMClient(http_client=httpx_client, use_rate_limiter=False)
+    with pytest.raises(LLMApiError) as exc_info:
+        client.embed(["a", "b"], model="m", max_retries=0)
+    assert exc_info.value.code == "ERROR_EmbeddingCount"
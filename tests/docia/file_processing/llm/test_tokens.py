@@ -0,0 +1,25 @@
+from unittest.mock import Mock, patch
+
+from docia.file_processing.llm.tokens import count_tokens
+
+
+def test_count_tokens_estimate(settings):
+    settings.TOKENIZER_ENCODING = ""
+    assert count_tokens("") == 0
+    assert count_tokens("a" * 7) == 2
+    assert count_tokens("a" * 8) == 3
+
+
+def test_count_tokens_encoding(settings):
+    settings.TOKENIZER_ENCODING = "test_encoding"
+    encoding = Mock()
+    encoding.encode.side_effect = lambda text, disallowed_special: text.split()
+    with patch("docia.file_processing.llm.tokens.get_encoding", return_value=encoding) as m:
+        assert count_tokens("trois mots ici") == 3
+    m.assert_called_once_with("test_encoding")
+
+
+def test_count_tokens_encoding_unavailable(settings):
+    settings.TOKENIZER_ENCODING = "test_encoding"
+    with patch("docia.file_processing.llm.tokens.get_encoding", return_value=None):
+        assert count_tokens("a" * 7) == 2
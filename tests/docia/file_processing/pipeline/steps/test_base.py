@@ -1,11 +1,25 @@
 import logging
+import threading
 from unittest import mock
 
 import pytest
 
 from docia.file_processing.models import ProcessDocumentStep, ProcessingStatus
-from docia.file_processing.pipeline.steps.base import AbstractStepRunner
-from tests.factories.file_processing import ProcessDocumentStepFactory
+from docia.file_processing.pipeline.steps.base import (
+    CLAIMED_STEP_MAX_RETRY_DELAY,
+    AbstractBatchStepRunner,
+    AbstractStepRunner,
+    run_step_task,
+)
+from docia.file_processing.pipeline.steps.classification import task_classify_document
+from docia.file_processing.pipeline.steps.content_analysis import task_analyze_content
+from docia.file_processing.pipeline.steps.exceptions import SkipStepException
+from docia.file_processing.pipeline.steps.recompute_structured_data import task_recompute_structured_data
+from tests.factories.file_processing import (
+    ProcessDocumentBatchFactory,
+    ProcessDocumentJobFactory,
+    ProcessDocumentStepFactory,
+)
 
 
 class DummyStepRunner(AbstractStepRunner):
@@ -77,3 +91,136 @@ def test_skip_if_job_already_processed(status, caplog):
     _test_skip(step, caplog)
     assert "Job already processed" in caplog.text
     assert step.status == ProcessingStatus.PENDING
+
+
+class DummyBatchStepRunner(AbstractBatchStepRunner):
+    step_type = "dummy_step"
+    batch_size = 10
+
+    def process(self, step: ProcessDocumentStep):
+        filename = step.job.document.filename
+        if filename.startswith("skip"):
+            raise SkipStepException("skipped")
+        if filename.startswith("error"):
+            raise Exception("boom")
+
+
+def _ready_step(batch, filename, next_step=False):
+    job = ProcessDocumentJobFactory(batch=batch, status=ProcessingStatus.STARTED, document__filename=filename)
+    ProcessDocumentStepFactory(job=job, step_type="previous_step", order=1, status=ProcessingStatus.SUCCESS)
+    step = ProcessDocumentStepFactory(job=job, step_type="dummy_step", order=2)
+    if next_step:
+        ProcessDocumentStepFactory(job=job, step_type="next_step", order=3)
+    return step
+
+
+@pytest.mark.django_db
+def test_batch_runner_claims_ready_steps():
+    batch = ProcessDocumentBatchFactory(status=ProcessingStatus.STARTED)
+    ok = _ready_step(batch, "ok.pdf")
+    ok_next = _ready_step(batch, "ok_next.pdf", next_step=True)
+    skipped = _ready_step(batch, "skip.pdf", next_step=True)
+    failed = _ready_step(batch, "error.pdf", next_step=True)
+    # Étapes non prêtes ou d'un autre type : non prises en charge
+    not_ready = ProcessDocumentStepFactory(step_type="dummy_step", order=2, job__status=ProcessingStatus.STARTED)
+    ProcessDocumentStepFactory(job=not_ready.job, step_type="previous_step", order=1)
+    other_type = ProcessDocumentStepFactory(step_type="other_step", job__status=ProcessingStatus.STARTED)
+
+    assert DummyBatchStepRunner().run(ok.id) == ProcessingStatus.SUCCESS
+
+    for step in (ok, ok_next, skipped, failed, not_ready, other_type):
+        step.refresh_from_db()
+        step.job.refresh_from_db()
+    batch.refresh_from_db()
+    assert ok.status == ProcessingStatus.SUCCESS
+    assert ok.job.status == ProcessingStatus.SUCCESS
+    assert ok.finished_at and ok.duration is not None and ok.peak_rss
+    assert ok_next.status == ProcessingStatus.SUCCESS
+    assert ok_next.job.status == ProcessingStatus.STARTED
+    assert ok_next.job.step_set.get(order=3).status == ProcessingStatus.PENDING
+    assert skipped.status == ProcessingStatus.SKIPPED
+    assert skipped.job.status == ProcessingStatus.SKIPPED
+    assert skipped.job.step_set.get(order=3).status == ProcessingStatus.SKIPPED
+    assert failed.status == ProcessingStatus.FAILURE
+    assert failed.error == "boom"
+    assert "Exception: boom" in failed.traceback
+    assert failed.job.status == ProcessingStatus.FAILURE
+    assert failed.job.step_set.get(order=3).status == ProcessingStatus.SKIPPED
+    assert not_ready.status == ProcessingStatus.PENDING
+    assert other_type.status == ProcessingStatus.PENDING
+    # Le job ok_next n'est pas terminé
+    assert batch.status == ProcessingStatus.STARTED
+
+
+@pytest.mark.django_db
+def test_batch_runner_finishes_batch():
+    batch = ProcessDocumentBatchFactory(status=ProcessingStatus.STARTED)
+    steps = [_ready_step(batch, "ok.pdf"), _ready_step(batch, "error.pdf")]
+
+    DummyBatchStepRunner().run(steps[1].id)
+
+    batch.refresh_from_db()
+    assert batch.status == ProcessingStatus.FAILURE
+
+
+@pytest.mark.django_db
+def test_batch_runner_step_already_processed(caplog):
+    batch = ProcessDocumentBatchFactory(status=ProcessingStatus.STARTED)
+    step = _ready_step(batch, "ok.pdf")
+    step.status = ProcessingStatus.STARTED
+    step.save()
+    other = _ready_step(batch, "ok2.pdf")
+
+    with caplog.at_level(logging.INFO, logger="docia"):
+        assert DummyBatchStepRunner().run(step.id) == ProcessingStatus.STARTED
+
+    assert "Step already processed" in caplog.text
+    other.refresh_from_db()
+    assert other.status == ProcessingStatus.PENDING
+
+
+@pytest.mark.django_db
+def test_run_step_task_waits_for_claimed_step_without_limit():
+    batch = ProcessDocumentBatchFactory(status=ProcessingStatus.STARTED)
+    step = _ready_step(batch, "ok.pdf")
+    step.status = ProcessingStatus.STARTED
+    step.save()
+    # Étape prise en charge par le lot d'une autre tâche depuis plus d'une heure
+    task = mock.Mock()
+    task.request.retries = 1000
+    task.retry.side_effect = Exception("retry")
+
+    with pytest.raises(Exception, match="retry"):
+        run_step_task(task, DummyBatchStepRunner(), step.id)
+    task.retry.assert_called_once_with(countdown=CLAIMED_STEP_MAX_RETRY_DELAY)
+
+    # Étape terminée par l'autre tâche : la chaîne continue
+    step.status = ProcessingStatus.SUCCESS
+    step.save()
+    task.retry.reset_mock()
+    assert run_step_task(task, DummyBatchStepRunner(), step.id) == ProcessingStatus.SUCCESS
+    task.retry.assert_not_called()
+
+
+@pytest.mark.parametrize("task", [task_analyze_content, task_classify_document, task_recompute_structured_data])
+def test_batch_step_tasks_retry_without_limit(task):
+    assert task.max_retries is None
+
+
+def test_batch_runner_process_batch_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    class ConcurrentRunner(DummyBatchStepRunner):
+        max_workers = 3
+
+        def process(self, step):
+            # Les trois étapes doivent être en cours en même temps pour franchir la barrière
+            barrier.wait()
+            if step.id == 2:
+                raise Exception("boom")
+
+    steps = [mock.Mock(id=i) for i in range(3)]
+    errors = ConcurrentRunner().process_batch(steps)
+
+    assert list(errors) == [2]
+    assert str(errors[2]) == "boom"
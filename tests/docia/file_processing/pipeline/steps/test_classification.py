@@ -2,10 +2,12 @@ from contextlib import contextmanager
 from unittest.mock import patch
 
 import pytest
+from celery.exceptions import Retry
 
 from docia.file_processing.models import ProcessDocumentStepType, ProcessingStatus
 from docia.file_processing.pipeline.steps.classification import task_classify_document
-from tests.factories.file_processing import ProcessDocumentStepFactory
+from docia.file_processing.processor.local_classifier import LocalPrediction
+from tests.factories.file_processing import ProcessDocumentJobFactory, ProcessDocumentStepFactory
 
 
 @contextmanager
@@ -27,3 +29,107 @@ def test_task_classification():
     assert step.job.document.classification == "kbis"
     assert step.job.document.classification_type == "llm"
     assert step.job.document.updated_at > last_updated_at
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "confidence, expected_classification, expected_type",
+    [(0.95, "devis", "local"), (0.5, "kbis", "llm")],
+)
+def test_task_classification_local(settings, confidence, expected_classification, expected_type):
+    settings.LOCAL_CLASSIFIER_ENABLED = True
+    settings.LOCAL_CLASSIFIER_THRESHOLD = 0.9
+    step = ProcessDocumentStepFactory(step_type=ProcessDocumentStepType.CLASSIFICATION)
+    prediction = LocalPrediction(classification="devis", confidence=confidence, source="model")
+    with (
+        patch_classify() as m_llm,
+        patch(
+            "docia.file_processing.processor.local_classifier.classify_file_locally", return_value=prediction
+        ) as m_local,
+    ):
+        task_classify_document(step.id)
+
+    step.refresh_from_db()
+    assert step.status == ProcessingStatus.SUCCESS
+    m_local.assert_called_once_with(step.job.document.filename, None)
+    assert m_llm.called == (expected_type == "llm")
+    assert step.job.document.classification == expected_classification
+    assert step.job.document.classification_type == expected_type
+
+
+@pytest.mark.django_db
+def test_task_classification_local_disabled(settings):
+    settings.LOCAL_CLASSIFIER_ENABLED = False
+    step = ProcessDocumentStepFactory(
+        step_type=ProcessDocumentStepType.CLASSIFICATION, job__document__filename="Extrait Kbis.pdf"
+    )
+    with patch_classify() as m_llm:
+        task_classify_document(step.id)
+
+    step.refresh_from_db()
+    assert m_llm.called
+    assert step.job.document.classification_type == "llm"
+
+
+def _classification_step(job_status=ProcessingStatus.STARTED, previous_status=ProcessingStatus.SUCCESS, **kwargs):
+    job = ProcessDocumentJobFactory(status=job_status, **kwargs)
+    ProcessDocumentStepFactory(
+        job=job, step_type=ProcessDocumentStepType.TEXT_EXTRACTION, order=1, status=previous_status
+    )
+    return ProcessDocumentStepFactory(job=job, step_type=ProcessDocumentStepType.CLASSIFICATION, order=2)
+
+
+@pytest.mark.django_db
+def test_task_classification_batch(settings):
+    settings.CLASSIFICATION_BATCH_SIZE = 3
+    steps = [_classification_step() for _ in range(4)]
+    not_ready = _classification_step(previous_status=ProcessingStatus.STARTED)
+    with patch("docia.file_processing.processor.classifier.classify_files_batch_with_llm", autospec=True) as m_batch:
+        m_batch.side_effect = lambda documents, *args, **kwargs: {step_id: "devis" for step_id in documents}
+        assert task_classify_document(steps[0].id) == ProcessingStatus.SUCCESS
+
+    m_batch.assert_called_once()
+    classified = [step for step in steps if step.id in m_batch.call_args.args[0]]
+    assert len(classified) == 3
+    assert steps[0] in classified
+    for step in steps + [not_ready]:
+        step.refresh_from_db()
+        step.job.document.refresh_from_db()
+        if step in classified:
+            assert step.status == ProcessingStatus.SUCCESS
+            assert step.job.document.classification == "devis"
+            assert step.job.document.classification_type == "llm"
+            # Dernière étape du job : le job est terminé
+            assert step.job.status == ProcessingStatus.SUCCESS
+        else:
+            assert step.status == ProcessingStatus.PENDING
+            assert step.job.document.classification is None
+
+
+@pytest.mark.django_db
+def test_task_classification_batch_errors_per_step(settings):
+    settings.CLASSIFICATION_BATCH_SIZE = 3
+    steps = [_classification_step() for _ in range(2)]
+    with patch(
+        "docia.file_processing.processor.classifier.classify_files_batch_with_llm",
+        autospec=True,
+        side_effect=Exception("API down"),
+    ):
+        task_classify_document(steps[0].id)
+
+    for step in steps:
+        step.refresh_from_db()
+        assert step.status == ProcessingStatus.FAILURE
+        assert step.error == "API down"
+        assert "API down" in step.traceback
+        assert step.job.status == ProcessingStatus.FAILURE
+
+
+@pytest.mark.django_db
+def test_task_classification_claimed_step_is_retried(settings):
+    settings.CLASSIFICATION_BATCH_SIZE = 3
+    step = _classification_step()
+    step.status = ProcessingStatus.STARTED
+    step.save()
+    with pytest.raises(Retry):
+        task_classify_document(step.id)
@@ -16,6 +16,8 @@ def patch_analyze_content():
         m.return_value = {
             "llm_response": {"nom": "Toto  ."},
             "structured_data": {"nom": "Toto"},
+            "prompt_tokens": 1234,
+            "context_strategy": "full",
         }
         yield m
 
@@ -35,6 +37,7 @@ def test_task_analyze_content():
     step.refresh_from_db()
     assert step.status == ProcessingStatus.SUCCESS
     assert step.error == ""
+    assert step.prompt_tokens == 1234
     assert step.job.document.llm_response == {"nom": "Toto  ."}
     assert step.job.document.structured_data == {"nom": "Toto"}
     assert step.job.document.analyzed_at == frozen_time
@@ -103,3 +106,35 @@ def test_skip_do_not_override_previous_results():
     assert step.job.document.llm_response == llm_response
     assert step.job.document.structured_data == structured_data
     assert step.job.document.analyzed_at == analyzed_at
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("classification,has_queries", [("ccap", True), ("kbis", False)])
+def test_select_content_for_types_with_search_queries(classification, has_queries):
+    step = ProcessDocumentStepFactory(
+        step_type=ProcessDocumentStepType.CONTENT_ANALYSIS, job__document__classification=classification
+    )
+    with patch_analyze_content() as m:
+        task_analyze_content(step.id)
+
+    step.refresh_from_db()
+    assert step.status == ProcessingStatus.SUCCESS
+    assert callable(m.call_args.kwargs["select_content"]) is has_queries
+
+
+@pytest.mark.django_db
+def test_analyze_relevant_content_without_loading_full_text():
+    step = ProcessDocumentStepFactory(
+        step_type=ProcessDocumentStepType.CONTENT_ANALYSIS, job__document__classification="ccap"
+    )
+    step.job.document.relevant_content = "Article 5 - Prix"
+    step.job.document.save()
+
+    with patch_analyze_content() as m, patch("docia.documents.models.Document.get_text", autospec=True) as m_text:
+        task_analyze_content(step.id)
+
+    step.refresh_from_db()
+    assert step.status == ProcessingStatus.SUCCESS
+    m_text.assert_not_called()
+    assert m.call_args.args[0] == "Article 5 - Prix"
+    assert m.call_args.kwargs["select_content"] is None
@@ -0,0 +1,51 @@
+import pytest
+
+from docia.file_processing.models import ProcessDocumentStepType, ProcessingStatus
+from docia.file_processing.pipeline.steps.recompute_structured_data import (
+    RecomputeStructuredDataStepRunner,
+    task_recompute_structured_data,
+)
+from tests.factories.file_processing import ProcessDocumentStepFactory
+
+LLM_RESPONSE = {"montant_ht": "1 000"}
+
+
+@pytest.mark.django_db
+def test_task_recompute_structured_data():
+    step = ProcessDocumentStepFactory(
+        step_type=ProcessDocumentStepType.RECOMPUTE_STRUCTURED_DATA,
+        job__document__classification="acte_engagement",
+        job__document__llm_response=LLM_RESPONSE,
+        job__document__structured_data={"montant_ht": "1 000"},
+    )
+    task_recompute_structured_data(step.id)
+
+    step.refresh_from_db()
+    assert step.status == ProcessingStatus.SUCCESS
+    document = step.job.document
+    document.refresh_from_db()
+    assert document.llm_response == LLM_RESPONSE
+    assert document.structured_data == {"montant_ht": "1000.00"}
+
+
+@pytest.mark.django_db
+def test_recompute_structured_data_batch():
+    steps = [
+        ProcessDocumentStepFactory(
+            step_type=ProcessDocumentStepType.RECOMPUTE_STRUCTURED_DATA,
+            job__status=ProcessingStatus.STARTED,
+            job__document__classification="acte_engagement",
+            job__document__llm_response=llm_response,
+        )
+        for llm_response in [LLM_RESPONSE, LLM_RESPONSE, None]
+    ]
+
+    RecomputeStructuredDataStepRunner(batch_size=10).run(steps[0].id)
+
+    statuses = []
+    for step in steps:
+        step.refresh_from_db()
+        step.job.document.refresh_from_db()
+        statuses.append(step.status)
+    assert statuses == [ProcessingStatus.SUCCESS, ProcessingStatus.SUCCESS, ProcessingStatus.SKIPPED]
+    assert [step.job.document.structured_data for step in steps] == [{"montant_ht": "1000.00"}] * 2 + [None]
@@ -0,0 +1,68 @@
+from unittest.mock import patch
+
+import pytest
+
+from docia.file_processing.models import ProcessDocumentStepType, ProcessingStatus
+from docia.file_processing.pipeline.steps.relevant_content import task_select_relevant_content
+from tests.factories.file_processing import ProcessDocumentStepFactory
+
+
+@pytest.mark.django_db
+def test_task_select_relevant_content_long_document(settings):
+    settings.RELEVANT_CONTENT_MIN_WORDS = 10
+    step = ProcessDocumentStepFactory(
+        step_type=ProcessDocumentStepType.RELEVANT_CONTENT,
+        job__document__classification="ccap",
+        job__document__text="mot " * 100,
+        job__document__nb_mot=100,
+    )
+    with patch("docia.file_processing.processor.relevant_content.select_relevant_content", return_value="mot mot") as m:
+        task_select_relevant_content(step.id)
+
+    step.refresh_from_db()
+    assert step.status == ProcessingStatus.SUCCESS
+    assert step.error == ""
+    assert m.call_count == 1
+    document = step.job.document
+    document.refresh_from_db()
+    assert document.relevant_content == "mot mot"
+    assert document.is_embedded is True
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("classification,nb_mot", [("ccap", 10), ("kbis", 100)])
+def test_task_select_relevant_content_full_text(settings, classification, nb_mot):
+    """Documents courts ou sans requêtes de recherche : le texte complet est analysé."""
+    settings.RELEVANT_CONTENT_MIN_WORDS = 50
+    step = ProcessDocumentStepFactory(
+        step_type=ProcessDocumentStepType.RELEVANT_CONTENT,
+        job__document__classification=classification,
+        job__document__text="mot " * nb_mot,
+        job__document__nb_mot=nb_mot,
+        job__document__relevant_content="ancien contenu",
+    )
+    with patch("docia.file_processing.processor.relevant_content.select_relevant_content") as m:
+        task_select_relevant_content(step.id)
+
+    step.refresh_from_db()
+    assert step.status == ProcessingStatus.SUCCESS
+    m.assert_not_called()
+    document = step.job.document
+    document.refresh_from_db()
+    assert document.relevant_content is None
+    assert document.is_embedded is False
+
+
+@pytest.mark.django_db
+def test_task_select_relevant_content_skip_based_on_classification():
+    step = ProcessDocumentStepFactory(
+        step_type=ProcessDocumentStepType.RELEVANT_CONTENT,
+        job__batch__target_classifications=["kbis"],
+        job__document__classification="ccap",
+    )
+    with patch("docia.file_processing.processor.relevant_content.select_relevant_content") as m:
+        task_select_relevant_content(step.id)
+
+    step.refresh_from_db()
+    assert step.status == ProcessingStatus.SKIPPED
+    m.assert_not_called()
@@ -25,10 +25,13 @@ def test_task_extract_info():
     step.refresh_from_db()
     assert step.status == ProcessingStatus.SUCCESS
     assert step.error == ""
-    assert step.job.document.text == "Hello World"
+    assert step.job.document.text is None
+    assert step.job.document.get_text() == "Hello World"
+    assert step.job.document.get_text_storage().nb_pages == 1
     assert not step.job.document.is_ocr
     assert step.job.document.nb_mot == 2
     assert step.job.document.updated_at > last_updated_at
+    assert step.peak_rss > 0
 
 
 @pytest.mark.django_db
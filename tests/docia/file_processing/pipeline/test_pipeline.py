@@ -39,6 +39,14 @@ def patch_classify():
         yield m
 
 
+@contextmanager
+def patch_select_relevant_content():
+    with patch(
+        "docia.file_processing.pipeline.steps.relevant_content.RelevantContentStepRunner.process", autospec=True
+    ) as m:
+        yield m
+
+
 @contextmanager
 def patch_extract_info():
     with patch(
@@ -54,7 +62,12 @@ def test_batch():
     doc2 = DocumentFactory(dossier=folder, filename="doc2.pdf")
     _doc_should_not_be_processed = DocumentFactory()
 
-    with patch_extract_text() as m_text, patch_classify() as m_classify, patch_extract_info() as m_info:
+    with (
+        patch_extract_text() as m_text,
+        patch_classify() as m_classify,
+        patch_select_relevant_content(),
+        patch_extract_info() as m_info,
+    ):
         batch, result = launch_batch(folder=folder)
 
     assert result.ready()
@@ -75,7 +88,8 @@ def test_batch():
         expected_steps = [
             (1, ProcessDocumentStepType.TEXT_EXTRACTION),
             (2, ProcessDocumentStepType.CLASSIFICATION),
-            (3, ProcessDocumentStepType.CONTENT_ANALYSIS),
+            (3, ProcessDocumentStepType.RELEVANT_CONTENT),
+            (4, ProcessDocumentStepType.CONTENT_ANALYSIS),
         ]
         actual_step_types = [(step.order, step.step_type) for step in steps]
         assert actual_step_types == expected_steps
@@ -91,7 +105,12 @@ def test_batch_error_handling():
         if step.job.document.filename == "doc2.pdf":
             raise Exception("Error processing doc2")
 
-    with patch_extract_text() as m_text, patch_classify() as m_classify, patch_extract_info() as m_info:
+    with (
+        patch_extract_text() as m_text,
+        patch_classify() as m_classify,
+        patch_select_relevant_content(),
+        patch_extract_info() as m_info,
+    ):
         m_text.side_effect = mock_extract_text
         batch, result = launch_batch(folder=folder)
 
@@ -127,7 +146,7 @@ def test_launch_batch_filter_documents_by_classifications_and_folder():
     DocumentFactory(dossier=folder, filename="doc2.pdf")
     _doc_should_not_be_processed = DocumentFactory(dossier=folder)
 
-    with patch_extract_text(), patch_classify(), patch_extract_info():
+    with patch_extract_text(), patch_classify(), patch_select_relevant_content(), patch_extract_info():
         batch, _result = launch_batch(folder=folder, target_classifications=["kbis", "devis"])
 
     batch.refresh_from_db()
@@ -142,7 +161,7 @@ def test_launch_batch_specify_qs():
     _doc_should_not_be_processed = DocumentFactory(dossier=folder)
 
     qs = Document.objects.filter(id__in=(doc1.id, doc2.id))
-    with patch_extract_text(), patch_classify(), patch_extract_info():
+    with patch_extract_text(), patch_classify(), patch_select_relevant_content(), patch_extract_info():
         batch, _result = launch_batch(qs_documents=qs)
 
     batch.refresh_from_db()
@@ -166,7 +185,7 @@ def test_retry_batch():
     ProcessDocumentJobFactory(batch=batch, status=ProcessingStatus.SUCCESS, document__dossier=batch.folder)
     ProcessDocumentJobFactory(batch=batch, status=ProcessingStatus.CANCELLED, document__dossier=batch.folder)
 
-    with patch_extract_text(), patch_classify(), patch_extract_info():
+    with patch_extract_text(), patch_classify(), patch_select_relevant_content(), patch_extract_info():
         new_batch, _result = retry_batch_failures(batch.id)
 
     job1, job2 = new_batch.job_set.order_by("document__filename")
@@ -186,7 +205,7 @@ def test_retry_batch_with_cancelled():
     # Job not to retry (status=success)
     ProcessDocumentJobFactory(batch=batch, status=ProcessingStatus.SUCCESS, document__dossier=batch.folder)
 
-    with patch_extract_text(), patch_classify(), patch_extract_info():
+    with patch_extract_text(), patch_classify(), patch_select_relevant_content(), patch_extract_info():
         new_batch, _result = retry_batch_failures(batch.id, retry_cancelled=True)
 
     new_batch.refresh_from_db()
@@ -264,17 +283,20 @@ def test_sync_and_analyze():
     with (
         patch("docia.file_processing.pipeline.pipeline.sync_all", autospec=True) as mock_sync_all,
         patch("docia.file_processing.pipeline.pipeline._init_and_launch_batch", autospec=True) as mock_init_launch,
+        patch("docia.file_processing.pipeline.pipeline.save_watermarks", autospec=True) as mock_save_watermarks,
     ):
         # Setup mock return values
-        mock_sync_all.return_value = {"num_ejs": ["ej1", "ej2"]}
+        watermarks = {("oa", "ga"): datetime(2024, 1, 30)}
+        mock_sync_all.return_value = {"num_ejs": ["ej1", "ej2"], "watermarks": watermarks}
         mock_init_launch.return_value = "test_batch_id"
 
         # Call the function
         result = sync_and_analyze(start, end, force_analyze=True)
 
         # Assertions
-        mock_sync_all.assert_called_once_with(start, end)
+        mock_sync_all.assert_called_once_with(start, end, backfill=False)
         mock_init_launch.assert_called_once_with(["ej1", "ej2"], force_analyze=True)
+        mock_save_watermarks.assert_called_once_with(watermarks)
         assert result == "test_batch_id"
 
 
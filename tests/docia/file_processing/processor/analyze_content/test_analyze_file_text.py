@@ -16,4 +16,8 @@ def test_analyze_file_text():
         assert r == {
             "llm_response": data,
             "structured_data": data,
+            "prompt_tokens": r["prompt_tokens"],
+            "context_strategy": "full",
         }
+        assert r["prompt_tokens"] > 0
+        assert m.call_count == 1
@@ -0,0 +1,108 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from docia.file_processing.llm.client import LLMApiError
+from docia.file_processing.processor.analyze_content import analyze_file_text
+from docia.file_processing.processor.attributes_query import (
+    DOC_TYPE_ATTRIBUTE_GROUPS,
+    DOC_TYPE_ATTRIBUTES_MAPPING,
+)
+from docia.file_processing.processor.relevant_content import search_queries
+
+
+def fake_ask_llm(messages, model, response_format, temperature):
+    """Réponse factice : chaque champ du schéma demandé prend la valeur de son nom."""
+    return {field: field for field in response_format["json_schema"]["schema"]["properties"]}
+
+
+@pytest.fixture
+def llm_client():
+    client = Mock()
+    client.ask_llm.side_effect = fake_ask_llm
+    return client
+
+
+@pytest.fixture(autouse=True)
+def no_post_processing():
+    with patch("docia.file_processing.processor.analyze_content.clean_llm_response", side_effect=lambda t, r: r):
+        yield
+
+
+@pytest.mark.parametrize("document_type", DOC_TYPE_ATTRIBUTE_GROUPS)
+def test_groups_cover_all_attributes(document_type):
+    groups = DOC_TYPE_ATTRIBUTE_GROUPS[document_type]
+    attributes = {name for group in groups.values() for name in group}
+    assert attributes == set(DOC_TYPE_ATTRIBUTES_MAPPING[document_type])
+
+
+def test_split_attributes(llm_client):
+    result = analyze_file_text("Texte du CCAP", "ccap", llm_client=llm_client, split_attributes=True)
+
+    assert llm_client.ask_llm.call_count == len(DOC_TYPE_ATTRIBUTE_GROUPS["ccap"])
+    # Réponses fusionnées dans l'ordre des attributs du type de document
+    fields = [definition["output_field"] for definition in DOC_TYPE_ATTRIBUTES_MAPPING["ccap"].values()]
+    assert list(result["llm_response"]) == fields
+    assert result["prompt_tokens"] > 0
+
+    monolithic = analyze_file_text("Texte du CCAP", "ccap", llm_client=llm_client, split_attributes=False)
+    assert monolithic["llm_response"] == result["llm_response"]
+    assert llm_client.ask_llm.call_count == len(DOC_TYPE_ATTRIBUTE_GROUPS["ccap"]) + 1
+
+
+def test_split_attributes_setting(settings, llm_client):
+    settings.CONTENT_ANALYSIS_SPLIT_ATTRIBUTES = True
+    analyze_file_text("Texte", "acte_engagement", llm_client=llm_client)
+    assert llm_client.ask_llm.call_count == len(DOC_TYPE_ATTRIBUTE_GROUPS["acte_engagement"])
+
+    # Type sans groupes : une seule requête
+    llm_client.ask_llm.reset_mock()
+    analyze_file_text("Texte", "kbis", llm_client=llm_client)
+    assert llm_client.ask_llm.call_count == 1
+
+
+def test_retry_failed_group_only(settings, llm_client):
+    settings.CONTENT_ANALYSIS_GROUP_RETRIES = 1
+    failures = []
+
+    def ask_llm(messages, model, response_format, temperature):
+        if "penalites" in response_format["json_schema"]["schema"]["properties"] and not failures:
+            failures.append(1)
+            raise LLMApiError("Erreur", code="HTTP_500", details=None)
+        return fake_ask_llm(messages, model, response_format, temperature)
+
+    llm_client.ask_llm.side_effect = ask_llm
+    result = analyze_file_text("Texte du CCAP", "ccap", llm_client=llm_client, split_attributes=True)
+
+    assert llm_client.ask_llm.call_count == len(DOC_TYPE_ATTRIBUTE_GROUPS["ccap"]) + 1
+    assert result["llm_response"]["penalites"] == "penalites"
+
+
+def test_failed_group_raises(settings, llm_client):
+    settings.CONTENT_ANALYSIS_GROUP_RETRIES = 1
+
+    def ask_llm(messages, model, response_format, temperature):
+        if "penalites" in response_format["json_schema"]["schema"]["properties"]:
+            raise LLMApiError("Erreur", code="HTTP_500", details=None)
+        return fake_ask_llm(messages, model, response_format, temperature)
+
+    llm_client.ask_llm.side_effect = ask_llm
+    with pytest.raises(LLMApiError):
+        analyze_file_text("Texte du CCAP", "ccap", llm_client=llm_client, split_attributes=True)
+
+
+def test_group_contexts(settings, llm_client):
+    """Texte trop long : chaque groupe a son contexte, sélectionné pour ses propres requêtes de recherche."""
+    settings.TOKENIZER_ENCODING = ""
+    settings.CONTENT_ANALYSIS_MAX_PROMPT_TOKENS = 20_000
+    select_content = Mock(return_value="Extrait pertinent")
+    text = "Clause du marché. " * 10_000
+
+    result = analyze_file_text(
+        text, "ccap", llm_client=llm_client, select_content=select_content, split_attributes=True
+    )
+
+    expected = [search_queries("ccap", group) for group in DOC_TYPE_ATTRIBUTE_GROUPS["ccap"].values()]
+    assert sorted(c.args[0] for c in select_content.call_args_list) == sorted(q for q in expected if q)
+    assert "rag" in result["context_strategy"]
+    assert all("Extrait pertinent" in c.args[0][1]["content"] for c in llm_client.ask_llm.call_args_list)
@@ -51,15 +51,15 @@ def test_check_consistency_iban_lowercase():
 
 
 def test_check_consistency_iban_catches_only_schwifty_exception():
-    """Vérifie qu'une SchwiftyException (ex. IBAN invalide) est attrapée et renvoie False."""
-    with patch("docia.file_processing.processor.post_processing_llm.IBAN") as mock_iban:
+    """IBAN hors France : validé par schwifty, dont l'exception (ex. IBAN invalide) est attrapée et renvoie False."""
+    with patch("docia.file_processing.processor.validation.IBAN") as mock_iban:
         mock_iban.side_effect = InvalidChecksumDigits("invalid")
-        assert check_consistency_iban("FR7630001007941234567890185") is False
+        assert check_consistency_iban("DE89370400440532013000") is False
 
 
 def test_check_consistency_iban_lets_other_exceptions_propagate():
     """Vérifie qu'une exception non-Schwifty (ex. ValueError) n'est pas attrapée et remonte."""
-    with patch("docia.file_processing.processor.post_processing_llm.IBAN") as mock_iban:
+    with patch("docia.file_processing.processor.validation.IBAN") as mock_iban:
         mock_iban.side_effect = ValueError("erreur inattendue")
         with pytest.raises(ValueError, match="erreur inattendue"):
-            check_consistency_iban("FR7630001007941234567890185")
+            check_consistency_iban("DE89370400440532013000")
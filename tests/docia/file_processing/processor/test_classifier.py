@@ -6,6 +6,8 @@ from docia.file_processing.processor.classifier import (
     DIC_CLASS_FILE_BY_NAME,
     classify_file_with_llm,
     classify_files,
+    classify_files_batch_with_llm,
+    create_batch_classification_prompt,
     create_classification_prompt,
 )
 
@@ -85,6 +87,73 @@ def test_classify_file_with_llm_takes_first_matching_category():
     assert r == "facture"
 
 
+# --- classify_files_batch_with_llm ---
+
+
+def test_create_batch_classification_prompt_contains_documents():
+    """Chaque document apparaît avec son identifiant, son nom et sa première page tronquée."""
+    list_class = {"x": {"nom_complet": "Catégorie X", "description": ""}}
+    prompt, _ = create_batch_classification_prompt({"1": ("a.pdf", "texte A"), "2": ("b.pdf", "b" * 3000)}, list_class)
+    assert 'id="1"' in prompt and 'id="2"' in prompt
+    assert "a.pdf" in prompt and "texte A" in prompt
+    assert "b" * 2000 in prompt
+    assert "b" * 2001 not in prompt
+
+
+def test_classify_files_batch_with_llm_one_request():
+    """Les documents sont classifiés en une requête ; la réponse est associée par identifiant."""
+    documents = {"doc-a": ("a.pdf", "A"), "doc-b": ("b.pdf", "B")}
+    with patch("docia.file_processing.processor.classifier.LLMClient.ask_llm", autospec=True) as mock_ask_llm:
+        mock_ask_llm.return_value = [
+            {"id": "2", "categories": ["Facture"]},
+            {"id": "1", "categories": ["Inconnu", "Extrait Kbis"]},
+        ]
+        r = classify_files_batch_with_llm(documents, DIC_CLASS_FILE_BY_NAME)
+    assert r == {"doc-a": "kbis", "doc-b": "facture"}
+    assert mock_ask_llm.call_count == 1
+    schema = mock_ask_llm.call_args.kwargs["response_format"]["json_schema"]["schema"]
+    assert schema["items"]["properties"]["id"]["enum"] == ["1", "2"]
+
+
+def test_classify_files_batch_with_llm_falls_back_for_missing_entries():
+    """Documents absents, en double ou mal formés : classification individuelle."""
+    documents = {"a": ("a.pdf", "A"), "b": ("b.pdf", "B"), "c": ("c.pdf", "C"), "d": ("d.pdf", "D")}
+    with patch("docia.file_processing.processor.classifier.LLMClient.ask_llm", autospec=True) as mock_ask_llm:
+        mock_ask_llm.side_effect = [
+            [
+                {"id": "1", "categories": ["Facture"]},
+                {"id": "2", "categories": "Facture"},
+                {"id": "3", "categories": ["Facture"]},
+                {"id": "3", "categories": ["Devis"]},
+                {"id": "99", "categories": ["Devis"]},
+            ],
+            ["Extrait Kbis"],
+            ["Extrait Kbis"],
+            ["Extrait Kbis"],
+        ]
+        r = classify_files_batch_with_llm(documents, DIC_CLASS_FILE_BY_NAME)
+    assert r == {"a": "facture", "b": "kbis", "c": "kbis", "d": "kbis"}
+    assert mock_ask_llm.call_count == 4
+
+
+def test_classify_files_batch_with_llm_invalid_json():
+    """Réponse qui n'est pas un JSON valide : tous les documents sont classifiés individuellement."""
+    documents = {"a": ("a.pdf", "A"), "b": ("b.pdf", "B")}
+    with patch("docia.file_processing.processor.classifier.LLMClient.ask_llm", autospec=True) as mock_ask_llm:
+        mock_ask_llm.side_effect = [ValueError("Expecting value"), ["Facture"], ["Devis"]]
+        r = classify_files_batch_with_llm(documents, DIC_CLASS_FILE_BY_NAME)
+    assert r == {"a": "facture", "b": "devis"}
+
+
+def test_classify_files_batch_with_llm_single_document():
+    """Un seul document : requête de classification individuelle."""
+    with patch("docia.file_processing.processor.classifier.LLMClient.ask_llm", autospec=True) as mock_ask_llm:
+        mock_ask_llm.return_value = ["Facture"]
+        r = classify_files_batch_with_llm({"a": ("a.pdf", "A")}, DIC_CLASS_FILE_BY_NAME)
+    assert r == {"a": "facture"}
+    assert mock_ask_llm.call_args.kwargs["response_format"]["json_schema"]["name"] == "ClassificationList"
+
+
 # --- classify_files ---
 
 
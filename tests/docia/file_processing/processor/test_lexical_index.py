@@ -0,0 +1,59 @@
+import io
+
+import numpy as np
+
+from docia.file_processing.processor.lexical_index import LexicalIndex, tokenize
+
+TEXTS = [
+    "Article 12 - Pénalités de retard : 100 € par jour calendaire.",
+    "Le montant du marché est de 25 000 € HT.",
+    "La durée du marché est de douze mois à compter de la notification.",
+    "Les pénalités ne sont pas plafonnées.",
+]
+
+
+def test_tokenize():
+    assert tokenize("L'article 12 : Pénalités de RETARD") == ["article", "12", "penalites", "retard"]
+    assert tokenize("de la et les") == []
+
+
+def test_scores_ranking():
+    index = LexicalIndex()
+    index.add(TEXTS)
+    scores = index.scores(["pénalités de retard", "durée du marché"])
+    assert scores.shape == (2, 4)
+    assert scores[0].argmax() == 0
+    assert scores[0][3] > 0
+    assert scores[0][1] == 0
+    assert scores[1].argmax() == 2
+
+
+def test_incremental_add_matches_single_add():
+    incremental = LexicalIndex()
+    incremental.add(TEXTS[:2])
+    incremental.add(TEXTS[2:])
+    single = LexicalIndex()
+    single.add(TEXTS)
+    assert len(incremental) == 4
+    np.testing.assert_array_equal(incremental.doc_freq, single.doc_freq)
+    np.testing.assert_allclose(incremental.scores(["pénalités", "montant"]), single.scores(["pénalités", "montant"]))
+
+
+def test_empty_texts():
+    index = LexicalIndex()
+    index.add(["", "de la"])
+    np.testing.assert_array_equal(index.scores(["pénalités"]), [[0.0, 0.0]])
+
+
+def test_save_load():
+    index = LexicalIndex(n_features=2**12)
+    index.add(TEXTS)
+    buffer = io.BytesIO()
+    index.save(buffer)
+    buffer.seek(0)
+
+    loaded = LexicalIndex.load(buffer)
+    assert loaded.n_features == 2**12
+    np.testing.assert_allclose(loaded.scores(["pénalités"]), index.scores(["pénalités"]))
+    loaded.add(["Nouvelles pénalités"])
+    assert len(loaded) == 5
@@ -0,0 +1,143 @@
+import io
+import uuid
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+import pytest
+
+from docia.file_processing.processor.local_classifier import (
+    LocalPrediction,
+    classify_by_rules,
+    classify_file_locally,
+    load_model,
+    load_rule_confidences,
+    measure_rules,
+    normalize_filename,
+    predict_with_model,
+    save_model,
+    train_model,
+)
+from tests.factories.data import DocumentFactory
+
+TRAINING_SET = {
+    "devis": ("Devis n°{i}", "Devis valable 30 jours. Quantité, prix unitaire HT, total TTC à régler."),
+    "facture": ("Facture_{i}", "Facture n° {i}. Montant à payer avant échéance, TVA 20 %, net à payer."),
+    "cctp": ("CCTP lot {i}", "Cahier des clauses techniques particulières : spécifications techniques du lot."),
+}
+
+
+def _training_data(nb_per_class=8):
+    filenames, texts, labels = [], [], []
+    for label, (filename, text) in TRAINING_SET.items():
+        for i in range(nb_per_class):
+            filenames.append(f"dossier/{filename.format(i=i)}.pdf")
+            texts.append(text.format(i=i))
+            labels.append(label)
+    return filenames, texts, labels
+
+
+@pytest.fixture(scope="module")
+def model():
+    return train_model(*_training_data())
+
+
+@pytest.fixture
+def model_path(settings):
+    path = f"tests/local_classifier_{uuid.uuid4().hex}.pickle"
+    settings.LOCAL_CLASSIFIER_PATH = path
+    yield path
+    if default_storage.exists(path):
+        default_storage.delete(path)
+
+
+def test_normalize_filename():
+    assert normalize_filename("ej/1300/Extrait_KBIS-Société.PDF") == "extrait kbis societe"
+    assert normalize_filename("  RIB (2).pdf") == "rib 2"
+
+
+@pytest.mark.parametrize(
+    "filename, expected",
+    [
+        ("Extrait Kbis 2024.pdf", "kbis"),
+        ("K-bis.pdf", "kbis"),
+        ("RIB_SARL_DUPONT.pdf", "rib"),
+        ("Relevé d'identité bancaire.pdf", "rib"),
+        ("DC4 - sous-traitant.pdf", "sous_traitance"),
+        ("Fiche navette PLACE-CHORUS.xlsx", "fiche_navette"),
+        ("DC1.pdf", "lettre_candidature_dc1"),
+        # Plusieurs règles s'appliquent
+        ("DC1-DC2.pdf", None),
+        ("RIB_et_Kbis.pdf", None),
+        # Le mot-clé doit commencer le nom
+        ("Certificat changement RIB.pdf", None),
+        ("Annexe DC4.pdf", None),
+        ("Facture 12.pdf", None),
+    ],
+)
+def test_classify_by_rules(filename, expected):
+    assert classify_by_rules(filename) == expected
+
+
+def test_measure_rules():
+    filenames = ["Kbis.pdf", "Kbis 2.pdf", "RIB.pdf", "RIB_et_Kbis.pdf", "Facture.pdf"]
+    labels = ["kbis", "statuts", "rib", "rib", "facture"]
+    assert measure_rules(filenames, labels) == {"kbis": (2, 0.5), "rib": (1, 1.0)}
+
+
+def test_predict_with_model(model):
+    predictions = predict_with_model(
+        model,
+        ["Facture_2025.pdf", "document.pdf"],
+        ["Facture n° 99. Net à payer avant échéance.", None],
+    )
+
+    assert predictions[0].classification == "facture"
+    assert predictions[0].source == "model"
+    assert predictions[0].confidence > predictions[1].confidence
+    assert 0 < predictions[1].confidence < 1
+
+
+def test_classify_file_locally_without_model(model_path):
+    # Précision des règles non mesurée : aucune classification locale
+    assert classify_file_locally("Extrait Kbis.pdf", "") is None
+    assert classify_file_locally("Facture_1.pdf", "Facture n° 1") is None
+
+
+def test_classify_file_locally_with_saved_model(model, model_path):
+    save_model(model, model_path)
+    # Enregistrer de nouveau remplace le modèle existant
+    save_model(model, model_path, {"rib": 0.98})
+
+    prediction = classify_file_locally("Facture_2025.pdf", "Facture n° 99. Net à payer avant échéance.")
+
+    assert prediction.classification == "facture"
+    assert prediction.source == "model"
+    assert classify_file_locally("RIB.pdf", "") == LocalPrediction(classification="rib", confidence=0.98, source="rule")
+    # Règle non mesurée : le modèle décide
+    assert classify_file_locally("Extrait Kbis.pdf", "").source == "model"
+
+
+@pytest.mark.django_db
+def test_train_local_classifier_command(model_path):
+    for filename, text, label in zip(*_training_data(nb_per_class=10), strict=True):
+        DocumentFactory(filename=filename, text=text, classification=label, classification_type="llm")
+    DocumentFactory(filename="Autre.pdf", text="Autre", classification="Non classifié", classification_type="llm")
+    DocumentFactory(filename="Kbis.pdf", text="Kbis", classification="kbis", classification_type="llm")
+    DocumentFactory(filename="RIB.pdf", text="RIB", classification="rib", classification_type="llm")
+    DocumentFactory(filename="Kbis_2.pdf", text="Statuts", classification="statuts", classification_type="llm")
+    out = io.StringIO()
+
+    call_command("train_local_classifier", stdout=out)
+
+    assert "30 labelled documents, 3 classes (3 classes with fewer than 10 documents ignored)" in out.getvalue()
+    assert "Rule kbis: 2 documents, precision 50.0%" in out.getvalue()
+    assert "accuracy: 100.0%" in out.getvalue()
+    model = load_model(model_path)
+    assert set(model.classes_) == {"devis", "facture", "cctp"}
+    # Règles reconnaissant moins de --min-samples documents : non retenues
+    assert load_rule_confidences(model_path) == {}
+
+    call_command("train_local_classifier", "--min-samples", "2", stdout=io.StringIO())
+
+    assert load_rule_confidences(model_path) == {"kbis": 0.5}
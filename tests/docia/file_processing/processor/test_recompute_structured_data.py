@@ -0,0 +1,71 @@
+from django.core.management import call_command
+
+import pytest
+
+from docia.file_processing.processor.recompute_structured_data import (
+    recompute_document_data,
+    recompute_rows,
+    recompute_structured_data,
+)
+from tests.factories.data import DocumentFactory
+
+LLM_RESPONSE = {"montant_ht": "1 000", "montant_ttc": "1200", "siret_mandataire": "123 456 789 01234"}
+STRUCTURED_DATA = {"montant_ht": "1000.00", "montant_ttc": "1200.00", "siret_mandataire": "12345678901234"}
+
+
+def test_recompute_document_data():
+    assert recompute_document_data("acte_engagement", LLM_RESPONSE, STRUCTURED_DATA) == (STRUCTURED_DATA, ())
+
+    old_data = {**STRUCTURED_DATA, "montant_ht": "1 000", "ancien_champ": "x"}
+    data, changed_fields = recompute_document_data("acte_engagement", LLM_RESPONSE, old_data)
+    assert data == STRUCTURED_DATA
+    assert changed_fields == ("ancien_champ", "montant_ht")
+
+    assert recompute_document_data("acte_engagement", LLM_RESPONSE, None)[1] == tuple(sorted(LLM_RESPONSE))
+
+
+def test_recompute_rows_errors():
+    results = recompute_rows([(1, "acte_engagement", LLM_RESPONSE, None), (2, "acte_engagement", None, None)])
+    assert [result.id for result in results] == [1, 2]
+    assert results[0].structured_data == STRUCTURED_DATA and results[0].error is None
+    assert results[1].structured_data is None and results[1].error.startswith("AttributeError")
+
+
+@pytest.fixture
+def documents():
+    return {
+        "changed": DocumentFactory(classification="acte_engagement", llm_response=LLM_RESPONSE, structured_data={}),
+        "unchanged": DocumentFactory(
+            classification="acte_engagement", llm_response=LLM_RESPONSE, structured_data=STRUCTURED_DATA
+        ),
+        "other_type": DocumentFactory(classification="kbis", llm_response={"a": 1}, structured_data=None),
+        "not_analyzed": DocumentFactory(classification="acte_engagement"),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("workers", [1, 2])
+def test_recompute_structured_data(documents, workers):
+    reports = []
+    report = recompute_structured_data(batch_size=2, workers=workers, on_batch=lambda r: reports.append(r.total))
+
+    assert (report.total, report.changed, report.unchanged, report.errors) == (3, 2, 1, 0)
+    assert report.changed_by_classification == {"acte_engagement": 1, "kbis": 1}
+    assert report.changed_fields["montant_ht"] == 1
+    assert reports == [2, 3]
+    for name, expected in [("changed", STRUCTURED_DATA), ("other_type", {"a": 1}), ("not_analyzed", None)]:
+        documents[name].refresh_from_db()
+        assert documents[name].structured_data == expected
+
+
+@pytest.mark.django_db
+def test_recompute_structured_data_command(documents):
+    call_command("recompute_structured_data", "--classification", "kbis", "--workers", "1", "--dry-run")
+    documents["other_type"].refresh_from_db()
+    assert documents["other_type"].structured_data is None
+
+    call_command("recompute_structured_data", classifications=["acte_engagement"], workers=1)
+    for document in documents.values():
+        document.refresh_from_db()
+    assert documents["changed"].structured_data == STRUCTURED_DATA
+    assert documents["other_type"].structured_data is None
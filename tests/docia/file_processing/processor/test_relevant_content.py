@@ -0,0 +1,224 @@
+from unittest.mock import Mock
+
+import pytest
+
+import numpy as np
+
+from docia.documents.models import ChunkEmbedding, DocumentChunk
+from docia.file_processing.llm.tokens import count_tokens
+from docia.file_processing.processor.relevant_content import (
+    CONTEXT_SEPARATOR,
+    Chunk,
+    get_embeddings,
+    hybrid_scores,
+    merge_spans,
+    search_queries,
+    select_relevant_content,
+    split_into_chunks,
+    text_hash,
+    to_vector,
+)
+from tests.factories.data import DocumentFactory
+
+VOCABULARY = ["penalites", "montant", "duree", "titulaire"]
+
+
+def fake_embed(texts, model=None):
+    """Embedding factice : nombre d'occurrences de chaque mot du vocabulaire (plus une composante constante)."""
+    return [[float(text.lower().count(word)) for word in VOCABULARY] + [0.1] for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def token_settings(settings):
+    settings.TOKENIZER_ENCODING = ""
+    settings.RELEVANT_CONTENT_CHUNK_TOKENS = 300
+
+
+@pytest.fixture
+def llm_client():
+    client = Mock()
+    client.embed.side_effect = fake_embed
+    return client
+
+
+def test_split_into_chunks_short_and_empty():
+    assert [(c.start, c.end, c.page) for c in split_into_chunks("  abc \n")] == [(2, 5, 1)]
+    assert split_into_chunks("") == []
+
+
+def test_split_into_chunks_merges_paragraphs():
+    text = "Premier paragraphe.\n\nDeuxième paragraphe.\n\nTroisième paragraphe."
+    chunks = split_into_chunks(text, max_tokens=100)
+    assert [c.text for c in chunks] == [text]
+
+
+def test_split_into_chunks_sections():
+    article_1 = "ARTICLE 1 - Objet\n" + "Le présent marché a pour objet des prestations. " * 10
+    article_2 = "ARTICLE 2 - Pénalités\n" + "Des pénalités de retard sont appliquées. " * 10
+    text = article_1 + "\n" + article_2
+    chunks = split_into_chunks(text, max_tokens=200)
+    assert [c.text for c in chunks] == [article_1.strip(), article_2.strip()]
+    # Offsets : le texte de chaque morceau est la tranche correspondante du texte complet
+    assert all(c.text == text[c.start : c.end] for c in chunks)
+
+
+def test_split_into_chunks_markdown_headings():
+    sheet = "| a | b |\n|---|---|\n" + "| 1 | 2 |\n" * 30
+    text = f"## Feuille 1\n\n{sheet}\n## Feuille 2\n\n{sheet}"
+    chunks = split_into_chunks(text, max_tokens=120)
+    assert [c.text.split("\n")[0] for c in chunks] == ["## Feuille 1", "## Feuille 2"]
+
+
+def test_split_into_chunks_pages():
+    text = "[[PAGE 1 / 2]]\nContenu de la page 1.\n[[FIN PAGE 1 / 2]]\n\n[[PAGE 2 / 2]]\nPage 2.\n[[FIN PAGE 2 / 2]]"
+    chunks = split_into_chunks(text, max_tokens=100)
+    assert [(c.text, c.page) for c in chunks] == [("Contenu de la page 1.", 1), ("Page 2.", 2)]
+
+    text = "Page 1\n\f\nPage 2\n\f\nPage 3"
+    assert [(c.text, c.page) for c in split_into_chunks(text, max_tokens=100)] == [
+        ("Page 1", 1),
+        ("Page 2", 2),
+        ("Page 3", 3),
+    ]
+
+
+def test_split_into_chunks_long_paragraph():
+    """Passage sans frontière : fenêtres qui se chevauchent, chacune dans la limite de tokens."""
+    text = " ".join(f"mot{i}" for i in range(1000))
+    chunks = split_into_chunks(text, max_tokens=100)
+    assert len(chunks) > 1
+    assert all(count_tokens(c.text) <= 100 for c in chunks)
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+    assert all(b.start < a.end for a, b in zip(chunks, chunks[1:], strict=False))
+
+
+def test_split_into_chunks_no_overlap_on_boundaries():
+    text = "\n\n".join(f"Paragraphe {i}. " + "texte " * 40 for i in range(10))
+    chunks = split_into_chunks(text, max_tokens=100)
+    assert len(chunks) == 10
+    assert all(b.start >= a.end for a, b in zip(chunks, chunks[1:], strict=False))
+
+
+def test_search_queries():
+    queries = search_queries("ccap")
+    assert queries
+    assert len(queries) == len(set(queries))
+    assert all(q.strip() for q in queries)
+    assert search_queries("kbis") == []
+    assert search_queries("inconnu") == []
+
+
+def test_merge_spans():
+    text = "a" * 1000 + "\n\n" + "b" * 1000 + "--" + "c" * 1000
+    chunks = [Chunk(1, 1002, 2002, ""), Chunk(0, 0, 1000, ""), Chunk(0, 500, 800, ""), Chunk(2, 2004, 3004, "")]
+    assert merge_spans(text, chunks) == [(0, 2002), (2004, 3004)]
+
+
+def test_hybrid_scores():
+    texts = ["les penalites de retard", "le montant du marche", "la duree du marche"]
+    queries = ["penalites", "duree"]
+    scores = hybrid_scores(
+        np.array(fake_embed(queries)), np.array(fake_embed(texts)), queries, texts, semantic_weight=0.7
+    )
+    assert scores.shape == (2, 3)
+    assert scores.argmax(axis=1).tolist() == [0, 2]
+    assert scores.min() >= 0 and scores.max() == pytest.approx(1)
+
+
+def _paragraph(sentence: str = "") -> str:
+    return " ".join(["Lorem ipsum dolor sit amet."] * 25 + [sentence]).strip()
+
+
+def _long_text():
+    paragraphs = [_paragraph() for _ in range(8)]
+    paragraphs[3] = _paragraph("Les penalites de retard sont de 100 euros.")
+    paragraphs[6] = _paragraph("La duree est de 12 mois.")
+    return "\n\n".join(paragraphs)
+
+
+@pytest.mark.django_db
+def test_select_relevant_content(llm_client):
+    document = DocumentFactory()
+    text = _long_text()
+
+    content = select_relevant_content(document, text, ["penalites", "duree"], top_k=1, llm_client=llm_client)
+
+    parts = content.split(CONTEXT_SEPARATOR)
+    assert len(parts) == 3
+    assert parts[0] == _paragraph()
+    assert "penalites" in parts[1]
+    assert "duree" in parts[2]
+    assert all(part in text for part in parts)
+    assert len(content) < len(text)
+
+
+@pytest.mark.django_db
+def test_select_relevant_content_reuses_embeddings(llm_client):
+    document = DocumentFactory()
+    text = _long_text()
+    nb_chunks = len(split_into_chunks(text))
+
+    select_relevant_content(document, text, ["penalites"], llm_client=llm_client)
+    assert DocumentChunk.objects.filter(document=document).count() == nb_chunks
+    # Morceaux et requête en un seul appel
+    assert llm_client.embed.call_count == 1
+    assert llm_client.embed.call_args.args[0][-1] == "penalites"
+
+    # Nouvelle analyse, même texte : aucun appel à l'API
+    llm_client.embed.reset_mock()
+    select_relevant_content(document, text, ["penalites"], llm_client=llm_client)
+    llm_client.embed.assert_not_called()
+
+    # Texte modifié à la fin : seuls les morceaux modifiés sont de nouveau envoyés
+    llm_client.embed.reset_mock()
+    new_text = text + "Le titulaire est Toto."
+    select_relevant_content(document, new_text, ["penalites"], llm_client=llm_client)
+    assert llm_client.embed.call_count == 1
+    assert 0 < len(llm_client.embed.call_args.args[0]) < nb_chunks
+    assert DocumentChunk.objects.filter(document=document).count() == len(split_into_chunks(new_text))
+
+
+@pytest.mark.django_db
+def test_embeddings_shared_between_documents(llm_client):
+    text = _long_text()
+    select_relevant_content(DocumentFactory(), text, ["penalites"], llm_client=llm_client)
+    nb_embeddings = ChunkEmbedding.objects.count()
+    assert nb_embeddings == len({c.text for c in split_into_chunks(text)}) + 1
+
+    # Un autre document au même contenu : seule la nouvelle requête est envoyée à l'API
+    llm_client.embed.reset_mock()
+    other = DocumentFactory()
+    select_relevant_content(other, text, ["penalites", "duree"], llm_client=llm_client)
+    assert [call.args[0] for call in llm_client.embed.call_args_list] == [["duree"]]
+    assert ChunkEmbedding.objects.count() == nb_embeddings + 1
+    assert other.chunks.count() == len(split_into_chunks(text))
+
+
+@pytest.mark.django_db
+def test_get_embeddings_float16(llm_client):
+    embeddings = get_embeddings(["le montant", "la duree"], "model", llm_client)
+    assert len(embeddings) == 2
+    embedding = embeddings[text_hash("la duree")]
+    assert len(embedding.vector) == len(VOCABULARY + ["constante"]) * 2
+    assert to_vector(embedding).tolist() == pytest.approx([0.0, 0.0, 1.0, 0.0, 0.1], abs=1e-3)
+
+
+@pytest.mark.django_db
+def test_select_relevant_content_max_tokens(llm_client):
+    document = DocumentFactory()
+    text = _long_text()
+    chunks = split_into_chunks(text)
+    penalites = next(c for c in chunks if "penalites" in c.text)
+    duree = next(c for c in chunks if "duree" in c.text)
+    max_tokens = chunks[0].nb_tokens + penalites.nb_tokens
+
+    content = select_relevant_content(
+        document, text, ["penalites", "duree"], top_k=3, llm_client=llm_client, max_tokens=max_tokens
+    )
+    # Meilleur morceau de la première requête retenu, celui de la seconde ne tient plus
+    assert content.startswith(chunks[0].text)
+    assert penalites.text in content
+    assert duree.text not in content
+
+    content = select_relevant_content(document, text, ["penalites", "duree"], top_k=3, llm_client=llm_client)
+    assert duree.text in content
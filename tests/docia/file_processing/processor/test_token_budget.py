@@ -0,0 +1,101 @@
+from unittest.mock import Mock
+
+import pytest
+
+from docia.file_processing.llm.tokens import count_tokens
+from docia.file_processing.processor.relevant_content import CONTEXT_SEPARATOR
+from docia.file_processing.processor.token_budget import (
+    ContextStrategy,
+    PromptBudget,
+    get_prompt_budget,
+    plan_context,
+    sample_pages,
+    split_text,
+)
+
+
+@pytest.fixture(autouse=True)
+def token_settings(settings):
+    settings.TOKENIZER_ENCODING = ""
+    settings.RELEVANT_CONTENT_CHUNK_TOKENS = 300
+
+
+def _pages(nb_pages: int, words_per_page: int = 100) -> str:
+    return "\n\f\n".join(f"Page {i} " + "texte " * words_per_page for i in range(1, nb_pages + 1))
+
+
+def test_get_prompt_budget(settings):
+    settings.LLM_CONTEXT_TOKENS_BY_MODEL = {"petit-modele": 8000}
+    settings.LLM_CONTEXT_TOKENS_DEFAULT = 32000
+    settings.CONTENT_ANALYSIS_RESPONSE_TOKENS = 1000
+    settings.CONTENT_ANALYSIS_MAX_PROMPT_TOKENS = 50000
+    messages = [{"role": "system", "content": "a" * 35}, {"role": "user", "content": "b" * 70}]
+    response_format = {"type": "json_schema", "json_schema": {"name": "devis"}}
+
+    budget = get_prompt_budget("petit-modele", messages, response_format)
+    assert budget.fixed_tokens > 10 + 20
+    assert budget.max_input_tokens == 7000
+    assert budget.text_tokens == 7000 - budget.fixed_tokens
+
+    budget = get_prompt_budget("autre", messages)
+    assert budget.max_input_tokens == 31000
+
+
+def test_plan_context_full():
+    budget = PromptBudget(fixed_tokens=100, max_input_tokens=1000, max_prompt_tokens=5000)
+    select_content = Mock()
+    plan = plan_context("Texte court", budget, select_content)
+    assert plan.strategy == ContextStrategy.FULL
+    assert plan.parts == ["Texte court"]
+    select_content.assert_not_called()
+
+
+def test_plan_context_rag():
+    budget = PromptBudget(fixed_tokens=100, max_input_tokens=1000, max_prompt_tokens=5000)
+    text = _pages(20)
+    plan = plan_context(text, budget, lambda max_tokens: "Contenu pertinent")
+    assert plan.strategy == ContextStrategy.RAG
+    assert plan.parts == ["Contenu pertinent"]
+
+
+def test_plan_context_split():
+    budget = PromptBudget(fixed_tokens=100, max_input_tokens=1000, max_prompt_tokens=10000)
+    text = _pages(20)
+    plan = plan_context(text, budget)
+    assert plan.strategy == ContextStrategy.SPLIT
+    assert len(plan.parts) > 1
+    assert all(count_tokens(part) <= budget.text_tokens for part in plan.parts)
+    # Chaque page est dans une seule partie
+    assert all(sum(f"Page {i} " in part for part in plan.parts) == 1 for i in range(1, 21))
+
+
+def test_plan_context_pages_over_cost_cap():
+    budget = PromptBudget(fixed_tokens=100, max_input_tokens=1000, max_prompt_tokens=1000)
+    text = _pages(20)
+    plan = plan_context(text, budget)
+    assert plan.strategy == ContextStrategy.PAGES
+    assert len(plan.parts) == 1
+    assert count_tokens(plan.parts[0]) <= budget.text_tokens
+
+
+def test_split_text_merges_chunks():
+    text = _pages(6)
+    parts = split_text(text, 400)
+    assert len(parts) == 3
+    assert all(part in text for part in parts)
+
+
+def test_sample_pages_first_and_last():
+    text = _pages(10)
+    page_tokens = count_tokens("Page 1 " + "texte " * 100)
+    content = sample_pages(text, 4 * page_tokens + 3 * count_tokens(CONTEXT_SEPARATOR))
+    pages = content.split(CONTEXT_SEPARATOR)
+    assert [page.split()[1] for page in pages] == ["1", "2", "9", "10"]
+
+
+def test_sample_pages_single_long_page():
+    text = "début " + "texte " * 2000 + "fin"
+    content = sample_pages(text, 200)
+    assert count_tokens(content) <= 200
+    assert content.startswith("début")
+    assert content.endswith("fin")
@@ -0,0 +1,137 @@
+import random
+import string
+
+import pytest
+from schwifty import IBAN
+from schwifty.exceptions import SchwiftyException
+
+from docia.file_processing.processor.validation import (
+    correct_iban,
+    correct_ibans,
+    iban_remainders,
+    is_valid_iban,
+    is_valid_rib,
+    is_valid_siren,
+    is_valid_siret,
+    rib_key,
+    validate_ibans,
+    validate_sirets,
+)
+
+
+def schwifty_is_valid(iban: str) -> bool:
+    try:
+        IBAN(iban, validate_bban=True)
+        return True
+    except SchwiftyException:
+        return False
+
+
+def schwifty_correct(iban: str) -> str | None:
+    """Correction par force brute avec schwifty (implémentation de référence)."""
+    valid = set()
+    for i in range(len(iban)):
+        for char in string.ascii_uppercase if i <= 1 else string.digits:
+            candidate = iban[:i] + char + iban[i + 1 :]
+            if char != iban[i] and schwifty_is_valid(candidate):
+                valid.add(candidate)
+    return valid.pop() if len(valid) == 1 else None
+
+
+def random_ibans(seed: int, count: int) -> list[str]:
+    rng = random.Random(seed)
+    ibans = []
+    for _ in range(count):
+        bank_code = "".join(rng.choices(string.digits, k=10))
+        account_code = "".join(rng.choices(string.digits + "ABJMSZ", k=11))
+        ibans.append(str(IBAN.generate("FR", bank_code=bank_code, account_code=account_code)))
+    return ibans
+
+
+def corrupt(ibans: list[str], seed: int) -> list[str]:
+    """Une erreur d'un caractère (chiffre ou lettre) à une position au hasard de chaque IBAN."""
+    rng = random.Random(seed)
+    corrupted = []
+    for iban in ibans:
+        i = rng.randrange(len(iban))
+        corrupted.append(iban[:i] + rng.choice(string.ascii_uppercase + string.digits) + iban[i + 1 :])
+    return corrupted
+
+
+def test_iban_remainders():
+    ibans = ["FR7630001007941234567890185", "FR7612", "FR76", "FR763000100794123456789018@", ""]
+    # BBAN puis code pays et clé, lettres converties en nombres (F = 15, R = 27)
+    assert iban_remainders(ibans) == [1, int("12152776") % 97, None, None, None]
+
+
+def test_validate_ibans_matches_schwifty():
+    ibans = random_ibans(seed=1, count=100)
+    ibans += corrupt(ibans, seed=2)
+    ibans += [
+        "DE89370400440532013000",
+        "DE89370400440532013001",
+        "GB82WEST12345698765432",
+        "IT60X0542811101000000123456",
+        "BE68539007547034",
+        "MC5811222000010123456789030",
+        "FR9930001007941234567890185",
+        "FR7630001007941234567890185134",
+        "XX7630001007941234567890185",
+    ]
+    assert validate_ibans(ibans) == [schwifty_is_valid(iban) for iban in ibans]
+
+
+def test_is_valid_iban_normalizes():
+    assert is_valid_iban("fr76 3000 1007 9412 3456 7890 185")
+    assert not is_valid_iban("")
+    assert not is_valid_iban("FR7630001007941234567890185é")
+
+
+def test_correct_ibans_match_brute_force():
+    ibans = corrupt(random_ibans(seed=3, count=30), seed=4)
+    assert correct_ibans(ibans) == [schwifty_correct(iban) for iban in ibans]
+
+
+@pytest.mark.parametrize(
+    "wrong,expected",
+    [
+        # Erreur sur la clé RIB, sur le code pays
+        ("FR1420041010050500013M02607", "FR1420041010050500013M02606"),
+        ("FB7630001007941234567890185", "FR7630001007941234567890185"),
+        # Plusieurs corrections possibles
+        ("FR7630001007941234567890186", None),
+    ],
+)
+def test_correct_iban(wrong, expected):
+    assert correct_iban(wrong) == schwifty_correct(wrong) == expected
+
+
+def test_correct_iban_invalid_input():
+    assert correct_iban("") is None
+    assert correct_iban("FR76") is None
+    assert correct_iban("FR763000100794123456789018@") is None
+
+
+def test_rib_key():
+    assert rib_key("30001", "00794", "12345678901") == "85"
+    assert rib_key("20041", "01005", "0500013M026") == "06"
+    assert is_valid_rib("20041", "01005", "0500013m026", "06")
+    assert not is_valid_rib("20041", "01005", "0500013M026", "07")
+    assert not is_valid_rib("2004", "01005", "0500013M026", "06")
+
+
+def test_siren_siret():
+    assert is_valid_siren("732829320")
+    assert not is_valid_siren("732829321")
+    assert not is_valid_siren("73282932")
+    assert validate_sirets(["73282932000074", "73282932000075", "7328293200007A", "", None]) == [
+        True,
+        False,
+        False,
+        False,
+        False,
+    ]
+    # La Poste : somme des chiffres multiple de 5, sauf le siège (clé de Luhn)
+    assert is_valid_siret("35600000000048")
+    assert is_valid_siret("35600000012345") is (sum(map(int, "35600000012345")) % 5 == 0)
+    assert is_valid_siret("35600000049837")
@@ -0,0 +1,153 @@
+import io
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+import pymupdf
+import pytest
+from PIL import Image
+
+from docia.file_processing.models import ExtractionCacheEntry
+from docia.file_processing.processor.text_extraction import extract_text_from_pdf, process_file
+from docia.file_processing.processor.text_extraction.cache import ExtractionCache, cache_stats, hit_rate
+
+
+def make_image(color):
+    buff = io.BytesIO()
+    Image.new("RGB", (50, 50), color).save(buff, format="PNG")
+    return buff.getvalue()
+
+
+def make_scanned_pdf(colors):
+    """PDF sans texte (une image par page)."""
+    doc = pymupdf.Document()
+    for color in colors:
+        page = doc.new_page(width=200, height=200)
+        page.insert_image(page.rect, stream=make_image(color))
+    return doc.tobytes()
+
+
+def ocr_pages_by_size(pdf_content):
+    """Faux OCR : une ligne par page, numérotée dans le PDF envoyé."""
+    doc = pymupdf.Document(stream=pdf_content)
+    return [f"page {i + 1} / {len(doc)}" for i in range(len(doc))]
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    cache_stats.clear()
+
+
+@pytest.mark.django_db
+def test_file_cache_hit_and_miss():
+    cache = ExtractionCache("mistral-ocr")
+
+    assert cache.get_file("abc", 50) is None
+    cache.set_file("abc", 50, "Bonjour", True)
+    assert cache.get_file("abc", 50) == ("Bonjour", True)
+    # Le seuil de mots et l'outil d'OCR font partie de la clé
+    assert cache.get_file("abc", 10) is None
+    assert ExtractionCache("tesseract").get_file("abc", 50) is None
+
+    entry = ExtractionCacheEntry.objects.get()
+    assert entry.hit_count == 1
+    assert entry.size == 7
+    assert hit_rate("FILE") == 0.25
+
+
+@pytest.mark.django_db
+def test_tesseract_settings_are_part_of_the_key(settings):
+    settings.TESSERACT_OCR_LANG = "fra"
+    settings.TESSERACT_OCR_DPI = 144
+    settings.TESSERACT_OCR_PSM = 3
+    ExtractionCache("tesseract").set_file("abc", 50, "Bonjour", True)
+    assert ExtractionCache("tesseract").get_file("abc", 50) == ("Bonjour", True)
+    assert ExtractionCache("tesseract", ocr_dpi=144, ocr_psm=3).get_file("abc", 50) == ("Bonjour", True)
+
+    # Changer la langue, la résolution ou le mode de segmentation invalide les entrées
+    assert ExtractionCache("tesseract", ocr_psm=6).get_file("abc", 50) is None
+    settings.TESSERACT_OCR_DPI = 300
+    assert ExtractionCache("tesseract").get_file("abc", 50) is None
+    settings.TESSERACT_OCR_DPI = 144
+    settings.TESSERACT_OCR_LANG = "fra+eng"
+    assert ExtractionCache("tesseract").get_file("abc", 50) is None
+
+
+@pytest.mark.django_db
+def test_eviction_removes_least_recently_used():
+    cache = ExtractionCache("mistral-ocr", max_bytes=25)
+    cache.set_file("a", 50, "x" * 10, True)
+    cache.set_file("b", 50, "x" * 10, True)
+    cache.get_file("a", 50)
+    cache.set_file("c", 50, "x" * 10, True)
+    # Pas d'éviction à l'écriture
+    assert ExtractionCacheEntry.objects.count() == 3
+
+    assert cache.evict() == (1, 10)
+    assert cache.get_file("a", 50) is not None
+    assert cache.get_file("b", 50) is None
+    assert cache.get_file("c", 50) is not None
+
+
+@pytest.mark.django_db
+def test_pdf_page_cache_only_ocr_new_pages():
+    cache = ExtractionCache("mistral-ocr")
+    with patch("docia.file_processing.processor.text_extraction.text_extract_document.LLMClient") as mock_llm_class:
+        ocr_pages = mock_llm_class.return_value.ocr_pdf_pages
+        ocr_pages.side_effect = ocr_pages_by_size
+
+        text, is_ocr = extract_text_from_pdf(make_scanned_pdf(["red", "green", "blue"]), cache=cache)
+        assert is_ocr
+        assert text == (
+            "[[PAGE 1 / 3]]\npage 1 / 3\n[[FIN PAGE 1 / 3]]\n\n"
+            "[[PAGE 2 / 3]]\npage 2 / 3\n[[FIN PAGE 2 / 3]]\n\n"
+            "[[PAGE 3 / 3]]\npage 3 / 3\n[[FIN PAGE 3 / 3]]"
+        )
+        assert ocr_pages.call_count == 1
+
+        # Seule la page modifiée est envoyée à l'OCR
+        text, is_ocr = extract_text_from_pdf(make_scanned_pdf(["red", "black", "blue"]), cache=cache)
+        assert ocr_pages.call_count == 2
+        assert len(pymupdf.Document(stream=ocr_pages.call_args.args[0])) == 1
+        assert text == (
+            "[[PAGE 1 / 3]]\npage 1 / 3\n[[FIN PAGE 1 / 3]]\n\n"
+            "[[PAGE 2 / 3]]\npage 1 / 1\n[[FIN PAGE 2 / 3]]\n\n"
+            "[[PAGE 3 / 3]]\npage 3 / 3\n[[FIN PAGE 3 / 3]]"
+        )
+
+        # Document identique : aucun appel OCR
+        extract_text_from_pdf(make_scanned_pdf(["red", "black", "blue"]), cache=cache)
+        assert ocr_pages.call_count == 2
+
+
+@pytest.mark.django_db
+def test_process_file_uses_file_cache():
+    file_path = default_storage.save("tests/scan.pdf", ContentFile(make_scanned_pdf(["red"])))
+    try:
+        with patch("docia.file_processing.processor.text_extraction.text_extraction.extract_text", autospec=True) as m:
+            m.return_value = ("Texte OCR", True)
+            assert process_file(file_path, "pdf") == ("Texte OCR", True, 2)
+            assert process_file(file_path, "pdf") == ("Texte OCR", True, 2)
+            assert m.call_count == 1
+            # Autre outil d'OCR : pas de résultat en cache
+            process_file(file_path, "pdf", ocr_tool="tesseract")
+            assert m.call_count == 2
+    finally:
+        default_storage.delete(file_path)
+
+
+@pytest.mark.django_db
+def test_process_file_cache_disabled(settings):
+    settings.EXTRACTION_CACHE_ENABLED = False
+    file_path = default_storage.save("tests/scan.pdf", ContentFile(make_scanned_pdf(["red"])))
+    try:
+        with patch("docia.file_processing.processor.text_extraction.text_extraction.extract_text", autospec=True) as m:
+            m.return_value = ("Texte OCR", True)
+            process_file(file_path, "pdf")
+            process_file(file_path, "pdf")
+            assert m.call_count == 2
+            assert m.call_args.kwargs["cache"] is None
+    finally:
+        default_storage.delete(file_path)
+    assert not ExtractionCacheEntry.objects.exists()
@@ -3,13 +3,20 @@ Tests d'extraction Excel (XLSX, XLS, ODS) via le package text_extraction.
 Utilise les assets générés par generate_excel_assets.py (plusieurs onglets, cellules fusionnées).
 """
 
+import io
+import re
+import zipfile
+
 import pytest
+from openpyxl import Workbook
+from openpyxl.styles import Font
 
 from docia.file_processing.processor.text_extraction import (
     extract_text_from_ods,
     extract_text_from_xls,
     extract_text_from_xlsx,
 )
+from docia.file_processing.processor.text_extraction.text_extract_excel import TRUNCATION_MARKER
 
 from .utils import ASSETS_DIR
 
@@ -73,3 +80,123 @@ def test_extract_text_from_ods():
     assert "|" in text
     # Au moins une des données attendues
     assert any(s in text for s in (TITRE_FUSIONNE, SECTION, TOTAL, "Ligne 1", "Col A", "V2", "V3", "Fin"))
+
+
+def _xlsx_bytes(wb) -> bytes:
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def test_extract_text_from_xlsx_ignores_formatted_empty_range():
+    """Une plage formatée mais vide (dimensions annoncées énormes) ne produit ni lignes ni colonnes vides."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "BPU"
+    ws["A1"] = "Prix"
+    ws["B1"] = "Montant"
+    ws["A2"] = "Unitaire"
+    ws["B2"] = 12.5
+    ws.merge_cells("C1:C3")
+    for row in range(5, 2000):
+        ws.cell(row=row, column=30).font = Font(bold=True)
+    content = _xlsx_bytes(wb)
+    # Dimensions annoncées : toute la feuille
+    with zipfile.ZipFile(io.BytesIO(content)) as z:
+        files = {name: z.read(name) for name in z.namelist()}
+    sheet = "xl/worksheets/sheet1.xml"
+    files[sheet] = re.sub(rb'<dimension ref="[^"]+"', b'<dimension ref="A1:XFD1048576"', files[sheet])
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        for name, data in files.items():
+            z.writestr(name, data)
+
+    text, _ = extract_text_from_xlsx(buffer.getvalue())
+
+    assert text.split("\n\n", 1)[1] == "## BPU\n\n| Prix | Montant |  |\n| Unitaire | 12.5 | # |\n|  |  | # |"
+
+
+def test_extract_text_from_xlsx_truncates_large_sheets(settings):
+    settings.EXTRACTION_EXCEL_MAX_ROWS = 3
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Gros"
+    for row in range(1, 11):
+        ws.cell(row=row * 2, column=1, value=f"ligne {row}")
+
+    text, _ = extract_text_from_xlsx(_xlsx_bytes(wb))
+
+    assert "| ligne 3 |" in text
+    assert "ligne 4" not in text
+    assert text.endswith(TRUNCATION_MARKER.format(nb_rows=3))
+
+
+def test_extract_text_from_xlsx_truncates_on_cells(settings):
+    settings.EXTRACTION_EXCEL_MAX_CELLS = 5
+    wb = Workbook()
+    ws = wb.active
+    for row in range(1, 5):
+        ws.append(["a", "b"])
+
+    text, _ = extract_text_from_xlsx(_xlsx_bytes(wb))
+
+    assert text.count("| a | b |") == 2
+    assert TRUNCATION_MARKER.format(nb_rows=2) in text
+
+
+ODS_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content
+    xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+    xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+    xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">
+  <office:body><office:spreadsheet>
+    <table:table table:name="Répétitions">
+      <table:table-column table:number-columns-repeated="16384"/>
+      <table:table-row>
+        <table:table-cell><text:p>Lot</text:p></table:table-cell>
+        <table:table-cell table:number-columns-repeated="2"/>
+        <table:table-cell table:number-columns-repeated="2"><text:p>x</text:p></table:table-cell>
+        <table:table-cell table:number-columns-repeated="16379"/>
+      </table:table-row>
+      <table:table-row table:number-rows-repeated="2">
+        <table:table-cell><text:p>idem</text:p></table:table-cell>
+        <table:covered-table-cell table:number-columns-repeated="2"/>
+        <table:table-cell table:number-columns-repeated="16381"/>
+      </table:table-row>
+      <table:table-row table:number-rows-repeated="1048573">
+        <table:table-cell table:number-columns-repeated="16384"/>
+      </table:table-row>
+    </table:table>
+    <table:table table:name="Vide">
+      <table:table-row table:number-rows-repeated="1048576">
+        <table:table-cell table:number-columns-repeated="16384"/>
+      </table:table-row>
+    </table:table>
+  </office:spreadsheet></office:body>
+</office:document-content>
+"""
+
+
+def _ods_bytes(content_xml: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("mimetype", "application/vnd.oasis.opendocument.spreadsheet")
+        z.writestr("content.xml", content_xml)
+    return buffer.getvalue()
+
+
+def test_extract_text_from_ods_expands_repeats():
+    """Les répétitions de lignes et colonnes sont développées, sauf les vides de fin."""
+    text, _ = extract_text_from_ods(_ods_bytes(ODS_CONTENT))
+
+    assert text.split("\n\n", 1)[1] == (
+        "## Répétitions\n\n| Lot |  |  | x | x |\n| idem | # | # |  |  |\n| idem | # | # |  |  |"
+    )
+
+
+def test_extract_text_from_ods_truncates_repeated_rows(settings):
+    settings.EXTRACTION_EXCEL_MAX_ROWS = 2
+
+    text, _ = extract_text_from_ods(_ods_bytes(ODS_CONTENT))
+
+    assert text.endswith("| idem | # | # |  |  |\n\n" + TRUNCATION_MARKER.format(nb_rows=2))
@@ -22,7 +22,7 @@ def test_extract_text():
     ) as m:
         m.return_value = ("hello", True)
         extract_text(file_content, "file.pdf", "pdf")
-        m.assert_called_once_with(file_content, 50, ocr_tool="mistral-ocr")
+        m.assert_called_once_with(file_content, 50, ocr_tool="mistral-ocr", cache=None)
 
     with mock.patch(
         "docia.file_processing.processor.text_extraction.text_extract_document.extract_text_from_docx", autospec=True
@@ -0,0 +1,79 @@
+import hashlib
+import io
+
+import pytest
+
+from docia.file_processing.processor.text_extraction import extract_text
+from docia.file_processing.processor.text_extraction.file_source import FileSource, as_path, open_pdf
+
+from .utils import ASSETS_DIR
+
+
+def test_small_file_stays_in_memory():
+    content = b"x" * 100
+    with FileSource.from_stream(io.BytesIO(content), max_memory=1000) as source:
+        assert source.in_memory
+        assert len(source) == 100
+        assert source.sha256 == hashlib.sha256(content).hexdigest()
+        assert source.view() is source.read()
+        assert source.open().read() == content
+
+
+def test_large_file_spills_to_disk():
+    content = bytes(range(256)) * 10_000
+    with FileSource.from_stream(io.BytesIO(content), max_memory=1000) as source:
+        assert not source.in_memory
+        assert len(source) == len(content)
+        assert source.sha256 == hashlib.sha256(content).hexdigest()
+        assert source.view()[:10] == content[:10]
+        assert source.read() == content
+        with source.open() as f:
+            assert f.read() == content
+        with source.path() as path:
+            with open(path, "rb") as f:
+                assert f.read() == content
+
+
+def test_from_chunks_closes_source_on_error():
+    def chunks():
+        yield b"x" * 2000
+        raise OSError("connection lost")
+
+    with pytest.raises(OSError, match="connection lost"):
+        FileSource.from_chunks(chunks(), max_memory=1000)
+
+
+def test_as_path_with_bytes():
+    with as_path(b"hello", ".txt") as path:
+        assert path.endswith(".txt")
+        with open(path, "rb") as f:
+            assert f.read() == b"hello"
+
+
+def test_open_pdf_from_disk():
+    content = (ASSETS_DIR / "lettre.pdf").read_bytes()
+    with FileSource.from_stream(io.BytesIO(content), max_memory=10) as source:
+        assert not source.in_memory
+        assert len(open_pdf(source)) == len(open_pdf(content))
+
+
+@pytest.mark.parametrize(
+    "filename,extension",
+    [
+        ("lettre.pdf", "pdf"),
+        ("lettre.docx", "docx"),
+        ("lettre.odt", "odt"),
+        ("lettre.md", "txt"),
+        ("sample.xlsx", "xlsx"),
+        ("sample.xls", "xls"),
+        ("sample.ods", "ods"),
+    ],
+)
+def test_extract_text_from_disk_source(filename, extension):
+    """Le texte extrait est identique que le fichier soit en mémoire ou sur disque."""
+    content = (ASSETS_DIR / filename).read_bytes()
+    expected = extract_text(content, filename, extension)
+
+    with FileSource.from_stream(io.BytesIO(content), max_memory=10) as source:
+        assert not source.in_memory
+        assert extract_text(source, filename, extension) == expected
@@ -0,0 +1,103 @@
+import os
+import signal
+import stat
+import sys
+import textwrap
+
+import pytest
+
+from docia.file_processing.processor.text_extraction.libreoffice import LibreOfficeError, LibreOfficeService
+
+# Faux soffice : reste actif en mode listener (--accept), sinon "convertit" les fichiers
+# en préfixant leur contenu et journalise chaque appel de conversion.
+FAKE_SOFFICE = textwrap.dedent(
+    """
+    import pathlib
+    import sys
+    import time
+
+    args = sys.argv[1:]
+    if any(arg.startswith("--accept") for arg in args):
+        time.sleep(3600)
+        sys.exit(0)
+
+    index = args.index("--outdir")
+    outdir = pathlib.Path(args[index + 1])
+    files = [pathlib.Path(f) for f in args[index + 2 :]]
+    with open(pathlib.Path(__file__).with_suffix(".log"), "a") as log:
+        log.write(" ".join(f.name for f in files) + "\\n")
+    outdir.mkdir(exist_ok=True)
+    for f in files:
+        content = f.read_text()
+        if "HANG" in content:
+            time.sleep(3600)
+        if "FAIL" in content:
+            continue
+        (outdir / (f.stem + ".txt")).write_text("converti: " + content)
+    """
+)
+
+
+@pytest.fixture
+def fake_soffice(tmp_path):
+    path = tmp_path / "soffice"
+    path.write_text(f"#!{sys.executable}\n{FAKE_SOFFICE}")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return path
+
+
+@pytest.fixture
+def service(fake_soffice):
+    service = LibreOfficeService(str(fake_soffice), timeout=2)
+    yield service
+    service.close()
+
+
+def read_calls(fake_soffice):
+    with open(fake_soffice.with_suffix(".log")) as f:
+        return [line.split() for line in f.read().splitlines()]
+
+
+def test_convert_reuses_listener(service, fake_soffice):
+    assert service.convert(b"premier") == "converti: premier"
+    listener = service._process
+    assert service.convert(b"second") == "converti: second"
+
+    assert service._process is listener
+    assert listener.poll() is None
+    # Conversion témoin au démarrage, puis un appel par conversion
+    assert read_calls(fake_soffice) == [["probe.txt"], ["document.doc"], ["document.doc"]]
+
+
+def test_convert_raises_on_failure(service):
+    with pytest.raises(LibreOfficeError, match="output file not found"):
+        service.convert(b"FAIL")
+
+
+def test_restart_after_crash(service):
+    service.convert(b"premier")
+    listener = service._process
+    os.killpg(listener.pid, signal.SIGKILL)
+    listener.wait()
+
+    assert service.convert(b"second") == "converti: second"
+    assert service._process is not listener
+    assert service._process.poll() is None
+
+
+def test_restart_after_timeout(service):
+    service.convert(b"premier")
+    listener = service._process
+
+    with pytest.raises(LibreOfficeError, match="Timeout"):
+        service.convert(b"HANG")
+
+    assert listener.poll() is not None
+    assert service.convert(b"second") == "converti: second"
+
+
+def test_convert_file_from_path(service, tmp_path):
+    path = tmp_path / "spool"
+    path.write_bytes(b"sur disque")
+
+    assert service.convert_file(str(path)) == "converti: sur disque"
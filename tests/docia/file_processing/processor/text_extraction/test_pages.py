@@ -0,0 +1,24 @@
+from docia.file_processing.llm.client import format_ocr_pages
+from docia.file_processing.processor.text_extraction.pages import PAGE_SEPARATOR, join_pages, split_pages
+
+
+def _pages(text):
+    return [text[start:end] for start, end in split_pages(text)]
+
+
+def test_split_native_pages():
+    text = join_pages(["  page 1\n", "", "page 3\n\n"])
+
+    assert text == f"page 1{PAGE_SEPARATOR}{PAGE_SEPARATOR}page 3"
+    assert _pages(text) == ["page 1", "", "page 3"]
+
+
+def test_split_ocr_pages():
+    text = format_ocr_pages(["# Titre\ntexte", "", "fin"])
+
+    assert _pages(text) == ["# Titre\ntexte", "", "fin"]
+
+
+def test_split_single_page():
+    assert _pages("texte sans pages") == ["texte sans pages"]
+    assert split_pages("") == []
@@ -0,0 +1,132 @@
+import os
+import time
+
+import pytest
+
+from docia.documents.models import Document
+from docia.file_processing.processor.text_extraction import UnsupportedFileType
+from docia.file_processing.processor.text_extraction.cache import cache_stats, hit_rate
+from docia.file_processing.processor.text_extraction.sandbox import (
+    SandboxError,
+    SandboxLimits,
+    limits_for,
+    run_in_sandbox,
+)
+
+LIMITS = SandboxLimits(timeout=10, cpu_time=10, memory=200 * 1024 * 1024)
+
+
+def _raise_unsupported():
+    raise UnsupportedFileType("Unsupported file type: custom")
+
+
+def _allocate(size):
+    return len(bytearray(size))
+
+
+def _spin():
+    while True:
+        pass
+
+
+def test_returns_result_and_peak_rss():
+    result, peak_rss = run_in_sandbox(lambda a, b=0: (a + b, os.getpid()), 1, b=2, limits=LIMITS)
+
+    assert result[0] == 3
+    assert result[1] != os.getpid()
+    assert peak_rss > 0
+
+
+def test_propagates_exception_with_remote_traceback():
+    with pytest.raises(UnsupportedFileType, match="custom") as exc_info:
+        run_in_sandbox(_raise_unsupported, limits=LIMITS)
+
+    assert "_raise_unsupported" in str(exc_info.value.__cause__)
+
+
+def _count_lookups(hits, misses):
+    cache_stats[("FILE", "hit")] += hits
+    cache_stats[("FILE", "miss")] += misses
+    if misses:
+        raise UnsupportedFileType("miss")
+
+
+def test_cache_stats_counted_in_child_are_merged():
+    cache_stats.clear()
+    cache_stats[("FILE", "hit")] = 1
+
+    run_in_sandbox(_count_lookups, 2, 0, limits=LIMITS)
+    # Aussi quand l'extraction échoue
+    with pytest.raises(UnsupportedFileType):
+        run_in_sandbox(_count_lookups, 0, 1, limits=LIMITS)
+
+    assert cache_stats[("FILE", "hit")] == 3
+    assert cache_stats[("FILE", "miss")] == 1
+    assert hit_rate("FILE") == 0.75
+    cache_stats.clear()
+
+
+def test_timeout():
+    limits = SandboxLimits(timeout=0.5, cpu_time=10, memory=LIMITS.memory)
+    start = time.monotonic()
+
+    with pytest.raises(SandboxError, match="timeout") as exc_info:
+        run_in_sandbox(time.sleep, 30, limits=limits)
+
+    assert exc_info.value.code == "timeout"
+    assert time.monotonic() - start < 5
+
+
+def test_memory_budget():
+    with pytest.raises(SandboxError) as exc_info:
+        run_in_sandbox(_allocate, 2 * LIMITS.memory, limits=LIMITS)
+
+    assert exc_info.value.code == "memory"
+    # Une allocation dans le budget passe
+    assert run_in_sandbox(_allocate, LIMITS.memory // 4, limits=LIMITS)[0] == LIMITS.memory // 4
+
+
+def test_cpu_limit():
+    limits = SandboxLimits(timeout=30, cpu_time=1, memory=LIMITS.memory)
+
+    with pytest.raises(SandboxError) as exc_info:
+        run_in_sandbox(_spin, limits=limits)
+
+    assert exc_info.value.code == "cpu"
+    assert exc_info.value.details["signal"] == "SIGXCPU"
+
+
+def test_crash():
+    with pytest.raises(SandboxError) as exc_info:
+        run_in_sandbox(os.abort, limits=LIMITS)
+
+    assert exc_info.value.code == "crash"
+    assert exc_info.value.details["signal"] == "SIGABRT"
+
+
+@pytest.mark.django_db
+def test_parent_db_connection_survives():
+    Document.objects.count()
+
+    assert run_in_sandbox(lambda: "ok", limits=LIMITS)[0] == "ok"
+    assert Document.objects.count() == 0
+
+
+def test_limits_for(settings):
+    settings.EXTRACTION_SANDBOX_BASE_TIMEOUT = 60
+    settings.EXTRACTION_SANDBOX_MAX_TIMEOUT = 600
+    settings.EXTRACTION_SANDBOX_BASE_MEMORY = 100
+    settings.EXTRACTION_SANDBOX_MAX_MEMORY = 10_000
+    settings.TESSERACT_POOL_SIZE = 4
+
+    limits = limits_for(2 * 1024 * 1024, "pdf")
+    assert limits.timeout == 120
+    assert limits.cpu_time == 481
+    assert limits.memory == 10_000
+
+    limits = limits_for(10, "XLSX")
+    assert limits.timeout == pytest.approx(60, abs=0.1)
+    assert limits.cpu_time == 61
+    assert limits.memory == 600
+
+    assert limits_for(10**10, "pdf").timeout == 600
@@ -0,0 +1,107 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pymupdf
+import pytest
+from PIL import Image
+
+from docia.file_processing.processor.text_extraction import tesseract_ocr
+from docia.file_processing.processor.text_extraction.tesseract_ocr import (
+    TesseractPool,
+    get_tesseract_pool,
+    ocr_pdf_pages,
+)
+
+
+class FakeEngine:
+    """Moteur Tesseract factice : renvoie la largeur de l'image reçue."""
+
+    instances = []
+
+    def __init__(self, lang, psm):
+        self.lang = lang
+        self.psm = psm
+        self.image = None
+        self.in_use = threading.Lock()
+        FakeEngine.instances.append(self)
+
+    def SetPageSegMode(self, psm):
+        self.psm = psm
+
+    def SetImage(self, image):
+        # Un moteur ne doit jamais être utilisé par deux threads à la fois
+        assert self.in_use.acquire(blocking=False)
+        self.image = image
+
+    def GetUTF8Text(self):
+        time.sleep(random.uniform(0, 0.01))
+        text = f"{self.image.width} psm={self.psm}\n"
+        self.in_use.release()
+        return text
+
+    def Clear(self):
+        self.image = None
+
+    def End(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fake_engine():
+    FakeEngine.instances = []
+    with patch.object(tesseract_ocr.tesserocr, "PyTessBaseAPI", FakeEngine):
+        yield
+
+
+def test_pool_reuses_engines():
+    pool = TesseractPool(size=2)
+    image = Image.new("RGB", (10, 10))
+
+    for _ in range(3):
+        assert pool.image_to_text(image) == "10 psm=3\n"
+
+    assert len(FakeEngine.instances) == 1
+
+
+def test_pool_size_is_bounded():
+    pool = TesseractPool(size=2)
+    images = [Image.new("RGB", (i + 1, 10)) for i in range(20)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        texts = list(executor.map(pool.image_to_text, images))
+
+    assert texts == [f"{i + 1} psm=3\n" for i in range(20)]
+    assert len(FakeEngine.instances) == 2
+
+
+def test_pool_psm_override_is_restored():
+    pool = TesseractPool(size=1, psm=3)
+    image = Image.new("RGB", (10, 10))
+
+    assert pool.image_to_text(image, psm=6) == "10 psm=6\n"
+    assert pool.image_to_text(image) == "10 psm=3\n"
+
+
+def test_ocr_pdf_pages_keeps_page_order(settings):
+    settings.TESSERACT_POOL_SIZE = 3
+    doc = pymupdf.Document()
+    for i in range(10):
+        doc.new_page(width=100 + i, height=100)
+
+    with patch.object(tesseract_ocr, "_pool", None):
+        texts = ocr_pdf_pages(doc, dpi=72)
+
+    assert texts == [f"{100 + i} psm=3" for i in range(10)]
+    assert len(FakeEngine.instances) <= 3
+
+
+def test_get_tesseract_pool_is_recreated_after_fork(settings):
+    settings.TESSERACT_POOL_SIZE = 1
+    with patch.object(tesseract_ocr, "_pool", None):
+        pool = get_tesseract_pool()
+        assert get_tesseract_pool() is pool
+        with patch.object(tesseract_ocr.os, "getpid", return_value=-1):
+            assert get_tesseract_pool() is not pool
@@ -5,6 +5,7 @@ from unittest import mock
 
 import pytest
 
+from docia.file_processing.processor.text_extraction.file_source import FileSource
 from docia.file_processing.sync.files_utils import detect_file_extension_from_content
 
 ASSETS_DIR = Path(__file__).resolve().parent / "assets"
@@ -38,3 +39,11 @@ def test_detect_file_extension_from_content(filename):
         ext = detect_file_extension_from_content(filepath)
         m.assert_called_with(filepath, "rb")
     assert ext == expected_ext
+
+
+@pytest.mark.parametrize("filename", ["calc.xls", "lettre.doc", "lettre.docx", "lettre.pdf"])
+def test_detect_file_extension_from_file_source(filename):
+    filepath = ASSETS_DIR / filename
+    with open(filepath, "rb") as f, FileSource.from_stream(f, max_memory=1000) as source:
+        assert not source.in_memory
+        assert detect_file_extension_from_content(source) == filepath.suffix.strip(".")
@@ -1,7 +1,9 @@
+import hashlib
 from datetime import datetime, timezone
 
 import pydantic
 import pytest
+import requests
 import responses
 
 from docia.file_processing.sync.client import (
@@ -267,10 +269,29 @@ def test_download_document_success(client):
     )
 
     # Download
-    content = client.download_document("doc123")
+    with client.download_document("doc123") as content:
+        # Verify content
+        assert content.read() == test_content
+        assert content.sha256 == hashlib.sha256(test_content).hexdigest()
 
-    # Verify content
-    assert content == test_content
+
+@responses.activate
+def test_download_large_document_is_streamed_to_disk(client, settings):
+    """Test that a document larger than FILE_SYNC_DOWNLOAD_MAX_MEMORY is written to a temporary file"""
+    settings.FILE_SYNC_DOWNLOAD_MAX_MEMORY = 1000
+    test_content = bytes(range(256)) * 100
+    responses.add(
+        responses.GET,
+        "https://filesync.api.testing.beta.gouv.fr/export_pj_ej/pieces_jointes_data('doc123')/$value",
+        body=test_content,
+        status=200,
+    )
+
+    with client.download_document("doc123") as content:
+        assert not content.in_memory
+        assert content.size == len(test_content)
+        assert content.sha256 == hashlib.sha256(test_content).hexdigest()
+        assert content.read() == test_content
 
 
 @responses.activate
@@ -427,3 +448,61 @@ def test_parse_api_datetime_edge_cases():
     result = parse_api_datetime("/Date(1672531200500)/")  # 2023-01-01 00:00:00.500 UTC
     expected = datetime(2023, 1, 1, 0, 0, 0, 500000, tzinfo=timezone.utc)
     assert result == expected
+
+
+def _doc_data(id_pj: str, num_ej: str) -> dict:
+    return {
+        "id_pj": id_pj,
+        "nom_pj": f"{id_pj}.pdf",
+        "num_ej": num_ej,
+        "size_pj": "1024",
+        "date_pj": "/Date(1774001460000)/",
+    }
+
+
+@responses.activate
+def test_list_documents_for_ejs(client):
+    """Documents of several engagements in one request, demultiplexed by engagement, pages followed"""
+    url = "https://filesync.api.testing.beta.gouv.fr/export_pj_ej/pieces_jointes_metadata"
+    next_url = url + "?$skiptoken=2"
+    responses.add(
+        responses.GET,
+        url,
+        match=[
+            responses.matchers.query_param_matcher(
+                {"$filter": "(num_ej eq 'EJ1' or num_ej eq 'EJ2' or num_ej eq 'EJ3') and object_type eq 'BUS2201'"}
+            )
+        ],
+        json={"d": {"results": [_doc_data("doc1", "EJ1"), _doc_data("doc2", "EJ2")], "__next": next_url}},
+    )
+    responses.add(
+        responses.GET,
+        url,
+        match=[responses.matchers.query_param_matcher({"$skiptoken": "2"})],
+        json={"d": {"results": [_doc_data("doc3", "EJ1"), _doc_data("doc3", "EJ1")]}},
+    )
+
+    documents = client.list_documents_for_ejs(["EJ1", "EJ2", "EJ3"])
+
+    assert {num_ej: [doc.id for doc in docs] for num_ej, docs in documents.items()} == {
+        "EJ1": ["doc1", "doc3"],
+        "EJ2": ["doc2"],
+        "EJ3": [],
+    }
+    assert len(responses.calls) == 2
+
+
+def test_documents_url_length(client):
+    num_ejs = [f"{i:010d}" for i in range(10)]
+    request = requests.Request(
+        "GET",
+        client.base_url + "export_pj_ej/pieces_jointes_metadata",
+        params={"$filter": client.documents_filter(num_ejs)},
+    ).prepare()
+    assert client.documents_url_length(num_ejs) == len(request.url)
+
+
+def test_documents_filter_escapes_quotes():
+    assert SyncClient.documents_filter(["EJ1", "EJ'2"]) == (
+        "(num_ej eq 'EJ1' or num_ej eq 'EJ''2') and object_type eq 'BUS2201'"
+    )
@@ -7,6 +7,7 @@ from django.core.files.storage import default_storage
 import pytest
 
 from docia.file_processing.models import FileInfo
+from docia.file_processing.processor.text_extraction.file_source import FileSource
 from docia.file_processing.sync.downloader import DocumentDownloader
 from tests.factories.file_processing import FileInfoFactory
 from tests.utils import assert_queryset_equal
@@ -28,7 +29,7 @@ def test_generic_file_handling(downloader):
     ):
         # Create simple text content
         text_content = b"Simple text content"
-        m_client_download.return_value = text_content
+        m_client_download.return_value = FileSource.from_bytes(text_content)
 
         # Test data
         external_id = "test_external_id_text"
@@ -76,7 +77,7 @@ def test_existing_fileinfo_skip_processing(downloader, caplog):
     ):
         # Create simple text content
         text_content = b"This should not be downloaded"
-        m_client_download.return_value = text_content
+        m_client_download.return_value = FileSource.from_bytes(text_content)
 
         # Test data
         external_id = "test_external_id_exists"
@@ -110,7 +111,7 @@ def test_invalid_zip_file_handling(downloader, caplog):
         patch.object(downloader.client, "download_document", autospec=True) as m_client_download,
     ):
         invalid_zip_content = b"This is not a valid zip file"
-        m_client_download.return_value = invalid_zip_content
+        m_client_download.return_value = FileSource.from_bytes(invalid_zip_content)
 
         # Test data
         external_id = "test_external_id_invalid"
@@ -150,7 +151,7 @@ def test_zip_file_with_nested_structure(downloader):
         zip_content = zip_buffer.getvalue()
 
         # Mock the client to return our zip content
-        m_client_download.return_value = zip_content
+        m_client_download.return_value = FileSource.from_bytes(zip_content)
 
         # Test data
         external_id = "test_external_id"
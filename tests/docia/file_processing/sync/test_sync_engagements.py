@@ -1,10 +1,10 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
 import pytest
 
-from docia.documents.models import DataEngagement
-from docia.file_processing.sync.sync_engagements import EngagementsSync
+from docia.documents.models import DataEngagement, EngagementScope
+from docia.file_processing.sync.sync_engagements import EngagementsSync, save_watermarks
 from tests.factories.data import DataEngagementFactory, EngagementScopeFactory
 from tests.factories.file_processing import ApiEngagementActivityFactory
 from tests.utils import bind_arguments
@@ -204,3 +204,61 @@ def test_sync_preserve_newer_external_updated_at(syncer):
 
     # Assert updated_at is preserved (no update has been performed since date is older)
     assert updated_ej.updated_at == ej_initial_updated_at
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("backfill", [False, True])
+def test_sync_from_watermark(syncer, settings, backfill):
+    """Scopes already synced are fetched from their watermark minus the overlap, unless in backfill mode."""
+    settings.FILE_SYNC_WATERMARK_OVERLAP_HOURS = 6
+    synced_until = datetime(2026, 3, 10, 12, tzinfo=timezone.utc)
+    EngagementScopeFactory(purchase_organization="oa1", purchase_group="ga1", synced_until=synced_until)
+    start = datetime(2026, 3, 3, tzinfo=timezone.utc)
+    end = datetime(2026, 3, 11, tzinfo=timezone.utc)
+    received_at = datetime(2026, 3, 10, 18, tzinfo=timezone.utc)
+
+    def m_list_ej_place(start, end, purchase_organization, purchase_group, return_raw=False):
+        return [
+            ApiEngagementActivityFactory(
+                purchase_organization=purchase_organization, purchase_group=purchase_group, received_at=received_at
+            ),
+            ApiEngagementActivityFactory(
+                purchase_organization=purchase_organization,
+                purchase_group=purchase_group,
+                received_at=received_at - timedelta(hours=1),
+            ),
+        ]
+
+    with patch.object(syncer.client, "list_ej_place", side_effect=m_list_ej_place) as m_list:
+        syncer.sync([("oa1", "ga1"), ("oa2", "ga2")], start=start, end=end, backfill=backfill)
+
+    starts = [call.args[0] for call in m_list.call_args_list]
+    assert starts == [start if backfill else synced_until - timedelta(hours=6), start]
+    assert syncer.watermarks == {("oa1", "ga1"): received_at, ("oa2", "ga2"): received_at}
+    # Watermarks are only saved once the engagements are processed
+    assert EngagementScope.objects.get(purchase_organization="oa2").synced_until is None
+
+
+@pytest.mark.django_db
+def test_save_watermarks():
+    """Watermarks never go backwards."""
+    synced_until = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    scope_1 = EngagementScopeFactory(synced_until=synced_until)
+    scope_2 = EngagementScopeFactory(synced_until=synced_until)
+    scope_3 = EngagementScopeFactory(synced_until=None)
+
+    save_watermarks(
+        {
+            (scope_1.purchase_organization, scope_1.purchase_group): synced_until + timedelta(days=1),
+            (scope_2.purchase_organization, scope_2.purchase_group): synced_until - timedelta(days=1),
+            (scope_3.purchase_organization, scope_3.purchase_group): synced_until,
+        }
+    )
+
+    for scope in (scope_1, scope_2, scope_3):
+        scope.refresh_from_db()
+    assert [scope_1.synced_until, scope_2.synced_until, scope_3.synced_until] == [
+        synced_until + timedelta(days=1),
+        synced_until,
+        synced_until,
+    ]
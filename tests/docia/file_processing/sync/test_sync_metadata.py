@@ -1,10 +1,17 @@
+import dataclasses
 import datetime
 from unittest.mock import patch
 
 import pytest
-
-from docia.file_processing.models import ExternalDocumentMetadata, ExternalLinkDocumentOrder
-from docia.file_processing.sync.client import ApiDocumentMetadata
+import requests
+
+from docia.file_processing.llm.rategate.gate import RateGate
+from docia.file_processing.models import (
+    ExternalDocumentMetadata,
+    ExternalLinkDocumentOrder,
+    SyncDocumentMetadataError,
+)
+from docia.file_processing.sync.client import ApiDocumentMetadata, SyncApiError
 from docia.file_processing.sync.sync_metadata import DocumentMetadataSync
 from tests.factories.file_processing import ExternalDocumentMetadataFactoryWithOrder
 from tests.utils import bind_arguments
@@ -14,6 +21,8 @@ from tests.utils import bind_arguments
 def syncer():
     syncer = DocumentMetadataSync()
     syncer.client.is_authenticated = True
+    # One request per engagement (see test_sync_multi_ej_filter)
+    syncer.multi_ej_filter = False
     yield syncer
 
 
@@ -94,3 +103,139 @@ def test_sync_update(syncer):
         {"external_document_id": api_doc.id, "order_id": api_doc.num_ej},
     ]
     assert db_links == expected_links
+
+
+@pytest.mark.django_db
+def test_sync_records_failures(syncer):
+    """An engagement in error is recorded, the others are synced."""
+    api_docs = [
+        ApiDocumentMetadata(id=f"000{i}", name=f"doc{i}.pdf", num_ej=f"{i}234567890", size=100, date=dt(2026, 3, 15))
+        for i in range(1, 4)
+    ]
+
+    def m_list_documents_for_ej(num_ej, *args, **kwargs):
+        if num_ej == "2234567890":
+            raise SyncApiError("500 Server Error", code="HTTP_500", details="")
+        return [doc for doc in api_docs if doc.num_ej == num_ej]
+
+    with patch.object(syncer.client, "list_documents_for_ej", side_effect=m_list_documents_for_ej):
+        synced_doc_ids = syncer.sync([doc.num_ej for doc in api_docs])
+
+    assert synced_doc_ids == ["0001", "0003"]
+    assert syncer.errors == {"2234567890": "500 Server Error"}
+    assert list(SyncDocumentMetadataError.objects.values_list("order_id", "message")) == [
+        ("2234567890", "500 Server Error")
+    ]
+    assert ExternalDocumentMetadata.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_sync_retries_previous_failures(syncer):
+    """Engagements that failed in a previous sync are fetched again, and their errors deleted once synced."""
+    SyncDocumentMetadataError.objects.create(order_id="2234567890", message="500 Server Error")
+    error = SyncDocumentMetadataError.objects.create(order_id="3234567890", message="500 Server Error")
+
+    def m_list_documents_for_ej(num_ej, *args, **kwargs):
+        if num_ej == "3234567890":
+            raise SyncApiError("503 Service Unavailable", code="HTTP_503", details="")
+        return [_api_doc(num_ej)]
+
+    with patch.object(syncer.client, "list_documents_for_ej", side_effect=m_list_documents_for_ej) as m_ej:
+        synced_doc_ids = syncer.sync(["1234567890"], retry_failed=True)
+
+    assert sorted(call.args[0] for call in m_ej.call_args_list) == ["1234567890", "2234567890", "3234567890"]
+    assert synced_doc_ids == ["doc-1234567890", "doc-2234567890"]
+    assert syncer.errors == {"3234567890": "503 Service Unavailable"}
+    assert syncer.recovered == ["2234567890"]
+    # Une seule ligne par EJ, mise à jour avec le dernier échec
+    assert list(SyncDocumentMetadataError.objects.values_list("id", "order_id", "message")) == [
+        (error.id, "3234567890", "503 Service Unavailable")
+    ]
+
+
+@pytest.mark.django_db
+def test_sync_concurrent_chunks(settings):
+    """Engagements are fetched concurrently, with a rate limit, and documents stored by chunks."""
+    settings.FILE_SYNC_RATE_PER_MINUTE = 6000
+    syncer = DocumentMetadataSync(concurrency=4, chunk_size=3)
+    syncer.client.is_authenticated = True
+    syncer.multi_ej_filter = False
+    num_ejs = [f"{i:010d}" for i in range(10)]
+    # The same document is linked to two engagements
+    shared_doc = ApiDocumentMetadata(id="shared", name="ccap.pdf", num_ej="", size=100, date=dt(2026, 3, 15))
+
+    def m_list_documents_for_ej(num_ej, *args, **kwargs):
+        return [
+            ApiDocumentMetadata(id=f"doc-{num_ej}", name="doc.pdf", num_ej=num_ej, size=100, date=dt(2026, 3, 15)),
+            dataclasses.replace(shared_doc, num_ej=num_ej),
+        ]
+
+    with (
+        patch.object(syncer.client, "list_documents_for_ej", side_effect=m_list_documents_for_ej),
+        patch.object(RateGate, "wait_turn", autospec=True) as m_wait_turn,
+        patch.object(syncer, "_save", wraps=syncer._save) as m_save,
+    ):
+        synced_doc_ids = syncer.sync(num_ejs)
+
+    assert synced_doc_ids == sorted([f"doc-{num_ej}" for num_ej in num_ejs] + ["shared"])
+    assert m_wait_turn.call_count == len(num_ejs)
+    assert m_save.call_count > 2
+    assert ExternalDocumentMetadata.objects.count() == len(num_ejs) + 1
+    assert ExternalLinkDocumentOrder.objects.filter(external_document_id="shared").count() == len(num_ejs)
+
+
+def _api_doc(num_ej: str) -> ApiDocumentMetadata:
+    return ApiDocumentMetadata(id=f"doc-{num_ej}", name="doc.pdf", num_ej=num_ej, size=100, date=dt(2026, 3, 15))
+
+
+@pytest.mark.django_db
+def test_sync_multi_ej_filter(settings):
+    """Engagements are queried by groups, within the URL length limit."""
+    settings.FILE_SYNC_RATE_PER_MINUTE = 0
+    settings.FILE_SYNC_MAX_EJS_PER_REQUEST = 4
+    syncer = DocumentMetadataSync(concurrency=2)
+    syncer.client.is_authenticated = True
+    num_ejs = [f"{i:010d}" for i in range(10)]
+    settings.FILE_SYNC_MAX_URL_LENGTH = syncer.client.documents_url_length(num_ejs[:3])
+
+    def m_list_documents_for_ejs(num_ejs, *args, **kwargs):
+        return {num_ej: [_api_doc(num_ej)] for num_ej in num_ejs}
+
+    with (
+        patch.object(syncer.client, "list_documents_for_ejs", side_effect=m_list_documents_for_ejs) as m_ejs,
+        patch.object(syncer.client, "list_documents_for_ej", side_effect=lambda num_ej: [_api_doc(num_ej)]) as m_ej,
+    ):
+        synced_doc_ids = syncer.sync(num_ejs)
+
+    assert synced_doc_ids == [f"doc-{num_ej}" for num_ej in num_ejs]
+    assert sorted(len(call.args[0]) for call in m_ejs.call_args_list) == [3, 3, 3]
+    assert m_ej.call_count == 1
+
+
+@pytest.mark.django_db
+def test_sync_multi_ej_filter_fallback(settings):
+    """If the gateway rejects the filter of a group, only this group is queried one engagement at a time."""
+    settings.FILE_SYNC_RATE_PER_MINUTE = 0
+    settings.FILE_SYNC_MAX_EJS_PER_REQUEST = 3
+    syncer = DocumentMetadataSync(concurrency=1)
+    syncer.client.is_authenticated = True
+    num_ejs = [f"{i:010d}" for i in range(5)] + ["bad'ej"]
+    response = requests.Response()
+    response.status_code = 400
+
+    def m_list_documents_for_ejs(num_ejs, *args, **kwargs):
+        if "bad'ej" in num_ejs:
+            raise requests.HTTPError("400", response=response)
+        return {num_ej: [_api_doc(num_ej)] for num_ej in num_ejs}
+
+    with (
+        patch.object(syncer.client, "list_documents_for_ejs", side_effect=m_list_documents_for_ejs) as m_ejs,
+        patch.object(syncer.client, "list_documents_for_ej", side_effect=lambda num_ej: [_api_doc(num_ej)]) as m_ej,
+    ):
+        synced_doc_ids = syncer.sync(num_ejs)
+
+    assert synced_doc_ids == sorted(f"doc-{num_ej}" for num_ej in num_ejs)
+    assert [call.args[0] for call in m_ejs.call_args_list] == [num_ejs[:3], num_ejs[3:]]
+    assert [call.args[0] for call in m_ej.call_args_list] == num_ejs[3:]
+    assert syncer.multi_ej_filter is True
+    assert not SyncDocumentMetadataError.objects.exists()
@@ -6,6 +6,7 @@ import pytest
 
 from docia.file_processing.sync.workflow import (
     download_documents,
+    sync_all,
     sync_documents,
     sync_engagements,
 )
@@ -36,7 +37,7 @@ def test_sync_engagements():
 
             # Verify EngagementsSync was instantiated and sync was called
             expected_start = datetime(2024, 3, 8, 12, 0, 0, tzinfo=timezone.utc)
-            mock_instance.sync.assert_called_once_with([["oa", "ga"]], expected_start, now)
+            mock_instance.sync.assert_called_once_with([["oa", "ga"]], expected_start, now, backfill=False)
 
 
 @pytest.mark.django_db
@@ -65,6 +66,27 @@ def test_sync_documents():
         assert actual_order_ids == expected_order_ids
 
 
+def test_sync_all_retries_failed_engagements():
+    """
+    Engagements whose documents failed to sync are synced again on the next runs (retry_failed), and then
+    analyzed: the watermarks are not held back by them.
+    """
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    with (
+        patch("docia.file_processing.sync.workflow.sync_engagements", autospec=True) as m_sync_engagements,
+        patch("docia.file_processing.sync.workflow.sync_documents_and_download_files", autospec=True) as m_sync_docs,
+    ):
+        m_sync_engagements.return_value = (["ej2", "ej3"], {("oa", "ga"): start})
+        m_sync_docs.return_value = {"recovered_num_ejs": ["ej1"], "metadata_errors": ["ej3"]}
+
+        result = sync_all(start)
+
+    m_sync_docs.assert_called_once_with(["ej2", "ej3"], retry_failed=True)
+    assert result["num_ejs"] == ["ej1", "ej2", "ej3"]
+    assert result["metadata_errors"] == ["ej3"]
+    assert result["watermarks"] == {("oa", "ga"): start}
+
+
 @pytest.mark.django_db
 def test_download_documents():
     """Test that download_documents fetches documents and downloads them"""
@@ -0,0 +1,7 @@
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark-update",
+        action="store_true",
+        default=False,
+        help="Write the measured results as the new benchmark baseline instead of comparing against it",
+    )
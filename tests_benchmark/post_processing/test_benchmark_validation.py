@@ -0,0 +1,89 @@
+"""
+Micro-benchmark de la validation et de la correction des IBAN (module validation) face à schwifty,
+utilisé auparavant pour chaque valeur et chaque substitution.
+
+Les deux implémentations sont exécutées sur les mêmes IBAN (valides, puis avec une erreur d'un caractère) :
+les résultats doivent être identiques, et le test échoue si le gain de temps est inférieur à MIN_SPEEDUP
+(variable BENCHMARK_MIN_SPEEDUP). Le rapport est le ratio de temps CPU mesurés dans le même processus,
+peu sensible à la charge de la machine ; le seuil reste bien en dessous du gain observé (x5 à x25).
+
+  pytest --no-migrations tests_benchmark/post_processing -s
+"""
+
+import os
+import random
+import string
+import time
+
+from schwifty import IBAN
+from schwifty.exceptions import SchwiftyException
+
+from docia.file_processing.processor.validation import correct_ibans, validate_ibans
+
+MIN_SPEEDUP = float(os.environ.get("BENCHMARK_MIN_SPEEDUP", "2"))
+NB_IBANS = 200
+
+
+def schwifty_is_valid(iban: str) -> bool:
+    try:
+        IBAN(iban, validate_bban=True)
+        return True
+    except SchwiftyException:
+        return False
+
+
+def schwifty_correct(iban: str) -> str | None:
+    valid = set()
+    for i in range(len(iban)):
+        for char in string.ascii_uppercase if i <= 1 else string.digits:
+            candidate = iban[:i] + char + iban[i + 1 :]
+            if char != iban[i] and schwifty_is_valid(candidate):
+                valid.add(candidate)
+    return valid.pop() if len(valid) == 1 else None
+
+
+def _ibans() -> tuple[list[str], list[str]]:
+    rng = random.Random(0)
+    valid = [
+        str(IBAN.generate("FR", bank_code="".join(rng.choices(string.digits, k=10)), account_code=f"{i:011d}"))
+        for i in range(NB_IBANS)
+    ]
+    wrong = []
+    for iban in valid:
+        i = rng.randrange(2, len(iban))
+        wrong.append(iban[:i] + str((int(iban[i]) + 1) % 10) + iban[i + 1 :])
+    return valid, wrong
+
+
+def _best_of(function, repeat: int = 5) -> tuple[float, object]:
+    """Meilleur temps CPU sur plusieurs essais, et résultat de la fonction."""
+    durations = []
+    for _ in range(repeat):
+        start = time.process_time()
+        result = function()
+        durations.append(time.process_time() - start)
+    return min(durations), result
+
+
+def test_benchmark_iban_validation():
+    valid, wrong = _ibans()
+    ibans = valid + wrong
+
+    reference_duration, reference = _best_of(lambda: [schwifty_is_valid(iban) for iban in ibans])
+    duration, result = _best_of(lambda: validate_ibans(ibans))
+
+    assert result == reference
+    print(f"\nValidation de {len(ibans)} IBAN : schwifty {reference_duration:.4f}s, validation {duration:.4f}s")
+    assert reference_duration / duration >= MIN_SPEEDUP
+
+
+def test_benchmark_iban_correction():
+    _, wrong = _ibans()
+    wrong = wrong[:50]
+
+    reference_duration, reference = _best_of(lambda: [schwifty_correct(iban) for iban in wrong], repeat=1)
+    duration, result = _best_of(lambda: correct_ibans(wrong))
+
+    assert result == reference
+    print(f"\nCorrection de {len(wrong)} IBAN : schwifty {reference_duration:.4f}s, validation {duration:.4f}s")
+    assert reference_duration / duration >= MIN_SPEEDUP
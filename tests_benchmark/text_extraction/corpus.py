@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Génère le corpus synthétique du benchmark d'extraction de texte.
+
+Chaque type de fichier supporté est décliné en plusieurs tailles : PDF natifs avec cases à cocher,
+PDF scannés, tableurs multi-onglets avec cellules fusionnées (xlsx, xls, ods), documents (docx, odt, doc)
+et images. Le contenu est déterministe (graine fixe) pour que les mesures restent comparables.
+
+À exécuter depuis la racine du projet pour écrire le corpus dans un répertoire :
+  python tests_benchmark/text_extraction/corpus.py /tmp/corpus
+"""
+
+import io
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from xml.sax.saxutils import escape
+
+import pymupdf
+from openpyxl import Workbook
+from PIL import Image
+
+WORDS = (
+    "marché public prestation montant titulaire acheteur article lot prix unitaire quantité total "
+    "engagement juridique fournisseur devis commande livraison délai paiement facture cotraitant "
+    "sous-traitant avenant annexe clause pénalité garantie exécution réception"
+).split()
+
+
+def _sentence(rng: random.Random, nb_words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(nb_words)).capitalize() + "."
+
+
+# PDF
+
+
+def build_native_pdf(nb_pages: int, seed: int = 0) -> bytes:
+    """PDF natif : paragraphes de texte et formulaires de cases à cocher (cochées ou non)."""
+    rng = random.Random(seed)
+    doc = pymupdf.Document()
+    for page_number in range(nb_pages):
+        page = doc.new_page()
+        y = 60
+        page.insert_text((50, y), f"Page {page_number + 1} - Acte d'engagement", fontsize=14)
+        y += 30
+        while y < 700:
+            if rng.random() < 0.3:
+                # Case à cocher (carré de 10 pt), cochée par une croix une fois sur deux
+                rect = pymupdf.Rect(50, y - 9, 60, y + 1)
+                page.draw_rect(rect, width=0.8)
+                if rng.random() < 0.5:
+                    page.draw_line(rect.top_left, rect.bottom_right, width=0.8)
+                    page.draw_line(rect.top_right, rect.bottom_left, width=0.8)
+                page.insert_text((66, y), _sentence(rng, 6), fontsize=10)
+            else:
+                page.insert_text((50, y), _sentence(rng), fontsize=10)
+            y += 18
+    return doc.tobytes()
+
+
+def build_scanned_pdf(nb_pages: int, seed: int = 0, dpi: int = 100) -> bytes:
+    """PDF scanné : chaque page est une image, sans couche texte (déclenche l'OCR)."""
+    native = pymupdf.Document(stream=build_native_pdf(nb_pages, seed))
+    doc = pymupdf.Document()
+    for page in native:
+        pix = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+        new_page = doc.new_page(width=page.rect.width, height=page.rect.height)
+        new_page.insert_image(new_page.rect, stream=pix.tobytes("png"))
+    return doc.tobytes()
+
+
+def build_image(fmt: str, seed: int = 0, dpi: int = 150) -> bytes:
+    """Image d'une page de texte (format PIL : PNG, JPEG, TIFF)."""
+    page = pymupdf.Document(stream=build_native_pdf(1, seed))[0]
+    pix = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+    image = Image.frombytes("L", [pix.width, pix.height], pix.samples)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+# Tableurs
+
+
+def _sheet_rows(nb_rows: int, nb_cols: int, seed: int) -> list[list]:
+    rng = random.Random(seed)
+    rows = [[f"Colonne {c + 1}" for c in range(nb_cols)]]
+    for r in range(nb_rows - 1):
+        rows.append([rng.choice(WORDS) if c % 2 == 0 else round(rng.random() * 1000, 2) for c in range(nb_cols)])
+    return rows
+
+
+def build_xlsx(nb_sheets: int, nb_rows: int, nb_cols: int = 8, seed: int = 0) -> bytes:
+    """Classeur xlsx : plusieurs onglets, fusions verticales tous les 10 lignes en première colonne."""
+    wb = Workbook()
+    wb.remove(wb.active)
+    for s in range(nb_sheets):
+        ws = wb.create_sheet(f"Onglet {s + 1}")
+        for row in _sheet_rows(nb_rows, nb_cols, seed + s):
+            ws.append(row)
+        for r in range(2, nb_rows - 2, 10):
+            ws.merge_cells(start_row=r, start_column=1, end_row=r + 2, end_column=1)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def build_xls(nb_sheets: int, nb_rows: int, nb_cols: int = 8, seed: int = 0) -> bytes:
+    """Classeur xls (xlwt) : plusieurs onglets, fusions verticales en première colonne."""
+    import xlwt
+
+    wb = xlwt.Workbook()
+    for s in range(nb_sheets):
+        ws = wb.add_sheet(f"Onglet {s + 1}")
+        merged = set()
+        for r in range(1, nb_rows - 2, 10):
+            merged.update({(r + 1, 0), (r + 2, 0)})
+        for r, row in enumerate(_sheet_rows(nb_rows, nb_cols, seed + s)):
+            for c, value in enumerate(row):
+                if (r, c) in merged:
+                    continue
+                if c == 0 and (r + 1, 0) in merged and (r + 2, 0) in merged and (r, 0) not in merged:
+                    ws.write_merge(r, r + 2, 0, 0, value)
+                else:
+                    ws.write(r, c, value)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+_ODF_NS = {
+    "office": "urn:oasis:names:tc:opendocument:xmlns:office:1.0",
+    "table": "urn:oasis:names:tc:opendocument:xmlns:table:1.0",
+    "text": "urn:oasis:names:tc:opendocument:xmlns:text:1.0",
+}
+_ODF_ROOT = (
+    '<office:document-content xmlns:office="{office}" xmlns:table="{table}" xmlns:text="{text}" '
+    'office:version="1.2"><office:body>'
+).format(**_ODF_NS)
+
+
+def _odf_zip(mimetype: str, content_xml: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("mimetype", mimetype, compress_type=zipfile.ZIP_STORED)
+        z.writestr("content.xml", content_xml)
+    return buffer.getvalue()
+
+
+def build_ods(nb_sheets: int, nb_rows: int, nb_cols: int = 8, seed: int = 0) -> bytes:
+    """Classeur ods : onglets avec fusions verticales et lignes/colonnes vides répétées en fin de feuille."""
+    parts = [_ODF_ROOT, "<office:spreadsheet>"]
+    for s in range(nb_sheets):
+        parts.append(f'<table:table table:name="Onglet {s + 1}">')
+        for r, row in enumerate(_sheet_rows(nb_rows, nb_cols, seed + s)):
+            parts.append("<table:table-row>")
+            for c, value in enumerate(row):
+                if c == 0 and r % 10 in (2, 3) and 1 < r < nb_rows - 2:
+                    parts.append("<table:covered-table-cell/>")
+                    continue
+                span = ' table:number-rows-spanned="3"' if c == 0 and r % 10 == 1 and r < nb_rows - 3 else ""
+                parts.append(
+                    f'<table:table-cell office:value-type="string"{span}><text:p>{escape(str(value))}</text:p>'
+                    "</table:table-cell>"
+                )
+            parts.append(f'<table:table-cell table:number-columns-repeated="{16384 - nb_cols}"/></table:table-row>')
+        parts.append(
+            '<table:table-row table:number-rows-repeated="1000000">'
+            '<table:table-cell table:number-columns-repeated="16384"/></table:table-row></table:table>'
+        )
+    parts.append("</office:spreadsheet></office:body></office:document-content>")
+    return _odf_zip("application/vnd.oasis.opendocument.spreadsheet", "".join(parts))
+
+
+# Documents
+
+
+def _paragraphs(nb_paragraphs: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(_sentence(rng) for _ in range(4)) for _ in range(nb_paragraphs)]
+
+
+def build_docx(nb_paragraphs: int, seed: int = 0) -> bytes:
+    """Document docx minimal (WordprocessingML)."""
+    body = "".join(f"<w:p><w:r><w:t>{escape(p)}</w:t></w:r></w:p>" for p in _paragraphs(nb_paragraphs, seed))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            "</Types>",
+        )
+        z.writestr(
+            "_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="word/document.xml"/></Relationships>',
+        )
+        z.writestr(
+            "word/document.xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{body}</w:body></w:document>",
+        )
+    return buffer.getvalue()
+
+
+def build_odt(nb_paragraphs: int, seed: int = 0) -> bytes:
+    """Document odt minimal."""
+    body = "".join(f"<text:p>{escape(p)}</text:p>" for p in _paragraphs(nb_paragraphs, seed))
+    content = f"{_ODF_ROOT}<office:text>{body}</office:text></office:body></office:document-content>"
+    return _odf_zip("application/vnd.oasis.opendocument.text", content)
+
+
+def build_doc(nb_paragraphs: int, seed: int = 0) -> bytes | None:
+    """Document .doc converti depuis un docx par LibreOffice ; None si LibreOffice est absent."""
+    executable = shutil.which("libreoffice") or shutil.which("soffice")
+    if executable is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source.docx"
+        source.write_bytes(build_docx(nb_paragraphs, seed))
+        subprocess.run(
+            [executable, "--headless", "--convert-to", "doc", "--outdir", tmp, str(source)],
+            capture_output=True,
+            timeout=120,
+            check=False,
+        )
+        target = Path(tmp) / "source.doc"
+        return target.read_bytes() if target.exists() else None
+
+
+# Corpus
+
+
+@dataclass
+class CorpusFile:
+    extension: str
+    size: str
+    build: Callable[[], bytes | None]
+
+    @property
+    def name(self) -> str:
+        return f"{self.size}.{self.extension}"
+
+
+CORPUS = [
+    CorpusFile("pdf", "small", lambda: build_native_pdf(1)),
+    CorpusFile("pdf", "medium", lambda: build_native_pdf(20)),
+    CorpusFile("pdf", "huge", lambda: build_native_pdf(60)),
+    CorpusFile("pdf", "scan-small", lambda: build_scanned_pdf(1)),
+    CorpusFile("pdf", "scan-medium", lambda: build_scanned_pdf(10)),
+    CorpusFile("xlsx", "small", lambda: build_xlsx(2, 50)),
+    CorpusFile("xlsx", "medium", lambda: build_xlsx(3, 2_000)),
+    CorpusFile("xlsx", "huge", lambda: build_xlsx(2, 10_000)),
+    CorpusFile("xls", "small", lambda: build_xls(2, 50)),
+    CorpusFile("xls", "medium", lambda: build_xls(3, 2_000)),
+    CorpusFile("ods", "small", lambda: build_ods(2, 50)),
+    CorpusFile("ods", "medium", lambda: build_ods(3, 2_000)),
+    CorpusFile("docx", "small", lambda: build_docx(10)),
+    CorpusFile("docx", "medium", lambda: build_docx(2_000)),
+    CorpusFile("odt", "small", lambda: build_odt(10)),
+    CorpusFile("odt", "medium", lambda: build_odt(2_000)),
+    CorpusFile("doc", "small", lambda: build_doc(10)),
+    CorpusFile("png", "small", lambda: build_image("PNG")),
+    CorpusFile("jpg", "small", lambda: build_image("JPEG")),
+    CorpusFile("tiff", "small", lambda: build_image("TIFF")),
+]
+
+
+def generate_corpus(out_dir: Path) -> dict[str, Path]:
+    """Écrit les fichiers du corpus dans out_dir ; retourne {nom: chemin} (fichiers générables seulement)."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for corpus_file in CORPUS:
+        path = out_dir / corpus_file.name
+        if not path.exists():
+            content = corpus_file.build()
+            if content is None:
+                continue
+            path.write_bytes(content)
+        paths[corpus_file.name] = path
+    return paths
+
+
+if __name__ == "__main__":
+    out = Path(sys.argv[1] if len(sys.argv) > 1 else "benchmark-corpus")
+    for name, path in generate_corpus(out).items():
+        print(f"{name:<20} {path.stat().st_size:>12,} octets")
@@ -0,0 +1,141 @@
+"""
+Benchmark de l'extraction de texte (extract_text) par type et taille de fichier, sur le corpus de corpus.py.
+
+Pour chaque fichier sont mesurés :
+- le temps CPU d'extraction (meilleur de plusieurs essais), exprimé en unités de calibration
+  (temps CPU d'une charge de référence sur la même machine) pour rester comparable d'une machine à l'autre.
+  Le temps CPU, contrairement au temps écoulé, ne dépend pas de la charge des autres processus
+  (runners CI partagés). Le temps passé dans le service LibreOffice (processus séparé) n'est pas compté ;
+- le pic de mémoire allouée par Python pendant l'extraction (tracemalloc).
+
+Les mesures sont comparées à baseline.json : le test échoue si elles dépassent la référence au-delà
+de la tolérance (variables BENCHMARK_TIME_TOLERANCE et BENCHMARK_MEMORY_TOLERANCE). La tolérance
+sur le temps est large ; celle sur la mémoire, mesure déterministe, est stricte.
+Aucun accès réseau : l'OCR par API est simulé.
+
+  pytest --no-migrations tests_benchmark                      # comparaison à la référence
+  pytest --no-migrations tests_benchmark --benchmark-update   # enregistre une nouvelle référence
+"""
+
+import json
+import os
+import time
+import tracemalloc
+import zlib
+from pathlib import Path
+from unittest.mock import patch
+
+from django.conf import settings
+
+import pytest
+import tesserocr
+
+from docia.file_processing.llm.client import format_ocr_pages
+from docia.file_processing.processor.text_extraction import extract_text
+
+from .corpus import CORPUS, generate_corpus
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+TIME_TOLERANCE = float(os.environ.get("BENCHMARK_TIME_TOLERANCE", "2.0"))
+MEMORY_TOLERANCE = float(os.environ.get("BENCHMARK_MEMORY_TOLERANCE", "1.25"))
+# Écarts absolus ignorés : bruit de mesure sur les petits fichiers
+MIN_TIME_DELTA = 1.0  # unités de calibration
+MIN_MEMORY_DELTA = 1024 * 1024  # octets
+
+IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "tif", "tiff"}
+
+
+def _calibration_workload():
+    data = b"".join(i.to_bytes(4, "little") for i in range(200_000))
+    zlib.compress(data)
+    sorted(str(i) for i in range(200_000))
+
+
+@pytest.fixture(scope="session")
+def calibration() -> float:
+    """Temps CPU (secondes) de la charge de référence sur cette machine."""
+    durations = []
+    for _ in range(5):
+        start = time.process_time()
+        _calibration_workload()
+        durations.append(time.process_time() - start)
+    return min(durations)
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory) -> dict[str, Path]:
+    return generate_corpus(tmp_path_factory.mktemp("corpus"))
+
+
+@pytest.fixture(scope="session")
+def baseline() -> dict:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+@pytest.fixture(scope="session")
+def benchmark_results(request, baseline):
+    results = {}
+    yield results
+    if request.config.getoption("--benchmark-update") and results:
+        BASELINE_PATH.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(autouse=True)
+def mock_ocr_api():
+    with patch("docia.file_processing.processor.text_extraction.text_extract_document.LLMClient") as mock_llm_class:
+        mock_llm_class.return_value.ocr_pdf.return_value = format_ocr_pages(["Texte reconnu par l'OCR"])
+        yield mock_llm_class
+
+
+def _tesseract_available() -> bool:
+    _, languages = tesserocr.get_languages()
+    return settings.TESSERACT_OCR_LANG in languages
+
+
+@pytest.mark.parametrize("corpus_file", CORPUS, ids=lambda f: f.name)
+def test_benchmark_extract_text(corpus_file, corpus, calibration, baseline, benchmark_results, request):
+    if corpus_file.name not in corpus:
+        pytest.skip(f"{corpus_file.name} cannot be generated here (LibreOffice missing)")
+    if corpus_file.extension in IMAGE_EXTENSIONS and not _tesseract_available():
+        pytest.skip(f"Tesseract language {settings.TESSERACT_OCR_LANG!r} missing")
+    content = corpus[corpus_file.name].read_bytes()
+
+    def run():
+        return extract_text(content, corpus_file.name, corpus_file.extension)
+
+    # Temps CPU (threads du pool Tesseract compris) : meilleur essai, le premier sert aussi de chauffe
+    durations = []
+    for _ in range(1 if corpus_file.size == "huge" else 3):
+        start = time.process_time()
+        text, _ = run()
+        durations.append(time.process_time() - start)
+    assert text, f"No text extracted from {corpus_file.name}"
+
+    # Mémoire : mesure séparée, tracemalloc ralentissant l'exécution
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {"time": round(min(durations) / calibration, 2), "memory": peak_memory}
+    benchmark_results[corpus_file.name] = result
+    print(
+        f"\n{corpus_file.name}: {min(durations):.3f}s CPU ({result['time']} unités), "
+        f"pic mémoire {peak_memory / 1e6:.1f} Mo, {len(content) / 1e6:.2f} Mo en entrée"
+    )
+
+    expected = baseline.get(corpus_file.name)
+    if request.config.getoption("--benchmark-update") or expected is None:
+        return
+    max_time = max(expected["time"] * TIME_TOLERANCE, expected["time"] + MIN_TIME_DELTA)
+    assert result["time"] <= max_time, (
+        f"{corpus_file.name}: time regression, {result['time']} units (baseline {expected['time']})"
+    )
+    max_memory = max(expected["memory"] * MEMORY_TOLERANCE, expected["memory"] + MIN_MEMORY_DELTA)
+    assert result["memory"] <= max_memory, (
+        f"{corpus_file.name}: memory regression, {result['memory']} bytes (baseline {expected['memory']})"
+    )
@@ -231,7 +231,9 @@ def get_comparison_functions():
     }
 
 
-def create_batch_test(multi_line_coef=1, max_workers=10, llm_model="openweight-medium", debug_mode=False):
+def create_batch_test(
+    multi_line_coef=1, max_workers=10, llm_model="openweight-medium", debug_mode=False, split_attributes=None
+):
     """Test de qualité des informations extraites par le LLM."""
 
     # Lecture du fichier CSV
@@ -255,6 +257,7 @@ def create_batch_test(multi_line_coef=1, max_workers=10, llm_model="openweight-m
         max_workers=max_workers,
         llm_model=llm_model,
         debug_mode=debug_mode,
+        split_attributes=split_attributes,
     )
 
 
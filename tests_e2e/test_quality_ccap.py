@@ -178,7 +178,9 @@ def get_comparison_functions():
     }
 
 
-def create_batch_test(multi_line_coef=1, max_workers=10, llm_model="openweight-medium", debug_mode=False):
+def create_batch_test(
+    multi_line_coef=1, max_workers=10, llm_model="openweight-medium", debug_mode=False, split_attributes=None
+):
     """Test de qualité des informations extraites par le LLM."""
 
     df_test = get_data_from_grist(table="Ccap_gt")
@@ -203,9 +205,26 @@ def create_batch_test(multi_line_coef=1, max_workers=10, llm_model="openweight-m
         max_workers=max_workers,
         llm_model=llm_model,
         debug_mode=debug_mode,
+        split_attributes=split_attributes,
     )
 
 
+def compare_split_modes(max_workers=10, llm_model="openweight-medium", excluded_columns=None):
+    """Compare l'extraction en une seule requête et l'extraction par groupes d'attributs (une requête par groupe)."""
+    comparison_functions = get_comparison_functions()
+    accuracies = {}
+    for split_attributes in (False, True):
+        _, _, df_merged = create_batch_test(
+            max_workers=max_workers, llm_model=llm_model, split_attributes=split_attributes
+        )
+        print("\nAnalyse par groupes d'attributs" if split_attributes else "\nAnalyse en une seule requête")
+        accuracies[split_attributes] = check_global_statistics(
+            df_merged, comparison_functions, excluded_columns=excluded_columns
+        )
+    print(f"Accuracy globale : une requête {accuracies[False]:.2%}, par groupes {accuracies[True]:.2%}")
+    return accuracies
+
+
 if __name__ == "__main__":
     df_test, df_result, df_merged = create_batch_test(
         multi_line_coef=1, max_workers=30, llm_model="mistral-medium-2508", debug_mode=True
@@ -228,6 +247,8 @@ if __name__ == "__main__":
     for v in fields_with_errors.values():
         print(json.dumps(v))
 
+    compare_split_modes(max_workers=30, llm_model="mistral-medium-2508", excluded_columns=EXCLUDED_COLUMNS)
+
 
 # "intro",
 # "id_marche",
@@ -0,0 +1,124 @@
+"""
+Rapport de précision et de latence de la pré-classification locale (règles + modèle entraîné par
+train_local_classifier) sur le jeu de référence Classif_gt utilisé par test_quality_classification.py.
+
+Pour chaque fichier : classification locale et confiance. Le rapport donne la précision globale, la part
+des fichiers au-dessus du seuil LOCAL_CLASSIFIER_THRESHOLD (classés sans LLM) et la précision sur ceux-ci,
+puis la précision de la chaîne complète (local au-dessus du seuil, LLM en dessous).
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+import django
+
+import pandas as pd
+
+sys.path.append(".")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "docia.settings")
+django.setup()
+
+
+from django.conf import settings  # noqa: E402
+
+from app.grist.grist_api import get_data_from_grist  # noqa: E402
+from docia.file_processing.processor.classifier import DIC_CLASS_FILE_BY_NAME, classify_files  # noqa: E402
+from docia.file_processing.processor.local_classifier import classify_file_locally  # noqa: E402
+
+logger = logging.getLogger("docia." + __name__)
+
+
+def load_ground_truth() -> pd.DataFrame:
+    """Jeu de référence : nom de fichier, texte et classification attendue (première catégorie)."""
+    df_test = get_data_from_grist(table="Classif_gt")[["filename", "classification", "text", "traitement"]]
+    df_test = df_test.query("traitement != 'Alexandre'").copy()
+    df_test["classification"] = df_test["classification"].apply(lambda c: json.loads(c) if c else None)
+    df_test.dropna(subset=["classification"], inplace=True)
+    df_test["true_classification"] = df_test["classification"].str[0]
+    return df_test.reset_index(drop=True)
+
+
+def classify_locally(df_test: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute la classification locale, sa source, sa confiance et la latence (ms) de chaque fichier."""
+    df_result = df_test.copy()
+    results = []
+    for row in df_result.itertuples():
+        start = time.perf_counter()
+        prediction = classify_file_locally(row.filename, row.text)
+        latency = (time.perf_counter() - start) * 1000
+        if prediction is None:
+            results.append((None, None, 0.0, latency))
+        else:
+            results.append((prediction.classification, prediction.source, prediction.confidence, latency))
+    df_result[["local_classification", "source", "confidence", "latency_ms"]] = results
+    df_result["is_correct_local"] = df_result["local_classification"] == df_result["true_classification"]
+    df_result["is_accepted"] = df_result["confidence"] >= settings.LOCAL_CLASSIFIER_THRESHOLD
+    return df_result
+
+
+def complete_with_llm(df_result: pd.DataFrame) -> pd.DataFrame:
+    """Classification finale : locale au-dessus du seuil, LLM pour les autres fichiers."""
+    df_result["classification"] = df_result["local_classification"].where(df_result["is_accepted"])
+    df_below = df_result.loc[~df_result["is_accepted"], ["filename", "text"]]
+    if not df_below.empty:
+        start = time.perf_counter()
+        df_llm = classify_files(dfFiles=df_below, list_classification=DIC_CLASS_FILE_BY_NAME, max_workers=10)
+        print(f"Classification LLM de {len(df_below)} fichiers : {time.perf_counter() - start:.1f}s")
+        df_result.loc[df_llm.index, "classification"] = df_llm["classification"]
+    df_result["is_correct"] = df_result["classification"] == df_result["true_classification"]
+    return df_result
+
+
+def display_report(df_result: pd.DataFrame):
+    total = len(df_result)
+    accepted = df_result[df_result["is_accepted"]]
+
+    print("=" * 60)
+    print(f"PRÉ-CLASSIFICATION LOCALE (seuil {settings.LOCAL_CLASSIFIER_THRESHOLD})")
+    print("=" * 60)
+    print(f"Nombre total de fichiers : {total}")
+    print(f"Précision locale (tous fichiers) : {100 * df_result['is_correct_local'].mean():.1f}%")
+    print(f"Fichiers classés sans LLM : {len(accepted)} ({100 * len(accepted) / total:.1f}%)")
+    if len(accepted):
+        print(f"Précision au-dessus du seuil : {100 * accepted['is_correct_local'].mean():.1f}%")
+        print(f"  dont règles : {(accepted['source'] == 'rule').sum()}")
+    print(
+        f"Latence locale : moyenne {df_result['latency_ms'].mean():.2f} ms, "
+        f"p95 {df_result['latency_ms'].quantile(0.95):.2f} ms"
+    )
+    if "is_correct" in df_result:
+        print(f"Précision de la chaîne complète (local + LLM) : {100 * df_result['is_correct'].mean():.1f}%")
+    print()
+
+    # Précision par classe attendue, au-dessus du seuil
+    if len(accepted):
+        df_stats = (
+            accepted.groupby("true_classification")
+            .agg(Total=("is_correct_local", "size"), Corrects=("is_correct_local", "sum"))
+            .reset_index()
+            .rename(columns={"true_classification": "Classe"})
+        )
+        df_stats["Précision (%)"] = (100 * df_stats["Corrects"] / df_stats["Total"]).round(1)
+        print(df_stats.to_string(index=False))
+        print()
+
+    # Erreurs acceptées : ce sont elles qui dégradent la qualité par rapport au LLM seul
+    errors = accepted[~accepted["is_correct_local"]]
+    if len(errors):
+        print("Erreurs au-dessus du seuil :")
+        print(
+            errors[["filename", "true_classification", "local_classification", "source", "confidence"]].to_string(
+                index=False
+            )
+        )
+
+
+df_test = load_ground_truth()
+df_result = classify_locally(df_test)
+display_report(df_result)
+
+df_result = complete_with_llm(df_result)
+display_report(df_result)
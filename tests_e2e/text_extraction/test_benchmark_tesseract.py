@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.append(".")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "docia.settings")
+django.setup()
+
+import pymupdf  # noqa: E402
+import tesserocr  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from docia.file_processing.processor.text_extraction.tesseract_ocr import ocr_pdf_pages  # noqa: E402
+
+ASSETS_DIR = Path(__file__).resolve().parent / "assets"
+LETTRE_OCR_PATH = ASSETS_DIR / "lettre-ocr.pdf"
+NB_PAGES = 12
+
+
+def build_multipage_scan(nb_pages):
+    """Construit un PDF scanné de nb_pages pages à partir de lettre-ocr.pdf."""
+    source = pymupdf.Document(stream=LETTRE_OCR_PATH.read_bytes())
+    doc = pymupdf.Document()
+    while len(doc) < nb_pages:
+        doc.insert_pdf(source, to_page=min(len(source), nb_pages - len(doc)) - 1)
+    return doc
+
+
+def ocr_sequential(doc):
+    """Chemin historique : un moteur Tesseract initialisé par page, pages traitées une à une."""
+    parts = []
+    for i in range(len(doc)):
+        pix = doc.load_page(i).get_pixmap(matrix=pymupdf.Matrix(2, 2))
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        parts.append(tesserocr.image_to_text(img, lang="fra").strip())
+    return parts
+
+
+def test_benchmark_tesseract_pool_vs_sequential():
+    """Le pool de moteurs + OCR parallèle doit être plus rapide et produire le même texte."""
+    doc = build_multipage_scan(NB_PAGES)
+
+    # Chauffe du pool (initialisation des moteurs hors mesure)
+    ocr_pdf_pages(build_multipage_scan(1))
+
+    start = time.monotonic()
+    expected = ocr_sequential(doc)
+    duration_sequential = time.monotonic() - start
+
+    start = time.monotonic()
+    parts = ocr_pdf_pages(doc)
+    duration_pool = time.monotonic() - start
+
+    print(
+        f"\nOCR Tesseract {NB_PAGES} pages : séquentiel {duration_sequential:.1f}s, "
+        f"pool {duration_pool:.1f}s (x{duration_sequential / duration_pool:.1f})"
+    )
+    assert parts == expected
+    assert duration_pool < duration_sequential
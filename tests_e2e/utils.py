@@ -286,6 +286,7 @@ def df_analyze_content(
     temperature: float = 0.0,
     max_workers: int = 4,
     debug_mode: bool = False,
+    split_attributes: bool | None = None,
 ) -> pd.DataFrame:
     """
     Analyse le contenu d'un DataFrame en parallèle en utilisant l'API LLM.
@@ -293,6 +294,7 @@ def df_analyze_content(
     Args:
         debug_mode: Si True, log le nom du fichier avec l'heure de début et le temps
             de réponse LLM pour chaque ligne.
+        split_attributes: Analyse par groupes d'attributs (None : réglage CONTENT_ANALYSIS_SPLIT_ATTRIBUTES).
 
     Returns:
         DataFrame avec les réponses du LLM ajoutées
@@ -313,6 +315,7 @@ def df_analyze_content(
             "text": row["text"],
             "document_type": row["classification"],
             "temperature": temperature,
+            "split_attributes": split_attributes,
         }
         if llm_model:
             kwargs["llm_model"] = llm_model
@@ -347,6 +350,7 @@ def analyze_content_quality_test(
     max_workers=10,
     llm_model="openweight-medium",
     debug_mode=False,
+    split_attributes=None,
 ):
     """Test de qualité des informations extraites par le LLM.
 
@@ -356,6 +360,7 @@ def analyze_content_quality_test(
         multi_line_coef: Coefficient de multiplication des lignes.
         use_cache: Si True, utilise le cache pour éviter de relancer l'analyse.
         debug_mode: Si True, log le nom du fichier et les temps (début / durée LLM) pour chaque ligne.
+        split_attributes: Analyse par groupes d'attributs (None : réglage CONTENT_ANALYSIS_SPLIT_ATTRIBUTES).
     """
 
     if multi_line_coef > 1:
@@ -368,7 +373,7 @@ def analyze_content_quality_test(
     df_analyze["text"] = df_test["text"]
 
     # Vérification du cache
-    cache_file = f"/tmp/cache_results_{document_type}.json"
+    cache_file = f"/tmp/cache_results_{document_type}_split_{split_attributes}.json"
     if use_cache and os.path.exists(cache_file):
         with open(cache_file, "r") as f:
             cached_data = json.load(f)
@@ -382,6 +387,7 @@ def analyze_content_quality_test(
             temperature=0.1,
             llm_model=llm_model,
             debug_mode=debug_mode,
+            split_attributes=split_attributes,
         )
 
     # Sauvegarde des résultats dans le cache